@@ -56,6 +56,9 @@ def refine_analysis_http(req: func.HttpRequest) -> func.HttpResponse:
         current_analysis = req_body.get("current_analysis", "")
         user_request = req_body.get("user_request", "")
         conversation_history = req_body.get("conversation_history", [])
+        conversation_summary = req_body.get("conversation_summary", "")
+        # The backend already fits the history into its token budget; older callers send all of it
+        budgeted = "context_tokens" in req_body
 
         if not user_request:
             return func.HttpResponse(
@@ -92,11 +95,15 @@ Respond in a helpful, conversational manner as if you're assisting them in under
         # Add conversation history context if available
         if conversation_history:
             context_history = "\n\nPrevious Conversation:\n"
-            for entry in conversation_history[-3:]:  # Last 3 exchanges
-                if "user_message" in entry and "ai_response" in entry:
-                    context_history += f"User: {entry['user_message']}\n"
+            entries = conversation_history if budgeted else conversation_history[-3:]  # Last 3 exchanges
+            for entry in entries:
+                user_message = entry.get("user_message") or entry.get("user_request")
+                if user_message and "ai_response" in entry:
+                    context_history += f"User: {user_message}\n"
                     context_history += f"Assistant: {entry['ai_response']}\n\n"
             refinement_prompt = context_history + refinement_prompt
+        if conversation_summary:
+            refinement_prompt = f"Summary of earlier conversation:\n{conversation_summary}\n" + refinement_prompt
 
         # Call the analysis service with refinement prompt
         logging.info("Processing analysis refinement request")
@@ -259,6 +266,7 @@ def blob_trigger(myblob: func.InputStream):
                 container_name=config.storage_recordings_container,
                 blob_name=f"{path_without_container}_{tag}_processed_text.txt",
                 text_content=formatted_text,
+                compress=True,
             )
             cosmos_service.update_job_status(
                 job_id, f"{file_type}_processed", transcription_file_path=processed_text_blob_url
@@ -374,6 +382,7 @@ def process_audio_file(config, blob_url, path_without_container, job_id, cosmos_
         container_name=config.storage_recordings_container,
         blob_name=f"{path_without_container}_{tag}_transcription.txt",
         text_content=formatted_text,
+        compress=True,
     )
     logging.debug(f"Transcription text uploaded: {transcription_blob_url}")
 
@@ -1,7 +1,8 @@
 import os
+import gzip
 import logging
 from typing import Optional, Any
-from azure.storage.blob import BlobServiceClient, BlobSasPermissions, generate_blob_sas
+from azure.storage.blob import BlobServiceClient, BlobSasPermissions, ContentSettings, generate_blob_sas
 from azure.core.exceptions import AzureError
 from datetime import datetime, timedelta
 from urllib.parse import urlparse
@@ -64,16 +65,26 @@ class StorageService:
             raise StorageServiceError(f"Error uploading file: {str(e)}") from e
 
     def upload_text(
-        self, container_name: str, blob_name: str, text_content: str
+        self, container_name: str, blob_name: str, text_content: str, compress: bool = False
     ) -> str:
-        """Upload text content to blob storage and return the blob URL."""
+        """Upload text content to blob storage and return the blob URL.
+
+        With ``compress`` the text is stored gzip-encoded with
+        ``Content-Encoding: gzip``; browsers reading it through a SAS URL
+        decode it transparently, and the API passes it on compressed.
+        """
         try:
             container_client = self.blob_service_client.get_container_client(
                 container_name
             )
             blob_client = container_client.get_blob_client(blob_name)
 
-            blob_client.upload_blob(text_content.encode("utf-8"), overwrite=True)
+            data = text_content.encode("utf-8")
+            content_settings = ContentSettings(content_type="text/plain; charset=utf-8")
+            if compress:
+                data = gzip.compress(data)
+                content_settings.content_encoding = "gzip"
+            blob_client.upload_blob(data, overwrite=True, content_settings=content_settings)
             return blob_client.url
         except Exception as e:
             logger.error(f"Error uploading text: {str(e)}")
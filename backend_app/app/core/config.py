@@ -11,7 +11,7 @@ try:
 except ImportError:
     from pydantic import BaseSettings
 
-from pydantic import Field
+from pydantic import AliasChoices, Field
 import os
 from pathlib import Path
 
@@ -52,6 +52,8 @@ class AppConfig(BaseSettings):
     jwt_algorithm: str = Field("HS256")
     jwt_access_token_expire_minutes: int = Field(60, env="JWT_ACCESS_TOKEN_EXPIRE_MINUTES")
     jwt_refresh_token_expire_days: int = Field(7, env="JWT_REFRESH_TOKEN_EXPIRE_DAYS")
+    # Threads used for bcrypt hashing/verification off the event loop
+    password_hash_workers: int = Field(2, env="PASSWORD_HASH_WORKERS")
     
     # Microsoft SSO (optional)
     microsoft_client_id: Optional[str] = Field(None, env="MICROSOFT_CLIENT_ID")
@@ -107,12 +109,97 @@ class AppConfig(BaseSettings):
     max_concurrent_jobs: int = Field(5, env="MAX_CONCURRENT_JOBS")
     job_retry_attempts: int = Field(3, env="JOB_RETRY_ATTEMPTS")
     job_retry_delay_seconds: int = Field(60, env="JOB_RETRY_DELAY")
+    # Tasks waiting for one of the max_concurrent_jobs workers; submissions beyond this are rejected
+    background_queue_max_size: int = Field(1000, env="BACKGROUND_QUEUE_MAX_SIZE")
+    # Finished tasks stay queryable for this long, and at most this many are kept
+    background_task_retention_seconds: int = Field(86400, env="BACKGROUND_TASK_RETENTION_SECONDS")
+    background_task_registry_max: int = Field(5000, env="BACKGROUND_TASK_REGISTRY_MAX")
+    # How long shutdown waits for queued and running tasks before cancelling them
+    background_drain_timeout_seconds: int = Field(30, env="BACKGROUND_DRAIN_TIMEOUT_SECONDS")
+    # Where task state is persisted so status reads and retries survive restarts: "sqlite" (a local
+    # file shared by this host's workers), "cosmos" (the background_tasks container) or "memory"
+    background_task_store: str = Field("sqlite", env="BACKGROUND_TASK_STORE")
+    background_task_sqlite_path: Optional[str] = Field(None, env="BACKGROUND_TASK_SQLITE_PATH")
+    # Workers renew a lease every third of this; tasks of a worker whose lease lapsed are taken over
+    background_lease_seconds: int = Field(60, env="BACKGROUND_LEASE_SECONDS")
+    # Task status read from the store is reused for this long
+    background_status_cache_seconds: int = Field(2, env="BACKGROUND_STATUS_CACHE_SECONDS")
     
     # Cache Settings
     cache_type: str = Field("in_memory", env="CACHE_TYPE")
     cache_default_ttl: int = Field(300, env="CACHE_DEFAULT_TTL")
-    cache_redis_url: Optional[str] = Field(None, env="REDIS_URL")
+    # Read from CACHE_REDIS_URL, falling back to REDIS_URL (shared with the rate limiter)
+    cache_redis_url: Optional[str] = Field(None, validation_alias=AliasChoices("cache_redis_url", "REDIS_URL"))
     cache_key_prefix: str = Field("permission:", env="CACHE_KEY_PREFIX")
+    # Upper bound on in-memory permission cache entries (least recently used are evicted)
+    cache_max_entries: int = Field(10000, env="CACHE_MAX_ENTRIES")
+
+    # Rate limiting (token buckets). RATE_LIMIT_STORE=redis shares limits across workers via REDIS_URL;
+    # RATE_LIMIT_ROUTE_QUOTAS takes "path-prefix=requests-per-minute" pairs, e.g. "/api/auth/login=10"
+    rate_limit_store: str = Field("in_memory", env="RATE_LIMIT_STORE")
+    rate_limit_per_minute: int = Field(60, env="RATE_LIMIT_PER_MINUTE")
+    rate_limit_user_per_minute: int = Field(120, env="RATE_LIMIT_USER_PER_MINUTE")
+    rate_limit_route_quotas: str = Field("", env="RATE_LIMIT_ROUTE_QUOTAS")
+    rate_limit_max_keys: int = Field(10000, env="RATE_LIMIT_MAX_KEYS")
+    # Admin analytics responses are reused within a bucket and served stale for one more while refreshing
+    analytics_cache_bucket_seconds: int = Field(60, env="ANALYTICS_CACHE_BUCKET_SECONDS")
+    # Worker processes rendering PDF reports, and where rendered reports are cached (defaults to the temp dir)
+    pdf_render_workers: int = Field(1, env="PDF_RENDER_WORKERS")
+    pdf_report_cache_dir: Optional[str] = Field(None, env="PDF_REPORT_CACHE_DIR")
+    # Per-route latency/RU metrics, exposed to admins at /api/system/metrics in Prometheus format
+    metrics_enabled: bool = Field(True, env="METRICS_ENABLED")
+    # Queries at or above either threshold are logged (first per fingerprint, then sampled);
+    # the top-queries table keeps the most expensive QUERY_STATS_MAX_FINGERPRINTS query shapes
+    slow_query_ms: float = Field(1000.0, env="SLOW_QUERY_MS")
+    expensive_query_ru: float = Field(50.0, env="EXPENSIVE_QUERY_RU")
+    slow_query_log_sample_rate: float = Field(0.1, env="SLOW_QUERY_LOG_SAMPLE_RATE")
+    query_stats_max_fingerprints: int = Field(500, env="QUERY_STATS_MAX_FINGERPRINTS")
+    # Outbound calls get a circuit breaker per endpoint. It opens after CIRCUIT_BREAKER_FAILURE_THRESHOLD
+    # consecutive failures, or once the window holds MINIMUM_CALLS calls and the failure rate or the rate of
+    # calls slower than SLOW_CALL_SECONDS (0 disables) reaches its threshold; after RECOVERY_SECONDS up to
+    # HALF_OPEN_CALLS probe calls are let through at once
+    circuit_breaker_failure_threshold: int = Field(5, env="CIRCUIT_BREAKER_FAILURE_THRESHOLD")
+    circuit_breaker_window_seconds: int = Field(60, env="CIRCUIT_BREAKER_WINDOW_SECONDS")
+    circuit_breaker_minimum_calls: int = Field(10, env="CIRCUIT_BREAKER_MINIMUM_CALLS")
+    circuit_breaker_failure_rate: float = Field(0.5, env="CIRCUIT_BREAKER_FAILURE_RATE")
+    circuit_breaker_slow_call_seconds: float = Field(60.0, env="CIRCUIT_BREAKER_SLOW_CALL_SECONDS")
+    circuit_breaker_slow_call_rate: float = Field(0.8, env="CIRCUIT_BREAKER_SLOW_CALL_RATE")
+    circuit_breaker_recovery_seconds: int = Field(60, env="CIRCUIT_BREAKER_RECOVERY_SECONDS")
+    circuit_breaker_half_open_calls: int = Field(1, env="CIRCUIT_BREAKER_HALF_OPEN_CALLS")
+    # Shared outbound HTTP pool (core.http_client). HTTP/2 needs the h2 package (httpx[http2]); streamed
+    # responses may go HTTP_STREAM_READ_TIMEOUT_SECONDS between chunks
+    http2_enabled: bool = Field(True, env="HTTP2_ENABLED")
+    http_max_connections: int = Field(100, env="HTTP_MAX_CONNECTIONS")
+    http_max_connections_per_host: int = Field(20, env="HTTP_MAX_CONNECTIONS_PER_HOST")
+    http_keepalive_expiry_seconds: float = Field(30.0, env="HTTP_KEEPALIVE_EXPIRY_SECONDS")
+    http_connect_timeout_seconds: float = Field(5.0, env="HTTP_CONNECT_TIMEOUT_SECONDS")
+    http_read_timeout_seconds: float = Field(30.0, env="HTTP_READ_TIMEOUT_SECONDS")
+    http_stream_read_timeout_seconds: float = Field(120.0, env="HTTP_STREAM_READ_TIMEOUT_SECONDS")
+    # Tokens of context sent with each analysis refinement (analysis first, then recent turns, a rolling
+    # summary of older turns capped at REFINEMENT_SUMMARY_TOKEN_BUDGET, then the transcript)
+    refinement_context_token_budget: int = Field(8000, env="REFINEMENT_CONTEXT_TOKEN_BUDGET")
+    refinement_summary_token_budget: int = Field(800, env="REFINEMENT_SUMMARY_TOKEN_BUDGET")
+    # How GET /jobs/{id}/transcription serves stored transcripts: "redirect" (307 to a short-lived read-only
+    # SAS URL), "url" (the signed URL as JSON) or "proxy" (bytes through the API, with Range and gzip support)
+    transcript_delivery: str = Field("proxy", env="TRANSCRIPT_DELIVERY")
+    transcript_url_lifetime_seconds: int = Field(300, env="TRANSCRIPT_URL_LIFETIME_SECONDS")
+    # Startup validation: each check is abandoned after this long; non-critical checks run after startup
+    startup_check_timeout_seconds: float = Field(10.0, env="STARTUP_CHECK_TIMEOUT_SECONDS")
+    # Optional JSON-lines file each startup's phase timings are appended to
+    startup_report_path: Optional[str] = Field(None, env="STARTUP_REPORT_PATH")
+    # Memory diagnostics: "sampling" keeps a ring buffer of RSS/GC readings and traces allocations only during
+    # short periodic windows; "full" traces every allocation from startup (high overhead, debugging only).
+    # When unset, the service falls back to reading ENABLE_SESSION_MEMORY_DIAG from the process environment
+    memory_diagnostics_enabled: Optional[bool] = Field(
+        None, validation_alias=AliasChoices("memory_diagnostics_enabled", "ENABLE_SESSION_MEMORY_DIAG")
+    )
+    memory_diagnostics_mode: str = Field(
+        "sampling", validation_alias=AliasChoices("memory_diagnostics_mode", "MEMORY_DIAG_MODE")
+    )
+    memory_sample_interval_seconds: float = Field(30.0, env="MEMORY_SAMPLE_INTERVAL_SECONDS")
+    memory_sample_history: int = Field(240, env="MEMORY_SAMPLE_HISTORY")
+    memory_trace_interval_seconds: float = Field(600.0, env="MEMORY_TRACE_INTERVAL_SECONDS")
+    memory_trace_window_seconds: float = Field(10.0, env="MEMORY_TRACE_WINDOW_SECONDS")
     
     @property
     def cosmos_containers(self) -> Dict[str, str]:
@@ -125,6 +212,8 @@ class AppConfig(BaseSettings):
             "events": f"{self.cosmos_prefix}events",
             "user_sessions": f"{self.cosmos_prefix}user_sessions",
             "audit_logs": f"{self.cosmos_prefix}audit_logs",
+            "background_tasks": f"{self.cosmos_prefix}background_tasks",
+            "refinements": f"{self.cosmos_prefix}refinements",
         }
     
     @property
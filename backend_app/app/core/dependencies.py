@@ -545,6 +545,21 @@ class CosmosService:
             )
             return None
     
+    def read_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get job by ID with a point read (the jobs container is partitioned by ``/id``)"""
+        try:
+            item = self.get_container("jobs").read_item(item=job_id, partition_key=job_id)
+        except CosmosResourceNotFoundError:
+            return None
+        except CosmosHttpResponseError as e:
+            logging.getLogger(__name__).error(
+                "Failed to read job by ID from Cosmos DB",
+                exc_info=True,
+                extra={"job_id": job_id, "status_code": e.status_code},
+            )
+            return None
+        return item if item.get("type") == "job" else None
+
     def create_job(self, job_doc: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new job document"""
         try:
@@ -913,6 +928,28 @@ def get_analytics_service(cosmos_service: CosmosService = Depends(get_cosmos_ser
     return _build_analytics_service()
 
 
+@lru_cache()
+def _build_analytics_response_cache():
+    from ..utils.response_cache import ResponseCache
+    return ResponseCache(bucket_seconds=get_config().analytics_cache_bucket_seconds)
+
+
+def get_analytics_response_cache():
+    """Provide the shared response cache for admin analytics endpoints."""
+    return _build_analytics_response_cache()
+
+
+@lru_cache()
+def _build_permission_query_optimizer():
+    from ..utils.permission_queries import PermissionQueryOptimizer
+    return PermissionQueryOptimizer(container=get_cosmos_service().get_container("auth"))
+
+
+def get_permission_query_optimizer():
+    """Provide the shared PermissionQueryOptimizer bound to the auth container."""
+    return _build_permission_query_optimizer()
+
+
 def get_file_security_service():
     """Provide FileSecurityService instance for dependency injection."""
     from ..services.storage import FileSecurityService
@@ -929,6 +966,30 @@ def get_storage_service():
     """Provide StorageService instance for dependency injection."""
     return _build_storage_service()
 
+
+async def close_storage_service() -> None:
+    """Close the shared StorageService's aio clients, if it was ever built."""
+    if _build_storage_service.cache_info().currsize:
+        await _build_storage_service().aclose()
+
+
+@lru_cache()
+def _build_background_service():
+    from ..services.processing.background_service import BackgroundProcessingService
+    from ..services.processing.task_store import create_task_store
+    cosmos_service = get_cosmos_service()
+    return BackgroundProcessingService(
+        storage_service=_build_storage_service(),
+        cosmos_service=cosmos_service,
+        analytics_service=_build_analytics_service(),
+        task_store=create_task_store(get_config(), cosmos_service),
+    )
+
+
+def get_background_service():
+    """Provide the shared BackgroundProcessingService; its workers are started by the app lifespan."""
+    return _build_background_service()
+
 def get_job_service(
     cosmos_service: CosmosService = Depends(get_cosmos_service),
     storage_service = Depends(get_storage_service)
@@ -1003,7 +1064,8 @@ def _build_export_service():
     from ..services.analytics.export_service import ExportService
     return ExportService(
         cosmos_service=get_cosmos_service(),
-        analytics_service=get_analytics_service()
+        analytics_service=get_analytics_service(),
+        report_cache_dir=get_config().pdf_report_cache_dir,
     )
 
 
@@ -1031,6 +1093,17 @@ def get_system_health_service(cosmos_service: CosmosService = Depends(get_cosmos
     return SystemHealthService(cosmos_service)
 
 
+@lru_cache()
+def _build_memory_diagnostics_service():
+    from ..services.monitoring.memory_diagnostics_service import MemoryDiagnosticsService
+    return MemoryDiagnosticsService.from_config(get_config())
+
+
+def get_memory_diagnostics_service():
+    """Provide the process-wide MemoryDiagnosticsService; its sampler is started by the app lifespan."""
+    return _build_memory_diagnostics_service()
+
+
 def get_talking_points_service():
     """Provide TalkingPointsService with dependency injection
     
@@ -1062,6 +1135,7 @@ __all__ = [
     "get_job_management_service",
     "get_job_sharing_service",
     "get_analysis_refinement_service",
+    "get_background_service",
     "reset_dependency_caches",
 ]
 
@@ -1070,7 +1144,10 @@ def reset_dependency_caches() -> None:
     """Clear cached dependency instances (useful for testing)."""
     _build_cosmos_service.cache_clear()
     _build_analytics_service.cache_clear()
+    _build_analytics_response_cache.cache_clear()
+    _build_permission_query_optimizer.cache_clear()
     _build_storage_service.cache_clear()
+    _build_background_service.cache_clear()
     _build_export_service.cache_clear()
     _build_session_tracking_service.cache_clear()
     _build_audit_logging_service.cache_clear()
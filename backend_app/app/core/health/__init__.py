@@ -3,9 +3,12 @@ Health check and startup validation module.
 """
 
 from .startup_validator import StartupValidator, ValidationResult, StartupValidationError
+from .readiness import Readiness, get_readiness
 
 __all__ = [
     "StartupValidator",
     "ValidationResult",
     "StartupValidationError",
+    "Readiness",
+    "get_readiness",
 ]
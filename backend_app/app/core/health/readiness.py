@@ -0,0 +1,93 @@
+"""
+Process readiness for the ``/live`` and ``/ready`` probes.
+
+``/live`` only says the event loop is answering requests, so the orchestrator
+restarts a hung process but never one that is merely waiting on a dependency.
+``/ready`` turns on once the critical startup checks have passed and off again
+as soon as shutdown begins, so traffic is drained before clients are closed.
+
+Non-critical checks run in a background task after the app starts serving;
+their result never changes readiness. ``/ready`` is unauthenticated, so it only
+reports the state and check counts; the check messages and the startup report
+are served by the admin-only ``GET /api/system/startup``.
+"""
+
+import logging
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from .startup_validator import StartupValidator, ValidationResult
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Startup and shutdown state of this worker, as reported to the probes."""
+
+    def __init__(self):
+        self.ready = False
+        self.stopping = False
+        self.ready_since: Optional[str] = None
+        self.startup_result: Optional[ValidationResult] = None
+        self.deferred_result: Optional[ValidationResult] = None
+        self.startup_report: Optional[Dict[str, Any]] = None
+
+    def mark_ready(
+        self, result: Optional[ValidationResult] = None, startup_report: Optional[Dict[str, Any]] = None
+    ) -> None:
+        self.startup_result = result
+        self.startup_report = startup_report
+        self.ready = True
+        self.stopping = False
+        self.ready_since = datetime.now(timezone.utc).isoformat()
+
+    def mark_stopping(self) -> None:
+        self.ready = False
+        self.stopping = True
+
+    @property
+    def status(self) -> str:
+        if self.ready:
+            return "ready"
+        if self.stopping:
+            return "stopping"
+        return "starting"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Public probe body: state and check counts only."""
+        results = [r for r in (self.startup_result, self.deferred_result) if r is not None]
+        passed = sum(r.validations_passed for r in results)
+        return {
+            "status": self.status,
+            "ready_since": self.ready_since,
+            "checks": {"passed": passed, "failed": sum(r.validations_run for r in results) - passed},
+        }
+
+    def details(self) -> Dict[str, Any]:
+        """Check messages, timings and the startup report, for administrators."""
+        return {
+            "status": self.status,
+            "ready_since": self.ready_since,
+            "startup_checks": self.startup_result.to_dict() if self.startup_result else None,
+            "deferred_checks": self.deferred_result.to_dict() if self.deferred_result else "pending",
+            "startup": self.startup_report,
+        }
+
+    async def run_deferred_checks(self, validator: StartupValidator) -> Optional[ValidationResult]:
+        """Run the non-critical checks and keep their result; failures are only logged."""
+        try:
+            result = await validator.validate_all(fail_fast=False, critical=False)
+        except Exception:
+            logger.exception("Deferred startup checks failed to run")
+            return None
+        self.deferred_result = result
+        if result.warnings:
+            logger.warning(f"⚠️  {len(result.warnings)} deferred startup checks reported warnings")
+        return result
+
+
+@lru_cache(maxsize=1)
+def get_readiness() -> Readiness:
+    """Process-wide readiness state shared by the lifespan and the probe endpoints."""
+    return Readiness()
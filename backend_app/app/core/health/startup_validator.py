@@ -11,12 +11,15 @@ Key Features:
 - Validates OpenAI service availability
 - Provides detailed error reporting with actionable remediation steps
 - Supports both blocking (fail-fast) and non-blocking (warning) modes
+- Runs checks concurrently, each bounded by STARTUP_CHECK_TIMEOUT_SECONDS
+- Splits checks into critical ones that gate startup and non-critical ones
+  that run in the background once the app is serving (see readiness.py)
 
 Usage:
     from core.health import StartupValidator
     
     validator = StartupValidator(cosmos_service, config)
-    result = await validator.validate_all()
+    result = await validator.validate_all(critical=True)
     
     if not result.is_healthy:
         # Log errors and exit
@@ -27,7 +30,8 @@ Usage:
 
 import logging
 import asyncio
-from typing import Dict, Any, List, Optional
+import time
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
@@ -36,6 +40,10 @@ from azure.cosmos.exceptions import CosmosHttpResponseError
 from azure.core.exceptions import AzureError
 
 from ..config import AppConfig
+from ...utils.async_utils import run_sync
+
+
+DEFAULT_CHECK_TIMEOUT_SECONDS = 10.0
 
 
 class ValidationLevel(str, Enum):
@@ -74,6 +82,7 @@ class ValidationResult:
     validations_run: int = 0
     validations_passed: int = 0
     duration_seconds: float = 0.0
+    check_durations_ms: Dict[str, float] = field(default_factory=dict)
     
     def add_error(self, error: ValidationError):
         """Add validation error"""
@@ -92,6 +101,40 @@ class ValidationResult:
             f"Errors: {len(self.errors)}, Warnings: {len(self.warnings)}"
         )
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Result as returned by the health and readiness endpoints"""
+        return {
+            "status": "healthy" if self.is_healthy else "unhealthy",
+            "checks": {
+                "total": self.validations_run,
+                "passed": self.validations_passed,
+                "failed": len(self.errors),
+                "warnings": len(self.warnings)
+            },
+            "duration_seconds": self.duration_seconds,
+            "check_durations_ms": dict(self.check_durations_ms),
+            "errors": [
+                {"component": e.component, "message": e.message, "level": e.level.value}
+                for e in self.errors
+            ],
+            "warnings": [
+                {"component": w.component, "message": w.message, "level": w.level.value}
+                for w in self.warnings
+            ]
+        }
+
+
+@dataclass
+class ValidationCheck:
+    """A named check; critical checks gate startup, the rest run once the app is serving"""
+    name: str
+    func: Callable[[], Awaitable[Optional[ValidationError]]]
+    critical: bool = True
+
+    @property
+    def level(self) -> ValidationLevel:
+        return ValidationLevel.CRITICAL if self.critical else ValidationLevel.WARNING
+
 
 class StartupValidationError(Exception):
     """Exception raised when critical startup validation fails"""
@@ -113,24 +156,74 @@ class StartupValidator:
     4. External service availability (OpenAI, Azure Speech)
     """
     
-    def __init__(self, cosmos_service, config: AppConfig):
+    def __init__(
+        self,
+        cosmos_service,
+        config: AppConfig,
+        storage_service=None,
+        check_timeout: Optional[float] = None,
+    ):
         """
         Initialize startup validator.
         
         Args:
             cosmos_service: CosmosService instance
             config: Application configuration
+            storage_service: StorageService used to probe the recordings container (optional)
+            check_timeout: Seconds each check may take (default STARTUP_CHECK_TIMEOUT_SECONDS)
         """
         self.cosmos = cosmos_service
         self.config = config
+        self.storage = storage_service
         self.logger = logging.getLogger(__name__)
+        if check_timeout is None:
+            configured = getattr(config, "startup_check_timeout_seconds", None)
+            valid = isinstance(configured, (int, float)) and not isinstance(configured, bool) and configured > 0
+            check_timeout = float(configured) if valid else DEFAULT_CHECK_TIMEOUT_SECONDS
+        self.check_timeout = check_timeout
+
+    def checks(self) -> List[ValidationCheck]:
+        """All checks, in reporting order"""
+        return [
+            ValidationCheck("Configuration", self._validate_configuration),
+            ValidationCheck("Cosmos DB Connection", self._validate_cosmos_connection),
+            ValidationCheck("Cosmos DB Containers", self._validate_cosmos_containers),
+            ValidationCheck("Blob Storage", self._validate_blob_storage, critical=False),
+        ]
+
+    async def _run_check(self, check: ValidationCheck) -> Tuple[Optional[ValidationError], float]:
+        """Run one check under the timeout; returns its error (if any) and duration in seconds"""
+        start = time.perf_counter()
+        try:
+            error = await asyncio.wait_for(check.func(), self.check_timeout)
+        except asyncio.TimeoutError:
+            error = ValidationError(
+                component=check.name,
+                message=f"Validation check timed out after {self.check_timeout:g}s",
+                level=check.level,
+                details={"timeout_seconds": self.check_timeout},
+                remediation="Check network connectivity to the dependency or raise STARTUP_CHECK_TIMEOUT_SECONDS"
+            )
+        except Exception as e:
+            # Unexpected error during validation
+            error = ValidationError(
+                component=check.name,
+                message=f"Validation check crashed: {str(e)}",
+                level=check.level,
+                details={"error_type": type(e).__name__},
+                remediation="Check application logs for stack trace"
+            )
+            self.logger.error(f"  ❌ {check.name} validation crashed", exc_info=True)
+        return error, time.perf_counter() - start
     
-    async def validate_all(self, fail_fast: bool = True) -> ValidationResult:
+    async def validate_all(self, fail_fast: bool = True, critical: Optional[bool] = None) -> ValidationResult:
         """
-        Run all validation checks.
+        Run validation checks concurrently.
         
         Args:
             fail_fast: If True, raise exception on critical failures
+            critical: Only the checks that gate startup (True) or only the
+                deferred ones (False); None runs every check
             
         Returns:
             ValidationResult with all check results
@@ -138,47 +231,28 @@ class StartupValidator:
         Raises:
             StartupValidationError: If fail_fast=True and critical checks fail
         """
-        start_time = datetime.utcnow()
+        start_time = time.perf_counter()
         result = ValidationResult(is_healthy=True)
+        checks = [check for check in self.checks() if critical is None or check.critical == critical]
         
-        self.logger.info("🚀 Starting application startup validation...")
+        self.logger.info(
+            f"🚀 Running {len(checks)} validation checks concurrently "
+            f"({self.check_timeout:g}s timeout each): {', '.join(c.name for c in checks)}"
+        )
         
-        # Run all validation checks
-        validation_checks = [
-            ("Configuration", self._validate_configuration),
-            ("Cosmos DB Connection", self._validate_cosmos_connection),
-            ("Cosmos DB Containers", self._validate_cosmos_containers),
-            ("Blob Storage", self._validate_blob_storage),
-        ]
+        outcomes = await asyncio.gather(*(self._run_check(check) for check in checks))
         
-        for check_name, check_func in validation_checks:
+        for check, (validation_error, duration) in zip(checks, outcomes):
             result.validations_run += 1
-            try:
-                self.logger.info(f"  Validating {check_name}...")
-                validation_error = await check_func()
-                
-                if validation_error:
-                    result.add_error(validation_error)
-                    self.logger.error(f"  ❌ {check_name} validation failed: {validation_error.message}")
-                else:
-                    result.validations_passed += 1
-                    self.logger.info(f"  ✅ {check_name} validated successfully")
-                    
-            except Exception as e:
-                # Unexpected error during validation
-                error = ValidationError(
-                    component=check_name,
-                    message=f"Validation check crashed: {str(e)}",
-                    level=ValidationLevel.CRITICAL,
-                    details={"error_type": type(e).__name__},
-                    remediation="Check application logs for stack trace"
-                )
-                result.add_error(error)
-                self.logger.error(f"  ❌ {check_name} validation crashed", exc_info=True)
+            result.check_durations_ms[check.name] = round(duration * 1000, 1)
+            if validation_error:
+                result.add_error(validation_error)
+                self.logger.error(f"  ❌ {check.name} validation failed: {validation_error.message}")
+            else:
+                result.validations_passed += 1
+                self.logger.info(f"  ✅ {check.name} validated successfully ({duration * 1000:.0f}ms)")
         
-        # Calculate duration
-        end_time = datetime.utcnow()
-        result.duration_seconds = (end_time - start_time).total_seconds()
+        result.duration_seconds = time.perf_counter() - start_time
         
         # Log summary
         self.logger.info(f"📊 Validation complete: {result.summary()}")
@@ -230,7 +304,7 @@ class StartupValidator:
             
             # Test actual connectivity with a lightweight query
             # This will fail if credentials are wrong or endpoint is unreachable
-            database_properties = database.read()
+            database_properties = await run_sync(database.read)
             
             self.logger.debug(f"Connected to Cosmos database: {database_properties.get('id')}")
             return None
@@ -269,19 +343,21 @@ class StartupValidator:
         ]
         
         missing_containers = []
+
+        async def read_container(container_name: str) -> None:
+            # Test container exists with a simple read
+            container = self.cosmos.get_container(container_name)
+            await run_sync(container.read)
+
+        outcomes = await asyncio.gather(
+            *(read_container(name) for name in required_containers), return_exceptions=True
+        )
         
-        for container_name in required_containers:
-            try:
-                # Try to get container client
-                container = self.cosmos.get_container(container_name)
-                
-                # Test container exists with a simple read
-                container.read()
-                
+        for container_name, outcome in zip(required_containers, outcomes):
+            if outcome is None:
                 self.logger.debug(f"Container '{container_name}' validated")
-                
-            except CosmosHttpResponseError as e:
-                if e.status_code == 404:
+            elif isinstance(outcome, CosmosHttpResponseError):
+                if outcome.status_code == 404:
                     missing_containers.append(container_name)
                     self.logger.warning(f"Container '{container_name}' not found (404)")
                 else:
@@ -292,17 +368,17 @@ class StartupValidator:
                         level=ValidationLevel.CRITICAL,
                         details={
                             "container": container_name,
-                            "status_code": e.status_code,
-                            "error": str(e)
+                            "status_code": outcome.status_code,
+                            "error": str(outcome)
                         },
                         remediation=f"Check permissions and container configuration for '{container_name}'"
                     )
-            except Exception as e:
+            else:
                 return ValidationError(
                     component="Cosmos DB Containers",
-                    message=f"Unexpected error validating container '{container_name}': {str(e)}",
+                    message=f"Unexpected error validating container '{container_name}': {str(outcome)}",
                     level=ValidationLevel.CRITICAL,
-                    details={"container": container_name, "error_type": type(e).__name__},
+                    details={"container": container_name, "error_type": type(outcome).__name__},
                     remediation="Check application logs for detailed stack trace"
                 )
         
@@ -332,9 +408,31 @@ class StartupValidator:
                 remediation="Set AZURE_STORAGE_ACCOUNT_URL if blob storage is required"
             )
         
-        # TODO: Add actual storage connectivity check when BlobService is available
-        # For now, just check configuration is present
         self.logger.debug(f"Blob storage account configured: {storage_account_url}")
+        if self.storage is None:
+            return None
+
+        # Deferred check, so a round trip to the account does not hold up startup
+        container_name = self.config.azure_storage_recordings_container
+        container = self.storage.blob_service_client.get_container_client(container_name)
+        try:
+            exists = await run_sync(container.exists)
+        except AzureError as e:
+            return ValidationError(
+                component="Blob Storage",
+                message="Failed to reach blob storage",
+                level=ValidationLevel.WARNING,
+                details={"account_url": storage_account_url, "error": str(e)},
+                remediation="Check storage credentials, role assignments and network access"
+            )
+        if not exists:
+            return ValidationError(
+                component="Blob Storage",
+                message=f"Recordings container '{container_name}' not found",
+                level=ValidationLevel.WARNING,
+                details={"container": container_name},
+                remediation="Create the container or set AZURE_STORAGE_RECORDINGS_CONTAINER"
+            )
         return None
     
     async def health_check(self) -> Dict[str, Any]:
@@ -346,30 +444,4 @@ class StartupValidator:
         """
         result = await self.validate_all(fail_fast=False)
         
-        return {
-            "status": "healthy" if result.is_healthy else "unhealthy",
-            "timestamp": datetime.utcnow().isoformat(),
-            "checks": {
-                "total": result.validations_run,
-                "passed": result.validations_passed,
-                "failed": len(result.errors),
-                "warnings": len(result.warnings)
-            },
-            "duration_seconds": result.duration_seconds,
-            "errors": [
-                {
-                    "component": e.component,
-                    "message": e.message,
-                    "level": e.level.value
-                }
-                for e in result.errors
-            ],
-            "warnings": [
-                {
-                    "component": w.component,
-                    "message": w.message,
-                    "level": w.level.value
-                }
-                for w in result.warnings
-            ]
-        }
+        return {**result.to_dict(), "timestamp": datetime.utcnow().isoformat()}
@@ -1,26 +1,171 @@
-from functools import lru_cache
+"""
+Shared outbound HTTP client.
+
+Every outbound call (Azure Functions, Azure OpenAI) goes through one pooled
+``httpx.AsyncClient`` so connections and TLS sessions are reused across
+requests instead of being set up per call.
+
+* HTTP/2 is used when the ``h2`` package is installed (``httpx[http2]``) and
+  ``http2_enabled`` is set; otherwise the pool speaks HTTP/1.1 keep-alive.
+* ``http_max_connections`` bounds the pool as a whole and
+  ``http_max_connections_per_host`` bounds concurrent requests to any one
+  host, so a slow upstream cannot take every connection. A streamed response
+  holds its host slot until it is closed.
+* ``stream_timeout()`` keeps the connect and pool timeouts short but allows a
+  long gap between chunks, for token streams that pause while the model works.
+"""
+import asyncio
+import importlib.util
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Optional
 
 import httpx
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS: Dict[str, Any] = {
+    "http2_enabled": True,
+    "http_max_connections": 100,
+    "http_max_connections_per_host": 20,
+    "http_keepalive_expiry_seconds": 30.0,
+    "http_connect_timeout_seconds": 5.0,
+    "http_read_timeout_seconds": 30.0,
+    "http_stream_read_timeout_seconds": 120.0,
+}
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _settings() -> Dict[str, Any]:
+    try:
+        from .config import get_config
+
+        config = get_config()
+        return {name: getattr(config, name, default) for name, default in DEFAULT_SETTINGS.items()}
+    except Exception:
+        return dict(DEFAULT_SETTINGS)
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that frees its host slot when closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    """Caps in-flight requests per host on top of the pool's overall limit."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_per_host: int):
+        self._transport = transport
+        self.max_per_host = max_per_host
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+
+    def in_flight(self) -> Dict[str, int]:
+        return {host: self.max_per_host - slot._value for host, slot in self._slots.items()}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.netloc.decode("ascii")
+        slot = self._slots.get(host)
+        if slot is None:
+            slot = self._slots[host] = asyncio.Semaphore(self.max_per_host)
+        # Waiting for a host slot counts against the pool timeout, like waiting for a connection
+        pool_timeout = request.extensions.get("timeout", {}).get("pool")
+        try:
+            await asyncio.wait_for(slot.acquire(), pool_timeout)
+        except asyncio.TimeoutError:
+            raise httpx.PoolTimeout(f"No free connection slot for {host}", request=request) from None
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                slot.release()
+
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        if response.is_closed:
+            # The transport already read the whole body into memory
+            release()
+            return response
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def create_client(**overrides: Any) -> httpx.AsyncClient:
+    """Build a pooled client from the ``http_*`` config fields (or ``overrides``)."""
+    settings = {**_settings(), **overrides}
+    http2 = bool(settings["http2_enabled"]) and http2_available()
+    transport = httpx.AsyncHTTPTransport(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=int(settings["http_max_connections"]),
+            max_keepalive_connections=int(settings["http_max_connections"]),
+            keepalive_expiry=float(settings["http_keepalive_expiry_seconds"]),
+        ),
+    )
+    connect = float(settings["http_connect_timeout_seconds"])
+    return httpx.AsyncClient(
+        transport=HostLimitedTransport(transport, int(settings["http_max_connections_per_host"])),
+        timeout=httpx.Timeout(float(settings["http_read_timeout_seconds"]), connect=connect, pool=connect),
+    )
+
+
+def stream_timeout() -> httpx.Timeout:
+    """Per-request timeout for streamed responses: ``read`` is the longest allowed gap between chunks."""
+    settings = _settings()
+    connect = float(settings["http_connect_timeout_seconds"])
+    return httpx.Timeout(
+        float(settings["http_read_timeout_seconds"]),
+        connect=connect,
+        pool=connect,
+        read=float(settings["http_stream_read_timeout_seconds"]),
+    )
 
-@lru_cache(maxsize=1)
-def _get_cached_client(timeout: float = 30.0) -> httpx.AsyncClient:
-    return httpx.AsyncClient(timeout=timeout)
 
+def get_client(timeout: Optional[float] = None) -> httpx.AsyncClient:
+    """Return the shared AsyncClient. Lazily initialized on first use.
 
-def get_client(timeout: float = 30.0) -> httpx.AsyncClient:
-    """Return the shared AsyncClient. Lazily initialized on first use."""
-    return _get_cached_client(timeout)
+    ``timeout`` is accepted for backwards compatibility; pass per-request
+    timeouts to the request methods instead.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+        logger.info(f"Shared HTTP client created (http2={http2_available()})")
+    return _client
 
 
-async def startup(timeout: float = 30.0) -> None:
+async def startup(timeout: Optional[float] = None) -> None:
     """Warm the shared client during application startup."""
-    _get_cached_client(timeout)
+    get_client()
 
 
 async def shutdown() -> None:
     """Close the shared client during application shutdown."""
-    if _get_cached_client.cache_info().currsize:
-        client = _get_cached_client()
+    global _client
+    if _client is not None:
+        client, _client = _client, None
         await client.aclose()
-        _get_cached_client.cache_clear()
@@ -9,7 +9,7 @@ except Exception:
     # older pydantic versions still expose BaseSettings here
     from pydantic import BaseSettings
 
-from pydantic import Field
+from pydantic import AliasChoices, Field
 from typing import Dict, Any, Optional, List
 import os
 from functools import lru_cache
@@ -47,6 +47,7 @@ class CacheSettings(BaseSettings):
     default_ttl: int = Field(300, env="CACHE_DEFAULT_TTL")  # 5 minutes
     redis_url: Optional[str] = Field(None, env="REDIS_URL")
     key_prefix: str = Field("permission:", env="CACHE_KEY_PREFIX")
+    max_entries: int = Field(10000, env="CACHE_MAX_ENTRIES")
 
 class AzureSettings(BaseSettings):
     """Azure services configuration"""
@@ -91,6 +92,45 @@ class AppSettings(BaseSettings):
     max_concurrent_jobs: int = Field(5, env="MAX_CONCURRENT_JOBS")
     job_retry_attempts: int = Field(3, env="JOB_RETRY_ATTEMPTS")
     job_retry_delay_seconds: int = Field(60, env="JOB_RETRY_DELAY")
+    background_queue_max_size: int = Field(1000, env="BACKGROUND_QUEUE_MAX_SIZE")
+    background_task_retention_seconds: int = Field(86400, env="BACKGROUND_TASK_RETENTION_SECONDS")
+    background_task_registry_max: int = Field(5000, env="BACKGROUND_TASK_REGISTRY_MAX")
+    background_drain_timeout_seconds: int = Field(30, env="BACKGROUND_DRAIN_TIMEOUT_SECONDS")
+    background_task_store: str = Field("sqlite", env="BACKGROUND_TASK_STORE")
+    background_task_sqlite_path: Optional[str] = Field(None, env="BACKGROUND_TASK_SQLITE_PATH")
+    background_lease_seconds: int = Field(60, env="BACKGROUND_LEASE_SECONDS")
+    background_status_cache_seconds: int = Field(2, env="BACKGROUND_STATUS_CACHE_SECONDS")
+    circuit_breaker_failure_threshold: int = Field(5, env="CIRCUIT_BREAKER_FAILURE_THRESHOLD")
+    circuit_breaker_window_seconds: int = Field(60, env="CIRCUIT_BREAKER_WINDOW_SECONDS")
+    circuit_breaker_minimum_calls: int = Field(10, env="CIRCUIT_BREAKER_MINIMUM_CALLS")
+    circuit_breaker_failure_rate: float = Field(0.5, env="CIRCUIT_BREAKER_FAILURE_RATE")
+    circuit_breaker_slow_call_seconds: float = Field(60.0, env="CIRCUIT_BREAKER_SLOW_CALL_SECONDS")
+    circuit_breaker_slow_call_rate: float = Field(0.8, env="CIRCUIT_BREAKER_SLOW_CALL_RATE")
+    circuit_breaker_recovery_seconds: int = Field(60, env="CIRCUIT_BREAKER_RECOVERY_SECONDS")
+    circuit_breaker_half_open_calls: int = Field(1, env="CIRCUIT_BREAKER_HALF_OPEN_CALLS")
+    http2_enabled: bool = Field(True, env="HTTP2_ENABLED")
+    http_max_connections: int = Field(100, env="HTTP_MAX_CONNECTIONS")
+    http_max_connections_per_host: int = Field(20, env="HTTP_MAX_CONNECTIONS_PER_HOST")
+    http_keepalive_expiry_seconds: float = Field(30.0, env="HTTP_KEEPALIVE_EXPIRY_SECONDS")
+    http_connect_timeout_seconds: float = Field(5.0, env="HTTP_CONNECT_TIMEOUT_SECONDS")
+    http_read_timeout_seconds: float = Field(30.0, env="HTTP_READ_TIMEOUT_SECONDS")
+    http_stream_read_timeout_seconds: float = Field(120.0, env="HTTP_STREAM_READ_TIMEOUT_SECONDS")
+    refinement_context_token_budget: int = Field(8000, env="REFINEMENT_CONTEXT_TOKEN_BUDGET")
+    refinement_summary_token_budget: int = Field(800, env="REFINEMENT_SUMMARY_TOKEN_BUDGET")
+    transcript_delivery: str = Field("proxy", env="TRANSCRIPT_DELIVERY")
+    transcript_url_lifetime_seconds: int = Field(300, env="TRANSCRIPT_URL_LIFETIME_SECONDS")
+    startup_check_timeout_seconds: float = Field(10.0, env="STARTUP_CHECK_TIMEOUT_SECONDS")
+    startup_report_path: Optional[str] = Field(None, env="STARTUP_REPORT_PATH")
+    memory_diagnostics_enabled: Optional[bool] = Field(
+        None, validation_alias=AliasChoices("memory_diagnostics_enabled", "ENABLE_SESSION_MEMORY_DIAG")
+    )
+    memory_diagnostics_mode: str = Field(
+        "sampling", validation_alias=AliasChoices("memory_diagnostics_mode", "MEMORY_DIAG_MODE")
+    )
+    memory_sample_interval_seconds: float = Field(30.0, env="MEMORY_SAMPLE_INTERVAL_SECONDS")
+    memory_sample_history: int = Field(240, env="MEMORY_SAMPLE_HISTORY")
+    memory_trace_interval_seconds: float = Field(600.0, env="MEMORY_TRACE_INTERVAL_SECONDS")
+    memory_trace_window_seconds: float = Field(10.0, env="MEMORY_TRACE_WINDOW_SECONDS")
     
     @property
     def cors_origins_list(self) -> List[str]:
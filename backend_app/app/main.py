@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from datetime import datetime
 from dotenv import load_dotenv
@@ -27,7 +28,8 @@ from .core.errors import (
     application_error_response,
 )
 # NOTE: temporarily import only essential services for minimal server
-# from .core.dependencies import get_storage_service, get_background_service
+# from .core.dependencies import get_storage_service
+from .core.dependencies import get_background_service, close_storage_service, get_memory_diagnostics_service
 # from .core.dependencies import (
 #     get_user_service,
 #     get_permission_service,
@@ -36,10 +38,13 @@ from .core.errors import (
 #     reset_all_services,
 # )
 from .core.http_client import startup as http_client_startup, shutdown as http_client_shutdown
+from .utils.password_utils import shutdown as password_executor_shutdown
+from .utils.pdf_report import shutdown as pdf_render_pool_shutdown
+from .utils.permission_cache import close_permission_cache
 
 from .utils.logging_config import setup_application_logging
 from .utils.startup_logging import get_startup_logger
-from .core.health import StartupValidator, StartupValidationError
+from .core.health import StartupValidator, StartupValidationError, get_readiness
 
 logger = setup_application_logging(level="INFO", force_flush=True)
 startup_logger = get_startup_logger()
@@ -66,10 +71,14 @@ async def lifespan(app: FastAPI):
 
     # Phase 3: Background Processing
     startup_logger.start_phase("background", "Initializing background processing")
-    # NOTE: Background service temporarily disabled for minimal server
-    # # Initialize background processing service via DI provider
-    # bg = get_background_service(config)
-    # app.state.background_service = bg
+    # Start the bounded worker pool; the app still serves requests if it cannot start
+    background_service = None
+    try:
+        background_service = get_background_service()
+        background_service.start()
+        app.state.background_service = background_service
+    except Exception:
+        logger.exception("Failed to start background processing workers")
     startup_logger.end_phase("background")
 
     # Phase 4: Core Services Warming
@@ -110,16 +119,24 @@ async def lifespan(app: FastAPI):
         startup_logger.end_phase("services")
 
     # Phase 5: Startup Validation (Fail-Fast Check)
+    # Critical checks run concurrently, each under STARTUP_CHECK_TIMEOUT_SECONDS;
+    # non-critical ones are deferred until the app is serving traffic
     startup_logger.start_phase("validation", "Validating critical dependencies")
+    readiness = get_readiness()
     try:
-        from .core.dependencies import get_cosmos_service
+        from .core.dependencies import get_cosmos_service, get_storage_service
         cosmos_service = get_cosmos_service()
+        try:
+            storage_service = get_storage_service()
+        except Exception:
+            logger.exception("Storage service unavailable; skipping blob storage probe")
+            storage_service = None
         
         # Create validator and run comprehensive checks
-        validator = StartupValidator(cosmos_service, config)
+        validator = StartupValidator(cosmos_service, config, storage_service=storage_service)
         
         # Run validation with fail_fast=True to exit on critical failures
-        validation_result = await validator.validate_all(fail_fast=True)
+        validation_result = await validator.validate_all(fail_fast=True, critical=True)
         
         # If we get here, validation passed
         logger.info(f"✅ Startup validation passed: {validation_result.summary()}")
@@ -130,7 +147,7 @@ async def lifespan(app: FastAPI):
             for warning in validation_result.warnings:
                 logger.warning(str(warning))
         
-        startup_logger.end_phase("validation")
+        startup_logger.end_phase("validation", {"checks_ms": validation_result.check_durations_ms})
         
     except StartupValidationError as e:
         # Critical validation failure - log and exit
@@ -139,8 +156,8 @@ async def lifespan(app: FastAPI):
         for error in e.result.errors:
             logger.critical(f"  - {error}")
         
-        startup_logger.end_phase("validation")
-        startup_logger.finish_startup(success=False)
+        startup_logger.end_phase("validation", {"checks_ms": e.result.check_durations_ms})
+        startup_logger.finish_startup(success=False, report_path=config.startup_report_path)
         
         # Exit with error code to signal container orchestrator
         import sys
@@ -150,14 +167,14 @@ async def lifespan(app: FastAPI):
         # Unexpected error during validation itself
         logger.critical(f"💥 UNEXPECTED ERROR DURING STARTUP VALIDATION: {str(e)}", exc_info=True)
         startup_logger.end_phase("validation")
-        startup_logger.finish_startup(success=False)
+        startup_logger.finish_startup(success=False, report_path=config.startup_report_path)
         
         # Exit with error code
         import sys
         sys.exit(1)
 
     # Complete startup
-    startup_logger.finish_startup()
+    startup_logger.finish_startup(report_path=config.startup_report_path)
 
     # Start shared HTTP client
     try:
@@ -165,8 +182,25 @@ async def lifespan(app: FastAPI):
     except Exception:
         logger.exception("Failed to start shared HTTP client")
 
+    # Memory sampling (ENABLE_SESSION_MEMORY_DIAG with MEMORY_DIAG_MODE=sampling)
+    memory_diagnostics = None
+    try:
+        memory_diagnostics = get_memory_diagnostics_service()
+        memory_diagnostics.start_sampling()
+    except Exception:
+        logger.exception("Failed to start memory sampling")
+
+    readiness.mark_ready(validation_result, startup_logger.last_report)
+    # Non-critical checks run once the server is accepting requests
+    deferred_checks = asyncio.create_task(readiness.run_deferred_checks(validator))
+
     yield
 
+    # Fail the readiness probe first so traffic drains while clients close
+    readiness.mark_stopping()
+    if not deferred_checks.done():
+        deferred_checks.cancel()
+
     # Shutdown: reset/cleanup services
     try:
         # NOTE: reset_all_services temporarily disabled for minimal server
@@ -175,16 +209,55 @@ async def lifespan(app: FastAPI):
     except Exception:
         logger.exception("Error during service reset on shutdown")
 
+    # Stop the memory sampler (and any trace window it has open)
+    if memory_diagnostics is not None:
+        try:
+            await memory_diagnostics.stop_sampling()
+        except Exception:
+            logger.exception("Error stopping memory sampling")
+
+    # Let queued background tasks finish (bounded by the drain timeout) before closing clients they use
+    if background_service is not None:
+        try:
+            await background_service.stop()
+        except Exception:
+            logger.exception("Error stopping background processing workers")
+
     # Close shared http client
     try:
         await http_client_shutdown()
     except Exception:
         logger.exception("Error closing shared HTTP client")
 
+    # Close the pooled async blob client used for downloads
+    try:
+        await close_storage_service()
+    except Exception:
+        logger.exception("Error closing storage clients")
+
+    # Stop the bcrypt executor used by login/registration
+    try:
+        password_executor_shutdown()
+    except Exception:
+        logger.exception("Error stopping password hashing executor")
+
+    # Stop the PDF report render processes
+    try:
+        pdf_render_pool_shutdown()
+    except Exception:
+        logger.exception("Error stopping PDF render pool")
+
+    # Close the permission cache backend (Redis connections when configured)
+    try:
+        await close_permission_cache()
+    except Exception:
+        logger.exception("Error closing permission cache")
+
 
 # Instantiate the FastAPI app with lifespan
 app = FastAPI(lifespan=lifespan)
 
+from .middleware.metrics_middleware import MetricsMiddleware
 from .middleware.session_tracking_middleware import SessionTrackingMiddleware
 from .core.dependencies import (
     get_cosmos_service,
@@ -213,6 +286,10 @@ else:
 # Configure CORS with security best practices
 config = get_config()
 
+# Per-route metrics sit outside session tracking so its cost is included in the latency
+if config.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 # Configure CORS carefully: when credentials are allowed the Access-Control-Allow-Origin
 # header must not be the wildcard '*' — browsers will reject wildcard with credentials.
 cors_origins = config.cors_origins_list if config.cors_origins_list else []
@@ -359,7 +436,9 @@ async def root():
                 "system_analytics": "GET /api/analytics/system"
             },
             "system": {
-                "health": "GET /api/system/health"
+                "health": "GET /api/system/health",
+                "live": "GET /live",
+                "ready": "GET /ready"
             }
         },
         "documentation": "/docs",
@@ -367,6 +446,19 @@ async def root():
     }
 
 
+@app.get("/live")
+async def live():
+    """Liveness probe: the process is up and its event loop answers requests"""
+    return {"status": "alive", "timestamp": datetime.now().isoformat()}
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 once critical startup checks passed, 503 while starting or stopping"""
+    readiness = get_readiness()
+    return JSONResponse(readiness.snapshot(), status_code=200 if readiness.ready else 503)
+
+
 @app.get("/echo")
 async def echo_request():
     logger.info("✓ Echo endpoint called")
@@ -0,0 +1,43 @@
+"""Small helpers shared by the raw ASGI middlewares.
+
+The middlewares in this package work on the ASGI ``scope`` directly instead of
+``BaseHTTPMiddleware`` so responses (including ``StreamingResponse``) pass
+through untouched. These helpers read what they need from the scope without
+building a full ``Request``.
+"""
+
+from typing import Optional
+
+from starlette.types import Scope
+
+# Probe, docs and root paths: never tracked, audited or rate limited
+PROBE_PATHS = frozenset({
+    "/",
+    "/health",
+    "/ready",
+    "/live",
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+    "/api/system/health",
+})
+
+
+def is_probe_path(path: str) -> bool:
+    """True for health checks, readiness/liveness probes and API docs."""
+    return path in PROBE_PATHS or path.rstrip("/") in PROBE_PATHS or path.startswith("/docs/")
+
+
+def get_header(scope: Scope, name: str) -> Optional[str]:
+    """First value of request header ``name`` (lower case) or None."""
+    key = name.lower().encode("latin-1")
+    for header, value in scope.get("headers") or ():
+        if header == key:
+            return value.decode("latin-1")
+    return None
+
+
+def has_bearer_token(scope: Scope) -> bool:
+    """Cheap check used to skip unauthenticated requests before any JWT work."""
+    auth = get_header(scope, "authorization")
+    return bool(auth) and auth[:7].lower() == "bearer "
@@ -0,0 +1,54 @@
+"""Request metrics middleware.
+
+Raw ASGI like the other middlewares in this package: it wraps ``send`` only to
+read the response status, so bodies are never buffered. Each request is
+recorded against its route template (``/api/jobs/{job_id}``, not the concrete
+path) and its method, with non-standard methods folded into ``OTHER``, together
+with the Cosmos RU charged while it was served.
+"""
+
+import time
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..utils.metrics import (
+    UNMATCHED_ROUTE,
+    MetricsRegistry,
+    end_request_charge,
+    get_metrics_registry,
+    method_label,
+    start_request_charge,
+)
+
+
+class MetricsMiddleware:
+    """Record latency, status and RU per route into a ``MetricsRegistry``."""
+
+    def __init__(self, app: ASGIApp, registry: Optional[MetricsRegistry] = None):
+        self.app = app
+        self.registry = registry or get_metrics_registry()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        charge, token = start_request_charge()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            end_request_charge(token)
+            # FastAPI stores the matched route in the scope during routing
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            self.registry.observe_request(method_label(scope["method"]), route, status_code, duration, charge)
@@ -1,23 +1,47 @@
 # Security Middleware for Input Validation and Rate Limiting
-from fastapi import Request, HTTPException, status
+from fastapi import Request
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from typing import Optional, Dict, Any
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Optional, Tuple
 import re
-import time
-from collections import defaultdict, deque
 import logging
 
+from .asgi_helpers import get_header, is_probe_path
+from ..utils.jwt_utils import TokenDecodeError, decode_token
+from ..utils.rate_limiter import (
+    InMemoryRateLimitStore,
+    RateLimitDecision,
+    RateLimiter,
+    RateLimitRule,
+)
+
 logger = logging.getLogger(__name__)
 
-class SecurityMiddleware(BaseHTTPMiddleware):
-    """Comprehensive security middleware for input validation and attack prevention"""
+class SecurityMiddleware:
+    """Comprehensive security middleware for input validation and attack prevention.
+    
+    Raw ASGI: rejected requests are answered before the app runs, and allowed
+    responses only get headers added to their start message, so bodies are
+    streamed through without buffering.
+    """
     
-    def __init__(self, app, max_requests_per_minute: int = 60, max_upload_size: int = 100*1024*1024):
-        super().__init__(app)
+    def __init__(
+        self,
+        app,
+        max_requests_per_minute: int = 60,
+        max_upload_size: int = 100*1024*1024,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.app = app
         self.max_requests_per_minute = max_requests_per_minute
         self.max_upload_size = max_upload_size
-        self.rate_limit_cache = defaultdict(lambda: deque())
+        # Defaults to a per-process limiter; pass one from create_rate_limiter for
+        # per-user/per-route quotas or limits shared across workers via Redis.
+        self.rate_limiter = rate_limiter or RateLimiter(
+            InMemoryRateLimitStore(),
+            default_rule=RateLimitRule.per_minute(max_requests_per_minute),
+        )
         
         # Dangerous patterns to block
         self.dangerous_patterns = [
@@ -33,26 +57,77 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             r'<\s*iframe',  # Iframe injection
         ]
         self.pattern_regex = re.compile('|'.join(self.dangerous_patterns), re.IGNORECASE)
+        
+        self.security_headers = {
+            "X-Content-Type-Options": "nosniff",
+            "X-Frame-Options": "DENY",
+            "X-XSS-Protection": "1; mode=block",
+            "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+            "Referrer-Policy": "strict-origin-when-cross-origin",
+            "Content-Security-Policy": (
+                "default-src 'self'; "
+                "script-src 'self'; "
+                "style-src 'self' 'unsafe-inline'; "
+                "img-src 'self' data: https:; "
+                "connect-src 'self' https://api.openai.com https://*.azure.com; "
+                "frame-ancestors 'none';"
+            ),
+        }
     
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request = Request(scope)
+        rate_limit: Optional[RateLimitDecision] = None
+        
+        # Health probes and docs skip rate limiting and input validation
+        if not is_probe_path(scope["path"]):
+            rejection, rate_limit = await self._validate_request(request)
+            if rejection is not None:
+                await rejection(scope, receive, send)
+                return
+        
+        extra_headers = dict(self.security_headers)
+        if rate_limit is not None:
+            extra_headers.update(rate_limit.headers())
+        
+        async def send_with_headers(message: Message) -> None:
+            # Headers are added to the response start message; body chunks pass through untouched
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in extra_headers.items():
+                    headers[name] = value
+            await send(message)
+        
+        await self.app(scope, receive, send_with_headers)
+    
+    async def _validate_request(self, request: Request) -> Tuple[Optional[JSONResponse], Optional[RateLimitDecision]]:
+        """Rate limit and validate the request; returns an error response to send instead, if any"""
         # Rate limiting
         client_ip = self._get_client_ip(request)
-        if not self._check_rate_limit(client_ip):
-            logger.warning(f"Rate limit exceeded for IP: {client_ip}")
+        rate_limit = await self._check_rate_limit(request, client_ip)
+        if not rate_limit.allowed:
+            logger.warning(f"Rate limit exceeded for {rate_limit.key} (IP: {client_ip})")
             return JSONResponse(
                 status_code=429,
-                content={"error": "Rate limit exceeded", "retry_after": 60}
-            )
+                content={"error": "Rate limit exceeded", "retry_after": rate_limit.retry_after},
+                headers=rate_limit.headers(),
+            ), rate_limit
         
         # Content length validation
         if request.headers.get("content-length"):
-            content_length = int(request.headers["content-length"])
+            try:
+                content_length = int(request.headers["content-length"])
+            except ValueError:
+                return JSONResponse(status_code=400, content={"error": "Invalid Content-Length header"}), rate_limit
             if content_length > self.max_upload_size:
                 logger.warning(f"Upload size exceeded: {content_length} bytes from {client_ip}")
                 return JSONResponse(
                     status_code=413,
                     content={"error": "Request entity too large"}
-                )
+                ), rate_limit
         
         # Input validation for query parameters
         for param, value in request.query_params.items():
@@ -61,7 +136,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                 return JSONResponse(
                     status_code=400,
                     content={"error": "Invalid input detected", "parameter": param}
-                )
+                ), rate_limit
         
         # Input validation for path parameters
         if self._contains_dangerous_pattern(str(request.url.path)):
@@ -69,26 +144,9 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             return JSONResponse(
                 status_code=400,
                 content={"error": "Invalid path detected"}
-            )
-        
-        response = await call_next(request)
+            ), rate_limit
         
-        # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Content-Security-Policy"] = (
-            "default-src 'self'; "
-            "script-src 'self'; "
-            "style-src 'self' 'unsafe-inline'; "
-            "img-src 'self' data: https:; "
-            "connect-src 'self' https://api.openai.com https://*.azure.com; "
-            "frame-ancestors 'none';"
-        )
-        
-        return response
+        return None, rate_limit
     
     def _get_client_ip(self, request: Request) -> str:
         """Get client IP address considering proxy headers"""
@@ -100,44 +158,63 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             return real_ip
         return request.client.host if request.client else "unknown"
     
-    def _check_rate_limit(self, client_ip: str) -> bool:
-        """Check if client has exceeded rate limit"""
-        now = time.time()
-        minute_ago = now - 60
-        
-        # Clean old entries
-        while self.rate_limit_cache[client_ip] and self.rate_limit_cache[client_ip][0] < minute_ago:
-            self.rate_limit_cache[client_ip].popleft()
-        
-        # Check current count
-        if len(self.rate_limit_cache[client_ip]) >= self.max_requests_per_minute:
-            return False
-        
-        # Add current request
-        self.rate_limit_cache[client_ip].append(now)
-        return True
+    async def _check_rate_limit(self, request: Request, client_ip: str) -> RateLimitDecision:
+        """Spend a token for this request from the caller's (and route's) buckets"""
+        return await self.rate_limiter.check(request.url.path, client_ip, self._get_user_id(request))
+    
+    def _get_user_id(self, request: Request) -> Optional[str]:
+        """User id from a valid bearer token; unauthenticated callers are limited by IP"""
+        auth = request.headers.get("authorization", "")
+        if not auth.lower().startswith("bearer "):
+            return None
+        try:
+            return decode_token(auth[7:].strip()).get("sub")
+        except TokenDecodeError:
+            return None
     
     def _contains_dangerous_pattern(self, text: str) -> bool:
         """Check if text contains dangerous patterns"""
         return bool(self.pattern_regex.search(text))
 
-class SecureResponseMiddleware(BaseHTTPMiddleware):
-    """Middleware to sanitize error responses and prevent information disclosure"""
+class SecureResponseMiddleware:
+    """Middleware to sanitize error responses and prevent information disclosure.
     
-    async def dispatch(self, request: Request, call_next):
+    The generic 500 is only sent if the app failed before starting its response;
+    once headers are on the wire the exception is re-raised for the server to
+    abort the connection.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        response_started = False
+        
+        async def send_tracking_start(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+        
         try:
-            response = await call_next(request)
-            return response
-        except Exception as e:
+            await self.app(scope, receive, send_tracking_start)
+        except Exception:
             # Log the full error for debugging
-            logger.exception(f"Unhandled exception in {request.url.path}")
+            logger.exception(f"Unhandled exception in {scope['path']}")
+            if response_started:
+                raise
             
             # Return generic error to client
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=500,
                 content={
                     "error": "Internal server error",
                     "message": "An unexpected error occurred. Please try again later.",
-                    "request_id": request.headers.get("x-request-id", "unknown")
+                    "request_id": get_header(scope, "x-request-id") or "unknown"
                 }
             )
+            await response(scope, receive, send)
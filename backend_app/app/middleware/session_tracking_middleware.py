@@ -4,15 +4,19 @@ This module exposes a single middleware class that requires fully constructed
 service dependencies at initialization time. The FastAPI application should
 resolve those dependencies (typically through providers in
 ``app.core.dependencies``) and supply them via ``app.add_middleware``.
+
+The middleware is plain ASGI rather than ``BaseHTTPMiddleware``: it never wraps
+or buffers the response, and skips health probes and unauthenticated requests
+before doing any work.
 """
 
 from datetime import datetime, timezone
 from typing import Dict, Any, TYPE_CHECKING
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from fastapi import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from ..utils.logging_config import get_logger
+from .asgi_helpers import has_bearer_token, is_probe_path
 
 if TYPE_CHECKING:
     from ..services.monitoring.audit_logging_service import AuditLoggingService
@@ -20,7 +24,7 @@ if TYPE_CHECKING:
     from ..services.auth.authentication_service import AuthenticationService
 
 
-class SessionTrackingMiddleware(BaseHTTPMiddleware):
+class SessionTrackingMiddleware:
     """
     Lightweight middleware for session tracking coordination.
     
@@ -47,7 +51,7 @@ class SessionTrackingMiddleware(BaseHTTPMiddleware):
         audit_service: "AuditLoggingService",
         auth_service: "AuthenticationService",
     ):
-        super().__init__(app)
+        self.app = app
         self.logger = get_logger(__name__)
         self.session_service = session_service
         self.audit_service = audit_service
@@ -55,15 +59,24 @@ class SessionTrackingMiddleware(BaseHTTPMiddleware):
         
         self.logger.info("🔍 Session tracking middleware initialized with proper DI")
 
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
         Main middleware coordination logic.
         
-        Coordinates between HTTP request and specialized services.
+        Probe/docs paths and requests without a bearer token go straight to the
+        app. Otherwise session tracking runs before the app is called; for audit
+        endpoints ``send`` is wrapped only to read the response status, so the
+        body is never buffered and streaming responses are unaffected.
         """
+        if scope["type"] != "http" or is_probe_path(scope["path"]) or not has_bearer_token(scope):
+            await self.app(scope, receive, send)
+            return
+
+        # Headers-only view of the request; the body is never read here
+        request = Request(scope)
         start_time = datetime.now(timezone.utc)
         user_info = None
-        session_id = None
+        audited = False
         
         try:
             # Extract user information using AuthenticationService
@@ -73,10 +86,10 @@ class SessionTrackingMiddleware(BaseHTTPMiddleware):
                 # Extract request metadata
                 ip_address = self.auth_service.extract_ip_address(request)
                 user_agent = self.auth_service.extract_user_agent(request)
-                request_path = str(request.url.path)
+                request_path = scope["path"]
                 
                 # Track session activity using SessionTrackingService
-                session_id = await self.session_service.get_or_create_session(
+                await self.session_service.get_or_create_session(
                     user_id=user_info["id"],
                     user_email=user_info.get("email"),
                     request_path=request_path,
@@ -86,26 +99,32 @@ class SessionTrackingMiddleware(BaseHTTPMiddleware):
                 )
                 
                 # Check if this endpoint should be audited using AuditLoggingService
-                if self.audit_service.is_audit_endpoint(request_path):
+                audited = self.audit_service.is_audit_endpoint(request_path)
+                if audited:
                     await self._log_audit_event(
                         user_info, request, ip_address, user_agent, start_time
                     )
-            
-            # Process the actual request
-            response = await call_next(request)
-            
-            # Log completion for audit endpoints if user is authenticated
-            if user_info and self.audit_service.is_audit_endpoint(str(request.url.path)):
-                await self._log_audit_completion(
-                    user_info, request, response, start_time
-                )
-            
-            return response
-            
         except Exception as e:
+            # Don't let tracking errors break the request
             self.logger.error("Session tracking middleware error: %s", e, exc_info=True)
-            # Don't let middleware errors break the application
-            return await call_next(request)
+        
+        if not audited:
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = 500
+        
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Log completion for audit endpoints, including failed requests
+            await self._log_audit_completion(user_info, request, status_code, start_time)
 
     async def _log_audit_event(
         self,
@@ -139,7 +158,7 @@ class SessionTrackingMiddleware(BaseHTTPMiddleware):
         self,
         user_info: Dict[str, Any],
         request: Request,
-        response: Response,
+        status_code: int,
         start_time: datetime
     ) -> None:
         """Log completion of audit-worthy operations."""
@@ -155,7 +174,7 @@ class SessionTrackingMiddleware(BaseHTTPMiddleware):
                 user_email=user_info.get("email"),
                 endpoint=str(request.url.path),
                 method=request.method,
-                status_code=response.status_code,
+                status_code=status_code,
                 ip_address=ip_address,
                 user_agent=user_agent,
                 processing_time_ms=processing_time_ms,
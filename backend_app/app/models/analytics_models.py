@@ -96,6 +96,7 @@ class SystemHealthResponse(BaseModel):
     timestamp: str
     metrics: SystemHealthMetrics
     services: Dict[str, str]  # service_name: status
+    circuit_breakers: Dict[str, Dict[str, Any]] = {}  # endpoint: breaker state and window metrics
 
 
 class JobAnalyticsResponse(BaseModel):
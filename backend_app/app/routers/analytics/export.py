@@ -1,6 +1,6 @@
 import logging
 from fastapi import APIRouter, Depends, Query
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from typing import Optional
 from ...core.dependencies import require_analytics_access, get_export_service, get_error_handler
 from ...services.interfaces import ExportServiceInterface
@@ -28,6 +28,15 @@ def _handle_internal_error(
         extra=details,
     )
 
+def _stream_export(result: dict) -> StreamingResponse:
+    """Send a streamed export as a file download."""
+    return StreamingResponse(
+        result["stream"],
+        media_type=result["content_type"],
+        headers={"Content-Disposition": f'attachment; filename="{result["filename"]}"'},
+    )
+
+
 @router.get("/system/csv")
 async def export_system_csv(
     days: int = Query(30, ge=1, le=365),
@@ -67,12 +76,7 @@ async def export_system_csv(
                 },
             )
 
-        return FileResponse(
-            path=result["file_path"],
-            media_type=result["content_type"],
-            filename=result["filename"],
-            background=lambda: export_service.cleanup_temp_file(result["file_path"]),
-        )
+        return _stream_export(result)
     except ApplicationError:
         raise
     except Exception as exc:
@@ -117,12 +121,7 @@ async def export_users(
                 },
             )
 
-        return FileResponse(
-            path=result["file_path"],
-            media_type=result["content_type"],
-            filename=result["filename"],
-            background=lambda: export_service.cleanup_temp_file(result["file_path"]),
-        )
+        return _stream_export(result)
     except ApplicationError:
         raise
     except Exception as exc:
@@ -157,7 +156,6 @@ async def export_user_pdf(
             path=result["file_path"],
             media_type=result["content_type"],
             filename=result["filename"],
-            background=lambda: export_service.cleanup_temp_file(result["file_path"]),
         )
     except ApplicationError:
         raise
@@ -8,6 +8,7 @@ from fastapi import (
     APIRouter,
     Depends,
     Query,
+    Request,
     Response,
 )
 from pydantic import BaseModel
@@ -18,6 +19,8 @@ from ...core.dependencies import (
     require_analytics_access,
     require_admin,
     get_cosmos_service,
+    get_analytics_service,
+    get_analytics_response_cache,
     CosmosService,
     get_error_handler,
 )
@@ -33,6 +36,7 @@ from ...models.analytics_models import (
     UserMinuteRecord
 )
 from ...models.permissions import PermissionLevel, has_permission_level
+from ...utils.response_cache import ResponseCache, etag_matches
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -86,15 +90,60 @@ def _query_container(
         )
 
 
+async def _serve_cached(
+    cache: ResponseCache,
+    request: Request,
+    response: Response,
+    namespace: str,
+    params: Dict[str, Any],
+    compute,
+):
+    """Serve an analytics payload through the shared time-bucketed cache.
+
+    Identical requests within a bucket share one computation, and clients that
+    send the current ETag in ``If-None-Match`` get an empty 304.
+    """
+    cached = await cache.get_or_compute(namespace, params, compute)
+    max_age = 0 if cached.stale else cache.seconds_until_refresh()
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": f"private, max-age={max_age}, stale-while-revalidate={cache.bucket_seconds}",
+        "Vary": "Authorization",
+    }
+    if etag_matches(request, cached.etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return cached.value
+
+
 @router.get("/users/{user_id}/analytics", response_model=UserAnalyticsResponse)
 async def get_user_analytics(
     user_id: str,
+    request: Request,
+    response: Response,
     days: int = Query(30, ge=1, le=365),
     current_user: Dict[str, Any] = Depends(require_analytics_access),
     cosmos_service: CosmosService = Depends(get_cosmos_service),
+    response_cache: ResponseCache = Depends(get_analytics_response_cache),
     error_handler: ErrorHandler = Depends(get_error_handler),
 ):
     """Get analytics for a specific user (Admin only)"""
+    return await _serve_cached(
+        response_cache,
+        request,
+        response,
+        "user-analytics",
+        {"user_id": user_id, "days": days},
+        lambda: _compute_user_analytics(user_id, days, cosmos_service, error_handler),
+    )
+
+
+async def _compute_user_analytics(
+    user_id: str,
+    days: int,
+    cosmos_service: CosmosService,
+    error_handler: ErrorHandler,
+) -> UserAnalyticsResponse:
     try:
         end_time = datetime.now(timezone.utc)
         start_time = end_time - timedelta(days=days)
@@ -160,12 +209,31 @@ async def get_user_analytics(
 @router.get("/users/{user_id}/session-summary")
 async def get_user_session_summary(
     user_id: str,
+    request: Request,
+    response: Response,
     days: int = Query(default=30, description="Number of days to analyze"),
     current_user: Dict[str, Any] = Depends(require_admin),
     cosmos_service: CosmosService = Depends(get_cosmos_service),
+    response_cache: ResponseCache = Depends(get_analytics_response_cache),
     error_handler: ErrorHandler = Depends(get_error_handler),
 ):
     """Get high-level session summary for a user"""
+    return await _serve_cached(
+        response_cache,
+        request,
+        response,
+        "session-summary",
+        {"user_id": user_id, "days": days},
+        lambda: _compute_user_session_summary(user_id, days, cosmos_service, error_handler),
+    )
+
+
+async def _compute_user_session_summary(
+    user_id: str,
+    days: int,
+    cosmos_service: CosmosService,
+    error_handler: ErrorHandler,
+) -> Dict[str, Any]:
     try:
         # Query sessions for the user in the specified timeframe
         cutoff_time = datetime.now(timezone.utc) - timedelta(days=days)
@@ -240,12 +308,31 @@ async def get_user_session_summary(
 @router.get("/users/{user_id}/session-analytics")
 async def get_user_session_analytics(
     user_id: str,
+    request: Request,
+    response: Response,
     days: int = Query(default=30, description="Number of days to analyze"),
     current_user: Dict[str, Any] = Depends(require_admin),
     cosmos_service: CosmosService = Depends(get_cosmos_service),
+    response_cache: ResponseCache = Depends(get_analytics_response_cache),
     error_handler: ErrorHandler = Depends(get_error_handler),
 ):
     """Get comprehensive session analytics for a user"""
+    return await _serve_cached(
+        response_cache,
+        request,
+        response,
+        "session-analytics",
+        {"user_id": user_id, "days": days},
+        lambda: _compute_user_session_analytics(user_id, days, cosmos_service, error_handler),
+    )
+
+
+async def _compute_user_session_analytics(
+    user_id: str,
+    days: int,
+    cosmos_service: CosmosService,
+    error_handler: ErrorHandler,
+) -> Dict[str, Any]:
     try:
         # Query sessions for the user in the specified timeframe
         cutoff_time = datetime.now(timezone.utc) - timedelta(days=days)
@@ -741,12 +828,36 @@ async def get_user_minutes(
 
 @router.get("/system")
 async def get_system_analytics(
+    request: Request,
+    response: Response,
     days: int = Query(30, ge=1, le=365),
     current_user: Dict[str, Any] = Depends(require_admin),
     cosmos_service: CosmosService = Depends(get_cosmos_service),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
+    response_cache: ResponseCache = Depends(get_analytics_response_cache),
     error_handler: ErrorHandler = Depends(get_error_handler),
 ):
-    """Get system-wide analytics (Admin only)"""
+    """Get system-wide analytics (Admin only)
+
+    Totals are read from the daily analytics rollups, so cost scales with `days`
+    rather than with the number of recorded events.
+    """
+    return await _serve_cached(
+        response_cache,
+        request,
+        response,
+        "system",
+        {"days": days},
+        lambda: _compute_system_analytics(days, cosmos_service, analytics_service, error_handler),
+    )
+
+
+async def _compute_system_analytics(
+    days: int,
+    cosmos_service: CosmosService,
+    analytics_service: AnalyticsService,
+    error_handler: ErrorHandler,
+) -> Dict[str, Any]:
     try:
         end_time = datetime.now(timezone.utc)
         start_time = end_time - timedelta(days=days)
@@ -760,102 +871,14 @@ async def get_system_analytics(
                 "end_date": end_time.isoformat(),
                 "analytics": {
                     "records": [],
+                    "daily": [],
                     "total_minutes": 0.0,
                     "total_jobs": 0,
                     "active_users": 0
                 }
             }
-        
-        # Query analytics data for total system metrics.
-        # Analytics documents use `timestamp` for creation; some legacy docs use `created_at`.
-        # Query both fields to be robust for either shape.
-        analytics_query = (
-            "SELECT * FROM c WHERE (IS_DEFINED(c.timestamp) AND c.timestamp >= @start_time) "
-            "OR (IS_DEFINED(c.created_at) AND c.created_at >= @start_time)"
-        )
-        parameters = [
-            {"name": "@start_time", "value": start_time.isoformat()}
-        ]
-        
-        try:
-            # Get analytics records
-            analytics_container = cosmos_service.get_container("analytics")
-            analytics_items = _query_container(
-                analytics_container,
-                action="query system analytics records",
-                query=analytics_query,
-                parameters=parameters,
-                details={"days": days},
-                error_handler=error_handler,
-            )
-            logger.debug("System analytics: fetched %d analytics records", len(analytics_items))
-        except ApplicationError as analytics_error:
-            logger.warning(
-                "Error querying analytics container",
-                extra={
-                    "context": {
-                        "days": days,
-                        "error": str(analytics_error),
-                    }
-                },
-            )
-            analytics_items = []
-        
-        # Calculate total minutes and jobs
-        total_minutes = 0.0
-        total_jobs = len(analytics_items)
-        for item in analytics_items:
-            minutes = item.get("audio_duration_minutes")
-            if isinstance(minutes, (int, float)):
-                total_minutes += minutes
-        
-        # Get active users from sessions
-        active_users = 0
-        try:
-            # Query for active sessions in the last 24 hours
-            recent_cutoff = datetime.now(timezone.utc) - timedelta(hours=24)
-            session_query = """
-            SELECT DISTINCT c.user_id 
-            FROM c 
-            WHERE ((IS_DEFINED(c.last_activity) AND c.last_activity >= @recent_cutoff) OR (IS_DEFINED(c.last_heartbeat) AND c.last_heartbeat >= @recent_cutoff))
-            """
-            session_parameters = [
-                {"name": "@recent_cutoff", "value": recent_cutoff.isoformat()}
-            ]
 
-            try:
-                sessions_container = cosmos_service.get_container("user_sessions")
-                active_sessions = _query_container(
-                    sessions_container,
-                    action="query active user sessions",
-                    query=session_query,
-                    parameters=session_parameters,
-                    details={"days": days},
-                    error_handler=error_handler,
-                )
-                active_users = len(active_sessions)
-                logger.debug("System analytics: found %d active session rows", len(active_sessions))
-            except ApplicationError as container_error:
-                logger.warning(
-                    "Sessions container not available for active user count",
-                    extra={"context": {"days": days, "error": str(container_error)}}
-                )
-                active_users = 0
-        except Exception as e:
-            logger.warning(f"Error getting active users: {str(e)}")
-            active_users = 0
-        
-        return {
-            "period_days": days,
-            "start_date": start_time.isoformat(),
-            "end_date": end_time.isoformat(),
-            "analytics": {
-                "records": analytics_items,
-                "total_minutes": total_minutes,
-                "total_jobs": total_jobs,
-                "active_users": active_users
-            }
-        }
+        return await analytics_service.get_system_analytics(days=days)
         
     except ApplicationError:
         raise
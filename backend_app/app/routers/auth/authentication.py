@@ -3,12 +3,12 @@ Authentication Router - Core authentication operations
 Handles login, logout, and token management
 """
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Dict, Any, Optional
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, Request
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from jwt.exceptions import InvalidTokenError, ExpiredSignatureError, InvalidAudienceError, InvalidIssuerError
-from passlib.context import CryptContext
 from pydantic import BaseModel
 import logging
 import uuid
@@ -27,7 +27,9 @@ from ...core.errors import (
     ErrorHandler,
     ValidationError,
 )
+from ...utils.async_utils import run_sync
 from ...utils.microsoft_token_validator import MicrosoftTokenValidator
+from ...utils.password_utils import verify_password_async
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -53,7 +55,6 @@ def _handle_internal_error(
         status_code=status_code,
         extra=details,
     )
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
@@ -66,12 +67,10 @@ class TokenData(BaseModel):
     email: str | None = None
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+@lru_cache(maxsize=4)
+def _get_token_validator(tenant_id: Optional[str], client_id: Optional[str]) -> MicrosoftTokenValidator:
+    """Share one validator per tenant/client so its JWKS key cache survives across logins."""
+    return MicrosoftTokenValidator(tenant_id=tenant_id, client_id=client_id)
 
 
 def create_access_token(data: dict, config: Any) -> str:
@@ -166,7 +165,8 @@ async def authenticate_user(
         )
     if not user:
         return False
-    if not verify_password(password, user["hashed_password"]):
+    # bcrypt is CPU-bound; verify on the password-hash executor, not the event loop
+    if not await verify_password_async(password, user["hashed_password"]):
         return False
     return user
 
@@ -253,9 +253,36 @@ async def login_for_access_token(
         _handle_internal_error(error_handler, "process login request", exc, details=details)
 
 
+async def _track_sso_login(
+    analytics_service: Any,
+    user: Dict[str, Any],
+    *,
+    tenant_id: Optional[str],
+    full_name: Optional[str],
+) -> None:
+    try:
+        await analytics_service.track_event(
+            event_type="user_login",
+            user_id=user["id"],
+            metadata={
+                "email": user["email"],
+                "login_method": "microsoft_sso",
+                "permission": user.get("permission", "User"),
+                "tenant_id": tenant_id,
+                "full_name": full_name,
+            },
+        )
+    except Exception as exc:
+        logger.warning(
+            "Failed to track Microsoft SSO login analytics: %s",
+            str(exc),
+        )
+
+
 @router.post("/microsoft-sso")
 async def microsoft_sso_auth(
     request: Request,
+    background_tasks: BackgroundTasks,
     cosmos_service: CosmosService = Depends(get_cosmos_service),
     analytics_service = Depends(get_analytics_service),
     error_handler: ErrorHandler = Depends(get_error_handler),
@@ -274,11 +301,8 @@ async def microsoft_sso_auth(
         except Exception as exc:
             _handle_internal_error(error_handler, "load authentication configuration", exc)
 
-        # Initialize Microsoft token validator with tenant and client ID validation
-        validator = MicrosoftTokenValidator(
-            tenant_id=config.microsoft_tenant_id,
-            client_id=config.microsoft_client_id,
-        )
+        # Shared Microsoft token validator with tenant and client ID validation
+        validator = _get_token_validator(config.microsoft_tenant_id, config.microsoft_client_id)
 
         # Extract user info from tokens with PROPER VALIDATION
         email = None
@@ -293,7 +317,8 @@ async def microsoft_sso_auth(
         if id_token:
             try:
                 # SECURE: Validate token signature, issuer, audience, expiration
-                decoded = validator.validate_id_token(id_token)
+                # JWKS lookups may hit the network, so validate off the event loop
+                decoded = await run_sync(validator.validate_id_token, id_token)
                 logger.info("ID token validated successfully")
             except ExpiredSignatureError:
                 raise ValidationError(
@@ -318,7 +343,7 @@ async def microsoft_sso_auth(
         elif access_token:
             try:
                 # SECURE: Validate access token
-                decoded = validator.validate_access_token(access_token)
+                decoded = await run_sync(validator.validate_access_token, access_token)
                 logger.info("Access token validated successfully")
             except ExpiredSignatureError:
                 raise ValidationError(
@@ -455,23 +480,15 @@ async def microsoft_sso_auth(
                 details={"email": email},
             )
 
-        try:
-            await analytics_service.track_event(
-                event_type="user_login",
-                user_id=user["id"],
-                metadata={
-                    "email": user["email"],
-                    "login_method": "microsoft_sso",
-                    "permission": user.get("permission", "User"),
-                    "tenant_id": tenant_id,
-                    "full_name": full_name,
-                },
-            )
-        except Exception as exc:
-            logger.warning(
-                "Failed to track Microsoft SSO login analytics: %s",
-                str(exc),
-            )
+        # Login analytics are best-effort and independent of the response, so
+        # record them after the response is sent instead of on the login path
+        background_tasks.add_task(
+            _track_sso_login,
+            analytics_service,
+            user,
+            tenant_id=tenant_id,
+            full_name=full_name,
+        )
 
         return {
             "status": 200,
@@ -15,6 +15,7 @@ from ...core.dependencies import (
 )
 from ...services.monitoring.audit_logging_service import AuditLoggingService as AuditService
 from .user_management import require_admin_user, require_user_view_access, require_user_edit_access
+from ...utils.permission_cache import get_permission_cache
 from ...models.permissions import PermissionLevel, PermissionCapability, get_user_capabilities
 from ...core.errors import (
     ApplicationError,
@@ -271,6 +272,18 @@ async def update_user_permission(
             extra={"user_id": user_id},
         )
 
+    # The user's old level lists are indexed by user; the new level's list never named them
+    try:
+        permission_cache = get_permission_cache()
+        await permission_cache.invalidate_user_cache(user_id)
+        await permission_cache.invalidate_permission_level_cache(new_permission)
+    except Exception as exc:
+        logger.warning(
+            "Failed to invalidate cached permissions for %s: %s",
+            user_id,
+            str(exc),
+        )
+
     try:
         action_details = {
             "old_permission": "unknown",
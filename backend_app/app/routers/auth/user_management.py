@@ -11,7 +11,7 @@ import uuid
 
 from app.core.config import get_config
 from app.core.dependencies import get_current_user, get_cosmos_service, get_error_handler
-from app.routers.auth.authentication import get_password_hash
+from app.utils.password_utils import get_password_hash_async
 from app.models.permissions import (
     PermissionLevel,
     has_permission_level,
@@ -253,7 +253,7 @@ async def register_user(
             "id": f"user_{timestamp}",
             "type": "user",
             "email": email,
-            "hashed_password": get_password_hash(password),
+            "hashed_password": await get_password_hash_async(password),
             "permission": PermissionLevel.USER.value,
             "created_at": datetime.now(timezone.utc).isoformat(),
             "updated_at": datetime.now(timezone.utc).isoformat(),
@@ -320,7 +320,7 @@ async def change_user_password(
     """
     Change user password. Admin only.
     """
-    hashed_password = get_password_hash(password_data.new_password)
+    hashed_password = await get_password_hash_async(password_data.new_password)
 
     update_data = {
         "hashed_password": hashed_password,
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from fastapi.responses import StreamingResponse
 import json
+import time
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
 import logging
@@ -102,13 +103,9 @@ async def create_refinement(
                     yield f"data: {json.dumps({'error':'job not found'})}\n\n"
                     return
 
-                # Prepare request payload
-                request_data = {
-                    "original_text": job.get("text_content", ""),
-                    "current_analysis": job.get("analysis_content", ""),
-                    "user_request": request.user_request,
-                    "conversation_history": job.get("refinement_history", [])
-                }
+                # Prepare request payload within the context token budget
+                request_data, context = await refinement_service.build_request_data(job, request.user_request)
+                started = time.monotonic()
 
                 buffer_parts = []
 
@@ -140,14 +137,12 @@ async def create_refinement(
                     "timestamp": __import__('datetime').datetime.now(__import__('datetime').timezone.utc).isoformat(),
                     "user_request": request.user_request,
                     "ai_response": ai_response,
-                    "status": final_result.get("status", "success") if isinstance(final_result, dict) else "success"
+                    "status": final_result.get("status", "success") if isinstance(final_result, dict) else "success",
+                    "latency_ms": round((time.monotonic() - started) * 1000, 1),
+                    "context_tokens": context.total_tokens,
                 }
 
-                if "refinement_history" not in job:
-                    job["refinement_history"] = []
-                job["refinement_history"].append(refinement_entry)
-                job["last_refined_at"] = __import__('datetime').datetime.now(__import__('datetime').timezone.utc).isoformat()
-                await refinement_service.cosmos.update_job_async(job_id, job)
+                await refinement_service.record_refinement(job, refinement_entry)
 
                 return
 
@@ -266,16 +261,20 @@ async def refine_analysis(
 @router.get("/{job_id}/refinements")
 async def get_refinement_history(
     job_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    before: Optional[int] = Query(None, ge=0, description="next_before cursor from the previous page"),
     current_user: dict = Depends(get_current_user),
     refinement_service: AnalysisRefinementService = Depends(get_analysis_refinement_service),
     permissions: JobPermissions = Depends(get_job_permissions),
     error_handler: ErrorHandler = Depends(get_error_handler),
 ):
     """
-    Get refinement history for a job.
+    Get refinement history for a job, newest page first.
     
     Args:
         job_id: ID of the job
+        limit: Maximum number of turns in the page
+        before: Cursor returned as ``next_before`` by the previous page
         current_user: Current user ID from auth
         refinement_service: Analysis refinement service
         permissions: Job permissions service
@@ -291,7 +290,9 @@ async def get_refinement_history(
         if not has_access:
             raise PermissionError("You don't have permission to access this job")
 
-        result = await refinement_service.get_refinement_history(job_id, current_user["id"])
+        result = await refinement_service.get_refinement_history(
+            job_id, current_user["id"], limit=limit, before=before
+        )
         
         if result["status"] == "error":
             if "not found" in result["message"]:
@@ -305,7 +306,8 @@ async def get_refinement_history(
             "status": "success",
             "job_id": job_id,
             "refinement_history": result.get("refinement_history", []),
-            "total_refinements": result.get("total_refinements", 0)
+            "total_refinements": result.get("total_refinements", 0),
+            "next_before": result.get("next_before"),
         }
         
     except ApplicationError:
@@ -1,8 +1,9 @@
-from typing import Optional, Dict, Any
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import StreamingResponse
-from datetime import datetime, timezone
+from typing import AsyncIterator, Optional, Dict, Any
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
+from datetime import datetime, timedelta, timezone
 import logging
+import zlib
 from pydantic import BaseModel
 
 from ...core.dependencies import (
@@ -15,21 +16,24 @@ from ...core.dependencies import (
     get_config,
     AppConfig,
     get_error_handler,
+    get_permission_query_optimizer,
 )
 from ...core.errors import ApplicationError, ErrorCode, ErrorHandler, PermissionError, ResourceNotFoundError, ResourceNotReadyError, ValidationError
 from ...services.jobs import JobService
 from ...services.jobs import check_job_access
 from ...services.jobs.job_management_service import JobManagementService
+from ...services.jobs.job_service import job_etag, job_summary_select
 from ...services.jobs.job_sharing_service import JobSharingService
-from ...services.storage.blob_service import StorageService
+from ...services.storage.blob_service import RangeNotSatisfiableError, StorageService, parse_byte_range
 from ...services.interfaces import AnalyticsServiceInterface, StorageServiceInterface
 from fastapi import File, UploadFile, BackgroundTasks, Form
 import json
-import tempfile, shutil, os
+import os
 from ...services.jobs.job_permissions import JobPermissions
 from ...services.jobs.job_management_service import JobManagementService
 from ...services.analytics.analytics_service import AnalyticsService
-from ...utils.file_utils import FileUtils
+from ...utils.permission_queries import PermissionQueryOptimizer
+from ...utils.response_cache import check_not_modified
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +60,27 @@ def _handle_internal_error(
     )
 
 
+async def _attach_owner_permissions(
+    jobs: list,
+    current_user: Dict[str, Any],
+    permission_optimizer: PermissionQueryOptimizer,
+) -> None:
+    """Set ``user_permission`` (the owner's permission level) on each job.
+
+    The caller's own permission is already known; every other owner is resolved
+    in one batched, cached lookup rather than one query per job.
+    """
+    known = {current_user.get("id"): current_user.get("permission")}
+    others = {job.get("user_id") for job in jobs if job.get("user_id") not in known}
+    if others:
+        try:
+            known.update(await permission_optimizer.bulk_check_permissions(list(others)))
+        except Exception:
+            logger.warning("Could not resolve job owner permissions", exc_info=True, extra={"owner_count": len(others)})
+    for job in jobs:
+        job["user_permission"] = known.get(job.get("user_id"))
+
+
 @router.get("/jobs")
 async def get_jobs(
     job_id: Optional[str] = Query(None),
@@ -64,6 +89,7 @@ async def get_jobs(
     offset: int = Query(0, ge=0),
     current_user: Dict[str, Any] = Depends(get_current_user),
     job_svc: JobService = Depends(get_job_service),
+    permission_optimizer: PermissionQueryOptimizer = Depends(get_permission_query_optimizer),
     error_handler: ErrorHandler = Depends(get_error_handler),
 ) -> Dict[str, Any]:
     # Build a minimal query using provided filters. This keeps behaviour close to legacy.
@@ -77,7 +103,7 @@ async def get_jobs(
         can_view_all = False
 
         # Build query string and parameters for Cosmos. Use async_query_jobs to avoid blocking.
-        query = "SELECT * FROM c WHERE c.type = 'job' AND (NOT IS_DEFINED(c.deleted) OR c.deleted = false)"
+        query = job_summary_select() + " FROM c WHERE c.type = 'job' AND (NOT IS_DEFINED(c.deleted) OR c.deleted = false)"
         params = []
         if job_id:
             query += " AND c.id = @job_id"
@@ -107,9 +133,9 @@ async def get_jobs(
 
         for job in jobs:
             job["is_owned"] = job.get("user_id") == current_user["id"]
-            job["user_permission"] = job_svc.cosmos.get_user_permission(job.get("user_id")) if hasattr(job_svc.cosmos, 'get_user_permission') else None
             job["shared_with_count"] = len(job.get("shared_with", []))
-            job_svc.enrich_job_file_urls(job)
+        await _attach_owner_permissions(jobs, current_user, permission_optimizer)
+        job_svc.enrich_jobs_file_urls(jobs)
 
         return {"status": 200, "count": total, "jobs": jobs}
     except ApplicationError:
@@ -131,22 +157,26 @@ async def get_jobs(
 @router.get("/jobs/{job_id}")
 async def get_job_by_id(
     job_id: str,
+    request: Request,
+    response: Response,
     current_user: Dict[str, Any] = Depends(get_current_user),
     job_svc: JobService = Depends(get_job_service),
+    permission_optimizer: PermissionQueryOptimizer = Depends(get_permission_query_optimizer),
     error_handler: ErrorHandler = Depends(get_error_handler),
 ) -> Dict[str, Any]:
+    """Get one job. Clients polling for status should send ``If-None-Match`` to get 304s."""
     try:
-        job = job_svc.get_job(job_id)
+        job = await job_svc.async_read_job(job_id)
         if not job:
             raise ResourceNotFoundError(f"Job {job_id} not found")
         if not check_job_access(job, current_user, "view"):
             raise PermissionError("Access denied to job")
+        # Unchanged jobs skip the owner lookup and SAS signing below
+        not_modified = check_not_modified(request, response, job_etag(job, current_user["id"]))
+        if not_modified is not None:
+            return not_modified
         job["is_owned"] = job.get("user_id") == current_user["id"]
-        job["user_permission"] = (
-            job_svc.cosmos.get_user_permission(job.get("user_id"))
-            if hasattr(job_svc.cosmos, "get_user_permission")
-            else None
-        )
+        await _attach_owner_permissions([job], current_user, permission_optimizer)
         job["shared_with_count"] = len(job.get("shared_with", []))
         job_svc.enrich_job_file_urls(job)
         return {"status": 200, "job": job}
@@ -164,16 +194,76 @@ async def get_job_by_id(
         )
 
 
+# Signed transcript URLs must not be cached by the browser or intermediaries beyond their lifetime
+NO_STORE_HEADERS = {"Cache-Control": "no-store"}
+
+
+async def _gunzip(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+async def _proxy_transcript(request: Request, storage_service: StorageService, blob_url: str) -> Response:
+    """Serve a stored transcript through the API, honouring Range and gzip-encoded blobs.
+
+    A gzip blob is passed on compressed to clients that accept gzip (ranges
+    then apply to the compressed bytes); other clients get it decoded in full.
+    """
+    accepts_gzip = "gzip" in request.headers.get("accept-encoding", "").lower()
+    byte_range = parse_byte_range(request.headers.get("range"))
+    headers = {"Accept-Ranges": "bytes", "Vary": "Accept-Encoding"}
+    try:
+        download = await storage_service.download_blob_range(
+            blob_url, *(byte_range or (None, None))
+        )
+    except RangeNotSatisfiableError as e:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{e.size}"})
+
+    media_type = download.content_type or "text/plain; charset=utf-8"
+    if download.content_encoding == "gzip" and not accepts_gzip:
+        if byte_range is not None:
+            # Ranges of the decoded text cannot be served without reading the blob from the start
+            download = await storage_service.download_blob_range(blob_url)
+        headers["Accept-Ranges"] = "none"
+        return StreamingResponse(_gunzip(download.chunks), media_type=media_type, headers=headers)
+
+    if download.content_encoding:
+        headers["Content-Encoding"] = download.content_encoding
+    headers["Content-Length"] = str(download.length)
+    status_code = 200
+    if byte_range is not None:
+        status_code = 206
+        headers["Content-Range"] = download.content_range
+    return StreamingResponse(download.chunks, status_code=status_code, media_type=media_type, headers=headers)
+
+
 @router.get("/jobs/{job_id}/transcription")
 async def get_job_transcription(
     job_id: str,
+    request: Request,
+    response: Response,
+    delivery: Optional[str] = Query(None, pattern="^(redirect|url|proxy)$"),
     current_user: Dict[str, Any] = Depends(get_current_user),
     job_svc: JobService = Depends(get_job_service),
-    storage_service: StorageServiceInterface = Depends(get_storage_service),
+    storage_service: StorageService = Depends(get_storage_service),
+    config: AppConfig = Depends(get_config),
     error_handler: ErrorHandler = Depends(get_error_handler),
 ):
+    """The job's transcript, after the access check.
+
+    ``delivery`` (default ``TRANSCRIPT_DELIVERY``) picks how a stored transcript
+    reaches the client: ``redirect`` answers 307 to a short-lived read-only SAS
+    URL, ``url`` returns that URL and its expiry as JSON, and ``proxy`` streams
+    the blob through the API. Signing failures fall back to proxying.
+    """
     try:
-        job = job_svc.get_job(job_id)
+        job = await job_svc.async_read_job(job_id)
         if not job:
             raise ResourceNotFoundError("Job", job_id)
         if not check_job_access(job, current_user, "view"):
@@ -193,8 +283,24 @@ async def get_job_transcription(
                 {"job_id": job_id, "job_status": job.get("status")}
             )
 
-        stream = storage_service.stream_blob_content(transcription_url)
-        return StreamingResponse(stream, media_type="text/plain")
+        mode = delivery or config.transcript_delivery
+        if mode in ("redirect", "url"):
+            signed = storage_service.generate_read_url(
+                transcription_url, timedelta(seconds=config.transcript_url_lifetime_seconds)
+            )
+            if signed is not None:
+                url, expires_at = signed
+                if mode == "redirect":
+                    return RedirectResponse(url, status_code=307, headers=NO_STORE_HEADERS)
+                response.headers.update(NO_STORE_HEADERS)
+                return {
+                    "status": "success",
+                    "url": url,
+                    "expires_at": expires_at.replace(tzinfo=timezone.utc).isoformat(),
+                }
+            logger.warning(f"Could not sign transcript URL for job {job_id}; proxying instead")
+
+        return await _proxy_transcript(request, storage_service, transcription_url)
     except ApplicationError:
         raise
     except Exception as exc:
@@ -213,6 +319,20 @@ async def get_job_transcription(
 
 
 
+# Read size for streamed uploads; matches the staged block size so each read
+# maps onto at most one block upload
+UPLOAD_READ_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+async def _iter_upload_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    """Yield an UploadFile's content in chunks without blocking the event loop."""
+    while True:
+        chunk = await file.read(UPLOAD_READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
 @router.post("/jobs")
 async def create_job(
     file: UploadFile = File(...),
@@ -228,14 +348,10 @@ async def create_job(
     """Create a new job by uploading a media file.
     
     RESTful endpoint for job creation. Returns 201 Created with Location header.
+    The upload is streamed straight into blob storage; size, hash and audio
+    duration are derived on the fly.
     """
-    # Save upload to a temp file then call the service
-    tmp_dir = tempfile.mkdtemp(prefix="sonic_upload_")
-    tmp_path = os.path.join(tmp_dir, file.filename)
     try:
-        with open(tmp_path, "wb") as out_file:
-            shutil.copyfileobj(file.file, out_file)
-
         # Build metadata from optional form fields so the job document contains
         # prompt and pre-session form data for downstream processing (e.g. blob
         # trigger that looks for prompt_subcategory_id).
@@ -251,31 +367,16 @@ async def create_job(
             except Exception:
                 metadata["pre_session_form_data"] = pre_session_form_data
 
-        # Try to extract audio duration from the temp file and include in metadata
-        try:
-            file_ext = FileUtils.get_extension(file.filename) if file is not None else ""
-            if file_ext.lower() in FileUtils.AUDIO_EXTENSIONS:
-                audio_secs = FileUtils.get_audio_duration(tmp_path)
-                if audio_secs is not None:
-                    metadata["audio_duration_seconds"] = float(audio_secs)
-                    metadata["audio_duration_minutes"] = float(audio_secs) / 60.0
-                    logger.info(f"Extracted audio duration: {metadata['audio_duration_minutes']:.2f} minutes for upload")
-        except Exception:
-            logger.exception("Failed to extract audio duration before creating job")
-
-        created_job = job_svc.upload_and_create_job(tmp_path, file.filename, current_user, metadata=metadata)
+        created_job = await job_svc.async_stream_upload_and_create_job(
+            _iter_upload_chunks(file), file.filename, current_user, metadata=metadata
+        )
 
         # Track job creation analytics (best-effort)
         try:
-            file_size_bytes = 0
-            try:
-                file_size_bytes = os.path.getsize(tmp_path)
-            except Exception:
-                pass
             # Enrich analytics metadata with file and duration info when available
             analytics_meta = {
                 "has_file": True,
-                "file_size_bytes": file_size_bytes,
+                "file_size_bytes": created_job.get("file_size_bytes", 0),
                 "prompt_category_id": metadata.get("prompt_category_id"),
                 "prompt_subcategory_id": metadata.get("prompt_subcategory_id"),
                 "job_status": created_job.get("status"),
@@ -316,15 +417,6 @@ async def create_job(
                 "user_id": current_user.get("id"),
             },
         )
-    finally:
-        try:
-            # schedule cleanup
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
-            if os.path.exists(tmp_dir):
-                os.rmdir(tmp_dir)
-        except Exception:
-            pass
 
 
 @router.patch("/jobs/{job_id}")
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Depends
-from typing import Dict, Any, Optional, List
+from fastapi import APIRouter, Depends, Request, Response
+from typing import Callable, Dict, Any, Optional, List
 from pydantic import BaseModel, Field
 import logging
 from ...core.config import DatabaseError
@@ -19,9 +19,11 @@ from ...core.errors import (
     ResourceNotFoundError,
 )
 from ...models.permissions import PermissionLevel, has_permission_level
+from ...services.prompts.prompt_service import CATEGORY_TYPE, SUBCATEGORY_TYPE, prompts_etag
 from ...services.prompts.talking_points_service import TalkingPointSection
 from ...services.interfaces import PromptServiceInterface, TalkingPointsServiceInterface
 from ...utils.async_utils import run_sync
+from ...utils.response_cache import check_not_modified
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -112,6 +114,18 @@ def _handle_internal_error(
     )
 
 
+async def _not_modified_since(
+    request: Request,
+    response: Response,
+    load_versions: Callable[[], List[Dict[str, Any]]],
+) -> Optional[Response]:
+    """Answer a revalidation from document ids and ``_etag``s alone, before loading the documents."""
+    if not request.headers.get("if-none-match"):
+        return None
+    versions = await run_sync(load_versions)
+    return check_not_modified(request, response, prompts_etag(versions))
+
+
 class PromptKey(BaseModel):
     key: str
     prompt: str
@@ -199,6 +213,8 @@ async def create_category(
 
 @router.get("/categories", response_model=List[CategoryResponse])
 async def list_categories(
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user), 
     auth_context: str = Depends(require_user),
     prompt_service: PromptServiceInterface = Depends(get_prompt_service),
@@ -206,7 +222,13 @@ async def list_categories(
 ) -> List[Dict[str, Any]]:
     """List all prompt categories (requires CAN_VIEW_PROMPTS capability)."""
     try:
-        return await run_sync(prompt_service.list_categories)
+        not_modified = await _not_modified_since(
+            request, response, lambda: prompt_service.list_versions((CATEGORY_TYPE,))
+        )
+        if not_modified is not None:
+            return not_modified
+        categories = await run_sync(prompt_service.list_categories)
+        return check_not_modified(request, response, prompts_etag(categories)) or categories
     except ApplicationError:
         raise
     except Exception as exc:
@@ -221,6 +243,8 @@ async def list_categories(
 @router.get("/categories/{category_id}", response_model=CategoryResponse)
 async def get_category(
     category_id: str, 
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user), 
     auth_context: str = Depends(require_user),
     prompt_service: PromptServiceInterface = Depends(get_prompt_service),
@@ -230,7 +254,7 @@ async def get_category(
         item = await run_sync(prompt_service.get_category, category_id)
         if not item:
             raise ResourceNotFoundError("Prompt category", category_id)
-        return item
+        return check_not_modified(request, response, prompts_etag([item])) or item
     except ApplicationError:
         raise
     except Exception as exc:
@@ -357,6 +381,8 @@ async def create_subcategory(
 
 @router.get("/subcategories", response_model=List[SubcategoryResponse])
 async def list_subcategories(
+    request: Request,
+    response: Response,
     category_id: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
     auth_context: str = Depends(require_user),
@@ -365,7 +391,15 @@ async def list_subcategories(
     error_handler: ErrorHandler = Depends(get_error_handler),
 ) -> List[Dict[str, Any]]:
     try:
+        not_modified = await _not_modified_since(
+            request, response, lambda: prompt_service.list_versions((SUBCATEGORY_TYPE,), category_id)
+        )
+        if not_modified is not None:
+            return not_modified
         subs = await run_sync(prompt_service.list_subcategories, category_id)
+        not_modified = check_not_modified(request, response, prompts_etag(subs))
+        if not_modified is not None:
+            return not_modified
         subs = [ensure_talking_points_structure(s, talking_points_service) for s in subs]
         return subs
     except ApplicationError:
@@ -383,6 +417,8 @@ async def list_subcategories(
 @router.get("/subcategories/{subcategory_id}", response_model=SubcategoryResponse)
 async def get_subcategory(
     subcategory_id: str,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     auth_context: str = Depends(require_user),
     prompt_service: PromptServiceInterface = Depends(get_prompt_service),
@@ -393,6 +429,10 @@ async def get_subcategory(
         sub = await run_sync(prompt_service.get_subcategory, subcategory_id)
         if not sub:
             raise ResourceNotFoundError("Prompt subcategory", subcategory_id)
+        # Talking points are only normalised for clients without a current copy
+        not_modified = check_not_modified(request, response, prompts_etag([sub]))
+        if not_modified is not None:
+            return not_modified
         sub = ensure_talking_points_structure(sub, talking_points_service)
         return sub
     except ApplicationError:
@@ -506,14 +546,21 @@ class AllPromptsResponse(BaseModel):
 
 @router.get("/retrieve_prompts", response_model=AllPromptsResponse)
 async def retrieve_prompts(
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     auth_context: str = Depends(require_user),
     prompt_service: PromptServiceInterface = Depends(get_prompt_service),
     error_handler: ErrorHandler = Depends(get_error_handler),
 ) -> Dict[str, Any]:
     try:
-        data = await run_sync(prompt_service.retrieve_prompts_hierarchy)
-        return {"status": 200, "data": data}
+        not_modified = await _not_modified_since(
+            request, response, lambda: prompt_service.list_versions((CATEGORY_TYPE, SUBCATEGORY_TYPE))
+        )
+        if not_modified is not None:
+            return not_modified
+        data, etag = await run_sync(prompt_service.retrieve_prompts_hierarchy_with_etag)
+        return check_not_modified(request, response, etag) or {"status": 200, "data": data}
     except DatabaseError as exc:
         _handle_internal_error(
             error_handler,
@@ -5,6 +5,7 @@ Handles health checks, system status, monitoring, and uptime tracking
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, Optional
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 import logging
 
@@ -14,9 +15,11 @@ from ...core.dependencies import (
     require_analytics_access,
     get_cosmos_service,
     get_system_health_service,
+    get_memory_diagnostics_service,
     get_error_handler,
     CosmosService,
 )
+from ...core.health import Readiness, get_readiness
 from ...core.errors import (
     ApplicationError,
     ErrorCode,
@@ -24,8 +27,11 @@ from ...core.errors import (
     PermissionError,
 )
 from ...services.interfaces import SystemHealthServiceInterface
+from ...services.monitoring.memory_diagnostics_service import MemoryDiagnosticsService
 from ...models.permissions import PermissionLevel, has_permission_level
 from ...utils.async_utils import run_sync
+from ...utils.metrics import PROMETHEUS_CONTENT_TYPE, MetricsRegistry, get_metrics_registry
+from ...utils.query_metrics import QueryStatsTable, get_query_stats
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -92,3 +98,62 @@ async def get_system_health(
         )
 
 
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(
+    current_user: Dict[str, Any] = Depends(require_analytics_access),
+    registry: MetricsRegistry = Depends(get_metrics_registry),
+):
+    """Per-route latency, RU and thread pool metrics in Prometheus text format (Admin only)"""
+    _require_admin_permission(current_user, "view metrics")
+    return PlainTextResponse(registry.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/queries/top")
+async def get_top_queries(
+    limit: int = Query(20, ge=1, le=200),
+    sort_by: str = Query("total_ru", pattern="^(total_ru|max_ru|avg_ru|count|total_ms|max_ms)$"),
+    current_user: Dict[str, Any] = Depends(require_analytics_access),
+    query_stats: QueryStatsTable = Depends(get_query_stats),
+):
+    """Most expensive Cosmos query fingerprints seen by this worker (Admin only)"""
+    _require_admin_permission(current_user, "view query statistics")
+    return {
+        "sort_by": sort_by,
+        "tracked_fingerprints": len(query_stats),
+        "evictions": query_stats.evictions,
+        "queries": query_stats.top(limit, sort_by),
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+@router.get("/memory")
+async def get_memory_diagnostics(
+    readings: int = Query(60, ge=1, le=1000),
+    trace_seconds: Optional[float] = Query(None, gt=0, le=60),
+    current_user: Dict[str, Any] = Depends(require_analytics_access),
+    diagnostics: MemoryDiagnosticsService = Depends(get_memory_diagnostics_service),
+):
+    """RSS/GC readings, RSS trend and allocation growth sites sampled by this worker (Admin only)
+
+    ``trace_seconds`` runs an extra trace window of that length before answering.
+    """
+    _require_admin_permission(current_user, "view memory diagnostics")
+    if trace_seconds:
+        await diagnostics.trace_window(trace_seconds)
+    return {
+        **diagnostics.sampling_report(readings),
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+@router.get("/startup")
+async def get_startup_diagnostics(
+    current_user: Dict[str, Any] = Depends(require_analytics_access),
+    readiness: Readiness = Depends(get_readiness),
+):
+    """Startup and deferred check results with this worker's startup phase report (Admin only)"""
+    _require_admin_permission(current_user, "view startup diagnostics")
+    return {
+        **readiness.details(),
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+    }
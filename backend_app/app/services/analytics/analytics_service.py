@@ -1,17 +1,72 @@
 import uuid
 import logging
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from azure.cosmos.exceptions import CosmosHttpResponseError, CosmosResourceNotFoundError
 
 from ...utils.logging_config import get_logger
 from ...utils.async_utils import run_sync
 from ...core.dependencies import CosmosService
 from ...core.errors import QueryError, DatabaseConnectionError
+from .rollup_service import AnalyticsRollupService, rollup_cutover, rollup_day_key
+from .concurrency import concurrency_series, peak_concurrency, session_intervals
 
 
 logger = logging.getLogger(__name__)
 
+# Event types that represent a new billable job in the rollups. Completion events
+# carry the same audio metadata and must not be counted a second time.
+ROLLUP_JOB_EVENT_TYPES = ("job_created", "job_uploaded")
+
+# Raw records returned alongside system totals for the dashboard activity table.
+SYSTEM_RECORDS_LIMIT = 200
+
+# Trailing hours of the window covered by the per-minute concurrency series.
+CONCURRENCY_SERIES_HOURS = 24
+
+
+def _record_minutes(item: Dict[str, Any]) -> Optional[float]:
+    minutes = item.get('audio_duration_minutes')
+    if minutes is None and item.get('audio_duration_seconds') is not None:
+        try:
+            minutes = float(item.get('audio_duration_seconds')) / 60.0
+        except Exception:
+            return None
+    return float(minutes) if isinstance(minutes, (int, float)) else None
+
+
+def _daily_from_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-day totals in the shape of the day rollups, built from raw records."""
+    days: Dict[str, Dict[str, Any]] = {}
+    users: Dict[str, set] = {}
+    for record in records:
+        day = (record.get('timestamp') or '')[:10]
+        if not day:
+            continue
+        entry = days.setdefault(day, {'date': day, 'jobs': 0, 'minutes': 0.0, 'active_users': 0})
+        entry['jobs'] += 1
+        entry['minutes'] += float(record.get('audio_duration_minutes') or 0.0)
+        if record.get('user_id'):
+            users.setdefault(day, set()).add(record['user_id'])
+    for day, entry in days.items():
+        entry['active_users'] = len(users.get(day, ()))
+    return list(days.values())
+
+
+def _merge_daily(*series: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Combine per-day entries; a day counted partly raw and partly by its rollup is summed."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for entries in series:
+        for entry in entries:
+            existing = merged.get(entry['date'])
+            if existing is None:
+                merged[entry['date']] = dict(entry)
+            else:
+                existing['jobs'] += entry['jobs']
+                existing['minutes'] += entry['minutes']
+                existing['active_users'] = max(existing['active_users'], entry['active_users'])
+    return [merged[day] for day in sorted(merged)]
+
 
 class AnalyticsService:
     """Analytics service: lightweight, efficient accessors and trackers for analytics data.
@@ -27,6 +82,7 @@ class AnalyticsService:
         # quick availability flags to avoid repeated hasattr checks
         self._analytics_container_available = hasattr(self.cosmos_db, 'analytics_container') and self.cosmos_db.analytics_container is not None
         self._events_container_available = hasattr(self.cosmos_db, 'events_container') and self.cosmos_db.events_container is not None
+        self.rollups = AnalyticsRollupService(cosmos_service)
 
 
     def close(self):
@@ -148,6 +204,9 @@ class AnalyticsService:
                         extra={"analytics_id": analytics_id, "job_id": job_id}
                     )
 
+                if event_type in ROLLUP_JOB_EVENT_TYPES:
+                    await self.rollups.record_job(user_id, audio_minutes)
+
         except CosmosHttpResponseError as e:
             # Non-fatal; we already created the lightweight event
             self.logger.warning(
@@ -173,9 +232,45 @@ class AnalyticsService:
         start_dt = end_dt - timedelta(days=days)
         minutes_total = 0.0
         jobs_count = 0
+
+        # A single point read of the user's rollup covers the window from the
+        # moment the rollup was first written; only the part of the window before
+        # that (history from before rollups existed) is scanned from raw documents.
+        raw_end = end_dt
+        rollup = await self.rollups.get_user_rollup(user_id)
+        if rollup:
+            start_day = rollup_day_key(start_dt)
+            jobs_by_day = rollup.get("jobs_by_day") or {}
+            minutes_by_day = rollup.get("minutes_by_day") or {}
+            for day, count in jobs_by_day.items():
+                if day >= start_day and isinstance(count, (int, float)):
+                    jobs_count += int(count)
+                    minutes_total += float(minutes_by_day.get(day) or 0.0)
+            first_day = min([*jobs_by_day, *(rollup.get("active_days") or {})], default=None)
+            raw_end = min(rollup_cutover(rollup.get("created_at"), first_day) or end_dt, end_dt)
+
+        if raw_end > start_dt:
+            raw_minutes, raw_jobs = await self._scan_user_records(user_id, start_dt, raw_end, days)
+            minutes_total += raw_minutes
+            jobs_count += raw_jobs
+
+        avg = (minutes_total / jobs_count) if jobs_count > 0 else 0.0
+        return {
+            "user_id": user_id,
+            "period_days": days,
+            "start_date": start_dt.isoformat(),
+            "end_date": end_dt.isoformat(),
+            "analytics": {"transcription_stats": {"total_minutes": float(minutes_total), "total_jobs": int(jobs_count), "average_job_duration": float(avg)}}
+        }
+
+    async def _scan_user_records(self, user_id: str, start_dt: datetime, end_dt: datetime, days: int) -> Tuple[float, int]:
+        """Sum a user's raw analytics documents in ``[start_dt, end_dt)``, falling back to job documents."""
+        minutes_total = 0.0
+        jobs_count = 0
+
         if self._analytics_container_available:
             try:
-                query = "SELECT c.audio_duration_minutes, c.audio_duration_seconds FROM c WHERE c.user_id = @user_id AND c.timestamp >= @start AND c.timestamp <= @end"
+                query = "SELECT c.audio_duration_minutes, c.audio_duration_seconds FROM c WHERE c.user_id = @user_id AND c.timestamp >= @start AND c.timestamp < @end"
                 params = [{"name": "@user_id", "value": user_id}, {"name": "@start", "value": start_dt.isoformat()}, {"name": "@end", "value": end_dt.isoformat()}]
                 items = await run_sync(lambda: list(self.cosmos_db.analytics_container.query_items(query=query, parameters=params, enable_cross_partition_query=True)))
                 for it in items:
@@ -210,9 +305,14 @@ class AnalyticsService:
                     WHERE c.type = 'job'
                     AND c.user_id = @user_id 
                     AND c.created_at >= @start_ms
+                    AND c.created_at < @end_ms
                     AND (NOT IS_DEFINED(c.deleted) OR c.deleted = false)
                 """
-                params2 = [{"name": "@user_id", "value": user_id}, {"name": "@start_ms", "value": int(start_dt.timestamp() * 1000)}]
+                params2 = [
+                    {"name": "@user_id", "value": user_id},
+                    {"name": "@start_ms", "value": int(start_dt.timestamp() * 1000)},
+                    {"name": "@end_ms", "value": int(end_dt.timestamp() * 1000)},
+                ]
                 items = await run_sync(lambda: list(self.cosmos_db.jobs_container.query_items(query=q2, parameters=params2, enable_cross_partition_query=True)))
                 for it in items:
                     m = it.get("audio_duration_minutes")
@@ -237,14 +337,7 @@ class AnalyticsService:
                     extra={"user_id": user_id, "days": days}
                 )
 
-        avg = (minutes_total / jobs_count) if jobs_count > 0 else 0.0
-        return {
-            "user_id": user_id,
-            "period_days": days,
-            "start_date": start_dt.isoformat(),
-            "end_date": end_dt.isoformat(),
-            "analytics": {"transcription_stats": {"total_minutes": float(minutes_total), "total_jobs": int(jobs_count), "average_job_duration": float(avg)}}
-        }
+        return minutes_total, jobs_count
 
     async def get_user_minutes_records(self, user_id: str, days: int = 30) -> Dict[str, Any]:
         end_dt = datetime.now(timezone.utc)
@@ -307,13 +400,141 @@ class AnalyticsService:
         return {"user_id": user_id, "period_days": days, "start_date": start_dt.isoformat(), "end_date": end_dt.isoformat(), "total_minutes": total_minutes, "total_records": len(records), "records": records}
 
     async def get_system_analytics(self, days: int = 30) -> Dict[str, Any]:
-        """Return system-level analytics including per-job records for the last `days` days.
-
-        This aggregates `transcription_analytics` documents where available, and falls
-        back to job documents with duration metadata where necessary.
+        """Return system-level analytics for the last `days` days.
+
+        Totals come from the per-day rollups maintained by `track_job_event` and
+        session tracking, so the cost grows with `days` rather than with the number
+        of events. `records` holds only the most recent `SYSTEM_RECORDS_LIMIT` raw
+        analytics documents for the activity table. The part of the window before
+        the earliest day rollup was first written (history from before rollups
+        existed) is scanned from raw `transcription_analytics`/job documents and
+        added in; a window with no rollups at all is scanned entirely. Where both
+        apply, `active_users` is the larger of the rollup and session counts.
+
+        Sessions are loaded once; `peak_active_users` is the exact peak of
+        overlapping session intervals, and `concurrency` is a per-minute series
+        for the trailing `CONCURRENCY_SERIES_HOURS` of the window.
         """
         end_dt = datetime.now(timezone.utc)
         start_dt = end_dt - timedelta(days=days)
+        start_day, end_day = rollup_day_key(start_dt), rollup_day_key(end_dt)
+
+        daily_rollups = await self.rollups.get_daily_rollups(start_day, end_day) or []
+        sessions = await run_sync(self._query_recent_sessions, start_dt, days)
+        raw_end = end_dt
+        if daily_rollups:
+            first = daily_rollups[0]
+            raw_end = min(rollup_cutover(first.get('created_at'), first.get('day')) or end_dt, end_dt)
+
+        raw_records: List[Dict[str, Any]] = []
+        raw_minutes, raw_jobs = 0.0, 0
+        if raw_end > start_dt:
+            raw_records, raw_minutes, raw_jobs = await run_sync(self._scan_system_records, start_dt, raw_end, days)
+        session_users = len({
+            s.get('user_id') for s in sessions
+            if s.get('user_id') and (s.get('status') is None or str(s.get('status')).lower() == 'active')
+        })
+
+        rollup_daily = [
+            {
+                'date': it.get('day'),
+                'jobs': int(it.get('jobs') or 0),
+                'minutes': float(it.get('audio_minutes') or 0.0),
+                'active_users': int(it.get('active_users') or 0),
+            }
+            for it in daily_rollups
+        ]
+        daily = _merge_daily(_daily_from_records(raw_records), rollup_daily)
+        total_jobs = raw_jobs + sum(d['jobs'] for d in rollup_daily)
+        total_minutes = raw_minutes + sum(d['minutes'] for d in rollup_daily)
+        if not daily_rollups:
+            active_users = session_users
+            records = raw_records
+        else:
+            active_users = await self.rollups.count_active_users(start_day)
+            if active_users is None:
+                active_users = max((d['active_users'] for d in rollup_daily), default=0)
+            if raw_end > start_dt:
+                active_users = max(active_users, session_users)
+            records = await self._get_recent_system_records(start_dt, end_dt, days)
+
+        starts, ends = session_intervals(sessions, start_dt, end_dt)
+        peak_active_users, peak_at = peak_concurrency(starts, ends)
+        series_start = max(start_dt, end_dt - timedelta(hours=CONCURRENCY_SERIES_HOURS))
+        per_minute = concurrency_series(starts, ends, series_start.timestamp(), end_dt.timestamp(), step_seconds=60)
+
+        return {
+            'period_days': days,
+            'start_date': start_dt.isoformat(),
+            'end_date': end_dt.isoformat(),
+            'total_minutes': total_minutes,
+            'total_jobs': total_jobs,
+            'active_users': active_users,
+            'peak_active_users': peak_active_users,
+            'analytics': {
+                'records': records,
+                'daily': daily,
+                'total_minutes': total_minutes,
+                'total_jobs': total_jobs,
+                'active_users': active_users,
+                'peak_active_users': peak_active_users,
+                'peak_active_at': datetime.fromtimestamp(peak_at, tz=timezone.utc).isoformat() if peak_at is not None else None,
+                'concurrency': {
+                    'start': series_start.isoformat(),
+                    'step_seconds': 60,
+                    'values': per_minute.tolist(),
+                },
+            }
+        }
+
+    async def _get_recent_system_records(self, start_dt: datetime, end_dt: datetime, days: int) -> List[Dict[str, Any]]:
+        """Fetch the newest `SYSTEM_RECORDS_LIMIT` analytics records in the window, oldest first."""
+        if not self._analytics_container_available:
+            return []
+        query = (
+            "SELECT TOP @limit c.id, c.job_id, c.user_id, c.timestamp, c.audio_duration_minutes, c.audio_duration_seconds, c.file_name "
+            "FROM c WHERE c.type = 'transcription_analytics' AND c.timestamp >= @start AND c.timestamp <= @end "
+            "ORDER BY c.timestamp DESC"
+        )
+        params = [
+            {"name": "@limit", "value": SYSTEM_RECORDS_LIMIT},
+            {"name": "@start", "value": start_dt.isoformat()},
+            {"name": "@end", "value": end_dt.isoformat()},
+        ]
+        try:
+            items = await run_sync(lambda: list(self.cosmos_db.analytics_container.query_items(query=query, parameters=params, enable_cross_partition_query=True)))
+        except CosmosHttpResponseError as e:
+            self.logger.warning(
+                "Failed to query recent analytics records",
+                extra={"days": days, "status_code": e.status_code}
+            )
+            return []
+        except Exception:
+            self.logger.error(
+                "Unexpected error querying recent analytics records",
+                exc_info=True,
+                extra={"days": days}
+            )
+            return []
+
+        records: List[Dict[str, Any]] = []
+        for it in items:
+            minutes = _record_minutes(it)
+            if minutes is None:
+                continue
+            records.append({
+                'id': it.get('id'),
+                'job_id': it.get('job_id'),
+                'user_id': it.get('user_id'),
+                'timestamp': it.get('timestamp'),
+                'audio_duration_minutes': minutes,
+                'file_name': it.get('file_name')
+            })
+        records.sort(key=lambda r: r.get('timestamp') or "")
+        return records
+
+    def _scan_system_records(self, start_dt: datetime, end_dt: datetime, days: int):
+        """Raw scan of ``[start_dt, end_dt)``, the part of a window not covered by rollups."""
         records: List[Dict[str, Any]] = []
         total_minutes = 0.0
         total_jobs = 0
@@ -321,7 +542,7 @@ class AnalyticsService:
         try:
             if self._analytics_container_available:
                 query = ("SELECT c.id, c.job_id, c.user_id, c.timestamp, c.event_type, c.audio_duration_minutes, c.audio_duration_seconds, c.file_name "
-                         "FROM c WHERE c.timestamp >= @start AND c.timestamp <= @end AND c.type = 'transcription_analytics'")
+                         "FROM c WHERE c.timestamp >= @start AND c.timestamp < @end AND c.type = 'transcription_analytics'")
                 params = [{"name": "@start", "value": start_dt.isoformat()}, {"name": "@end", "value": end_dt.isoformat()}]
                 for it in self.cosmos_db.analytics_container.query_items(query=query, parameters=params, enable_cross_partition_query=True):
                     minutes = it.get('audio_duration_minutes')
@@ -368,9 +589,13 @@ class AnalyticsService:
                     FROM c 
                     WHERE c.type = 'job' 
                     AND c.created_at >= @start_ms
+                    AND c.created_at < @end_ms
                     AND (NOT IS_DEFINED(c.deleted) OR c.deleted = false)
                 """
-                params2 = [{"name": "@start_ms", "value": int(start_dt.timestamp() * 1000)}]
+                params2 = [
+                    {"name": "@start_ms", "value": int(start_dt.timestamp() * 1000)},
+                    {"name": "@end_ms", "value": int(end_dt.timestamp() * 1000)},
+                ]
                 for it in self.cosmos_db.jobs_container.query_items(query=job_q, parameters=params2, enable_cross_partition_query=True):
                     minutes = it.get('audio_duration_minutes')
                     if minutes is None and it.get('audio_duration_seconds') is not None:
@@ -410,76 +635,22 @@ class AnalyticsService:
 
         # Sort records ascending by timestamp
         records.sort(key=lambda r: r.get('timestamp') or "")
+        return records, total_minutes, total_jobs
 
-        # Calculate active users by scanning the sessions container for recent heartbeats
-        active_user_set = set()
-        try:
-            if hasattr(self.cosmos_db, 'sessions_container') and self.cosmos_db.sessions_container is not None:
-                sess_query = "SELECT c.user_id, c.last_activity, c.last_heartbeat, c.status FROM c WHERE (IS_DEFINED(c.last_activity) AND c.last_activity >= @start) OR (IS_DEFINED(c.last_heartbeat) AND c.last_heartbeat >= @start)"
-                sess_params = [{"name": "@start", "value": start_dt.isoformat()}]
-                for s in self.cosmos_db.sessions_container.query_items(query=sess_query, parameters=sess_params, enable_cross_partition_query=True):
-                    try:
-                        uid = s.get('user_id')
-                        status = s.get('status')
-                        if uid and (status is None or str(status).lower() == 'active'):
-                            active_user_set.add(uid)
-                    except Exception as e:
-                        self.logger.debug(
-                            "Failed to process session record for active user",
-                            extra={"error": str(e)}
-                        )
-                        continue
-        except CosmosHttpResponseError as e:
-            # Non-fatal; leave active_user_set empty
-            self.logger.warning(
-                "Failed to query sessions for active users",
-                extra={
-                    "days": days,
-                    "status_code": e.status_code
-                }
-            )
-        except Exception as e:
-            self.logger.error(
-                "Unexpected error querying active users",
-                exc_info=True,
-                extra={"days": days}
-            )
-
-        active_users = len(active_user_set)
-
-        # Derive peak active users per day (approx) by bucketing heartbeat timestamps if available
-        peak_active_users = active_users
+    def _query_recent_sessions(self, start_dt: datetime, days: int) -> List[Dict[str, Any]]:
+        """Load every session with activity since `start_dt` in one scan."""
+        if not hasattr(self.cosmos_db, 'sessions_container') or self.cosmos_db.sessions_container is None:
+            return []
+        sess_query = (
+            "SELECT c.user_id, c.status, c.created_at, c.last_activity, c.last_heartbeat, c.ended_at FROM c "
+            "WHERE (IS_DEFINED(c.last_activity) AND c.last_activity >= @start) OR (IS_DEFINED(c.last_heartbeat) AND c.last_heartbeat >= @start)"
+        )
+        sess_params = [{"name": "@start", "value": start_dt.isoformat()}]
         try:
-            # Re-query sessions for finer buckets only if container present
-            if hasattr(self.cosmos_db, 'sessions_container') and self.cosmos_db.sessions_container is not None:
-                bucket_counts = {}
-                sess_query2 = "SELECT c.user_id, c.last_activity, c.last_heartbeat FROM c WHERE ((IS_DEFINED(c.last_activity) AND c.last_activity >= @start AND c.last_activity <= @end) OR (IS_DEFINED(c.last_heartbeat) AND c.last_heartbeat >= @start AND c.last_heartbeat <= @end))"
-                sess_params2 = [{"name": "@start", "value": start_dt.isoformat()}, {"name": "@end", "value": end_dt.isoformat()}]
-                for s in self.cosmos_db.sessions_container.query_items(query=sess_query2, parameters=sess_params2, enable_cross_partition_query=True):
-                    try:
-                        hb = s.get('last_activity') or s.get('last_heartbeat')
-                        uid = s.get('user_id')
-                        if not hb or not uid:
-                            continue
-                        # Normalize to hour bucket for rough concurrency approximation
-                        from datetime import datetime as _dt
-                        try:
-                            ts = _dt.fromisoformat(hb.replace('Z','+00:00'))
-                        except Exception:
-                            continue
-                        bucket = ts.strftime('%Y-%m-%dT%H:00')
-                        bucket_counts.setdefault(bucket, set()).add(uid)
-                    except Exception as e:
-                        self.logger.debug(
-                            "Failed to process session bucket for peak active users",
-                            extra={"error": str(e)}
-                        )
-                        continue
-                if bucket_counts:
-                    peak_active_users = max(len(v) for v in bucket_counts.values())
+            return list(self.cosmos_db.sessions_container.query_items(query=sess_query, parameters=sess_params, enable_cross_partition_query=True))
         except CosmosHttpResponseError as e:
             self.logger.warning(
-                "Failed to calculate peak active users",
+                "Failed to query sessions for system analytics",
                 extra={
                     "days": days,
                     "status_code": e.status_code
@@ -487,27 +658,11 @@ class AnalyticsService:
             )
         except Exception as e:
             self.logger.error(
-                "Unexpected error calculating peak active users",
+                "Unexpected error querying sessions for system analytics",
                 exc_info=True,
                 extra={"days": days}
             )
-
-        return {
-            'period_days': days,
-            'start_date': start_dt.isoformat(),
-            'end_date': end_dt.isoformat(),
-            'total_minutes': total_minutes,
-            'total_jobs': total_jobs,
-            'active_users': active_users,
-            'peak_active_users': peak_active_users,
-            'analytics': {
-                'records': records,
-                'total_minutes': total_minutes,
-                'total_jobs': total_jobs,
-                'active_users': active_users,
-                'peak_active_users': peak_active_users
-            }
-        }
+        return []
 
     async def get_recent_jobs(self, limit: int = 10, prompt_id: Optional[str] = None) -> List[Dict[str, Any]]:
         results: List[Dict[str, Any]] = []
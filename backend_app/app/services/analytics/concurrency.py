@@ -0,0 +1,81 @@
+"""Session concurrency via a sweep line over start/end vectors.
+
+Sessions are treated as half-open intervals ``[start, end)`` in epoch seconds.
+With both vectors sorted, the number of sessions active at time ``t`` is
+``#starts <= t - #ends <= t``, so concurrency at every session start (where the
+peak must occur) and at every series step is a pair of vectorised
+``searchsorted`` calls instead of a Python loop.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+def _parse_ts(value: Any) -> Optional[float]:
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+def session_intervals(
+    sessions: Iterable[Dict[str, Any]],
+    window_start: datetime,
+    window_end: datetime,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Build clipped ``(starts, ends)`` epoch-second vectors from session documents.
+
+    A session starts at ``created_at`` and ends at ``ended_at`` when it was closed,
+    otherwise at its last recorded activity. Intervals are clipped to the window;
+    sessions entirely outside it are dropped.
+    """
+    lo, hi = window_start.timestamp(), window_end.timestamp()
+    starts, ends = [], []
+    for s in sessions:
+        end = _parse_ts(s.get("ended_at")) or _parse_ts(s.get("last_activity")) or _parse_ts(s.get("last_heartbeat"))
+        start = _parse_ts(s.get("created_at")) or end
+        if start is None or end is None:
+            continue
+        start, end = max(start, lo), min(end, hi)
+        if end < start:
+            continue
+        starts.append(start)
+        # A single heartbeat still counts as being present at that instant
+        ends.append(end if end > start else start + 1.0)
+    return np.asarray(starts, dtype=np.float64), np.asarray(ends, dtype=np.float64)
+
+
+def peak_concurrency(starts: np.ndarray, ends: np.ndarray) -> Tuple[int, Optional[float]]:
+    """Return ``(peak, time_of_peak)`` for the given intervals."""
+    if starts.size == 0:
+        return 0, None
+    starts = np.sort(starts)
+    ends = np.sort(ends)
+    active = np.searchsorted(starts, starts, side="right") - np.searchsorted(ends, starts, side="right")
+    idx = int(np.argmax(active))
+    return int(active[idx]), float(starts[idx])
+
+
+def concurrency_series(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    series_start: float,
+    series_end: float,
+    step_seconds: int = 60,
+) -> np.ndarray:
+    """Sessions overlapping each ``[t, t + step)`` step between the given bounds."""
+    edges = np.arange(series_start, series_end, step_seconds, dtype=np.float64)
+    if edges.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    starts = np.sort(starts)
+    ends = np.sort(ends)
+    started = np.searchsorted(starts, edges + step_seconds, side="left")
+    finished = np.searchsorted(ends, edges, side="right")
+    return (started - finished).astype(np.int64)
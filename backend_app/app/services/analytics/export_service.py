@@ -1,21 +1,32 @@
+import asyncio
 import io
 import csv
 import logging
 import tempfile
 import os
+import uuid
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Any, List, Optional, TYPE_CHECKING
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from typing import AsyncIterator, Dict, Any, List, Optional, Set, Tuple, TYPE_CHECKING
 
 logger = logging.getLogger(__name__)
 from ...utils.async_utils import run_sync
+from ...utils.query_metrics import PagedQuery
+from ...utils.pdf_report import format_datetime, render_user_report_pdf_async, report_version
 from ...core.dependencies import CosmosService
 
+# Items fetched per Cosmos page when streaming CSV exports
+EXPORT_PAGE_SIZE = 500
+
+# User document fields shown in the PDF report
+REPORT_USER_FIELDS = (
+    'id', 'email', 'full_name', 'permission', 'source', 'microsoft_oid', 'tenant_id',
+    'created_at', 'last_login', 'is_active', 'permission_changed_at', 'permission_changed_by',
+)
+# Per-job rows included in the PDF report (caps the size of huge reports)
+REPORT_MAX_RECORDS = 50
+# Rendered reports kept on disk before the least recently served are pruned
+REPORT_CACHE_MAX_FILES = 200
+
 if TYPE_CHECKING:
     from .analytics_service import AnalyticsService
 
@@ -27,10 +38,13 @@ class ExportService:
         self,
         cosmos_service: CosmosService,
         analytics_service: "AnalyticsService",
+        report_cache_dir: Optional[str] = None,
     ):
         self.cosmos_db = cosmos_service
         self.logger = logging.getLogger(__name__)
         self.analytics_service = analytics_service
+        self.report_cache_dir = report_cache_dir or os.path.join(tempfile.gettempdir(), 'sonic-brief-reports')
+        self._inflight_renders: Dict[str, "asyncio.Future[None]"] = {}
 
     async def export_users_csv(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -40,65 +54,51 @@ class ExportService:
             filters: Optional filters to apply (permission, date_range, etc.)
             
         Returns:
-            Dictionary with file path and metadata
+            Dictionary with an async byte ``stream`` of CSV chunks and metadata.
+            The first page is fetched before returning so query errors surface
+            here rather than mid-download.
         """
         try:
-            # Get all users
-            users = await self.cosmos_db.get_all_users()
-            
-            # Apply filters if provided
-            if filters:
-                users = self._apply_user_filters(users, filters)
-            
-            # Create temporary file
-            temp_file = tempfile.NamedTemporaryFile(
-                mode='w', 
-                suffix='.csv', 
-                delete=False,
-                newline='',
-                encoding='utf-8'
-            )
-            
-            # Write CSV data
-            writer = csv.writer(temp_file)
-            
-            # Header row
+            query = "SELECT * FROM c WHERE c.type = 'user'"
+            pages = self._query_pages(self.cosmos_db.get_container("auth"), query)
+
+            async def _rows():
+                async for users in pages:
+                    if filters:
+                        users = self._apply_user_filters(users, filters)
+                    yield [
+                        [
+                            user.get('id', ''),
+                            user.get('email', ''),
+                            user.get('full_name', ''),
+                            user.get('permission', ''),
+                            user.get('source', ''),
+                            user.get('microsoft_oid', ''),
+                            user.get('tenant_id', ''),
+                            user.get('created_at', ''),
+                            user.get('last_login', ''),
+                            str(user.get('is_active', False)),
+                            user.get('permission_changed_at', ''),
+                            user.get('permission_changed_by', '')
+                        ]
+                        for user in users
+                    ]
+
             headers = [
                 'ID', 'Email', 'Full Name', 'Permission', 'Source',
                 'Microsoft OID', 'Tenant ID', 'Created At', 'Last Login',
                 'Is Active', 'Permission Changed At', 'Permission Changed By'
             ]
-            writer.writerow(headers)
-            
-            # Data rows
-            for user in users:
-                row = [
-                    user.get('id', ''),
-                    user.get('email', ''),
-                    user.get('full_name', ''),
-                    user.get('permission', ''),
-                    user.get('source', ''),
-                    user.get('microsoft_oid', ''),
-                    user.get('tenant_id', ''),
-                    user.get('created_at', ''),
-                    user.get('last_login', ''),
-                    str(user.get('is_active', False)),
-                    user.get('permission_changed_at', ''),
-                    user.get('permission_changed_by', '')
-                ]
-                writer.writerow(row)
-            
-            temp_file.close()
-            
+            stream = await self._primed_csv_stream(headers, _rows())
+
             # Generate filename
             timestamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
             filename = f'sonic-brief-users-{timestamp}.csv'
             
             return {
                 'status': 'success',
-                'file_path': temp_file.name,
+                'stream': stream,
                 'filename': filename,
-                'record_count': len(users),
                 'content_type': 'text/csv'
             }
             
@@ -112,203 +112,41 @@ class ExportService:
     async def export_user_details_pdf(self, user_id: str, include_analytics: bool = True, days: int = 30) -> Dict[str, Any]:
         """
         Export individual user details to PDF format
-        
+
+        The report data is gathered into a plain snapshot and rendered in the PDF
+        process pool. Rendered files are cached on disk under a digest of that
+        snapshot, so repeat downloads of unchanged data skip rendering entirely.
+
         Args:
             user_id: ID of the user to export
             include_analytics: Whether to include analytics data
-            
+            days: Analytics window in days
+
         Returns:
-            Dictionary with file path and metadata
+            Dictionary with file path and metadata. The file belongs to the report
+            cache and must not be deleted by the caller.
         """
         try:
-            # Get user data
-            user = await self.cosmos_db.get_user_by_id(user_id)
-            if not user:
+            snapshot = await self._build_report_snapshot(user_id, include_analytics, days)
+            if snapshot is None:
                 return {
                     'status': 'error',
                     'message': 'User not found'
                 }
-            
-            # Get analytics if requested
-            analytics = None
-            if include_analytics:
-                analytics_data = await self.analytics_service.get_user_analytics(user_id, days=days)
-                analytics = analytics_data.get('analytics', {})
-            
-            # Create temporary file
-            temp_file = tempfile.NamedTemporaryFile(
-                suffix='.pdf', 
-                delete=False
-            )
-            temp_file.close()
-            
-            # Create PDF
-            doc = SimpleDocTemplate(
-                temp_file.name,
-                pagesize=A4,
-                rightMargin=72,
-                leftMargin=72,
-                topMargin=72,
-                bottomMargin=18
-            )
-            
-            # Build PDF content
-            story = []
-            styles = getSampleStyleSheet()
-            
-            # Title
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                alignment=TA_CENTER,
-                fontSize=18,
-                spaceAfter=30
-            )
-            story.append(Paragraph("User Details Report", title_style))
-            story.append(Spacer(1, 12))
-            
-            # User Information Section
-            story.append(Paragraph("User Information", styles['Heading2']))
-            
-            user_data = [
-                ['Field', 'Value'],
-                ['User ID', user.get('id', 'N/A')],
-                ['Email', user.get('email', 'N/A')],
-                ['Full Name', user.get('full_name', 'N/A')],
-                ['Permission Level', user.get('permission', 'N/A')],
-                ['Account Source', user.get('source', 'N/A')],
-                ['Microsoft OID', user.get('microsoft_oid', 'N/A')],
-                ['Tenant ID', user.get('tenant_id', 'N/A')],
-                ['Created At', self._format_datetime(user.get('created_at'))],
-                ['Last Login', self._format_datetime(user.get('last_login'))],
-                ['Is Active', 'Yes' if user.get('is_active') else 'No'],
-                ['Permission Last Changed', self._format_datetime(user.get('permission_changed_at'))],
-                ['Permission Changed By', user.get('permission_changed_by', 'N/A')],
-            ]
-            
-            user_table = Table(user_data, colWidths=[2*inch, 4*inch])
-            user_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ]))
-            
-            story.append(user_table)
-            story.append(Spacer(1, 20))
-            
-            # Analytics Section
-            if analytics:
-                story.append(Paragraph(f"Analytics Summary (Last {days} Days)", styles['Heading2']))
-                
-                # Transcription Stats
-                transcription_stats = analytics.get('transcription_stats', {})
-                if transcription_stats:
-                    story.append(Paragraph("Transcription Statistics", styles['Heading3']))
-                    
-                    transcription_data = [
-                        ['Metric', 'Value'],
-                        ['Total Transcription Minutes', f"{transcription_stats.get('total_minutes', 0):.1f}"],
-                        ['Total Jobs', str(transcription_stats.get('total_jobs', 0))],
-                        ['Average Job Duration (minutes)', f"{transcription_stats.get('average_job_duration', 0):.1f}"],
-                    ]
-                    
-                    transcription_table = Table(transcription_data, colWidths=[3*inch, 2*inch])
-                    transcription_table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 9),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                        ('FONTSIZE', (0, 1), (-1, -1), 8),
-                    ]))
-                    
-                    story.append(transcription_table)
-                    story.append(Spacer(1, 15))
-
-                # Include detailed per-job minutes if available
-                try:
-                    minutes_data = await self.analytics_service.get_user_minutes_records(user.get('id'), days=30)
-                    records = minutes_data.get('records', [])
-                    if records:
-                        story.append(Paragraph("Per-Job Duration Records", styles['Heading3']))
-                        minutes_table_data = [["Job ID", "Timestamp", "Minutes", "File Name"]]
-                        for r in records[:50]:  # cap rows to avoid huge PDFs
-                            minutes_table_data.append([
-                                r.get('job_id', ''),
-                                self._format_datetime(r.get('timestamp')),
-                                f"{float(r.get('audio_duration_minutes', 0.0)):.2f}",
-                                r.get('file_name', '') or ''
-                            ])
-                        table = Table(minutes_table_data, colWidths=[2*inch, 2*inch, 1*inch, 2*inch])
-                        table.setStyle(TableStyle([
-                            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-                            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                            ('FONTSIZE', (0, 0), (-1, -1), 8),
-                            ('ALIGN', (2, 1), (2, -1), 'RIGHT'),
-                        ]))
-                        story.append(table)
-                        story.append(Spacer(1, 15))
-                except Exception as e:
-                    self.logger.warning(f"Could not include per-job minutes in PDF: {str(e)}")
-                
-                # Activity Stats
-                activity_stats = analytics.get('activity_stats', {})
-                if activity_stats:
-                    story.append(Paragraph("Activity Statistics", styles['Heading3']))
-                    
-                    activity_data = [
-                        ['Metric', 'Value'],
-                        ['Total Events', str(activity_stats.get('total_events', 0))],
-                        ['Login Count', str(activity_stats.get('login_count', 0))],
-                        ['Jobs Created', str(activity_stats.get('jobs_created', 0))],
-                        ['Last Activity', self._format_datetime(activity_stats.get('last_activity'))],
-                    ]
-                    
-                    activity_table = Table(activity_data, colWidths=[3*inch, 2*inch])
-                    activity_table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgreen),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 9),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                        ('FONTSIZE', (0, 1), (-1, -1), 8),
-                    ]))
-                    
-                    story.append(activity_table)
-                    story.append(Spacer(1, 15))
-            
-            # Footer
-            story.append(Spacer(1, 30))
-            footer_text = f"Report generated on {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}"
-            story.append(Paragraph(footer_text, styles['Normal']))
-            
-            # Build PDF
-            doc.build(story)
-            
-            # Generate filename
+
+            file_path, cached = await self._get_or_render_report(snapshot)
+
             timestamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
             filename = f'user-report-{user_id}-{timestamp}.pdf'
-            
+
             return {
                 'status': 'success',
-                'file_path': temp_file.name,
+                'file_path': file_path,
                 'filename': filename,
-                'content_type': 'application/pdf'
+                'content_type': 'application/pdf',
+                'cached': cached,
             }
-            
+
         except Exception as e:
             self.logger.error(f"Error exporting user details to PDF: {str(e)}")
             return {
@@ -316,13 +154,103 @@ class ExportService:
                 'message': str(e)
             }
 
+    async def _build_report_snapshot(self, user_id: str, include_analytics: bool, days: int) -> Optional[Dict[str, Any]]:
+        """Collect everything the user report shows as plain, picklable data."""
+        user = await self.cosmos_db.get_user_by_id(user_id)
+        if not user:
+            return None
+
+        snapshot: Dict[str, Any] = {
+            'user_id': user_id,
+            'days': days,
+            'include_analytics': include_analytics,
+            'user': {field: user.get(field) for field in REPORT_USER_FIELDS if user.get(field) is not None},
+            'analytics': None,
+            'records': [],
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+        }
+        if not include_analytics:
+            return snapshot
+
+        analytics_data = await self.analytics_service.get_user_analytics(user_id, days=days)
+        analytics = analytics_data.get('analytics', {}) or {}
+        if analytics:
+            snapshot['analytics'] = {
+                key: analytics.get(key) or {} for key in ('transcription_stats', 'activity_stats')
+            }
+            try:
+                minutes_data = await self.analytics_service.get_user_minutes_records(user_id, days=days)
+                snapshot['records'] = [
+                    {
+                        'job_id': r.get('job_id', ''),
+                        'timestamp': r.get('timestamp'),
+                        'audio_duration_minutes': float(r.get('audio_duration_minutes', 0.0) or 0.0),
+                        'file_name': r.get('file_name', '') or '',
+                    }
+                    for r in (minutes_data.get('records') or [])[:REPORT_MAX_RECORDS]
+                ]
+            except Exception as e:
+                self.logger.warning(f"Could not include per-job minutes in PDF: {str(e)}")
+        return snapshot
+
+    async def _get_or_render_report(self, snapshot: Dict[str, Any]) -> Tuple[str, bool]:
+        """Return ``(path, cached)`` for the rendered snapshot, rendering at most once per version."""
+        version = report_version(snapshot)
+        file_path = os.path.join(self.report_cache_dir, f'user-report-{version}.pdf')
+        if os.path.exists(file_path):
+            try:
+                os.utime(file_path)  # keep recently served reports out of pruning
+            except OSError:
+                pass
+            return file_path, True
+
+        task = self._inflight_renders.get(version)
+        if task is None:
+            task = asyncio.ensure_future(self._render_report(snapshot, file_path))
+            self._inflight_renders[version] = task
+            task.add_done_callback(lambda _t: self._inflight_renders.pop(version, None))
+        # Shield so one client disconnecting does not cancel a render others await
+        await asyncio.shield(task)
+        return file_path, False
+
+    async def _render_report(self, snapshot: Dict[str, Any], file_path: str) -> None:
+        os.makedirs(self.report_cache_dir, exist_ok=True)
+        partial_path = f'{file_path}.{uuid.uuid4().hex}.tmp'
+        try:
+            await render_user_report_pdf_async(snapshot, partial_path)
+            # Atomic publish: readers never see a half-written report
+            os.replace(partial_path, file_path)
+        finally:
+            if os.path.exists(partial_path):
+                os.unlink(partial_path)
+        self._prune_report_cache()
+
+    def _prune_report_cache(self) -> None:
+        """Drop the least recently served reports beyond ``REPORT_CACHE_MAX_FILES``."""
+        try:
+            entries = [
+                os.path.join(self.report_cache_dir, name)
+                for name in os.listdir(self.report_cache_dir)
+                if name.endswith('.pdf')
+            ]
+            if len(entries) <= REPORT_CACHE_MAX_FILES:
+                return
+            entries.sort(key=os.path.getmtime)
+            for path in entries[:len(entries) - REPORT_CACHE_MAX_FILES]:
+                os.unlink(path)
+        except OSError as e:
+            self.logger.warning(f"Could not prune PDF report cache: {str(e)}")
+
     async def export_system_analytics_csv(self, days: int = 30) -> Dict[str, Any]:
-        """Export system analytics (per-job minutes) within the last N days to CSV."""
+        """Export system analytics (per-job minutes) within the last N days to CSV.
+
+        Rows are streamed page by page; user emails are resolved with one batched
+        lookup per page and remembered for later pages.
+        """
         try:
             end_dt = datetime.now(timezone.utc)
             start_dt = end_dt - timedelta(days=days)
 
-            rows: List[List[str]] = []
             headers = [
                 'job_id', 'user_id', 'timestamp', 'minutes', 'file_name', 'user_email'
             ]
@@ -330,70 +258,111 @@ class ExportService:
             # Query analytics container for records in range
             query = (
                 "SELECT c.id, c.job_id, c.user_id, c.timestamp, c.audio_duration_minutes, c.audio_duration_seconds, c.file_name "
-                "FROM c WHERE c.timestamp >= @start AND c.timestamp <= @end"
+                "FROM c WHERE c.type = 'transcription_analytics' AND c.timestamp >= @start AND c.timestamp <= @end"
             )
             params = [
                 {"name": "@start", "value": start_dt.isoformat()},
                 {"name": "@end", "value": end_dt.isoformat()},
             ]
+            pages = self._query_pages(self.cosmos_db.analytics_container, query, params)
+            emails: Dict[str, str] = {}
 
-            try:
-                items = await run_sync(lambda: list(self.cosmos_db.analytics_container.query_items(
-                    query=query, parameters=params, enable_cross_partition_query=True
-                )))
-                for it in items:
-                    job_id = it.get('job_id') or it.get('id') or ''
-                    user_id = it.get('user_id') or ''
-                    ts = it.get('timestamp') or ''
-                    minutes = it.get('audio_duration_minutes')
-                    if minutes is None and it.get('audio_duration_seconds') is not None:
+            async def _rows():
+                async for items in pages:
+                    await self._resolve_emails({it.get('user_id') for it in items if it.get('user_id')}, emails)
+                    rows = []
+                    for it in items:
+                        job_id = it.get('job_id') or it.get('id') or ''
+                        user_id = it.get('user_id') or ''
+                        ts = it.get('timestamp') or ''
+                        minutes = it.get('audio_duration_minutes')
+                        if minutes is None and it.get('audio_duration_seconds') is not None:
+                            try:
+                                minutes = float(it['audio_duration_seconds']) / 60.0
+                            except Exception:
+                                minutes = 0
                         try:
-                            minutes = float(it['audio_duration_seconds']) / 60.0
+                            minutes_str = f"{float(minutes):.2f}" if minutes is not None else ""
                         except Exception:
-                            minutes = 0
-                    try:
-                        minutes_str = f"{float(minutes):.2f}" if minutes is not None else ""
-                    except Exception:
-                        minutes_str = ""
-                    file_name = it.get('file_name') or ''
-                    
-                    # Get user email
-                    user_email = ''
-                    if user_id:
-                        try:
-                            user = await self.cosmos_db.get_user_by_id(user_id)
-                            user_email = user.get('email', '') if user else ''
-                        except Exception:
-                            user_email = ''
-                    
-                    row = [str(job_id), str(user_id), str(ts), minutes_str, str(file_name), user_email]
-                    rows.append(row)
-            except Exception as qe:
-                self.logger.error(f"Error querying analytics for export: {qe}")
-
-            # Create temporary CSV file
-            temp_file = tempfile.NamedTemporaryFile(
-                mode='w', suffix='.csv', delete=False, newline='', encoding='utf-8'
-            )
-            writer = csv.writer(temp_file)
-            writer.writerow(headers)
-            for r in rows:
-                writer.writerow(r)
-            temp_file.close()
+                            minutes_str = ""
+                        file_name = it.get('file_name') or ''
+                        rows.append([str(job_id), str(user_id), str(ts), minutes_str, str(file_name), emails.get(user_id, '')])
+                    yield rows
+
+            stream = await self._primed_csv_stream(headers, _rows())
 
             timestamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
             filename = f'sonic-brief-system-analytics-{days}d-{timestamp}.csv'
             return {
                 'status': 'success',
-                'file_path': temp_file.name,
+                'stream': stream,
                 'filename': filename,
-                'record_count': len(rows),
                 'content_type': 'text/csv'
             }
         except Exception as e:
             self.logger.error(f"Error exporting system analytics CSV: {e}")
             return {'status': 'error', 'message': str(e)}
 
+    def _query_pages(self, container, query: str, parameters: Optional[List[Dict[str, Any]]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Lazily page through a cross-partition query, EXPORT_PAGE_SIZE items at a time."""
+        return PagedQuery(
+            container,
+            query,
+            parameters,
+            page_size=EXPORT_PAGE_SIZE,
+            enable_cross_partition_query=True,
+        )
+
+    async def _resolve_emails(self, user_ids: Set[str], emails: Dict[str, str]) -> None:
+        """Fill ``emails`` for any of ``user_ids`` not looked up yet, in one query."""
+        missing = [uid for uid in user_ids if uid not in emails]
+        if not missing:
+            return
+        for uid in missing:
+            emails[uid] = ''
+        try:
+            container = self.cosmos_db.get_container("auth")
+            found = await run_sync(lambda: list(container.query_items(
+                query="SELECT c.id, c.email FROM c WHERE ARRAY_CONTAINS(@ids, c.id)",
+                parameters=[{"name": "@ids", "value": missing}],
+                enable_cross_partition_query=True,
+            )))
+            for user in found:
+                emails[user.get('id')] = user.get('email') or ''
+        except Exception as e:
+            self.logger.warning(f"Could not resolve user emails for export: {e}")
+
+    async def _primed_csv_stream(self, headers: List[str], row_pages: AsyncIterator[List[List[str]]]) -> AsyncIterator[bytes]:
+        """Encode pages of rows as CSV chunks, fetching the first page eagerly.
+
+        Priming means a failing query raises here, while the caller can still
+        return an error status, instead of after response headers are sent.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def _encode(rows: List[List[str]]) -> bytes:
+            writer.writerows(rows)
+            chunk = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+            return chunk
+
+        writer.writerow(headers)
+        try:
+            first_page = await row_pages.__anext__()
+        except StopAsyncIteration:
+            first_page = []
+        first_chunk = _encode(first_page)
+
+        async def _stream() -> AsyncIterator[bytes]:
+            yield first_chunk
+            async for rows in row_pages:
+                if rows:
+                    yield _encode(rows)
+
+        return _stream()
+
     def _apply_user_filters(self, users: List[Dict[str, Any]], filters: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Apply filters to user list"""
         filtered_users = users
@@ -449,14 +418,7 @@ class ExportService:
 
     def _format_datetime(self, dt_string: Optional[str]) -> str:
         """Format datetime string for display"""
-        if not dt_string:
-            return 'N/A'
-        
-        try:
-            dt = datetime.fromisoformat(dt_string.replace('Z', '+00:00'))
-            return dt.strftime('%Y-%m-%d %H:%M:%S UTC')
-        except:
-            return dt_string
+        return format_datetime(dt_string)
 
     async def cleanup_temp_file(self, file_path: str):
         """Clean up temporary export file"""
@@ -0,0 +1,336 @@
+"""Incrementally maintained analytics rollups.
+
+Dashboards used to rebuild their totals from raw ``transcription_analytics``
+and session documents on every load. This service keeps two small document
+kinds in the analytics container up to date as events happen instead:
+
+* one **day rollup** per UTC day (job count, audio minutes, distinct active users)
+* one **user rollup** per user (lifetime totals plus per-day job/minute maps and
+  the set of days the user was active)
+
+Counters are only ever changed through Cosmos patch ``incr`` operations, so
+concurrent writers never lose updates. Rollup documents use the same value for
+``id``, ``user_id`` and ``partition_key`` so the point reads and patches work
+regardless of which of those the container is partitioned on, and so the
+synthetic ``user_id`` never collides with a real user's raw analytics.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from azure.cosmos.exceptions import CosmosHttpResponseError, CosmosResourceExistsError
+
+from ...utils.async_utils import run_sync
+from ...utils.logging_config import get_logger
+
+
+ROLLUP_DAY_TYPE = "analytics_rollup_day"
+ROLLUP_USER_TYPE = "analytics_rollup_user"
+
+# Cosmos returns 412 when a patch filter predicate does not match.
+_PRECONDITION_FAILED = 412
+
+
+def rollup_day_key(timestamp: Optional[datetime] = None) -> str:
+    """Return the UTC ``YYYY-MM-DD`` bucket for ``timestamp`` (defaults to now)."""
+    ts = timestamp or datetime.now(timezone.utc)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc).strftime("%Y-%m-%d")
+
+
+def rollup_cutover(created_at: Any, day: Optional[str] = None) -> Optional[datetime]:
+    """Return when a rollup document began counting.
+
+    That is its ``created_at`` (the first write, since seed documents carry no
+    counts), or the start of ``day`` for documents without one. Activity before
+    this instant is only in the raw analytics/job documents.
+    """
+    if isinstance(created_at, str):
+        try:
+            ts = datetime.fromisoformat(created_at)
+            return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+    if day:
+        try:
+            return datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        except ValueError:
+            return None
+    return None
+
+
+def day_rollup_id(day: str) -> str:
+    return f"rollup_day_{day}"
+
+
+def user_rollup_id(user_id: str) -> str:
+    return f"rollup_user_{user_id}"
+
+
+class AnalyticsRollupService:
+    """Maintain and read per-day and per-user analytics rollups."""
+
+    def __init__(self, cosmos_service):
+        self.cosmos_db = cosmos_service
+        self.logger = get_logger(__name__)
+        self._available = hasattr(self.cosmos_db, "analytics_container") and self.cosmos_db.analytics_container is not None
+
+    @property
+    def available(self) -> bool:
+        return self._available
+
+    # ------------------------------------------------------------------
+    # Writers
+    # ------------------------------------------------------------------
+    async def record_job(self, user_id: str, audio_minutes: Optional[float], timestamp: Optional[datetime] = None) -> bool:
+        """Count one job (and its audio minutes) against the day and user rollups."""
+        if not self._available or not user_id:
+            return False
+
+        day = rollup_day_key(timestamp)
+        minutes = float(audio_minutes or 0.0)
+        now_iso = datetime.now(timezone.utc).isoformat()
+        try:
+            await self._patch(
+                day_rollup_id(day),
+                [
+                    {"op": "incr", "path": "/jobs", "value": 1},
+                    {"op": "incr", "path": "/audio_minutes", "value": minutes},
+                    {"op": "set", "path": "/updated_at", "value": now_iso},
+                ],
+                seed=lambda: self._new_day_rollup(day),
+            )
+            await self._patch(
+                user_rollup_id(user_id),
+                [
+                    {"op": "incr", "path": "/total_jobs", "value": 1},
+                    {"op": "incr", "path": "/total_audio_minutes", "value": minutes},
+                    {"op": "incr", "path": f"/jobs_by_day/{day}", "value": 1},
+                    {"op": "incr", "path": f"/minutes_by_day/{day}", "value": minutes},
+                    {"op": "set", "path": "/updated_at", "value": now_iso},
+                ],
+                seed=lambda: self._new_user_rollup(user_id),
+            )
+        except CosmosHttpResponseError as e:
+            self.logger.warning(
+                "Failed to update job analytics rollups",
+                extra={"user_id": user_id, "day": day, "status_code": e.status_code},
+            )
+            return False
+        except Exception:
+            self.logger.error(
+                "Unexpected error updating job analytics rollups",
+                exc_info=True,
+                extra={"user_id": user_id, "day": day},
+            )
+            return False
+
+        await self.record_activity(user_id, timestamp)
+        return True
+
+    async def record_activity(self, user_id: str, timestamp: Optional[datetime] = None) -> bool:
+        """Mark ``user_id`` active on the day of ``timestamp``.
+
+        Returns True only for the first activity of that user on that day, which
+        is also the only time the day rollup's ``active_users`` is incremented.
+        """
+        if not self._available or not user_id:
+            return False
+
+        day = rollup_day_key(timestamp)
+        try:
+            first_today = await self._patch(
+                user_rollup_id(user_id),
+                [
+                    {"op": "set", "path": f"/active_days/{day}", "value": True},
+                    {"op": "set", "path": "/last_active_day", "value": day},
+                ],
+                seed=lambda: self._new_user_rollup(user_id),
+                filter_predicate=f'FROM c WHERE NOT IS_DEFINED(c.active_days["{day}"])',
+            )
+            if first_today:
+                await self._patch(
+                    day_rollup_id(day),
+                    [{"op": "incr", "path": "/active_users", "value": 1}],
+                    seed=lambda: self._new_day_rollup(day),
+                )
+            return first_today
+        except CosmosHttpResponseError as e:
+            self.logger.warning(
+                "Failed to update activity analytics rollups",
+                extra={"user_id": user_id, "day": day, "status_code": e.status_code},
+            )
+            return False
+        except Exception:
+            self.logger.error(
+                "Unexpected error updating activity analytics rollups",
+                exc_info=True,
+                extra={"user_id": user_id, "day": day},
+            )
+            return False
+
+    async def _patch(
+        self,
+        doc_id: str,
+        operations: List[Dict[str, Any]],
+        *,
+        seed: Callable[[], Dict[str, Any]],
+        filter_predicate: Optional[str] = None,
+    ) -> bool:
+        """Patch ``doc_id``, creating it from ``seed`` with zeroed counters on first use.
+
+        Returns False when ``filter_predicate`` did not match. Seed documents never
+        carry counts themselves, so a lost create race cannot double count.
+        """
+        container = self.cosmos_db.analytics_container
+        for attempt in range(2):
+            try:
+                await run_sync(
+                    lambda: container.patch_item(
+                        item=doc_id,
+                        partition_key=doc_id,
+                        patch_operations=operations,
+                        filter_predicate=filter_predicate,
+                    )
+                )
+                return True
+            except CosmosHttpResponseError as e:
+                if e.status_code == _PRECONDITION_FAILED:
+                    return False
+                if e.status_code != 404 or attempt:
+                    raise
+            try:
+                await run_sync(lambda: container.create_item(body=seed()))
+            except CosmosResourceExistsError:
+                # Another writer created it first; the retry patches theirs.
+                pass
+        return False
+
+    @staticmethod
+    def _new_day_rollup(day: str) -> Dict[str, Any]:
+        doc_id = day_rollup_id(day)
+        return {
+            "id": doc_id,
+            "user_id": doc_id,
+            "partition_key": doc_id,
+            "type": ROLLUP_DAY_TYPE,
+            "day": day,
+            "jobs": 0,
+            "audio_minutes": 0.0,
+            "active_users": 0,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    @staticmethod
+    def _new_user_rollup(user_id: str) -> Dict[str, Any]:
+        doc_id = user_rollup_id(user_id)
+        return {
+            "id": doc_id,
+            "user_id": doc_id,
+            "partition_key": doc_id,
+            "type": ROLLUP_USER_TYPE,
+            "subject_user_id": user_id,
+            "total_jobs": 0,
+            "total_audio_minutes": 0.0,
+            "jobs_by_day": {},
+            "minutes_by_day": {},
+            "active_days": {},
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    # ------------------------------------------------------------------
+    # Readers
+    # ------------------------------------------------------------------
+    async def get_daily_rollups(self, start_day: str, end_day: str) -> Optional[List[Dict[str, Any]]]:
+        """Return day rollups in ``[start_day, end_day]`` ordered by day, or None on failure."""
+        if not self._available:
+            return None
+        query = (
+            "SELECT c.day, c.jobs, c.audio_minutes, c.active_users, c.created_at FROM c "
+            "WHERE c.type = @type AND c.day >= @start AND c.day <= @end"
+        )
+        params = [
+            {"name": "@type", "value": ROLLUP_DAY_TYPE},
+            {"name": "@start", "value": start_day},
+            {"name": "@end", "value": end_day},
+        ]
+        try:
+            items = await run_sync(
+                lambda: list(
+                    self.cosmos_db.analytics_container.query_items(
+                        query=query, parameters=params, enable_cross_partition_query=True
+                    )
+                )
+            )
+        except CosmosHttpResponseError as e:
+            self.logger.warning(
+                "Failed to query daily analytics rollups",
+                extra={"start_day": start_day, "end_day": end_day, "status_code": e.status_code},
+            )
+            return None
+        except Exception:
+            self.logger.error(
+                "Unexpected error querying daily analytics rollups",
+                exc_info=True,
+                extra={"start_day": start_day, "end_day": end_day},
+            )
+            return None
+        return sorted(items, key=lambda it: it.get("day") or "")
+
+    async def count_active_users(self, start_day: str) -> Optional[int]:
+        """Count distinct users whose last activity falls on or after ``start_day``."""
+        if not self._available:
+            return None
+        query = "SELECT VALUE COUNT(1) FROM c WHERE c.type = @type AND c.last_active_day >= @start"
+        params = [
+            {"name": "@type", "value": ROLLUP_USER_TYPE},
+            {"name": "@start", "value": start_day},
+        ]
+        try:
+            counts = await run_sync(
+                lambda: list(
+                    self.cosmos_db.analytics_container.query_items(
+                        query=query, parameters=params, enable_cross_partition_query=True
+                    )
+                )
+            )
+        except CosmosHttpResponseError as e:
+            self.logger.warning(
+                "Failed to count active users from rollups",
+                extra={"start_day": start_day, "status_code": e.status_code},
+            )
+            return None
+        except Exception:
+            self.logger.error(
+                "Unexpected error counting active users from rollups",
+                exc_info=True,
+                extra={"start_day": start_day},
+            )
+            return None
+        # Cross-partition COUNT may come back as one partial count per partition.
+        return int(sum(c for c in counts if isinstance(c, (int, float))))
+
+    async def get_user_rollup(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Point-read the rollup document for ``user_id`` (None if missing)."""
+        if not self._available or not user_id:
+            return None
+        doc_id = user_rollup_id(user_id)
+        try:
+            return await run_sync(
+                lambda: self.cosmos_db.analytics_container.read_item(item=doc_id, partition_key=doc_id)
+            )
+        except CosmosHttpResponseError as e:
+            if e.status_code != 404:
+                self.logger.warning(
+                    "Failed to read user analytics rollup",
+                    extra={"user_id": user_id, "status_code": e.status_code},
+                )
+            return None
+        except Exception:
+            self.logger.error(
+                "Unexpected error reading user analytics rollup",
+                exc_info=True,
+                extra={"user_id": user_id},
+            )
+            return None
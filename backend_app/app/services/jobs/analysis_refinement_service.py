@@ -1,29 +1,83 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timezone
 import logging
-import aiohttp
 import asyncio
+import time
 import uuid
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type, RetryError
 import traceback
+import httpx
 
 from ...core.config import get_config, DatabaseError
 from ...core.dependencies import CosmosService
+from ...core.http_client import get_client, stream_timeout
+from ...utils.circuit_breaker import get_circuit_breaker_registry
+from ...utils.metrics import get_metrics_registry
+from .refinement_context import SUMMARY_KEY, RefinementContext, RefinementContextBuilder
+from .refinement_store import COUNT_KEY, DEFAULT_PAGE_SIZE, HISTORY_KEY, RefinementStore
 
 logger = logging.getLogger(__name__)
 
+# Most turns loaded to build a refinement context; older unsummarised turns are skipped
+CONTEXT_TURN_LIMIT = 50
+
 
 class AnalysisRefinementService:
     """Service for handling AI-powered analysis refinement via Azure Functions."""
     
-    def __init__(self, cosmos_service: CosmosService):
+    def __init__(self, cosmos_service: CosmosService, refinement_store: Optional[RefinementStore] = None):
         cfg = get_config()
         self.cosmos = cosmos_service
         self.config = cfg
+        self._refinements = refinement_store
         
         # Azure Functions configuration
         self.functions_base_url = cfg.azure_functions.get("base_url") if hasattr(cfg, 'azure_functions') else None
         self.functions_key = cfg.azure_functions.get("key") if hasattr(cfg, 'azure_functions') else None
+        # Refinement endpoints get their own breakers, so audio-analysis failures do not block them
+        self.circuit_breakers = get_circuit_breaker_registry()
+        self.context_builder = RefinementContextBuilder.from_config(cfg)
+
+    @property
+    def refinements(self) -> RefinementStore:
+        """Turn storage in the ``refinements`` container, opened on first use."""
+        if self._refinements is None:
+            self._refinements = RefinementStore(self.cosmos.get_container("refinements"))
+        return self._refinements
+
+    async def build_request_data(self, job: Dict[str, Any], user_request: str) -> Tuple[Dict[str, Any], RefinementContext]:
+        """Token-budgeted refinement payload for ``job``.
+
+        Loads only the turns the cached summary does not cover yet. Updates
+        the rolling conversation summary cached on ``job``; callers persist it
+        with ``record_refinement``.
+        """
+        if HISTORY_KEY in job:
+            # Not migrated yet; the turns are still on the job
+            context, summary_state = self.context_builder.build(job, user_request)
+        else:
+            covered = int((job.get(SUMMARY_KEY) or {}).get("turns", 0))
+            history = await self.refinements.recent(job["id"], since=covered, limit=CONTEXT_TURN_LIMIT)
+            first_turn = history[0]["seq"] if history else int(job.get(COUNT_KEY) or 0)
+            context, summary_state = self.context_builder.build(job, user_request, history, first_turn)
+        if summary_state is not None:
+            job[SUMMARY_KEY] = summary_state
+        request_data = {
+            "original_text": context.original_text,
+            "current_analysis": context.current_analysis,
+            "user_request": user_request,
+            "conversation_history": context.recent_turns,
+            "conversation_summary": context.summary,
+            "context_prompt": context.render(),
+            "context_tokens": context.tokens,
+        }
+        return request_data, context
+
+    async def record_refinement(self, job: Dict[str, Any], entry: Dict[str, Any]) -> None:
+        """Store a finished turn and save the job's turn count, timestamp and summary."""
+        await self.refinements.migrate_embedded(job)
+        await self.refinements.append(job, entry)
+        await self.cosmos.update_job_async(job["id"], job)
     
     async def refine_analysis(
         self, 
@@ -52,16 +106,9 @@ class AnalysisRefinementService:
             if job.get("user_id") != user_id:
                 return {"status": "error", "message": "Access denied"}
             
-            # Get conversation history
-            refinement_history = job.get("refinement_history", [])
-            
-            # Prepare request data
-            request_data = {
-                "original_text": job.get("text_content", ""),
-                "current_analysis": job.get("analysis_content", ""),
-                "user_request": user_request,
-                "conversation_history": refinement_history
-            }
+            # Prepare request data within the context token budget
+            request_data, context = await self.build_request_data(job, user_request)
+            started = time.monotonic()
             
             # Call Azure Functions endpoint. If the functions host is unreachable
             # (network/DNS errors, timeouts) provide a concise assistant-style
@@ -77,7 +124,7 @@ class AnalysisRefinementService:
                     result = await self._call_model_provider(request_data)
                 else:
                     result = await self._call_functions_api(request_data)
-            except (aiohttp.ClientError, asyncio.TimeoutError, RetryError) as e:
+            except (httpx.HTTPError, asyncio.TimeoutError, RetryError) as e:
                 logger.error(f"Unable to reach Azure Functions for refinement: {str(e)}")
                 logger.debug(traceback.format_exc())
                 # Provide a short assistant-formatted fallback response
@@ -89,23 +136,26 @@ class AnalysisRefinementService:
                     "status": "fallback"
                 }
             
+            latency_ms = round((time.monotonic() - started) * 1000, 1)
+            logger.info(
+                f"Refinement for job {job_id} took {latency_ms}ms with {context.total_tokens} context tokens "
+                f"(budget {context.budget}, truncated: {context.truncated or 'none'})"
+            )
+
             # Save refinement to history
             refinement_entry = {
                 "id": str(uuid.uuid4()),
                 "timestamp": datetime.now(timezone.utc).isoformat(),
                 "user_request": user_request,
                 "ai_response": result.get("refined_analysis", ""),
-                "status": result.get("status", "success")
+                "status": result.get("status", "success"),
+                "latency_ms": latency_ms,
+                "context_tokens": context.total_tokens,
             }
+            if result.get("usage"):
+                refinement_entry["usage"] = result["usage"]
             
-            # Update job with new refinement
-            if "refinement_history" not in job:
-                job["refinement_history"] = []
-            
-            job["refinement_history"].append(refinement_entry)
-            job["last_refined_at"] = datetime.now(timezone.utc).isoformat()
-            
-            await self.cosmos.update_job_async(job_id, job)
+            await self.record_refinement(job, refinement_entry)
             
             return {
                 "status": "success",
@@ -121,7 +171,7 @@ class AnalysisRefinementService:
             logger.error(f"Error refining analysis for job {job_id}: {str(e)}")
             return {"status": "error", "message": str(e)}
     
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(2), retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError)))
+    @retry(stop=stop_after_attempt(3), wait=wait_fixed(2), retry=retry_if_exception_type((httpx.TransportError, asyncio.TimeoutError)))
     async def _call_functions_api(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """Call the Azure Functions API for refinement with retry logic.
 
@@ -156,41 +206,55 @@ class AnalysisRefinementService:
         # Log header keys (safe) so we can see whether the function key was attached
         logger.info(f"Functions request headers keys: {list(headers.keys())}")
 
-        timeout = aiohttp.ClientTimeout(total=300)  # 5 minute timeout
+        timeout = httpx.Timeout(300.0, connect=10.0)  # 5 minute timeout
+
+        breaker = self.circuit_breakers.get(url)
+        if not breaker.try_acquire():
+            logger.warning(f"Refinement call to {breaker.name} rejected - circuit breaker is OPEN")
+            return {"refined_analysis": "Assistant: refinement service is temporarily unavailable.", "status": "fallback"}
+        healthy = None
+        started = time.monotonic()
         
         try:
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(url, json=request_data, headers=headers) as response:
-                    logger.info(f"Response status: {response.status}")
-                    text = await response.text()
-                    logger.debug(f"Functions response text: {text}")
-
-                    if response.status == 200:
-                        try:
-                            result = await response.json()
-                        except Exception:
-                            logger.warning("Failed to parse JSON from functions response; returning text as refined_analysis")
-                            result = {"refined_analysis": text, "status": "fallback"}
-
-                        logger.info("Analysis refinement completed successfully via Azure Functions")
-                        return result
-                    else:
-                        logger.error(f"Azure Functions call failed with status {response.status}: {text}")
-                        # Convert non-200 into a controlled fallback rather than raising raw ClientError
-                        return {"refined_analysis": f"Assistant: refinement service returned status {response.status}", "status": "fallback"}
-        except asyncio.TimeoutError as e:
+            # The rendered prompt is only for direct model calls; the Functions host builds its own
+            body = {key: value for key, value in request_data.items() if key != "context_prompt"}
+            response = await get_client().post(url, json=body, headers=headers, timeout=timeout)
+            logger.info(f"Response status: {response.status_code}")
+            text = response.text
+            logger.debug(f"Functions response text: {text}")
+            healthy = response.status_code < 500 and response.status_code != 429
+
+            if response.status_code == 200:
+                try:
+                    result = response.json()
+                except Exception:
+                    logger.warning("Failed to parse JSON from functions response; returning text as refined_analysis")
+                    result = {"refined_analysis": text, "status": "fallback"}
+
+                logger.info("Analysis refinement completed successfully via Azure Functions")
+                return result
+            else:
+                logger.error(f"Azure Functions call failed with status {response.status_code}: {text}")
+                # Convert non-200 into a controlled fallback rather than raising
+                return {"refined_analysis": f"Assistant: refinement service returned status {response.status_code}", "status": "fallback"}
+        except httpx.TimeoutException as e:
+            healthy = False
             logger.error(f"Timeout error when calling Azure Functions: {str(e)}")
             logger.debug(traceback.format_exc())
             return {"refined_analysis": "Assistant: refinement service timed out.", "status": "fallback"}
-        except aiohttp.ClientError as e:
+        except httpx.HTTPError as e:
+            healthy = False
             logger.error(f"HTTP client error when calling Azure Functions: {str(e)}")
             logger.debug(traceback.format_exc())
             return {"refined_analysis": "Assistant: refinement service unreachable.", "status": "fallback"}
         except Exception as e:
-            # Catch any other unexpected exceptions from aiohttp or json parsing
+            # Catch any other unexpected exceptions from the client or json parsing
+            healthy = False
             logger.error(f"Unexpected error calling Azure Functions: {str(e)}")
             logger.debug(traceback.format_exc())
             return {"refined_analysis": "Assistant: an unexpected error occurred while contacting the refinement service.", "status": "fallback"}
+        finally:
+            breaker.record(healthy, time.monotonic() - started)
 
     async def _call_model_provider(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -211,7 +275,7 @@ class AnalysisRefinementService:
         # Construct request payload for Azure OpenAI Chat Completions
         messages = [
             {"role": "system", "content": "You are a concise assistant. Answer in 2-3 short sentences or bullet points when requested."},
-            {"role": "user", "content": request_data.get('user_request', '')}
+            {"role": "user", "content": request_data.get('context_prompt') or request_data.get('user_request', '')}
         ]
 
         url = f"{openai_endpoint}/openai/deployments/{deployment}/chat/completions?api-version=2024-10-21"
@@ -226,34 +290,44 @@ class AnalysisRefinementService:
             "temperature": 0.2,
         }
 
-        timeout = aiohttp.ClientTimeout(total=300)
+        timeout = httpx.Timeout(300.0, connect=10.0)
+
+        breaker = self.circuit_breakers.get(url)
+        if not breaker.try_acquire():
+            logger.warning(f"Model provider call to {breaker.name} rejected - circuit breaker is OPEN")
+            return {"refined_analysis": "Assistant: model provider is temporarily unavailable.", "status": "fallback"}
+        healthy = None
+        started = time.monotonic()
 
         try:
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(url, json=payload, headers=headers) as resp:
-                    text = await resp.text()
-                    if resp.status != 200:
-                        logger.error(f"Model provider returned status {resp.status}: {text}")
-                        return {"refined_analysis": f"Assistant: model provider returned status {resp.status}", "status": "fallback"}
-
-                    try:
-                        data = await resp.json()
-                        # Azure OpenAI chat/completions shape: choices[0].message.content
-                        content = ""
-                        if isinstance(data, dict):
-                            choices = data.get('choices') or []
-                            if choices and isinstance(choices[0], dict):
-                                message = choices[0].get('message') or {}
-                                content = message.get('content') or ''
-                        return {"refined_analysis": content, "status": "success"}
-                    except Exception:
-                        logger.warning("Failed to parse JSON from model provider; returning raw text")
-                        return {"refined_analysis": text, "status": "fallback"}
+            resp = await get_client().post(url, json=payload, headers=headers, timeout=timeout)
+            text = resp.text
+            healthy = resp.status_code < 500 and resp.status_code != 429
+            if resp.status_code != 200:
+                logger.error(f"Model provider returned status {resp.status_code}: {text}")
+                return {"refined_analysis": f"Assistant: model provider returned status {resp.status_code}", "status": "fallback"}
+
+            try:
+                data = resp.json()
+                # Azure OpenAI chat/completions shape: choices[0].message.content
+                content = ""
+                if isinstance(data, dict):
+                    choices = data.get('choices') or []
+                    if choices and isinstance(choices[0], dict):
+                        message = choices[0].get('message') or {}
+                        content = message.get('content') or ''
+                return {"refined_analysis": content, "status": "success", "usage": data.get('usage') if isinstance(data, dict) else None}
+            except Exception:
+                logger.warning("Failed to parse JSON from model provider; returning raw text")
+                return {"refined_analysis": text, "status": "fallback"}
 
         except Exception as e:
+            healthy = False
             logger.error(f"Error calling model provider: {str(e)}")
             logger.debug(traceback.format_exc())
             return {"refined_analysis": "Assistant: an error occurred contacting the model provider.", "status": "fallback"}
+        finally:
+            breaker.record(healthy, time.monotonic() - started)
 
     async def stream_model_provider(self, request_data: Dict[str, Any]):
         """
@@ -277,7 +351,7 @@ class AnalysisRefinementService:
 
         messages = [
             {"role": "system", "content": "You are a concise assistant. Reply in short, direct sentences or bullets."},
-            {"role": "user", "content": request_data.get('user_request', '')}
+            {"role": "user", "content": request_data.get('context_prompt') or request_data.get('user_request', '')}
         ]
 
         payload = {
@@ -287,41 +361,61 @@ class AnalysisRefinementService:
             "stream": True
         }
 
-        timeout = aiohttp.ClientTimeout(total=0)  # rely on streaming connection
+        breaker = self.circuit_breakers.get(url)
+        if not breaker.try_acquire():
+            yield "ERROR: model provider is temporarily unavailable (circuit breaker is OPEN)"
+            return
+        healthy = None
+        started = time.monotonic()
+        first_token_at = None
 
         try:
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(url, json=payload, headers=headers) as resp:
-                    if resp.status != 200:
-                        text = await resp.text()
-                        yield f"ERROR: model returned status {resp.status}: {text}"
-                        return
-
-                    async for line in resp.content:
-                        # Each chunk may contain newline-delimited events; forward as-is
-                        try:
-                            chunk = line.decode(errors='ignore')
-                        except Exception:
-                            chunk = str(line)
-                        if not chunk:
-                            continue
-                        # The Azure streaming payload often prefixes 'data: ' lines; pass them through
-                        yield chunk
+            # The read timeout bounds the gap between chunks rather than the whole stream
+            async with get_client().stream("POST", url, json=payload, headers=headers, timeout=stream_timeout()) as resp:
+                healthy = resp.status_code < 500 and resp.status_code != 429
+                # Only the time to response headers counts towards the slow-call rate
+                breaker.record(healthy, time.monotonic() - started)
+                if resp.status_code != 200:
+                    text = (await resp.aread()).decode(errors='ignore')
+                    yield f"ERROR: model returned status {resp.status_code}: {text}"
+                    return
+
+                async for chunk in resp.aiter_lines():
+                    # Each line is one SSE field; the Azure payload prefixes events with 'data: '
+                    if not chunk:
+                        continue
+                    if first_token_at is None:
+                        first_token_at = time.monotonic()
+                        get_metrics_registry().observe_time_to_first_token("azure_openai", first_token_at - started)
+                        logger.info(f"Model stream first token after {(first_token_at - started) * 1000:.0f}ms")
+                    yield chunk
 
         except Exception as e:
+            if healthy is None:
+                healthy = False
+                breaker.record(healthy, time.monotonic() - started)
             yield f"ERROR: streaming failed: {str(e)}"
             return
+        finally:
+            if healthy is None:
+                # Cancelled before the provider answered
+                breaker.release()
 
-    async def get_refinement_history(self, job_id: str, user_id: str) -> Dict[str, Any]:
+    async def get_refinement_history(
+        self, job_id: str, user_id: str, limit: int = DEFAULT_PAGE_SIZE, before: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
-        Get the refinement history for a job.
+        Get one page of the refinement history for a job.
         
         Args:
             job_id: ID of the job
             user_id: ID of the user requesting history
+            limit: Maximum number of turns to return
+            before: Cursor from a previous page; only older turns are returned
             
         Returns:
-            Dict containing refinement history
+            Dict containing the page of turns (oldest first) and the cursor for
+            the page before it, or None when there are no older turns
         """
         try:
             # Get the job
@@ -333,13 +427,16 @@ class AnalysisRefinementService:
             if job.get("user_id") != user_id:
                 return {"status": "error", "message": "Access denied"}
             
-            refinement_history = job.get("refinement_history", [])
+            if await self.refinements.migrate_embedded(job):
+                await self.cosmos.update_job_async(job_id, job)
+            refinement_history, next_before = await self.refinements.page(job_id, limit=limit, before=before)
             
             return {
                 "status": "success",
                 "job_id": job_id,
                 "refinement_history": refinement_history,
-                "total_refinements": len(refinement_history)
+                "total_refinements": int(job.get(COUNT_KEY) or 0),
+                "next_before": next_before,
             }
             
         except DatabaseError as e:
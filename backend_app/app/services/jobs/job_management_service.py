@@ -6,7 +6,7 @@ import uuid
 from ...core.config import get_config, DatabaseError
 from ...core.dependencies import CosmosService
 from ...utils.async_utils import run_sync
-from .job_service import JobService
+from .job_service import JobService, job_summary_select
 
 logger = logging.getLogger(__name__)
 
@@ -202,11 +202,8 @@ class JobManagementService:
                 )
             ))
             
-            # Enrich deleted jobs with display names and file URLs
-            enriched_jobs = []
-            for job in items:
-                enriched_job = self.job_service.enrich_job_file_urls(job)
-                enriched_jobs.append(enriched_job)
+            # Enrich deleted jobs with display names and file URLs (SAS tokens signed in one batch)
+            enriched_jobs = self.job_service.enrich_jobs_file_urls(items)
 
             return {"status": "success", "deleted_jobs": enriched_jobs, "total_count": total}
 
@@ -228,8 +225,8 @@ class JobManagementService:
             List of user's jobs
         """
         try:
-            query = """
-            SELECT * FROM c 
+            query = job_summary_select() + """
+            FROM c 
             WHERE c.type = 'job' 
             AND c.user_id = @user_id 
             AND (NOT IS_DEFINED(c.deleted) OR c.deleted = false)
@@ -323,8 +320,8 @@ class JobManagementService:
             total = count_items[0] if count_items else 0
             
             # Build optimized query with database-level pagination
-            query = """
-            SELECT * FROM c
+            query = job_summary_select() + """
+            FROM c
             WHERE c.type = 'job'
             """
             if not include_deleted:
@@ -341,11 +338,8 @@ class JobManagementService:
                 )
             ))
             
-            # Enrich jobs with display names and file URLs
-            enriched_jobs = []
-            for job in items:
-                enriched_job = self.job_service.enrich_job_file_urls(job)
-                enriched_jobs.append(enriched_job)
+            # Enrich jobs with display names and file URLs (SAS tokens signed in one batch)
+            enriched_jobs = self.job_service.enrich_jobs_file_urls(items)
 
             return {"jobs": enriched_jobs, "total_count": total}
 
@@ -1,16 +1,49 @@
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional
 from urllib.parse import urlparse
 from datetime import datetime, timezone
 import logging
+import time
 
 from ...core.config import get_config
 from ...core.dependencies import CosmosService
-from ..storage.blob_service import StorageService
+from ..storage.blob_service import SAS_TOKEN_LIFETIME, StorageService
 import uuid
 from ...utils.async_utils import run_sync
+from ...utils.file_utils import FileUtils
+from ...utils.response_cache import etag_for_versions
 
 logger = logging.getLogger(__name__)
 
+# Job fields holding blob URLs that are handed to clients with a SAS token
+SIGNED_URL_FIELDS = ("file_path", "transcription_file_path", "analysis_file_path")
+
+# Fields returned by job listings. Transcripts, analysis text and prompts are
+# only read with the full job, so a listing's RU does not grow with them.
+JOB_SUMMARY_FIELDS = (
+    "id", "type", "user_id", "user_email", "status", "created_at", "updated_at",
+    "file_name", "filename", "displayname", "display_name",
+    "file_path", "transcription_file_path", "analysis_file_path",
+    "transcription_id", "prompt_category_id", "prompt_subcategory_id",
+    "file_size_bytes", "audio_duration_seconds", "audio_duration_minutes",
+    "shared_with", "deleted", "deleted_at", "deleted_by",
+    "error_message", "refinement_count", "last_refined_at", "_ts",
+)
+
+
+def job_etag(job: Dict[str, Any], viewer_id: Optional[str], now: Optional[float] = None) -> str:
+    """ETag for a job as returned to ``viewer_id``.
+
+    Changes with the stored document and at least twice per SAS lifetime, so a
+    revalidated copy never carries file URLs whose SAS token has expired.
+    """
+    sas_epoch = int((time.time() if now is None else now) // (SAS_TOKEN_LIFETIME.total_seconds() / 2))
+    return etag_for_versions(job.get("id"), job.get("_etag"), viewer_id, sas_epoch)
+
+
+def job_summary_select() -> str:
+    """``SELECT`` clause projecting ``JOB_SUMMARY_FIELDS`` from ``c``."""
+    return "SELECT " + ", ".join(f"c.{name}" for name in JOB_SUMMARY_FIELDS)
+
 
 class JobService:
     """Encapsulates job-related DB access and light enrichment (SAS tokens, metadata).
@@ -31,6 +64,13 @@ class JobService:
     async def async_get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
         return await run_sync(lambda: self.get_job(job_id))
 
+    async def async_read_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Point-read a job; cheaper than ``get_job``'s query when only the id is known."""
+        try:
+            return await run_sync(self.cosmos.read_job, job_id)
+        except Exception:
+            return None
+
     def query_jobs(self, query: str, parameters: List[Dict[str, Any]]):
         return list(self.cosmos.jobs_container.query_items(query=query, parameters=parameters, enable_cross_partition_query=True))
 
@@ -38,11 +78,26 @@ class JobService:
         return await run_sync(lambda: self.query_jobs(query, parameters))
 
     def enrich_job_file_urls(self, job: Dict[str, Any]):
+        return self._enrich_job(job, self.storage.add_sas_token_to_url)
+
+    def enrich_jobs_file_urls(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Enrich a page of jobs, signing every blob URL in one batch.
+
+        Used by listing endpoints so SAS generation cost does not grow with a
+        network round-trip per URL.
+        """
+        urls = [job[field] for job in jobs for field in SIGNED_URL_FIELDS if job.get(field)]
+        signed_urls = self.storage.sign_urls(urls) if urls else {}
+        for job in jobs:
+            self._enrich_job(job, lambda url: signed_urls.get(url, url))
+        return jobs
+
+    def _enrich_job(self, job: Dict[str, Any], sign_url: Callable[[str], str]):
         if job.get("file_path"):
             file_path = job["file_path"]
             path_parts = urlparse(file_path).path.strip("/").split("/")
             job["file_name"] = path_parts[-1] if path_parts else None
-            job["file_path"] = self.storage.add_sas_token_to_url(file_path)
+            job["file_path"] = sign_url(file_path)
         # Provide a stable alias expected by some frontend pages (e.g. admin/Deleted recordings)
         # Without overwriting existing explicit values if already set differently.
         if job.get("file_name") and not job.get("filename"):
@@ -51,27 +106,16 @@ class JobService:
         if not job.get("displayname"):
             job["displayname"] = job.get("file_name") or job.get("filename") or "Untitled Recording"
         if job.get("transcription_file_path"):
-            job["transcription_file_path"] = self.storage.add_sas_token_to_url(job["transcription_file_path"])
+            job["transcription_file_path"] = sign_url(job["transcription_file_path"])
         if job.get("analysis_file_path"):
-            job["analysis_file_path"] = self.storage.add_sas_token_to_url(job["analysis_file_path"])
+            job["analysis_file_path"] = sign_url(job["analysis_file_path"])
         return job
 
     def close(self):
         # No persistent resources to close, but provide hook for DI resets
         logger.info("JobService.close: no resources to close")
 
-    def upload_and_create_job(self, file_path: str, original_filename: str, owner_user: Dict[str, Any], metadata: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Upload a file to storage and create a minimal job record in Cosmos.
-
-        Returns the created job document.
-        """
-        if metadata is None:
-            metadata = {}
-
-        # Upload file to blob storage
-        blob_url = self.storage.upload_file(file_path, original_filename)
-
-        # Build job document
+    def _build_job_document(self, blob_url: str, original_filename: str, owner_user: Dict[str, Any], metadata: Dict[str, Any]) -> Dict[str, Any]:
         job_doc = {
             # Ensure Cosmos DB required 'id' is present
             "id": str(uuid.uuid4()),
@@ -86,7 +130,9 @@ class JobService:
 
         # Merge additional metadata if provided
         job_doc.update(metadata)
+        return job_doc
 
+    def _create_job_document(self, job_doc: Dict[str, Any]) -> Dict[str, Any]:
         # Persist to Cosmos (uses cosmos helper if available)
         try:
             created = self.cosmos.create_job(job_doc)
@@ -98,5 +144,40 @@ class JobService:
             # On failure, attempt best-effort cleanup: remove uploaded blob is intentionally omitted
             raise
 
+    def upload_and_create_job(self, file_path: str, original_filename: str, owner_user: Dict[str, Any], metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Upload a file to storage and create a minimal job record in Cosmos.
+
+        Returns the created job document.
+        """
+        if metadata is None:
+            metadata = {}
+
+        # Upload file to blob storage
+        blob_url = self.storage.upload_file(file_path, original_filename)
+
+        return self._create_job_document(self._build_job_document(blob_url, original_filename, owner_user, metadata))
+
     async def async_upload_and_create_job(self, file_path: str, original_filename: str, owner_user: Dict[str, Any], metadata: Dict[str, Any] = None) -> Dict[str, Any]:
         return await run_sync(lambda: self.upload_and_create_job(file_path, original_filename, owner_user, metadata))
+
+    async def async_stream_upload_and_create_job(self, chunks: AsyncIterator[bytes], original_filename: str, owner_user: Dict[str, Any], metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Stream an upload straight into blob storage and create the job record.
+
+        Size, SHA-256 and (for audio) duration are derived while streaming, so the
+        file never has to be written to or re-read from local disk.
+        """
+        metadata = dict(metadata or {})
+
+        upload = await self.storage.upload_stream(chunks, original_filename)
+        metadata["file_size_bytes"] = upload["size_bytes"]
+        metadata["file_sha256"] = upload["sha256"]
+
+        if FileUtils.get_extension(original_filename) in FileUtils.AUDIO_EXTENSIONS:
+            audio_secs = FileUtils.get_audio_duration_from_header(upload["header"], upload["size_bytes"], original_filename)
+            if audio_secs is not None:
+                metadata["audio_duration_seconds"] = float(audio_secs)
+                metadata["audio_duration_minutes"] = float(audio_secs) / 60.0
+                logger.info(f"Extracted audio duration: {metadata['audio_duration_minutes']:.2f} minutes for upload")
+
+        job_doc = self._build_job_document(upload["url"], original_filename, owner_user, metadata)
+        return await run_sync(lambda: self._create_job_document(job_doc))
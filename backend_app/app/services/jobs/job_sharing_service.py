@@ -1,13 +1,35 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional
 from datetime import datetime, timezone
+import asyncio
 import logging
 
+from azure.cosmos.exceptions import CosmosHttpResponseError, CosmosResourceExistsError
+
 from ...core.config import get_config, DatabaseError
 from ...core.dependencies import CosmosService
 from ...utils.async_utils import run_sync
 
 logger = logging.getLogger(__name__)
 
+SHARE_INDEX_TYPE = "share_index"
+# Cosmos accepts at most 10 operations per patch request
+_MAX_PATCH_OPERATIONS = 10
+# Job point reads issued concurrently when resolving a share index
+SHARED_JOB_READ_BATCH = 20
+
+
+def share_index_id(user_id: str) -> str:
+    return f"share_index_{user_id}"
+
+
+def is_share_for(share: Dict[str, Any], user_id: str) -> bool:
+    """Whether a ``shared_with`` entry names ``user_id``.
+
+    Legacy entries may only carry ``user_email``, and some tokens use the email
+    as the user identifier, so both fields are matched.
+    """
+    return share.get("user_id") == user_id or share.get("user_email") == user_id
+
 
 class JobSharingService:
     """Service for handling job sharing operations with Cosmos DB."""
@@ -69,6 +91,7 @@ class JobSharingService:
             
             # Update the job in database (use async wrapper)
             await self.cosmos.update_job_async(job_id, job)
+            await self._index_share(job, target_user["id"], permission_level)
             
             return {
                 "status": "success",
@@ -108,15 +131,19 @@ class JobSharingService:
             
             # Remove share if exists
             if "shared_with" in job:
-                original_count = len(job["shared_with"])
+                removed = [
+                    share for share in job["shared_with"]
+                    if share.get("user_email") == target_user_email
+                ]
                 job["shared_with"] = [
                     share for share in job["shared_with"] 
                     if share.get("user_email") != target_user_email
                 ]
                 
-                if len(job["shared_with"]) < original_count:
+                if removed:
                     # Update the job in database (use async wrapper)
                     await self.cosmos.update_job_async(job_id, job)
+                    await self._index_unshare(job, [share.get("user_id") for share in removed])
                     return {
                         "status": "success",
                         "message": f"Job unshared from {target_user_email}",
@@ -157,7 +184,7 @@ class JobSharingService:
             
             if "shared_with" in job:
                 has_shared_access = any(
-                    share.get("user_id") == current_user_id 
+                    is_share_for(share, current_user_id)
                     for share in job["shared_with"]
                 )
             
@@ -184,6 +211,12 @@ class JobSharingService:
     async def get_shared_jobs(self, user_id: str) -> List[Dict[str, Any]]:
         """
         Get all jobs shared with the current user and jobs owned by current user that are shared with others.
+
+        Reads the user's share index document (a single-partition point read)
+        and then point-reads the referenced jobs in batches. Jobs are re-checked
+        against their ``shared_with`` list, so a stale index entry can never grant
+        visibility. Users without a complete index fall back to the legacy
+        cross-partition queries once, which also backfills their index.
         
         Args:
             user_id: ID of the current user
@@ -192,79 +225,24 @@ class JobSharingService:
             List of shared jobs
         """
         try:
-            # Query for jobs shared with this user. Some tokens use the user's
-            # email as the identifier while shared entries store the internal
-            # user id. To be tolerant, search for both `user_id` and
-            # `user_email` inside shared_with.
-            shared_query_by_id = """
-            SELECT * FROM c
-            WHERE c.type = 'job'
-            AND ARRAY_CONTAINS(c.shared_with, {'user_id': @user_id}, false)
-            AND (NOT IS_DEFINED(c.deleted) OR c.deleted = false)
-            """
-
-            shared_query_by_email = """
-            SELECT * FROM c
-            WHERE c.type = 'job'
-            AND ARRAY_CONTAINS(c.shared_with, {'user_email': @user_email}, false)
-            AND (NOT IS_DEFINED(c.deleted) OR c.deleted = false)
-            """
-
-            shared_params_id = [{"name": "@user_id", "value": user_id}]
-            shared_params_email = [{"name": "@user_email", "value": user_id}]
-
-            shared_jobs = await run_sync(lambda: list(
-                self.cosmos.jobs_container.query_items(
-                    query=shared_query_by_id,
-                    parameters=shared_params_id,
-                    enable_cross_partition_query=True,
-                )
-            ))
+            index = await self._read_share_index(user_id)
+            if index is None or not index.get("backfilled"):
+                return await self._backfill_share_index(user_id, index_exists=index is not None)
 
-            # Also include matches where the shared entry contains the user's email
-            try:
-                shared_jobs_by_email = await run_sync(lambda: list(
-                    self.cosmos.jobs_container.query_items(
-                        query=shared_query_by_email,
-                        parameters=shared_params_email,
-                        enable_cross_partition_query=True,
-                    )
-                ))
-            except Exception:
-                shared_jobs_by_email = []
+            shared_with_me = list((index.get("shared_with_me") or {}).keys())
+            shared_by_me = list((index.get("shared_by_me") or {}).keys())
+            jobs = await self._read_jobs(list(dict.fromkeys(shared_with_me + shared_by_me)))
 
-            # Merge both lists
-            shared_jobs.extend(shared_jobs_by_email)
-            
-            # Query for jobs owned by current user that are shared with others
-            owned_shared_query = """
-            SELECT * FROM c 
-            WHERE c.type = 'job' 
-            AND c.user_id = @user_id 
-            AND IS_DEFINED(c.shared_with) 
-            AND ARRAY_LENGTH(c.shared_with) > 0
-            AND (NOT IS_DEFINED(c.deleted) OR c.deleted = false)
-            """
-            
-            owned_shared_jobs = await run_sync(lambda: list(
-                self.cosmos.jobs_container.query_items(
-                    query=owned_shared_query,
-                    parameters=shared_params_id,
-                    enable_cross_partition_query=True,
-                )
-            ))
-            
-            # Combine and deduplicate
-            all_jobs = shared_jobs + owned_shared_jobs
-            seen_ids = set()
-            unique_jobs = []
-            
-            for job in all_jobs:
-                if job["id"] not in seen_ids:
-                    seen_ids.add(job["id"])
-                    unique_jobs.append(job)
-            
-            return unique_jobs
+            visible = []
+            for job in jobs:
+                if job is None or job.get("deleted"):
+                    continue
+                shares = job.get("shared_with") or []
+                is_recipient = any(is_share_for(share, user_id) for share in shares)
+                is_sharing_owner = job.get("user_id") == user_id and len(shares) > 0
+                if is_recipient or is_sharing_owner:
+                    visible.append(job)
+            return visible
             
         except DatabaseError as e:
             logger.error(f"Database error getting shared jobs for user {user_id}: {str(e)}")
@@ -273,6 +251,238 @@ class JobSharingService:
             logger.error(f"Error getting shared jobs for user {user_id}: {str(e)}")
             raise
 
+    # ------------------------------------------------------------------
+    # Share index
+    #
+    # One document per user in the jobs container (partitioned by id), with
+    # ``shared_with_me`` mapping job ids shared with the user to share details
+    # and ``shared_by_me`` mapping the user's own shared job ids to their share
+    # counts. The job's ``shared_with`` list stays the source of truth.
+    # ------------------------------------------------------------------
+    async def _read_share_index(self, user_id: str) -> Optional[Dict[str, Any]]:
+        doc_id = share_index_id(user_id)
+        try:
+            return await run_sync(
+                lambda: self.cosmos.jobs_container.read_item(item=doc_id, partition_key=doc_id)
+            )
+        except CosmosHttpResponseError as e:
+            if e.status_code == 404:
+                return None
+            raise
+
+    async def _read_jobs(self, job_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        async def _read(job_id: str) -> Optional[Dict[str, Any]]:
+            try:
+                return await run_sync(
+                    lambda: self.cosmos.jobs_container.read_item(item=job_id, partition_key=job_id)
+                )
+            except CosmosHttpResponseError as e:
+                if e.status_code == 404:
+                    return None
+                raise
+
+        jobs: List[Optional[Dict[str, Any]]] = []
+        for i in range(0, len(job_ids), SHARED_JOB_READ_BATCH):
+            batch = job_ids[i:i + SHARED_JOB_READ_BATCH]
+            jobs.extend(await asyncio.gather(*(_read(job_id) for job_id in batch)))
+        return jobs
+
+    @staticmethod
+    def _new_share_index(user_id: str, backfilled: bool = False) -> Dict[str, Any]:
+        return {
+            "id": share_index_id(user_id),
+            "type": SHARE_INDEX_TYPE,
+            "recipient_user_id": user_id,
+            "shared_with_me": {},
+            "shared_by_me": {},
+            "backfilled": backfilled,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    async def _patch_share_index(self, user_id: str, operations: List[Dict[str, Any]]) -> None:
+        """Apply ``operations`` to a user's index, creating an empty one on first use."""
+        container = self.cosmos.jobs_container
+        doc_id = share_index_id(user_id)
+        for start in range(0, len(operations), _MAX_PATCH_OPERATIONS):
+            chunk = operations[start:start + _MAX_PATCH_OPERATIONS]
+            for attempt in range(2):
+                try:
+                    await run_sync(
+                        lambda: container.patch_item(item=doc_id, partition_key=doc_id, patch_operations=chunk)
+                    )
+                    break
+                except CosmosHttpResponseError as e:
+                    if e.status_code != 404 or attempt:
+                        raise
+                try:
+                    await run_sync(lambda: container.create_item(body=self._new_share_index(user_id)))
+                except CosmosResourceExistsError:
+                    pass
+
+    async def _remove_share_index_entries(self, user_id: str, paths: Iterable[str]) -> None:
+        for path in paths:
+            try:
+                await self._patch_share_index(user_id, [{"op": "remove", "path": path}])
+            except CosmosHttpResponseError as e:
+                # 400: the entry was never indexed; nothing to remove
+                if e.status_code != 400:
+                    raise
+
+    async def _index_share(self, job: Dict[str, Any], recipient_id: str, permission_level: str) -> None:
+        job_id, owner_id = job["id"], job.get("user_id")
+        try:
+            await self._patch_share_index(recipient_id, [{
+                "op": "set",
+                "path": f"/shared_with_me/{job_id}",
+                "value": {
+                    "owner_user_id": owner_id,
+                    "permission_level": permission_level,
+                    "shared_at": datetime.now(timezone.utc).isoformat(),
+                },
+            }])
+            if owner_id:
+                await self._patch_share_index(owner_id, [{
+                    "op": "set", "path": f"/shared_by_me/{job_id}", "value": len(job.get("shared_with") or []),
+                }])
+        except Exception as e:
+            logger.warning(
+                "Failed to update share index after sharing job",
+                extra={"job_id": job_id, "recipient_user_id": recipient_id, "error": str(e)},
+            )
+
+    async def _index_unshare(self, job: Dict[str, Any], recipient_ids: List[Optional[str]]) -> None:
+        job_id, owner_id = job["id"], job.get("user_id")
+        remaining = len(job.get("shared_with") or [])
+        try:
+            for recipient_id in filter(None, recipient_ids):
+                await self._remove_share_index_entries(recipient_id, [f"/shared_with_me/{job_id}"])
+            if owner_id:
+                if remaining:
+                    await self._patch_share_index(owner_id, [{
+                        "op": "set", "path": f"/shared_by_me/{job_id}", "value": remaining,
+                    }])
+                else:
+                    await self._remove_share_index_entries(owner_id, [f"/shared_by_me/{job_id}"])
+        except Exception as e:
+            logger.warning(
+                "Failed to update share index after unsharing job",
+                extra={"job_id": job_id, "error": str(e)},
+            )
+
+    async def _backfill_share_index(self, user_id: str, index_exists: bool) -> List[Dict[str, Any]]:
+        """Answer from the legacy scans and record the result in the user's index."""
+        shared_jobs, owned_shared_jobs = await self._query_shared_jobs_legacy(user_id)
+
+        shared_with_me: Dict[str, Any] = {}
+        for job in shared_jobs:
+            share = next(
+                (s for s in job.get("shared_with") or [] if is_share_for(s, user_id)),
+                {},
+            )
+            shared_with_me[job["id"]] = {
+                "owner_user_id": job.get("user_id"),
+                "permission_level": share.get("permission_level", "view"),
+                "shared_at": share.get("shared_at"),
+            }
+        shared_by_me = {job["id"]: len(job.get("shared_with") or []) for job in owned_shared_jobs}
+
+        try:
+            created = False
+            if not index_exists:
+                doc = self._new_share_index(user_id, backfilled=True)
+                doc["shared_with_me"], doc["shared_by_me"] = shared_with_me, shared_by_me
+                try:
+                    await run_sync(lambda: self.cosmos.jobs_container.create_item(body=doc))
+                    created = True
+                except CosmosResourceExistsError:
+                    pass
+            if not created:
+                # Merge entry by entry so shares indexed concurrently are kept
+                operations = [
+                    {"op": "set", "path": f"/shared_with_me/{job_id}", "value": entry}
+                    for job_id, entry in shared_with_me.items()
+                ] + [
+                    {"op": "set", "path": f"/shared_by_me/{job_id}", "value": count}
+                    for job_id, count in shared_by_me.items()
+                ] + [{"op": "set", "path": "/backfilled", "value": True}]
+                await self._patch_share_index(user_id, operations)
+        except Exception as e:
+            logger.warning(
+                "Failed to backfill share index",
+                extra={"user_id": user_id, "error": str(e)},
+            )
+
+        # Combine and deduplicate
+        seen_ids = set()
+        unique_jobs = []
+        for job in shared_jobs + owned_shared_jobs:
+            if job["id"] not in seen_ids:
+                seen_ids.add(job["id"])
+                unique_jobs.append(job)
+        return unique_jobs
+
+    async def _query_shared_jobs_legacy(self, user_id: str):
+        """Cross-partition scans over ``shared_with``; used only to backfill an index."""
+        # Matches the same entries as ``is_share_for``: by `user_id` or `user_email`
+        shared_query_by_id = """
+        SELECT * FROM c
+        WHERE c.type = 'job'
+        AND ARRAY_CONTAINS(c.shared_with, {'user_id': @user_id}, false)
+        AND (NOT IS_DEFINED(c.deleted) OR c.deleted = false)
+        """
+
+        shared_query_by_email = """
+        SELECT * FROM c
+        WHERE c.type = 'job'
+        AND ARRAY_CONTAINS(c.shared_with, {'user_email': @user_email}, false)
+        AND (NOT IS_DEFINED(c.deleted) OR c.deleted = false)
+        """
+
+        shared_params_id = [{"name": "@user_id", "value": user_id}]
+        shared_params_email = [{"name": "@user_email", "value": user_id}]
+
+        shared_jobs = await run_sync(lambda: list(
+            self.cosmos.jobs_container.query_items(
+                query=shared_query_by_id,
+                parameters=shared_params_id,
+                enable_cross_partition_query=True,
+            )
+        ))
+
+        # Also include matches where the shared entry contains the user's email
+        try:
+            shared_jobs_by_email = await run_sync(lambda: list(
+                self.cosmos.jobs_container.query_items(
+                    query=shared_query_by_email,
+                    parameters=shared_params_email,
+                    enable_cross_partition_query=True,
+                )
+            ))
+        except Exception:
+            shared_jobs_by_email = []
+
+        # Merge both lists
+        shared_jobs.extend(shared_jobs_by_email)
+        
+        # Query for jobs owned by current user that are shared with others
+        owned_shared_query = """
+        SELECT * FROM c 
+        WHERE c.type = 'job' 
+        AND c.user_id = @user_id 
+        AND IS_DEFINED(c.shared_with) 
+        AND ARRAY_LENGTH(c.shared_with) > 0
+        AND (NOT IS_DEFINED(c.deleted) OR c.deleted = false)
+        """
+        
+        owned_shared_jobs = await run_sync(lambda: list(
+            self.cosmos.jobs_container.query_items(
+                query=owned_shared_query,
+                parameters=shared_params_id,
+                enable_cross_partition_query=True,
+            )
+        ))
+        return shared_jobs, owned_shared_jobs
+
     def close(self):
         """Close any resources - placeholder for consistency"""
         logger.info("JobSharingService.close: no resources to close")
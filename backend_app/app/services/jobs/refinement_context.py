@@ -0,0 +1,234 @@
+"""
+Token-budgeted conversation context for analysis refinement.
+
+``RefinementContextBuilder`` fits what is sent with a refinement request into
+``refinement_context_token_budget`` tokens, filling it in priority order:
+
+1. the user's request (always sent),
+2. the current analysis, truncated only if it alone exceeds the budget,
+3. the most recent successful turns, verbatim, newest first,
+4. a rolling summary of older turns, up to ``refinement_summary_token_budget``,
+5. as much of the original transcript as still fits.
+
+The summary is extractive (one short line per turn) and built incrementally:
+turns that fall out of the verbatim window are folded in once, and the result
+is cached on the job under ``refinement_summary`` together with how many turns
+it covers, so later requests only load and summarise the newer turns.
+
+Tokens are counted locally with ``tiktoken`` when it is installed and its
+encoding can be loaded, and estimated at four characters per token otherwise.
+"""
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+# Optional tiktoken import
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_KEY = "refinement_summary"
+TIKTOKEN_ENCODING = "cl100k_base"
+CHARS_PER_TOKEN = 4
+# Instructions the Functions host or the direct model call wraps around the context
+PROMPT_OVERHEAD_TOKENS = 200
+TRUNCATION_MARKER = "\n[...truncated]"
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        return tiktoken.get_encoding(TIKTOKEN_ENCODING)
+    except Exception as e:
+        # The encoding file is downloaded on first use; fall back to estimates when that fails
+        logger.warning(f"tiktoken encoding unavailable, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: Optional[str]) -> int:
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: Optional[str], max_tokens: int) -> str:
+    """The start of ``text`` within ``max_tokens`` tokens, marked when anything was cut."""
+    if not text or max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    keep = max(0, max_tokens - count_tokens(TRUNCATION_MARKER))
+    encoding = _encoding()
+    if encoding is not None:
+        head = encoding.decode(encoding.encode(text, disallowed_special=())[:keep])
+    else:
+        head = text[: keep * CHARS_PER_TOKEN]
+    return head.rstrip() + TRUNCATION_MARKER
+
+
+def _summary_line(turn: Dict[str, Any], max_tokens: int) -> str:
+    request = " ".join(str(turn.get("user_request", "")).split())
+    response = str(turn.get("ai_response", "")).strip().split("\n\n", 1)[0]
+    response = " ".join(response.split())
+    return (
+        f"- User: {truncate_to_tokens(request, max_tokens // 2).replace(TRUNCATION_MARKER, '...')}"
+        f" -> Assistant: {truncate_to_tokens(response, max_tokens).replace(TRUNCATION_MARKER, '...')}"
+    )
+
+
+def _usable(turn: Dict[str, Any]) -> bool:
+    # Fallback and error replies carry no content worth sending back to the model
+    return turn.get("status", "success") == "success" and bool(turn.get("ai_response"))
+
+
+@dataclass
+class RefinementContext:
+    """The sections sent with one refinement request and their token counts."""
+    user_request: str
+    current_analysis: str
+    original_text: str
+    summary: str
+    recent_turns: List[Dict[str, str]]
+    budget: int
+    tokens: Dict[str, int] = field(default_factory=dict)
+    truncated: List[str] = field(default_factory=list)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.tokens.values())
+
+    def render(self) -> str:
+        """The context as one prompt block, for callers that build the messages themselves."""
+        sections = []
+        if self.current_analysis:
+            sections.append(f"Current analysis:\n{self.current_analysis}")
+        if self.summary:
+            sections.append(f"Summary of earlier conversation:\n{self.summary}")
+        if self.recent_turns:
+            turns = "\n\n".join(
+                f"User: {turn['user_request']}\nAssistant: {turn['ai_response']}" for turn in self.recent_turns
+            )
+            sections.append(f"Recent conversation:\n{turns}")
+        if self.original_text:
+            sections.append(f"Original content:\n{self.original_text}")
+        sections.append(f"User request: {self.user_request}")
+        return "\n\n".join(sections)
+
+
+class RefinementContextBuilder:
+    """Builds budgeted refinement context and maintains the job's rolling summary."""
+
+    def __init__(self, token_budget: int = 8000, summary_token_budget: int = 800, summary_line_tokens: int = 40):
+        self.token_budget = token_budget
+        self.summary_token_budget = summary_token_budget
+        self.summary_line_tokens = summary_line_tokens
+
+    @classmethod
+    def from_config(cls, config: Any) -> "RefinementContextBuilder":
+        def setting(name: str, default: int) -> int:
+            value = getattr(config, name, default)
+            return value if isinstance(value, int) and not isinstance(value, bool) and value > 0 else default
+
+        return cls(
+            token_budget=setting("refinement_context_token_budget", 8000),
+            summary_token_budget=setting("refinement_summary_token_budget", 800),
+        )
+
+    def build(
+        self,
+        job: Dict[str, Any],
+        user_request: str,
+        history: Optional[List[Dict[str, Any]]] = None,
+        first_turn: int = 0,
+    ) -> Tuple[RefinementContext, Optional[Dict[str, Any]]]:
+        """Context for ``user_request`` on ``job``, and the new summary state if it changed.
+
+        ``history`` holds the job's turns from number ``first_turn`` on (by
+        default every turn embedded in the job). Turns before ``first_turn``
+        that the summary does not cover yet are skipped.
+        """
+        if history is None:
+            history, first_turn = job.get("refinement_history") or [], 0
+        cached = job.get(SUMMARY_KEY) or {}
+        cached_turns = int(cached.get("turns", 0))
+        covered = min(max(0, cached_turns - first_turn), len(history))
+        lines: List[str] = list(cached.get("lines", [])) if cached_turns and (covered or first_turn) else []
+
+        tokens: Dict[str, int] = {"user_request": count_tokens(user_request)}
+        truncated: List[str] = []
+        remaining = self.token_budget - PROMPT_OVERHEAD_TOKENS - tokens["user_request"]
+
+        analysis = job.get("analysis_content") or ""
+        if count_tokens(analysis) > remaining:
+            analysis = truncate_to_tokens(analysis, remaining)
+            truncated.append("current_analysis")
+        tokens["current_analysis"] = count_tokens(analysis)
+        remaining -= tokens["current_analysis"]
+
+        # Verbatim turns, newest first, leaving room for a summary if older turns exist
+        summary_reserve = min(self.summary_token_budget, max(0, remaining // 4))
+        recent: List[Dict[str, str]] = []
+        first_recent = len(history)
+        for index in range(len(history) - 1, covered - 1, -1):
+            turn = history[index]
+            if not _usable(turn):
+                first_recent = index
+                continue
+            entry = {"user_request": str(turn.get("user_request", "")), "ai_response": str(turn["ai_response"])}
+            cost = count_tokens(entry["user_request"]) + count_tokens(entry["ai_response"])
+            reserve = summary_reserve if (index > covered or lines) else 0
+            if cost > remaining - reserve:
+                break
+            recent.insert(0, entry)
+            remaining -= cost
+            first_recent = index
+        tokens["recent_turns"] = sum(
+            count_tokens(turn["user_request"]) + count_tokens(turn["ai_response"]) for turn in recent
+        )
+
+        # Fold turns that left the verbatim window into the rolling summary, oldest lines dropping out first
+        summary_state = None
+        if first_recent > covered:
+            lines.extend(
+                _summary_line(turn, self.summary_line_tokens) for turn in history[covered:first_recent] if _usable(turn)
+            )
+            while lines and count_tokens("\n".join(lines)) > self.summary_token_budget:
+                lines.pop(0)
+            summary_state = {"turns": first_turn + first_recent, "lines": lines}
+
+        summary_lines = list(lines)
+        while summary_lines and count_tokens("\n".join(summary_lines)) > remaining:
+            summary_lines.pop(0)
+            if "summary" not in truncated:
+                truncated.append("summary")
+        summary = "\n".join(summary_lines)
+        tokens["summary"] = count_tokens(summary)
+        remaining -= tokens["summary"]
+
+        original_text = job.get("text_content") or ""
+        if count_tokens(original_text) > remaining:
+            original_text = truncate_to_tokens(original_text, remaining)
+            truncated.append("original_text")
+        tokens["original_text"] = count_tokens(original_text)
+
+        context = RefinementContext(
+            user_request=user_request,
+            current_analysis=analysis,
+            original_text=original_text,
+            summary=summary,
+            recent_turns=recent,
+            budget=self.token_budget,
+            tokens=tokens,
+            truncated=truncated,
+        )
+        return context, summary_state
@@ -0,0 +1,106 @@
+"""
+Refinement turns stored outside the job document.
+
+Each turn is one document in the ``refinements`` container, partitioned by
+``/job_id`` and numbered by ``seq`` in the order it was recorded. The job
+itself only keeps ``refinement_count`` (the next ``seq``) and
+``last_refined_at``, so job reads and listings stay the same size however
+long the conversation grows.
+
+History is read a page at a time, newest first, with the oldest ``seq`` of a
+page as the cursor for the next one. Every read is a single-partition query
+ordered by ``seq``, so a page costs the same RU wherever it is in the history.
+
+Jobs refined before the split still carry their turns in
+``refinement_history``; ``migrate_embedded`` moves them into the container
+(keeping their ids, so an interrupted migration can simply run again) and the
+caller saves the slimmed job.
+"""
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from ...utils.async_utils import run_sync
+from ...utils.query_metrics import execute_query_with_metrics_async
+
+logger = logging.getLogger(__name__)
+
+REFINEMENT_DOC_TYPE = "refinement"
+# Job fields: the legacy embedded turns and the number of turns recorded so far
+HISTORY_KEY = "refinement_history"
+COUNT_KEY = "refinement_count"
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class RefinementStore:
+    """Refinement turns of every job, one document per turn."""
+
+    def __init__(self, container):
+        self.container = container
+
+    async def append(self, job: Dict[str, Any], entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Store ``entry`` as the job's next turn and advance ``refinement_count`` on ``job``."""
+        seq = int(job.get(COUNT_KEY) or 0)
+        doc = dict(entry, type=REFINEMENT_DOC_TYPE, job_id=job["id"], seq=seq)
+        await run_sync(self.container.upsert_item, doc)
+        job[COUNT_KEY] = seq + 1
+        if entry.get("timestamp"):
+            job["last_refined_at"] = entry["timestamp"]
+        return doc
+
+    async def migrate_embedded(self, job: Dict[str, Any]) -> bool:
+        """Move turns embedded in ``job`` into the container; True when ``job`` changed and needs saving."""
+        if HISTORY_KEY not in job:
+            return False
+        turns = job.get(HISTORY_KEY) or []
+        start = int(job.get(COUNT_KEY) or 0)
+        for offset, turn in enumerate(turns):
+            seq = start + offset
+            doc = dict(turn, type=REFINEMENT_DOC_TYPE, job_id=job["id"], seq=seq)
+            doc.setdefault("id", f"{job['id']}-{seq}")
+            await run_sync(self.container.upsert_item, doc)
+        del job[HISTORY_KEY]
+        job[COUNT_KEY] = start + len(turns)
+        logger.info(f"Moved {len(turns)} refinement turns of job {job['id']} out of the job document")
+        return True
+
+    async def page(
+        self, job_id: str, limit: int = DEFAULT_PAGE_SIZE, before: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Up to ``limit`` turns older than ``before`` (oldest first) and the cursor for the page before them."""
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        query = "SELECT TOP @limit * FROM c WHERE c.job_id = @job_id AND c.type = @type"
+        parameters = [
+            {"name": "@limit", "value": limit},
+            {"name": "@job_id", "value": job_id},
+            {"name": "@type", "value": REFINEMENT_DOC_TYPE},
+        ]
+        if before is not None:
+            query += " AND c.seq < @before"
+            parameters.append({"name": "@before", "value": int(before)})
+        query += " ORDER BY c.seq DESC"
+
+        turns = await execute_query_with_metrics_async(
+            self.container, query, parameters=parameters, partition_key=job_id
+        )
+        turns.reverse()
+        oldest = turns[0]["seq"] if turns else 0
+        return turns, (oldest if len(turns) == limit and oldest > 0 else None)
+
+    async def recent(self, job_id: str, since: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
+        """The newest ``limit`` turns with ``seq >= since``, oldest first."""
+        turns = await execute_query_with_metrics_async(
+            self.container,
+            "SELECT TOP @limit * FROM c WHERE c.job_id = @job_id AND c.type = @type AND c.seq >= @since "
+            "ORDER BY c.seq DESC",
+            parameters=[
+                {"name": "@limit", "value": limit},
+                {"name": "@job_id", "value": job_id},
+                {"name": "@type", "value": REFINEMENT_DOC_TYPE},
+                {"name": "@since", "value": since},
+            ],
+            partition_key=job_id,
+        )
+        turns.reverse()
+        return turns
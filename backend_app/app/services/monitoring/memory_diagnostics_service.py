@@ -5,15 +5,30 @@ This service handles ONLY memory diagnostics and monitoring:
 - Memory usage tracking
 - Process memory information
 - Optional memory snapshots
+- Continuous low-overhead sampling (mode "sampling")
 
 This was extracted from the middleware to maintain separation of concerns.
+
+Modes (``MEMORY_DIAG_MODE``):
+- ``full``: tracemalloc traces every allocation from startup. Precise, but
+  every allocation pays for it; meant for short debugging sessions.
+- ``sampling``: a background task records RSS and GC readings into a ring
+  buffer, and every ``trace_interval`` seconds turns tracemalloc on for a
+  ``trace_window`` of a few seconds. Allocations made during a window that
+  are still alive at its end are that window's growth sites; comparing them
+  with earlier windows shows which sites keep growing, which is what a slow
+  creep on a long-lived worker looks like.
 """
 
+import asyncio
 import logging
 import os
 import platform
 import gc
-from typing import Dict, Any, Optional
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
 
 from ...utils.logging_config import get_logger
 
@@ -28,6 +43,17 @@ try:
 except ImportError:
     tracemalloc = None
 
+MODES = ("full", "sampling")
+DEFAULT_SAMPLE_INTERVAL_SECONDS = 30.0
+DEFAULT_SAMPLE_HISTORY = 240
+DEFAULT_TRACE_INTERVAL_SECONDS = 600.0
+DEFAULT_TRACE_WINDOW_SECONDS = 10.0
+# Growth sites kept per window, and completed windows kept for comparison
+TRACE_TOP_SITES = 15
+TRACE_WINDOW_HISTORY = 12
+# Frames stored per traced allocation during a window; one frame keeps tracing cheap
+TRACE_FRAMES = 1
+
 
 class MemoryDiagnosticsService:
     """
@@ -47,22 +73,65 @@ class MemoryDiagnosticsService:
     - Business logic
     """
     
-    def __init__(self, enable_diagnostics: bool = None, pending_threshold: int = 200):
+    def __init__(
+        self,
+        enable_diagnostics: bool = None,
+        pending_threshold: int = 200,
+        mode: Optional[str] = None,
+        sample_interval: float = DEFAULT_SAMPLE_INTERVAL_SECONDS,
+        sample_history: int = DEFAULT_SAMPLE_HISTORY,
+        trace_interval: float = DEFAULT_TRACE_INTERVAL_SECONDS,
+        trace_window: float = DEFAULT_TRACE_WINDOW_SECONDS,
+    ):
         self.logger = get_logger(__name__)
         
         # Enable diagnostics based on environment variable if not explicitly set
         if enable_diagnostics is None:
             enable_diagnostics = os.getenv("ENABLE_SESSION_MEMORY_DIAG", "false").lower() in ("1", "true", "yes")
+        if mode is None:
+            mode = os.getenv("MEMORY_DIAG_MODE", "full")
+        mode = str(mode).lower()
         
         self.enable_diagnostics = enable_diagnostics
         self.pending_threshold = pending_threshold
+        self.mode = mode if mode in MODES else "full"
+        self.sample_interval = sample_interval
+        self.trace_interval = trace_interval
+        self.trace_window_seconds = trace_window
+        
+        # Sampling state: RSS/GC readings, recent trace windows and how many
+        # windows in a row each growth site has appeared in
+        self._samples: deque = deque(maxlen=max(1, sample_history))
+        self._windows: deque = deque(maxlen=TRACE_WINDOW_HISTORY)
+        self._site_streaks: Dict[str, int] = {}
+        self._window_running = False
+        self._sampler: Optional[asyncio.Task] = None
         
         if self.enable_diagnostics:
-            self.logger.info("🧭 Memory diagnostics service enabled")
-            self._initialize_tracemalloc()
+            self.logger.info(f"🧭 Memory diagnostics service enabled ({self.mode} mode)")
+            if self.mode == "full":
+                self._initialize_tracemalloc()
         else:
             self.logger.debug("Memory diagnostics service disabled")
     
+    @classmethod
+    def from_config(cls, config: Any) -> "MemoryDiagnosticsService":
+        def setting(name: str, default):
+            value = getattr(config, name, default)
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+            return value if valid else default
+        
+        enabled = getattr(config, "memory_diagnostics_enabled", None)
+        mode = getattr(config, "memory_diagnostics_mode", None)
+        return cls(
+            enable_diagnostics=enabled if isinstance(enabled, bool) else None,
+            mode=mode if isinstance(mode, str) else None,
+            sample_interval=setting("memory_sample_interval_seconds", DEFAULT_SAMPLE_INTERVAL_SECONDS),
+            sample_history=int(setting("memory_sample_history", DEFAULT_SAMPLE_HISTORY)),
+            trace_interval=setting("memory_trace_interval_seconds", DEFAULT_TRACE_INTERVAL_SECONDS),
+            trace_window=setting("memory_trace_window_seconds", DEFAULT_TRACE_WINDOW_SECONDS),
+        )
+    
     def _initialize_tracemalloc(self) -> None:
         """Initialize tracemalloc if available for Python allocation tracking"""
         if tracemalloc and not tracemalloc.is_tracing():
@@ -246,4 +315,220 @@ class MemoryDiagnosticsService:
             }
         except Exception as e:
             self.logger.error(f"Failed to get GC stats: {e}")
-            return {"error": str(e), "diagnostics_enabled": True}
\ No newline at end of file
+            return {"error": str(e), "diagnostics_enabled": True}
+    # ------------------------------------------------------------------
+    # Sampling mode
+    # ------------------------------------------------------------------
+    
+    def _read_rss(self) -> Optional[int]:
+        """Resident set size in bytes: psutil, else /proc on Linux, else None"""
+        if psutil:
+            try:
+                return psutil.Process(os.getpid()).memory_info().rss
+            except Exception as e:
+                self.logger.debug(f"psutil memory read failed: {e}")
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError, AttributeError):
+            return None
+    
+    def take_sample(self) -> Dict[str, Any]:
+        """
+        Record one RSS and GC reading in the ring buffer.
+        
+        Returns:
+            The reading that was recorded
+        """
+        gc_stats = gc.get_stats()
+        sample = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "rss": self._read_rss(),
+            "gc_counts": list(gc.get_count()),
+            "gc_collections": [generation.get("collections", 0) for generation in gc_stats],
+            "gc_uncollectable": sum(generation.get("uncollectable", 0) for generation in gc_stats),
+            "traced_bytes": (
+                tracemalloc.get_traced_memory()[0] if tracemalloc and tracemalloc.is_tracing() else None
+            ),
+        }
+        self._samples.append(sample)
+        return sample
+    
+    @staticmethod
+    def _trace_filters() -> List[Any]:
+        return [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ]
+    
+    async def trace_window(self, seconds: Optional[float] = None, top: int = TRACE_TOP_SITES) -> Optional[Dict[str, Any]]:
+        """
+        Trace allocations for a short window and record the sites that grew most.
+        
+        When tracemalloc is off it is started for the window only, so the end
+        snapshot holds exactly the allocations made during the window that are
+        still alive. When it is already tracing (full mode) the window is the
+        difference between snapshots taken at its start and end.
+        
+        Args:
+            seconds: Window length (default: the configured trace window)
+            top: Number of growth sites to keep
+            
+        Returns:
+            The recorded window, or None when diagnostics are disabled, tracemalloc
+            is unavailable or another window is running
+        """
+        if not self.enable_diagnostics or not tracemalloc or self._window_running:
+            return None
+        
+        seconds = self.trace_window_seconds if seconds is None else seconds
+        self._window_running = True
+        started_at = datetime.now(timezone.utc).isoformat()
+        started_here = not tracemalloc.is_tracing()
+        baseline = None
+        peak = None
+        try:
+            if started_here:
+                tracemalloc.start(TRACE_FRAMES)
+            else:
+                baseline = tracemalloc.take_snapshot()
+            await asyncio.sleep(seconds)
+            snapshot = tracemalloc.take_snapshot()
+            if started_here:
+                peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            if started_here and tracemalloc.is_tracing():
+                tracemalloc.stop()
+            self._window_running = False
+        
+        filters = self._trace_filters()
+        snapshot = snapshot.filter_traces(filters)
+        if baseline is None:
+            growth = [(stat.traceback[0], stat.size, stat.count) for stat in snapshot.statistics("lineno")]
+        else:
+            growth = [
+                (stat.traceback[0], stat.size_diff, stat.count_diff)
+                for stat in snapshot.compare_to(baseline.filter_traces(filters), "lineno")
+            ]
+        growth = sorted((entry for entry in growth if entry[1] > 0), key=lambda entry: entry[1], reverse=True)
+        
+        previous = {site["site"]: site for site in (self._windows[-1]["sites"] if self._windows else [])}
+        streaks: Dict[str, int] = {}
+        sites = []
+        for frame, size, count in growth[:top]:
+            key = f"{frame.filename}:{frame.lineno}"
+            streaks[key] = self._site_streaks.get(key, 0) + 1
+            sites.append({
+                "site": key,
+                "size_bytes": size,
+                "count": count,
+                "previous_size_bytes": previous[key]["size_bytes"] if key in previous else None,
+                "windows_in_a_row": streaks[key],
+            })
+        self._site_streaks = streaks
+        
+        window = {
+            "started_at": started_at,
+            "seconds": seconds,
+            "method": "window" if started_here else "snapshot_diff",
+            "growth_bytes": sum(entry[1] for entry in growth),
+            "peak_traced_bytes": peak,
+            "sites": sites,
+            "new_sites": [site["site"] for site in sites if site["site"] not in previous],
+            "dropped_sites": [key for key in previous if key not in streaks],
+        }
+        self._windows.append(window)
+        self.logger.debug(
+            f"Memory trace window: {window['growth_bytes']} bytes retained, top site "
+            f"{sites[0]['site'] if sites else None}"
+        )
+        return window
+    
+    async def _sample_loop(self) -> None:
+        # The first window waits a full interval so startup allocations are not reported as growth
+        next_window = time.monotonic() + self.trace_interval
+        while True:
+            try:
+                self.take_sample()
+                if self.trace_window_seconds > 0 and time.monotonic() >= next_window:
+                    next_window = time.monotonic() + self.trace_interval
+                    await self.trace_window()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"Memory sampling failed: {e}")
+            await asyncio.sleep(self.sample_interval)
+    
+    def start_sampling(self) -> bool:
+        """
+        Start the background sampler; called from the application lifespan.
+        
+        Returns:
+            True when sampling is running (enabled and in sampling mode)
+        """
+        if not self.enable_diagnostics or self.mode != "sampling":
+            return False
+        if self._sampler is None or self._sampler.done():
+            self._sampler = asyncio.create_task(self._sample_loop(), name="memory-sampler")
+            self.logger.info(
+                f"Memory sampling every {self.sample_interval:g}s, tracing {self.trace_window_seconds:g}s "
+                f"every {self.trace_interval:g}s"
+            )
+        return True
+    
+    async def stop_sampling(self) -> None:
+        """Stop the background sampler (tracing started by a window is stopped with it)"""
+        sampler, self._sampler = self._sampler, None
+        if sampler is not None:
+            sampler.cancel()
+            await asyncio.gather(sampler, return_exceptions=True)
+    
+    def sampling_report(self, readings: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Readings, RSS trend and trace windows collected by this worker.
+        
+        Args:
+            readings: Number of most recent readings to include (default: all)
+            
+        Returns:
+            Dictionary suitable for the admin memory endpoint
+        """
+        if not self.enable_diagnostics:
+            return {"diagnostics_enabled": False}
+        
+        samples = list(self._samples)
+        with_rss = [sample for sample in samples if sample["rss"] is not None]
+        rss_trend = None
+        if len(with_rss) >= 2:
+            first, last = with_rss[0], with_rss[-1]
+            hours = (
+                datetime.fromisoformat(last["timestamp"]) - datetime.fromisoformat(first["timestamp"])
+            ).total_seconds() / 3600
+            growth = last["rss"] - first["rss"]
+            rss_trend = {
+                "since": first["timestamp"],
+                "first_rss": first["rss"],
+                "last_rss": last["rss"],
+                "min_rss": min(sample["rss"] for sample in with_rss),
+                "max_rss": max(sample["rss"] for sample in with_rss),
+                "growth_bytes": growth,
+                "growth_bytes_per_hour": round(growth / hours) if hours > 0 else None,
+            }
+        
+        latest_sites = self._windows[-1]["sites"] if self._windows else []
+        return {
+            "diagnostics_enabled": True,
+            "mode": self.mode,
+            "sampling": self._sampler is not None and not self._sampler.done(),
+            "pid": os.getpid(),
+            "sample_interval_seconds": self.sample_interval,
+            "trace_interval_seconds": self.trace_interval,
+            "trace_window_seconds": self.trace_window_seconds,
+            "rss_trend": rss_trend,
+            # Sites that kept growing across consecutive windows are the leak candidates
+            "persistent_sites": [site for site in latest_sites if site["windows_in_a_row"] > 1],
+            "windows": list(self._windows),
+            "samples": samples[-readings:] if readings else samples,
+        }
@@ -14,6 +14,7 @@ if TYPE_CHECKING:
 from ...utils.async_utils import run_sync
 from ...utils.logging_config import get_logger
 from ...config.audit_config import DEFAULT_SESSION_TIMEOUT_MINUTES
+from ..analytics.rollup_service import AnalyticsRollupService, rollup_day_key
 
 
 class SessionTrackingService:
@@ -32,6 +33,7 @@ class SessionTrackingService:
         self._cosmos = cosmos_service
         self.logger = get_logger(__name__)
         self.session_timeout_minutes = session_timeout_minutes
+        self._rollups = AnalyticsRollupService(cosmos_service)
 
     async def get_or_create_session(
         self,
@@ -72,6 +74,10 @@ class SessionTrackingService:
             # Check if session exists to determine if this is new or update
             existing_session = await self._get_session(user_id)
             is_new_session = existing_session is None
+            # Heartbeats arrive on every request; only the first one of a UTC day
+            # needs to touch the daily active-user rollups.
+            previous_activity = (existing_session or {}).get("last_activity") or ""
+            first_activity_today = not previous_activity.startswith(rollup_day_key(timestamp))
             
             if is_new_session:
                 # New session - initialize all fields
@@ -98,6 +104,13 @@ class SessionTrackingService:
             else:
                 # Update existing session (this is the common case)
                 session_item = existing_session
+
+                # A closed or timed-out session being reused starts a new interval,
+                # so concurrency analytics don't treat the gap as time online
+                if session_item.get("status") != "active" or session_item.get("expires_at", "") < timestamp.isoformat():
+                    session_item["created_at"] = timestamp.isoformat()
+                    session_item.pop("ended_at", None)
+                    session_item.pop("end_reason", None)
                 
                 # Update activity timestamps
                 session_item["last_activity"] = timestamp.isoformat()
@@ -125,6 +138,9 @@ class SessionTrackingService:
             
             # Atomic upsert - no race conditions possible
             await run_sync(lambda: self._cosmos.sessions_container.upsert_item(session_item))
+
+            if first_activity_today:
+                await self._rollups.record_activity(user_id, timestamp)
             
             return user_id  # Session ID = User ID
             
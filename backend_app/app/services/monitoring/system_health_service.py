@@ -12,6 +12,7 @@ from azure.cosmos import exceptions as cosmos_exceptions
 from ...core.config import get_config
 from ...core.dependencies import CosmosService
 from ...utils.async_utils import run_sync
+from ...utils.circuit_breaker import get_circuit_breaker_registry
 from ...models.analytics_models import SystemHealthMetrics, SystemHealthResponse
 
 # Optional psutil import
@@ -65,12 +66,17 @@ class SystemHealthService:
 
             # Determine overall status
             status = self._determine_overall_status(metrics, services)
+            breakers = get_circuit_breaker_registry()
+            # An upstream behind an open breaker is failing fast, so the API is only partly working
+            if status == "healthy" and breakers.open_count():
+                status = "degraded"
 
             return SystemHealthResponse(
                 status=status,
                 timestamp=datetime.now(timezone.utc).isoformat(),
                 metrics=metrics,
-                services=services
+                services=services,
+                circuit_breakers=breakers.snapshot(),
             )
 
         except Exception as e:
@@ -1,11 +1,31 @@
 """
 Background Processing Service for handling long-running operations with retry logic and circuit breaker patterns.
+
+Submitted tasks go into a bounded priority queue served by ``max_concurrent_jobs``
+worker coroutines. Within a priority level tasks are ordered round-robin by user,
+so a bulk upload from one user is interleaved with everyone else's work instead
+of running ahead of it. Task records live in a ``TaskRegistry`` that drops
+finished tasks by age and count as new tasks arrive.
+
+With a task store (see ``task_store``) every status change is also persisted,
+so status reads work from any worker and after a restart. Tasks submitted
+through ``submit_resumable_task`` store their handler name and payload instead
+of a function; if the worker holding them dies or shuts down, another worker
+claims them once its lease lapses and runs them again.
+
+Azure Functions calls go through a circuit breaker per endpoint (see
+``utils.circuit_breaker``), so an outage of one function route only fails
+calls to that route.
 """
 import asyncio
+import itertools
 import logging
+import time
+import uuid
+from collections import OrderedDict, deque
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, Callable, List
-from enum import Enum
+from typing import Dict, Any, Optional, Callable, List, Tuple
+from enum import Enum, IntEnum
 import json
 from contextlib import asynccontextmanager
 
@@ -23,8 +43,16 @@ from fastapi import BackgroundTasks
 
 from ...core.config import AppConfig
 from ...core.dependencies import CosmosService
+from ...core.errors import ApplicationError, ErrorCode
 from ..storage.blob_service import StorageService
 from ..analytics.analytics_service import AnalyticsService
+from ...utils.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+    get_circuit_breaker_registry,
+)
+from .task_store import BaseTaskStore, new_owner_id
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -37,6 +65,27 @@ class TaskStatus(Enum):
     FAILED = "failed"
     RETRYING = "retrying"
 
+
+FINISHED_STATUSES = (TaskStatus.COMPLETED, TaskStatus.FAILED)
+
+# Results larger than this (as JSON) are kept in memory but not persisted
+MAX_PERSISTED_RESULT_BYTES = 8192
+
+
+class TaskPriority(IntEnum):
+    """Queue priority; lower values are served first."""
+    HIGH = 0
+    NORMAL = 5
+    LOW = 10
+
+
+class TaskRejectedError(ApplicationError):
+    """Raised when the queue is full or the service is shutting down."""
+
+    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(message, ErrorCode.SERVICE_UNAVAILABLE, 503, details)
+
+
 class BackgroundTask:
     """Represents a background task with status tracking."""
     
@@ -52,6 +101,10 @@ class BackgroundTask:
         self.retry_count = 0
         self.max_retries = 3
         self.result = None
+        self.priority = TaskPriority.NORMAL
+        # Handler arguments of resumable tasks; None means the task cannot be rerun elsewhere
+        self.payload: Optional[Dict[str, Any]] = None
+        self.owner: Optional[str] = None
 
     def update_status(self, status: TaskStatus, error_message: str = None, result: Any = None):
         """Update task status and metadata."""
@@ -79,41 +132,112 @@ class BackgroundTask:
             "result": self.result
         }
 
-class CircuitBreaker:
-    """Simple circuit breaker implementation for Azure Functions calls."""
-    
-    def __init__(self, failure_threshold: int = 5, recovery_timeout: int = 60):
-        self.failure_threshold = failure_threshold
-        self.recovery_timeout = recovery_timeout
-        self.failure_count = 0
-        self.last_failure_time = None
-        self.state = "CLOSED"  # CLOSED, OPEN, HALF_OPEN
-        
-    def is_open(self) -> bool:
-        """Check if circuit breaker is open."""
-        if self.state == "OPEN":
-            if datetime.now().timestamp() - self.last_failure_time > self.recovery_timeout:
-                self.state = "HALF_OPEN"
-                logger.info("Circuit breaker transitioning to HALF_OPEN state")
-                return False
-            return True
-        return False
-    
-    def record_success(self):
-        """Record a successful operation."""
-        self.failure_count = 0
-        if self.state == "HALF_OPEN":
-            self.state = "CLOSED"
-            logger.info("Circuit breaker transitioning to CLOSED state")
-    
-    def record_failure(self):
-        """Record a failed operation."""
-        self.failure_count += 1
-        self.last_failure_time = datetime.now().timestamp()
-        
-        if self.failure_count >= self.failure_threshold:
-            self.state = "OPEN"
-            logger.warning(f"Circuit breaker OPEN after {self.failure_count} failures")
+    def to_record(self) -> Dict[str, Any]:
+        """Compact form persisted by task stores; timestamps are epoch seconds."""
+        result = self.result
+        if result is not None:
+            try:
+                if len(json.dumps(result, default=str)) > MAX_PERSISTED_RESULT_BYTES:
+                    result = None
+            except (TypeError, ValueError):
+                result = None
+        return {
+            "id": self.task_id,
+            "task_type": self.task_type,
+            "user_id": self.user_id,
+            "status": self.status.value,
+            "priority": int(self.priority),
+            "payload": self.payload,
+            "metadata": self.metadata,
+            "retry_count": self.retry_count,
+            "max_retries": self.max_retries,
+            "owner": self.owner,
+            "error": self.error_message,
+            "result": result,
+            "created_at": self.created_at.timestamp(),
+            "updated_at": self.updated_at.timestamp(),
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "BackgroundTask":
+        task = cls(record["id"], record["task_type"], record["user_id"], record.get("metadata"))
+        task.status = TaskStatus(record["status"])
+        task.priority = TaskPriority(record.get("priority", TaskPriority.NORMAL))
+        task.payload = record.get("payload")
+        task.retry_count = record.get("retry_count", 0)
+        task.max_retries = record.get("max_retries", task.max_retries)
+        task.owner = record.get("owner")
+        task.error_message = record.get("error")
+        task.result = record.get("result")
+        task.created_at = datetime.fromtimestamp(record["created_at"], timezone.utc)
+        task.updated_at = datetime.fromtimestamp(record["updated_at"], timezone.utc)
+        return task
+
+class TaskRegistry(OrderedDict):
+    """Task records keyed by task id, bounded by age and count.
+
+    Entries are kept in insertion order, which is creation order, so eviction
+    walks from the oldest entry and stops at the first one that is neither
+    expired nor needed to get back under ``max_tasks``. Only finished tasks are
+    evicted; pending and running tasks stay however old they are. Eviction runs
+    whenever a new task is added, so no periodic full scan is needed.
+    """
+
+    def __init__(self, max_tasks: int = 5000, retention_seconds: float = 86400):
+        super().__init__()
+        self.max_tasks = max_tasks
+        self.retention_seconds = retention_seconds
+        self.evictions = 0
+
+    def __setitem__(self, task_id: str, task: "BackgroundTask") -> None:
+        is_new = task_id not in self
+        super().__setitem__(task_id, task)
+        if is_new:
+            self.evict()
+
+    def evict(self, max_age_seconds: Optional[float] = None) -> int:
+        """Drop finished tasks older than the retention period or beyond ``max_tasks``."""
+        max_age = self.retention_seconds if max_age_seconds is None else max_age_seconds
+        cutoff = time.time() - max_age
+        overflow = len(self) - self.max_tasks
+        evicted = []
+        for task_id, task in self.items():
+            expired = task.created_at.timestamp() < cutoff
+            if not expired and overflow <= 0:
+                break
+            if task.status in FINISHED_STATUSES:
+                evicted.append(task_id)
+                overflow -= 1
+        for task_id in evicted:
+            del self[task_id]
+        self.evictions += len(evicted)
+        return len(evicted)
+
+
+class _QueuedTask:
+    """A task waiting in the queue together with the call that runs it."""
+
+    __slots__ = ("task", "func", "args", "kwargs", "enqueued_at")
+
+    def __init__(self, task: "BackgroundTask", func: Callable, args: tuple, kwargs: Dict[str, Any]):
+        self.task = task
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.enqueued_at = time.monotonic()
+
+
+def _config_int(config: Any, name: str, default: int) -> int:
+    value = getattr(config, name, default)
+    return value if isinstance(value, int) and not isinstance(value, bool) and value > 0 else default
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
 
 class BackgroundProcessingService:
     """Service for handling background processing with retry logic and circuit breaker patterns."""
@@ -123,12 +247,44 @@ class BackgroundProcessingService:
         storage_service: StorageService,
         cosmos_service: CosmosService,
         analytics_service: AnalyticsService,
+        task_store: Optional[BaseTaskStore] = None,
+        circuit_breakers: Optional[CircuitBreakerRegistry] = None,
     ):
         self.storage_service = storage_service
         self.cosmos_service = cosmos_service
         self.config = cosmos_service.config
-        self.tasks: Dict[str, BackgroundTask] = {}
-        self.circuit_breaker = CircuitBreaker()
+        self.tasks = TaskRegistry(
+            max_tasks=_config_int(self.config, "background_task_registry_max", 5000),
+            retention_seconds=_config_int(self.config, "background_task_retention_seconds", 86400),
+        )
+        self.max_workers = _config_int(self.config, "max_concurrent_jobs", 5)
+        self.drain_timeout_seconds = _config_int(self.config, "background_drain_timeout_seconds", 30)
+        # Entries are (priority, fairness round, sequence, queued task); the sequence keeps FIFO order on ties
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue(
+            maxsize=_config_int(self.config, "background_queue_max_size", 1000)
+        )
+        self._sequence = itertools.count()
+        # Each user's next task goes one round after their previous one, so users take turns
+        self._current_round = 0
+        self._user_rounds: Dict[str, int] = {}
+        self._workers: List[asyncio.Task] = []
+        self._stopping = False
+        self._running = 0
+        self._rejected = 0
+        self._wait_times: deque = deque(maxlen=1000)
+        # Durable state: this process's lease on its tasks and a short cache of store reads
+        self.task_store = task_store
+        self.owner_id = new_owner_id()
+        self.lease_seconds = _config_int(self.config, "background_lease_seconds", 60)
+        self.status_cache_seconds = _config_int(self.config, "background_status_cache_seconds", 2)
+        self._status_cache: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._maintenance: Optional[asyncio.Task] = None
+        # Task types that can be resumed from a stored payload
+        self.handlers: Dict[str, Callable] = {
+            "audio_analysis": self.process_audio_analysis,
+            "text_refinement": self.process_text_refinement,
+        }
+        self.circuit_breakers = circuit_breakers or get_circuit_breaker_registry()
         self.analytics_service = analytics_service
         # Normalize azure functions base url across different config shapes
         # Older AppConfig stores azure_functions as a dict with key 'base_url'
@@ -149,33 +305,287 @@ class BackgroundProcessingService:
         # Fallback to localhost function host for dev if nothing provided
         self.azure_functions_base_url = base_url or "http://localhost:7071"
 
+    def start(self) -> None:
+        """Start the worker pool; called from the application lifespan."""
+        if self._workers:
+            return
+        self._stopping = False
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"background-worker-{index}")
+            for index in range(self.max_workers)
+        ]
+        if self.task_store is not None:
+            self._maintenance = asyncio.create_task(self._maintain_leases(), name="background-task-leases")
+        try:
+            from ...utils.metrics import get_metrics_registry
+            registry = get_metrics_registry()
+            registry.register_gauge(
+                "background_queue_depth", "Background tasks waiting for a worker.", self._queue.qsize
+            )
+            registry.register_gauge(
+                "background_tasks_running", "Background tasks currently executing.", lambda: self._running
+            )
+            registry.register_gauge(
+                "background_task_wait_p95_seconds",
+                "95th percentile time recent background tasks waited in the queue.",
+                lambda: self.get_queue_metrics()["wait_seconds"]["p95"],
+            )
+        except Exception as e:
+            logger.debug(f"Background queue gauges not registered: {e}")
+        logger.info(f"Started {self.max_workers} background workers")
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting tasks, wait for queued and running ones, then cancel whatever is left.
+
+        Resumable tasks that did not finish are released to the task store for
+        another worker instead of being failed.
+        """
+        self._stopping = True
+        timeout = self.drain_timeout_seconds if timeout is None else timeout
+        if self._workers:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Background queue not drained after {timeout}s; cancelling "
+                    f"{self._running} running and {self._queue.qsize()} queued tasks"
+                )
+        tasks = self._workers + ([self._maintenance] if self._maintenance else [])
+        for worker in tasks:
+            worker.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._maintenance = None
+
+        while not self._queue.empty():
+            *_, queued = self._queue.get_nowait()
+            if not await self._release(queued.task):
+                queued.task.update_status(TaskStatus.FAILED, error_message="Not started before shutdown")
+                await self._persist(queued.task)
+            self._queue.task_done()
+
+        if self.task_store is not None:
+            try:
+                await self.task_store.release_lease(self.owner_id)
+                await self.task_store.close()
+            except Exception as e:
+                logger.warning(f"Failed to release background task lease: {e}")
+        logger.info("Background workers stopped")
+
     async def submit_task(
         self, 
         task_id: str, 
         task_type: str, 
         user_id: str, 
         task_func: Callable,
-        background_tasks: BackgroundTasks,
+        background_tasks: Optional[BackgroundTasks] = None,
         metadata: Dict[str, Any] = None,
         *args, 
+        priority: TaskPriority = TaskPriority.NORMAL,
         **kwargs
     ) -> BackgroundTask:
-        """Submit a task for background processing."""
+        """Queue a task for the worker pool.
+
+        ``background_tasks`` is accepted for existing callers but no longer used:
+        work runs on the service's own workers so it is bounded by
+        ``max_concurrent_jobs``. Tasks submitted before ``start()`` wait in the
+        queue. Raises ``TaskRejectedError`` when the queue is full or the service
+        is stopping.
+        """
         task = BackgroundTask(task_id, task_type, user_id, metadata)
-        self.tasks[task_id] = task
-        
-        # Add the task to FastAPI's background tasks
-        background_tasks.add_task(
-            self._execute_task_with_retry,
-            task,
-            task_func,
-            *args,
-            **kwargs
-        )
-        
-        logger.info(f"Submitted background task {task_id} of type {task_type}")
+        task.priority = TaskPriority(priority)
+        await self._accept(task, task_func, args, kwargs)
         return task
-    
+
+    async def submit_resumable_task(
+        self,
+        task_type: str,
+        user_id: str,
+        payload: Dict[str, Any],
+        task_id: Optional[str] = None,
+        metadata: Dict[str, Any] = None,
+        priority: TaskPriority = TaskPriority.NORMAL,
+    ) -> BackgroundTask:
+        """Queue a registered task type whose JSON payload is persisted with it.
+
+        If this worker stops or dies before the task finishes, another worker
+        reruns ``handlers[task_type](**payload)``, up to ``max_retries`` times.
+        """
+        handler = self.handlers.get(task_type)
+        if handler is None:
+            raise ValueError(f"Unknown resumable task type: {task_type}")
+        task = BackgroundTask(task_id or str(uuid.uuid4()), task_type, user_id, metadata)
+        task.priority = TaskPriority(priority)
+        task.max_retries = _config_int(self.config, "job_retry_attempts", task.max_retries)
+        task.payload = dict(payload)
+        await self._accept(task, handler, (), task.payload)
+        return task
+
+    async def queue_audio_analysis(
+        self, file_path: str, job_id: str, user_id: str, analysis_type: str = "comprehensive"
+    ) -> BackgroundTask:
+        """Run ``process_audio_analysis`` on the worker pool; retries survive restarts."""
+        return await self.submit_resumable_task(
+            "audio_analysis",
+            user_id,
+            {"file_path": file_path, "job_id": job_id, "user_id": user_id, "analysis_type": analysis_type},
+            metadata={"job_id": job_id},
+        )
+
+    async def queue_text_refinement(
+        self, text: str, refinement_prompt: str, job_id: str, user_id: str
+    ) -> BackgroundTask:
+        """Run ``process_text_refinement`` on the worker pool; retries survive restarts."""
+        return await self.submit_resumable_task(
+            "text_refinement",
+            user_id,
+            {"text": text, "refinement_prompt": refinement_prompt, "job_id": job_id, "user_id": user_id},
+            metadata={"job_id": job_id},
+        )
+
+    async def _accept(self, task: BackgroundTask, func: Callable, args: tuple, kwargs: Dict[str, Any]) -> None:
+        if self._stopping:
+            self._rejected += 1
+            raise TaskRejectedError("Background processing is shutting down", {"task_id": task.task_id})
+        if self._queue.full():
+            self._rejected += 1
+            raise TaskRejectedError(
+                "Background queue is full, try again later",
+                {"task_id": task.task_id, "queue_depth": self._queue.qsize()},
+            )
+        task.owner = self.owner_id
+        self.tasks[task.task_id] = task
+        # Persisted before it is queued so a worker's RUNNING write always lands after PENDING
+        await self._persist(task)
+        try:
+            self._enqueue(task, func, args, kwargs)
+        except asyncio.QueueFull:
+            # Filled up by another submission while the record was being written
+            self._rejected += 1
+            task.update_status(TaskStatus.FAILED, error_message="Background queue is full")
+            await self._persist(task)
+            raise TaskRejectedError("Background queue is full, try again later", {"task_id": task.task_id})
+        logger.info(f"Submitted background task {task.task_id} of type {task.task_type}")
+
+    def _enqueue(self, task: BackgroundTask, func: Callable, args: tuple, kwargs: Dict[str, Any]) -> None:
+        fair_round = max(self._current_round, self._user_rounds.get(task.user_id, -1) + 1)
+        queued = _QueuedTask(task, func, args, kwargs)
+        self._queue.put_nowait((int(task.priority), fair_round, next(self._sequence), queued))
+        self._user_rounds[task.user_id] = fair_round
+
+    async def _worker(self) -> None:
+        while True:
+            _, fair_round, _, queued = await self._queue.get()
+            self._current_round = max(self._current_round, fair_round)
+            if self._queue.empty():
+                # Nothing is waiting, so every user is back to the current round
+                self._user_rounds.clear()
+            self._wait_times.append(time.monotonic() - queued.enqueued_at)
+            self._running += 1
+            try:
+                await self._execute_task_with_retry(queued.task, queued.func, *queued.args, **queued.kwargs)
+            except asyncio.CancelledError:
+                if not await self._release(queued.task):
+                    queued.task.update_status(TaskStatus.FAILED, error_message="Cancelled during shutdown")
+                    await self._persist(queued.task)
+                raise
+            finally:
+                self._running -= 1
+                self._queue.task_done()
+
+    async def _persist(self, task: BackgroundTask) -> None:
+        """Write the task to the store; store failures are logged and never fail the task."""
+        if self.task_store is None:
+            return
+        try:
+            await self.task_store.save(task.to_record())
+        except Exception as e:
+            logger.warning(f"Failed to persist background task {task.task_id}: {e}")
+
+    async def _release(self, task: BackgroundTask) -> bool:
+        """Hand an unfinished resumable task back to the store for another worker."""
+        if self.task_store is None or task.payload is None:
+            return False
+        task.owner = None
+        task.update_status(TaskStatus.PENDING)
+        await self._persist(task)
+        return True
+
+    async def _maintain_leases(self) -> None:
+        """Renew this worker's lease and take over tasks from workers whose lease lapsed."""
+        interval = max(1.0, self.lease_seconds / 3)
+        while True:
+            try:
+                await self.task_store.renew_lease(self.owner_id, self.lease_seconds)
+                await self.recover_orphaned_tasks()
+                await self.task_store.purge_finished(time.time() - self.tasks.retention_seconds)
+            except Exception as e:
+                logger.warning(f"Background task lease maintenance failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def recover_orphaned_tasks(self) -> int:
+        """Claim tasks left by stopped or crashed workers; resumable ones are queued again.
+
+        Returns the number of tasks queued. Orphans that cannot be rerun (no
+        payload, unknown type, or out of retries) are marked failed.
+        """
+        capacity = self._queue.maxsize - self._queue.qsize() if self._queue.maxsize else 100
+        if self.task_store is None or self._stopping or capacity <= 0:
+            return 0
+        resumed = released = 0
+        for record in await self.task_store.claim_orphans(self.owner_id, limit=min(capacity, 100)):
+            task = BackgroundTask.from_record(record)
+            handler = self.handlers.get(task.task_type) if task.payload is not None else None
+            if handler is None:
+                task.update_status(TaskStatus.FAILED, error_message="Worker stopped before the task finished")
+            elif task.retry_count >= task.max_retries:
+                task.update_status(
+                    TaskStatus.FAILED, error_message=f"Abandoned after {task.retry_count + 1} attempts"
+                )
+            else:
+                task.retry_count += 1
+                task.update_status(TaskStatus.PENDING)
+                try:
+                    self._enqueue(task, handler, (), task.payload)
+                except asyncio.QueueFull:
+                    # Filled by new submissions since capacity was measured; hand it back unattempted
+                    task.retry_count -= 1
+                    task.owner = None
+                    released += 1
+                else:
+                    self.tasks[task.task_id] = task
+                    resumed += 1
+            await self._persist(task)
+        if resumed:
+            logger.info(f"Resumed {resumed} background tasks from stopped workers")
+        if released:
+            logger.info(f"Released {released} orphaned background tasks: queue is full")
+        return resumed
+
+    def get_queue_metrics(self) -> Dict[str, Any]:
+        """Queue depth, worker usage, task counts and recent queue wait times."""
+        waits = sorted(self._wait_times)
+        status_counts = {status.value: 0 for status in TaskStatus}
+        for task in list(self.tasks.values()):
+            status_counts[task.status.value] += 1
+        return {
+            "workers": len(self._workers),
+            "max_concurrent_jobs": self.max_workers,
+            "running": self._running,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "rejected": self._rejected,
+            "tasks_tracked": len(self.tasks),
+            "tasks_evicted": self.tasks.evictions,
+            "tasks_by_status": status_counts,
+            "wait_seconds": {
+                "samples": len(waits),
+                "p50": round(_percentile(waits, 50), 4),
+                "p95": round(_percentile(waits, 95), 4),
+                "max": round(waits[-1], 4) if waits else 0.0,
+            },
+        }
+
     async def _execute_task_with_retry(
         self, 
         task: BackgroundTask, 
@@ -185,6 +595,7 @@ class BackgroundProcessingService:
     ):
         """Execute a task with retry logic."""
         task.update_status(TaskStatus.RUNNING)
+        await self._persist(task)
         
         try:
             result = await self._retry_with_circuit_breaker(task_func, *args, **kwargs)
@@ -200,6 +611,8 @@ class BackgroundProcessingService:
             error_msg = f"Unexpected error in task execution: {str(e)}"
             task.update_status(TaskStatus.FAILED, error_message=error_msg)
             logger.error(f"Task {task.task_id} failed with unexpected error: {error_msg}")
+
+        await self._persist(task)
     
     @retry(
         stop=stop_after_attempt(3),
@@ -209,17 +622,10 @@ class BackgroundProcessingService:
         after=after_log(logger, logging.INFO)
     )
     async def _retry_with_circuit_breaker(self, task_func: Callable, *args, **kwargs):
-        """Execute function with circuit breaker protection."""
-        if self.circuit_breaker.is_open():
-            raise Exception("Circuit breaker is OPEN - service unavailable")
-        
+        """Execute function with retries; breakers apply per endpoint in ``call_azure_function``."""
         try:
-            result = await task_func(*args, **kwargs)
-            self.circuit_breaker.record_success()
-            return result
-            
+            return await task_func(*args, **kwargs)
         except Exception as e:
-            self.circuit_breaker.record_failure()
             logger.error(f"Function execution failed: {str(e)}")
             raise
     
@@ -230,9 +636,8 @@ class BackgroundProcessingService:
         headers: Dict[str, str] = None,
         timeout: int = 30
     ) -> Dict[str, Any]:
-        """Make a resilient call to Azure Functions with retry and circuit breaker."""
-        if self.circuit_breaker.is_open():
-            raise Exception("Azure Functions service unavailable - circuit breaker is OPEN")
+        """Make a resilient call to Azure Functions through the endpoint's circuit breaker."""
+        breaker = self.circuit_breakers.get(function_url)
         
         default_headers = {
             "Content-Type": "application/json",
@@ -242,18 +647,19 @@ class BackgroundProcessingService:
             default_headers.update(headers)
         
         try:
-            from ...core.http_client import get_client
-            client = get_client()
-            response = await client.post(function_url, json=payload, headers=default_headers)
-            response.raise_for_status()
-            self.circuit_breaker.record_success()
+            async with breaker.guard():
+                from ...core.http_client import get_client
+                client = get_client()
+                response = await client.post(function_url, json=payload, headers=default_headers)
+                response.raise_for_status()
             return response.json()
+        except CircuitOpenError:
+            logger.warning(f"Azure Function call to {breaker.name} rejected - circuit breaker is OPEN")
+            raise
         except httpx.HTTPError as e:
-            self.circuit_breaker.record_failure()
             logger.error(f"Azure Function call failed: {str(e)}")
             raise
         except Exception as e:
-            self.circuit_breaker.record_failure()
             logger.error(f"Unexpected error calling Azure Function: {str(e)}")
             raise
     
@@ -471,42 +877,83 @@ class BackgroundProcessingService:
                 logger.error(f"Failed to update job status after upload error: {str(db_error)}")
     
     def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
-        """Get the status of a background task."""
+        """Get the status of a background task known to this worker.
+
+        Use ``fetch_task_status`` to also see tasks accepted by other workers
+        or before a restart.
+        """
         task = self.tasks.get(task_id)
         return task.to_dict() if task else None
     
     def get_user_tasks(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get all tasks for a specific user."""
+        """Get all tasks for a specific user known to this worker."""
         user_tasks = [
             task.to_dict() 
             for task in self.tasks.values() 
             if task.user_id == user_id
         ]
         return sorted(user_tasks, key=lambda x: x['created_at'], reverse=True)
+
+    async def fetch_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Status of a task from this worker or, failing that, the task store.
+
+        Store reads are cached for ``background_status_cache_seconds`` so
+        clients polling for status do not each cost a read.
+        """
+        task = self.tasks.get(task_id)
+        if task is not None:
+            return task.to_dict()
+        if self.task_store is None:
+            return None
+
+        async def load():
+            record = await self.task_store.get(task_id)
+            return BackgroundTask.from_record(record).to_dict() if record else None
+
+        return await self._cached_read(("task", task_id), load)
+
+    async def fetch_user_tasks(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """A user's most recent tasks across all workers, newest first."""
+        if self.task_store is None:
+            return self.get_user_tasks(user_id)[:limit]
+
+        async def load():
+            records = await self.task_store.list_for_user(user_id, limit)
+            return [BackgroundTask.from_record(record).to_dict() for record in records]
+
+        stored = await self._cached_read(("user", user_id), load) or []
+        # This worker's copy is never older than the store's
+        merged = {task["task_id"]: task for task in stored}
+        merged.update((task["task_id"], task) for task in self.get_user_tasks(user_id))
+        return sorted(merged.values(), key=lambda x: x["created_at"], reverse=True)[:limit]
+
+    async def _cached_read(self, key: Tuple[str, str], load: Callable) -> Any:
+        now = time.monotonic()
+        cached = self._status_cache.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        try:
+            value = await load()
+        except Exception as e:
+            logger.warning(f"Failed to read background task state for {key[1]}: {e}")
+            return cached[1] if cached is not None else None
+        self._status_cache[key] = (now + self.status_cache_seconds, value)
+        self._status_cache.move_to_end(key)
+        while len(self._status_cache) > 1000:
+            self._status_cache.popitem(last=False)
+        return value
     
     def cleanup_old_tasks(self, max_age_hours: int = 24):
-        """Clean up tasks older than specified hours."""
-        cutoff_time = datetime.now(timezone.utc).timestamp() - (max_age_hours * 3600)
-        
-        tasks_to_remove = [
-            task_id for task_id, task in self.tasks.items()
-            if task.created_at.timestamp() < cutoff_time and 
-            task.status in [TaskStatus.COMPLETED, TaskStatus.FAILED]
-        ]
-        
-        for task_id in tasks_to_remove:
-            del self.tasks[task_id]
-            
-        if tasks_to_remove:
-            logger.info(f"Cleaned up {len(tasks_to_remove)} old tasks")
+        """Clean up finished tasks older than specified hours.
+
+        The registry already evicts by its retention period on every insert;
+        this allows a shorter age on demand.
+        """
+        removed = self.tasks.evict(max_age_seconds=max_age_hours * 3600)
+        if removed:
+            logger.info(f"Cleaned up {removed} old tasks")
     
-    def get_circuit_breaker_status(self) -> Dict[str, Any]:
-        """Get current circuit breaker status."""
-        return {
-            "state": self.circuit_breaker.state,
-            "failure_count": self.circuit_breaker.failure_count,
-            "failure_threshold": self.circuit_breaker.failure_threshold,
-            "last_failure_time": self.circuit_breaker.last_failure_time,
-            "recovery_timeout": self.circuit_breaker.recovery_timeout
-        }
+    def get_circuit_breaker_status(self) -> Dict[str, Dict[str, Any]]:
+        """State and window metrics of each endpoint's circuit breaker."""
+        return self.circuit_breakers.snapshot()
 
@@ -0,0 +1,373 @@
+"""
+Durable storage for background task state.
+
+``BackgroundProcessingService`` keeps its queue in memory; a task store makes
+task records visible to every worker and lets them outlive the process that
+accepted them. Records are compact JSON documents built by
+``BackgroundTask.to_record``: status, attempt count, owner, a size-capped
+result and, for resumable task types, the call payload.
+
+Leases: every worker process renews one short lease under its owner id while
+it runs. A live task belongs to the worker named in its ``owner`` field; once
+that worker's lease has lapsed (crash, kill, deploy) or it released the task
+on shutdown, any other worker may take it over with ``claim_orphans``, which
+reassigns ownership atomically so two workers never resume the same task.
+Renewing one lease per worker rather than one per task keeps the write rate
+independent of queue length.
+
+Stores:
+
+* ``SqliteTaskStore`` - a local SQLite file in WAL mode, shared by every
+  Uvicorn worker on the host and kept across restarts. Finished tasks are
+  purged after the retention period.
+* ``CosmosTaskStore`` - the ``background_tasks`` container (partitioned by
+  ``/id``), shared across hosts. Finished tasks and leases expire through
+  per-item TTL, and claims are conditional patches that fail with 412 when
+  another worker got there first.
+"""
+import json
+import logging
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+
+from azure.cosmos.exceptions import CosmosHttpResponseError, CosmosResourceNotFoundError
+
+from ...utils.async_utils import run_sync
+from ...utils.query_metrics import execute_query_with_metrics_async
+
+logger = logging.getLogger(__name__)
+
+TASK_DOC_TYPE = "background_task"
+WORKER_LEASE_DOC_TYPE = "worker_lease"
+
+# Statuses of tasks that still need a worker
+LIVE_STATUSES = ("pending", "running", "retrying")
+FINISHED_STATUSES = ("completed", "failed")
+
+# Cosmos returns 412 when a patch filter predicate does not match.
+_PRECONDITION_FAILED = 412
+
+
+def new_owner_id() -> str:
+    """Identify this worker process in task ``owner`` fields and lease records."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class BaseTaskStore(ABC):
+    """Persists task records and the worker leases that guard them."""
+
+    @abstractmethod
+    async def save(self, record: Dict[str, Any]) -> None:
+        """Insert or replace a task record."""
+
+    @abstractmethod
+    async def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def list_for_user(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent tasks first."""
+
+    @abstractmethod
+    async def renew_lease(self, owner: str, lease_seconds: float) -> None:
+        pass
+
+    @abstractmethod
+    async def release_lease(self, owner: str) -> None:
+        pass
+
+    @abstractmethod
+    async def claim_orphans(self, owner: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Take over live tasks that are unowned or whose owner's lease lapsed."""
+
+    async def purge_finished(self, before: float) -> int:
+        """Delete finished tasks last updated before ``before`` (epoch seconds)."""
+        return 0
+
+    async def close(self) -> None:
+        return None
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS background_tasks (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    owner TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_background_tasks_user ON background_tasks (user_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_background_tasks_status ON background_tasks (status, updated_at);
+CREATE TABLE IF NOT EXISTS worker_leases (
+    owner TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SqliteTaskStore(BaseTaskStore):
+    """Task records in a local SQLite file, shared by the workers on one host.
+
+    One connection is used from the thread pool under a lock; WAL mode lets
+    other processes read while one writes, and claims run inside
+    ``BEGIN IMMEDIATE`` so only one process reassigns a task.
+    """
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SQLITE_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        def call():
+            with self._lock:
+                return fn(self._connect(), *args)
+
+        return await run_sync(call)
+
+    async def save(self, record: Dict[str, Any]) -> None:
+        await self._run(self._save, record)
+
+    @staticmethod
+    def _save(conn: sqlite3.Connection, record: Dict[str, Any]) -> None:
+        conn.execute(
+            "INSERT INTO background_tasks (id, user_id, status, owner, created_at, updated_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET status = excluded.status, owner = excluded.owner, "
+            "updated_at = excluded.updated_at, data = excluded.data",
+            (
+                record["id"],
+                record["user_id"],
+                record["status"],
+                record.get("owner"),
+                record["created_at"],
+                record["updated_at"],
+                json.dumps(record, default=str),
+            ),
+        )
+
+    async def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        row = await self._run(
+            lambda conn: conn.execute("SELECT data FROM background_tasks WHERE id = ?", (task_id,)).fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+    async def list_for_user(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        rows = await self._run(
+            lambda conn: conn.execute(
+                "SELECT data FROM background_tasks WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+                (user_id, limit),
+            ).fetchall()
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    async def renew_lease(self, owner: str, lease_seconds: float) -> None:
+        expires_at = self._clock() + lease_seconds
+        await self._run(
+            lambda conn: conn.execute(
+                "INSERT INTO worker_leases (owner, expires_at) VALUES (?, ?) "
+                "ON CONFLICT(owner) DO UPDATE SET expires_at = excluded.expires_at",
+                (owner, expires_at),
+            )
+        )
+
+    async def release_lease(self, owner: str) -> None:
+        await self._run(lambda conn: conn.execute("DELETE FROM worker_leases WHERE owner = ?", (owner,)))
+
+    async def claim_orphans(self, owner: str, limit: int = 50) -> List[Dict[str, Any]]:
+        return await self._run(self._claim_orphans, owner, self._clock(), limit)
+
+    @staticmethod
+    def _claim_orphans(conn: sqlite3.Connection, owner: str, now: float, limit: int) -> List[Dict[str, Any]]:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM worker_leases WHERE expires_at <= ?", (now,))
+            rows = conn.execute(
+                "SELECT id, data FROM background_tasks "
+                f"WHERE status IN ({','.join('?' * len(LIVE_STATUSES))}) "
+                "AND (owner IS NULL OR owner NOT IN (SELECT owner FROM worker_leases)) "
+                "ORDER BY created_at LIMIT ?",
+                (*LIVE_STATUSES, limit),
+            ).fetchall()
+            claimed = []
+            for task_id, data in rows:
+                record = json.loads(data)
+                record["owner"] = owner
+                conn.execute(
+                    "UPDATE background_tasks SET owner = ?, data = ? WHERE id = ?",
+                    (owner, json.dumps(record, default=str), task_id),
+                )
+                claimed.append(record)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return claimed
+
+    async def purge_finished(self, before: float) -> int:
+        cursor = await self._run(
+            lambda conn: conn.execute(
+                f"DELETE FROM background_tasks WHERE status IN ({','.join('?' * len(FINISHED_STATUSES))}) "
+                "AND updated_at < ?",
+                (*FINISHED_STATUSES, before),
+            )
+        )
+        return cursor.rowcount
+
+    async def close(self) -> None:
+        def close_connection():
+            with self._lock:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+
+        await run_sync(close_connection)
+
+
+def _quote(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("'", "\\'")
+
+
+class CosmosTaskStore(BaseTaskStore):
+    """Task records and worker leases as documents in one Cosmos container."""
+
+    def __init__(self, container, retention_seconds: int = 86400, clock: Callable[[], float] = time.time):
+        self.container = container
+        self.retention_seconds = retention_seconds
+        self._clock = clock
+
+    async def save(self, record: Dict[str, Any]) -> None:
+        body = dict(record, type=TASK_DOC_TYPE)
+        if record["status"] in FINISHED_STATUSES:
+            body["ttl"] = int(self.retention_seconds)
+        await run_sync(self.container.upsert_item, body)
+
+    async def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            doc = await run_sync(self.container.read_item, item=task_id, partition_key=task_id)
+        except CosmosResourceNotFoundError:
+            return None
+        return doc if doc.get("type") == TASK_DOC_TYPE else None
+
+    async def list_for_user(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        return await execute_query_with_metrics_async(
+            self.container,
+            "SELECT TOP @limit * FROM c WHERE c.type = @type AND c.user_id = @user_id ORDER BY c.created_at DESC",
+            parameters=[
+                {"name": "@limit", "value": limit},
+                {"name": "@type", "value": TASK_DOC_TYPE},
+                {"name": "@user_id", "value": user_id},
+            ],
+            enable_cross_partition_query=True,
+        )
+
+    @staticmethod
+    def _lease_id(owner: str) -> str:
+        return f"{WORKER_LEASE_DOC_TYPE}:{owner}"
+
+    async def renew_lease(self, owner: str, lease_seconds: float) -> None:
+        await run_sync(
+            self.container.upsert_item,
+            {
+                "id": self._lease_id(owner),
+                "type": WORKER_LEASE_DOC_TYPE,
+                "owner": owner,
+                "expires_at": self._clock() + lease_seconds,
+                # Cosmos removes leases of workers that never came back
+                "ttl": max(60, int(lease_seconds * 2)),
+            },
+        )
+
+    async def release_lease(self, owner: str) -> None:
+        lease_id = self._lease_id(owner)
+        try:
+            await run_sync(self.container.delete_item, item=lease_id, partition_key=lease_id)
+        except CosmosResourceNotFoundError:
+            pass
+
+    async def claim_orphans(self, owner: str, limit: int = 50) -> List[Dict[str, Any]]:
+        live_owners = await execute_query_with_metrics_async(
+            self.container,
+            "SELECT VALUE c.owner FROM c WHERE c.type = @type AND c.expires_at > @now",
+            parameters=[{"name": "@type", "value": WORKER_LEASE_DOC_TYPE}, {"name": "@now", "value": self._clock()}],
+            enable_cross_partition_query=True,
+        )
+        candidates = await execute_query_with_metrics_async(
+            self.container,
+            "SELECT TOP @limit * FROM c WHERE c.type = @type AND ARRAY_CONTAINS(@statuses, c.status) "
+            "AND (NOT IS_DEFINED(c.owner) OR IS_NULL(c.owner) OR NOT ARRAY_CONTAINS(@live, c.owner))",
+            parameters=[
+                {"name": "@limit", "value": limit},
+                {"name": "@type", "value": TASK_DOC_TYPE},
+                {"name": "@statuses", "value": list(LIVE_STATUSES)},
+                {"name": "@live", "value": live_owners},
+            ],
+            enable_cross_partition_query=True,
+        )
+
+        claimed = []
+        for doc in candidates:
+            previous = doc.get("owner")
+            predicate = (
+                "FROM c WHERE NOT IS_DEFINED(c.owner) OR IS_NULL(c.owner)"
+                if previous is None
+                else f"FROM c WHERE c.owner = '{_quote(previous)}'"
+            )
+            try:
+                updated = await run_sync(
+                    lambda: self.container.patch_item(
+                        item=doc["id"],
+                        partition_key=doc["id"],
+                        patch_operations=[{"op": "set", "path": "/owner", "value": owner}],
+                        filter_predicate=predicate,
+                    )
+                )
+            except CosmosHttpResponseError as e:
+                if e.status_code == _PRECONDITION_FAILED:
+                    # Another worker claimed it between the query and the patch
+                    continue
+                raise
+            claimed.append(updated)
+        return claimed
+
+
+def create_task_store(config, cosmos_service=None) -> Optional[BaseTaskStore]:
+    """Build the task store selected by ``BACKGROUND_TASK_STORE``; None keeps state in memory only."""
+    kind = (getattr(config, "background_task_store", None) or "memory").lower()
+    if kind == "cosmos":
+        if cosmos_service is not None:
+            try:
+                return CosmosTaskStore(
+                    cosmos_service.get_container("background_tasks"),
+                    retention_seconds=config.background_task_retention_seconds,
+                )
+            except Exception as e:
+                logger.warning(f"Cosmos task store unavailable, falling back to SQLite: {e}")
+        kind = "sqlite"
+    if kind == "sqlite":
+        path = config.background_task_sqlite_path or os.path.join(
+            tempfile.gettempdir(), "sonic-brief-background-tasks.sqlite3"
+        )
+        return SqliteTaskStore(path)
+    return None
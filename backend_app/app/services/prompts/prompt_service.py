@@ -4,16 +4,25 @@ Prompt Service
 Encapsulates all Cosmos DB access for prompt categories and subcategories.
 Provides a DI-friendly service that obtains containers via the CosmosService
 """
-from typing import List, Dict, Any, Optional
+from typing import Iterable, List, Dict, Any, Optional, Tuple
 import logging
 from datetime import datetime, timezone
 import uuid
 
 from ...core.dependencies import CosmosService
 from ...utils.async_utils import run_sync
+from ...utils.response_cache import etag_for_versions
 
 logger = logging.getLogger(__name__)
 
+CATEGORY_TYPE = "prompt_category"
+SUBCATEGORY_TYPE = "prompt_subcategory"
+
+
+def prompts_etag(docs: Iterable[Dict[str, Any]]) -> str:
+    """ETag for a response built from prompt documents (full documents or ``list_versions`` rows)."""
+    return etag_for_versions(*sorted(f"{doc.get('id')}:{doc.get('_etag')}" for doc in docs))
+
 
 class PromptService:
     def __init__(self, cosmos_service: CosmosService):
@@ -171,7 +180,21 @@ class PromptService:
     async def async_delete_subcategory(self, subcategory_id: str) -> None:
         return await run_sync(lambda: self.delete_subcategory(subcategory_id))
 
+    def list_versions(self, doc_types: Tuple[str, ...], category_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Ids and ``_etag``s of the prompt documents a listing would return, for revalidation."""
+        container = self.cosmos_service.get_container("prompts")
+        query = "SELECT c.id, c._etag FROM c WHERE ARRAY_CONTAINS(@types, c.type)"
+        parameters = [{"name": "@types", "value": list(doc_types)}]
+        if category_id:
+            query += " AND c.category_id = @category_id"
+            parameters.append({"name": "@category_id", "value": category_id})
+        return list(container.query_items(query=query, parameters=parameters, enable_cross_partition_query=True))
+
     def retrieve_prompts_hierarchy(self) -> List[Dict[str, Any]]:
+        return self.retrieve_prompts_hierarchy_with_etag()[0]
+
+    def retrieve_prompts_hierarchy_with_etag(self) -> Tuple[List[Dict[str, Any]], str]:
+        """The prompt hierarchy and the ETag of the documents it was built from."""
         cosmos_db = self.cosmos_service
         container = cosmos_db.get_container("prompts")
         categories = list(container.query_items(query="SELECT * FROM c WHERE c.type = 'prompt_category'", enable_cross_partition_query=True))
@@ -196,7 +219,7 @@ class PromptService:
                     })
             results.append(category_data)
 
-        return results
+        return results, prompts_etag(categories + subcategories)
 
     async def async_retrieve_prompts_hierarchy(self) -> List[Dict[str, Any]]:
         return await run_sync(lambda: self.retrieve_prompts_hierarchy())
@@ -1,16 +1,81 @@
 import os
+import asyncio
+import base64
+import hashlib
 import logging
-from typing import Optional, AsyncGenerator
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional, AsyncGenerator, AsyncIterator, Dict, Iterable, List, Tuple
 from azure.storage.blob import BlobServiceClient, BlobSasPermissions, generate_blob_sas
 from azure.storage.blob.aio import BlobClient as AsyncBlobClient
+from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
 from azure.identity import DefaultAzureCredential
-from azure.core.exceptions import AzureError
+from azure.core.exceptions import AzureError, HttpResponseError
 from datetime import datetime, timedelta
 from urllib.parse import urlparse
 from azure.core.exceptions import ResourceNotFoundError
 from ...core.config import AppConfig
 
 
+# Lifetime of read-only SAS tokens handed out to clients
+SAS_TOKEN_LIFETIME = timedelta(hours=8)
+# User delegation keys are valid for up to 7 days; request a day at a time and
+# refresh once the remaining validity can no longer cover a full SAS lifetime
+USER_DELEGATION_KEY_LIFETIME = timedelta(hours=24)
+USER_DELEGATION_KEY_REFRESH_MARGIN = timedelta(minutes=5)
+
+# Streaming uploads are cut into staged blocks of this size, with a bounded
+# number of blocks in flight so memory stays at roughly size * concurrency
+UPLOAD_BLOCK_SIZE = 4 * 1024 * 1024
+UPLOAD_MAX_CONCURRENCY = 4
+# Leading bytes kept from a streamed upload for format/duration sniffing
+UPLOAD_HEADER_BYTES = 256 * 1024
+
+_BYTE_RANGE = re.compile(r"^bytes=(\d+)-(\d*)$")
+
+
+def parse_byte_range(header: Optional[str]) -> Optional[Tuple[int, Optional[int]]]:
+    """Offset and length (None: to the end) of a single ``bytes=start-[end]`` Range header.
+
+    Suffix ranges, multiple ranges and malformed headers return None, and the
+    caller serves the whole blob as a plain 200 as RFC 9110 allows.
+    """
+    match = _BYTE_RANGE.match((header or "").strip())
+    if not match:
+        return None
+    start = int(match.group(1))
+    if not match.group(2):
+        return start, None
+    end = int(match.group(2))
+    if end < start:
+        return None
+    return start, end - start + 1
+
+
+class RangeNotSatisfiableError(ValueError):
+    """The requested range starts past the end of the blob."""
+
+    def __init__(self, size: int):
+        super().__init__(f"Range not satisfiable for blob of {size} bytes")
+        self.size = size
+
+
+@dataclass
+class BlobDownload:
+    """An open (possibly ranged) blob read and the headers needed to serve it."""
+    chunks: AsyncIterator[bytes]
+    offset: int
+    length: int
+    total_size: int
+    content_type: Optional[str] = None
+    content_encoding: Optional[str] = None
+
+    @property
+    def content_range(self) -> str:
+        return f"bytes {self.offset}-{self.offset + self.length - 1}/{self.total_size}"
+
+
 class StorageService:
     def __init__(self, config: AppConfig):
         self.config = config
@@ -30,55 +95,136 @@ class StorageService:
             account_url=self.config.azure_storage_account_url, credential=self.credential
         )
 
+        # Cached user delegation key (managed identity only), see _get_user_delegation_key
+        self._user_delegation_key = None
+        self._user_delegation_key_expiry: Optional[datetime] = None
+        self._delegation_key_lock = threading.Lock()
+        self._async_credential = None
+        # Shared aio client for reads, so downloads reuse one connection pool
+        self._async_service_client = None
+
+    def _get_user_delegation_key(self):
+        """Return a cached user delegation key, refreshing it ahead of expiry.
+
+        The key is only fetched over the network when none is cached or when the
+        cached key would expire before a freshly issued SAS token does.
+        """
+        with self._delegation_key_lock:
+            now = datetime.utcnow()
+            if (
+                self._user_delegation_key is not None
+                and self._user_delegation_key_expiry is not None
+                and self._user_delegation_key_expiry - now > SAS_TOKEN_LIFETIME + USER_DELEGATION_KEY_REFRESH_MARGIN
+            ):
+                return self._user_delegation_key
+
+            key_expiry = now + USER_DELEGATION_KEY_LIFETIME
+            self.logger.info("Requesting new user delegation key for SAS signing")
+            self._user_delegation_key = self.blob_service_client.get_user_delegation_key(
+                key_start_time=now - timedelta(minutes=5),
+                key_expiry_time=key_expiry,
+            )
+            self._user_delegation_key_expiry = key_expiry
+            return self._user_delegation_key
+
+    def _sign_blob_url(
+        self, blob_url: str, user_delegation_key=None, expiry: Optional[datetime] = None
+    ) -> Optional[str]:
+        """Sign a single blob URL locally. Returns None when the URL is not a blob URL."""
+        parsed_url = urlparse(blob_url)
+        path_parts = parsed_url.path.strip("/").split("/")
+        if len(path_parts) < 2:
+            return None
+
+        container_name = path_parts[0]
+        blob_name = "/".join(path_parts[1:])
+        credential_kwargs = (
+            {"account_key": self.credential}
+            if user_delegation_key is None
+            else {"user_delegation_key": user_delegation_key}
+        )
+
+        return generate_blob_sas(
+            account_name=parsed_url.netloc.split(".")[0],
+            container_name=container_name,
+            blob_name=blob_name,
+            permission=BlobSasPermissions(read=True),
+            expiry=expiry or datetime.utcnow() + SAS_TOKEN_LIFETIME,
+            **credential_kwargs,
+        )
+
     def generate_sas_token(self, blob_url: str) -> Optional[str]:
-        """Generate SAS token for a blob URL using managed identity"""
+        """Generate SAS token for a blob URL using the account key or a cached user delegation key"""
         try:
             if not blob_url:
                 return None
 
-            # Parse blob URL to get container and blob name
-            parsed_url = urlparse(blob_url)
-            path_parts = parsed_url.path.strip("/").split("/")
-            if len(path_parts) < 2:
+            if len(urlparse(blob_url).path.strip("/").split("/")) < 2:
                 return None
 
-            container_name = path_parts[0]
-            blob_name = "/".join(path_parts[1:])
-
-            # Use different SAS generation method depending on authentication type
-            if isinstance(self.credential, str):
-                # Key-based authentication - use account key
-                sas_token = generate_blob_sas(
-                    account_name=parsed_url.netloc.split(".")[0],
-                    container_name=container_name,
-                    blob_name=blob_name,
-                    account_key=self.credential,
-                    permission=BlobSasPermissions(read=True),
-                    expiry=datetime.utcnow() + timedelta(hours=8),
-                )
-            else:
-                # Managed identity - get user delegation key
-                user_delegation_key = self.blob_service_client.get_user_delegation_key(
-                    key_start_time=datetime.utcnow() - timedelta(minutes=5),
-                    key_expiry_time=datetime.utcnow() + timedelta(hours=8),
-                )
-
-                # Generate SAS token using user delegation key
-                sas_token = generate_blob_sas(
-                    account_name=parsed_url.netloc.split(".")[0],
-                    container_name=container_name,
-                    blob_name=blob_name,
-                    user_delegation_key=user_delegation_key,
-                    permission=BlobSasPermissions(read=True),
-                    expiry=datetime.utcnow() + timedelta(hours=8),
-                )
-
-            return sas_token
+            # Key-based authentication signs with the account key; managed identity
+            # signs with the (cached) user delegation key
+            user_delegation_key = None
+            if not isinstance(self.credential, str):
+                user_delegation_key = self._get_user_delegation_key()
+
+            return self._sign_blob_url(blob_url, user_delegation_key)
 
         except Exception as e:
             self.logger.error(f"Error generating SAS token: {str(e)}")
             return None
 
+    def sign_urls(self, urls: Iterable[str]) -> Dict[str, str]:
+        """Add SAS tokens to many blob URLs at once.
+
+        The user delegation key is resolved at most once for the whole batch and
+        every token is signed locally. Returns a mapping of original URL to signed
+        URL; URLs that cannot be signed map to themselves.
+        """
+        unique_urls = list(dict.fromkeys(url for url in urls if url))
+        if not unique_urls:
+            return {}
+
+        user_delegation_key = None
+        if not isinstance(self.credential, str):
+            try:
+                user_delegation_key = self._get_user_delegation_key()
+            except Exception as e:
+                self.logger.error(f"Error obtaining user delegation key: {str(e)}")
+                return {url: url for url in unique_urls}
+
+        signed: Dict[str, str] = {}
+        for url in unique_urls:
+            try:
+                sas_token = self._sign_blob_url(url, user_delegation_key)
+            except Exception as e:
+                self.logger.error(f"Error generating SAS token: {str(e)}")
+                sas_token = None
+            signed[url] = f"{url}?{sas_token}" if sas_token else url
+        return signed
+
+    def generate_read_url(self, blob_url: str, lifetime: timedelta) -> Optional[Tuple[str, datetime]]:
+        """A read-only SAS URL for ``blob_url`` valid for ``lifetime``, and its expiry (UTC).
+
+        Returns None when the URL cannot be signed, so callers can fall back to
+        serving the blob themselves.
+        """
+        if not blob_url:
+            return None
+        unsigned_url = blob_url.split("?", 1)[0]
+        try:
+            user_delegation_key = None
+            if not isinstance(self.credential, str):
+                user_delegation_key = self._get_user_delegation_key()
+            expiry = datetime.utcnow() + lifetime
+            sas_token = self._sign_blob_url(unsigned_url, user_delegation_key, expiry=expiry)
+        except Exception as e:
+            self.logger.error(f"Error generating read URL: {str(e)}")
+            return None
+        if not sas_token:
+            return None
+        return f"{unsigned_url}?{sas_token}", expiry
+
     def add_sas_token_to_url(self, blob_url: str) -> str:
         """Add SAS token to blob URL if not already present"""
         if not blob_url:
@@ -91,23 +237,110 @@ class StorageService:
         self.logger.debug(f"No SAS token generated for blob URL: {blob_url}")
         return blob_url
 
+    def _build_upload_blob_name(self, original_filename: str) -> str:
+        """Build the dated, timestamped blob name used for uploaded recordings"""
+        # Sanitize filename - replace spaces with underscores
+        sanitized_filename = original_filename.replace(" ", "_")
+        self.logger.debug(
+            f"Sanitized filename: {original_filename} -> {sanitized_filename}"
+        )
+
+        # Generate blob name with date and nested structure including timestamp for uniqueness
+        current_date = datetime.now().strftime("%Y-%m-%d")
+        timestamp = datetime.now().strftime("%H%M%S_%f")[:-3]  # HHMMSS_milliseconds
+        file_name_without_ext = os.path.splitext(sanitized_filename)[0]
+        # Include timestamp in both folder and filename to ensure uniqueness
+        return f"{current_date}/{file_name_without_ext}_{timestamp}/{sanitized_filename}"
+
+    def _get_async_credential(self):
+        """Credential usable by the aio blob clients (account key or async managed identity)"""
+        if isinstance(self.credential, str):
+            return self.credential
+        if self._async_credential is None:
+            from azure.identity.aio import DefaultAzureCredential as AsyncDefaultAzureCredential
+
+            self._async_credential = AsyncDefaultAzureCredential()
+        return self._async_credential
+
+    def _get_async_service_client(self):
+        if self._async_service_client is None:
+            self._async_service_client = AsyncBlobServiceClient(
+                account_url=self.config.azure_storage_account_url,
+                credential=self._get_async_credential(),
+            )
+        return self._async_service_client
+
+    async def aclose(self) -> None:
+        """Close the shared aio client and credential; they are recreated on next use."""
+        client, self._async_service_client = self._async_service_client, None
+        if client is not None:
+            await client.close()
+        credential, self._async_credential = self._async_credential, None
+        if credential is not None:
+            await credential.close()
+
+    @staticmethod
+    def _blob_location(blob_url: str) -> Tuple[str, str]:
+        """Container and blob name of a blob URL (``/<container>/<blob name>``)."""
+        if not blob_url:
+            raise ValueError("Blob URL cannot be empty.")
+        path = urlparse(blob_url).path
+        if not path:
+            raise ValueError("Invalid blob URL: Missing path.")
+        path_parts = path.strip("/").split("/")
+        if len(path_parts) < 2 or not path_parts[0]:
+            raise ValueError(f"Blob URL path format not recognized: {path}")
+        blob_name = "/".join(path_parts[1:])
+        if not blob_name:
+            raise ValueError("Could not extract blob name from URL")
+        return path_parts[0], blob_name
+
+    async def download_blob_range(
+        self, blob_url: str, offset: Optional[int] = None, length: Optional[int] = None
+    ) -> BlobDownload:
+        """
+        Open a read of a blob, or of ``length`` bytes from ``offset``, on the shared aio client.
+
+        The blob's stored ``Content-Encoding`` is reported as-is; bytes are never
+        decoded here.
+
+        Raises:
+            ValueError: If the URL is not a blob URL.
+            RangeNotSatisfiableError: If ``offset`` is past the end of the blob.
+            ResourceNotFoundError: If the blob does not exist.
+        """
+        container_name, blob_name = self._blob_location(blob_url)
+        blob_client = self._get_async_service_client().get_blob_client(container_name, blob_name)
+        try:
+            downloader = await blob_client.download_blob(offset=offset, length=length)
+        except HttpResponseError as e:
+            if offset is None or e.status_code != 416:
+                raise
+            properties = await blob_client.get_blob_properties()
+            raise RangeNotSatisfiableError(properties.size) from e
+
+        properties = downloader.properties
+        content_range = getattr(properties, "content_range", None) or ""
+        total_size = int(content_range.rsplit("/", 1)[-1]) if "/" in content_range else downloader.size
+        start = offset or 0
+        available = max(0, total_size - start)
+        content_settings = getattr(properties, "content_settings", None)
+        return BlobDownload(
+            chunks=downloader.chunks(),
+            offset=start,
+            length=available if length is None else min(length, available),
+            total_size=total_size,
+            content_type=getattr(content_settings, "content_type", None),
+            content_encoding=getattr(content_settings, "content_encoding", None),
+        )
+
     def upload_file(self, file_path: str, original_filename: str) -> str:
         """Upload a file to blob storage"""
         try:
             container_client = self.blob_service_client.get_container_client(
                 self.config.azure_storage_recordings_container
-            )            # Sanitize filename - replace spaces with underscores
-            sanitized_filename = original_filename.replace(" ", "_")
-            self.logger.debug(
-                f"Sanitized filename: {original_filename} -> {sanitized_filename}"
             )
-            
-            # Generate blob name with date and nested structure including timestamp for uniqueness
-            current_date = datetime.now().strftime("%Y-%m-%d")
-            timestamp = datetime.now().strftime("%H%M%S_%f")[:-3]  # HHMMSS_milliseconds
-            file_name_without_ext = os.path.splitext(sanitized_filename)[0]
-            # Include timestamp in both folder and filename to ensure uniqueness
-            blob_name = f"{current_date}/{file_name_without_ext}_{timestamp}/{sanitized_filename}"
+            blob_name = self._build_upload_blob_name(original_filename)
 
             blob_client = container_client.get_blob_client(blob_name)
 
@@ -125,6 +358,108 @@ class StorageService:
             self.logger.error(f"Error uploading file: {str(e)}")
             raise
 
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        original_filename: str,
+        block_size: int = UPLOAD_BLOCK_SIZE,
+        max_concurrency: int = UPLOAD_MAX_CONCURRENCY,
+    ) -> Dict[str, Any]:
+        """
+        Upload a stream of chunks to blob storage as staged blocks.
+
+        Incoming chunks are re-cut into ``block_size`` blocks which are staged
+        concurrently (at most ``max_concurrency`` in flight) and committed once
+        the stream is exhausted. Size and SHA-256 are computed on the fly, and the
+        first ``UPLOAD_HEADER_BYTES`` are kept for format sniffing.
+
+        Args:
+            chunks: Async iterator of raw file bytes.
+            original_filename: Client-supplied filename used to build the blob name.
+            block_size: Size of each staged block in bytes.
+            max_concurrency: Maximum number of blocks being staged at once.
+
+        Returns:
+            Dict[str, Any]: ``url``, ``size_bytes``, ``sha256`` and ``header`` bytes.
+
+        Raises:
+            AzureError: If staging or committing a block fails.
+        """
+        blob_name = self._build_upload_blob_name(original_filename)
+        async_blob_client = AsyncBlobClient(
+            account_url=self.config.azure_storage_account_url,
+            container_name=self.config.azure_storage_recordings_container,
+            blob_name=blob_name,
+            credential=self._get_async_credential(),
+        )
+
+        digest = hashlib.sha256()
+        header = bytearray()
+        size_bytes = 0
+        block_ids: List[str] = []
+        tasks: List[asyncio.Task] = []
+        failures: List[BaseException] = []
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def stage(block_id: str, data: bytes) -> None:
+            try:
+                await async_blob_client.stage_block(block_id=block_id, data=data, length=len(data))
+            except Exception as exc:
+                failures.append(exc)
+                raise
+            finally:
+                semaphore.release()
+
+        async def submit(data: bytes) -> None:
+            # Waiting for a free slot is what applies backpressure to the request stream
+            await semaphore.acquire()
+            if failures:
+                semaphore.release()
+                raise failures[0]
+            # Block ids must be base64 and of equal length within a blob
+            block_id = base64.b64encode(f"{len(block_ids):08d}".encode()).decode()
+            block_ids.append(block_id)
+            tasks.append(asyncio.create_task(stage(block_id, data)))
+
+        self.logger.info(f"Streaming upload to blob storage: {blob_name}")
+        try:
+            async with async_blob_client:
+                buffer = bytearray()
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    digest.update(chunk)
+                    size_bytes += len(chunk)
+                    if len(header) < UPLOAD_HEADER_BYTES:
+                        header += chunk[: UPLOAD_HEADER_BYTES - len(header)]
+                    if not buffer and len(chunk) == block_size:
+                        # Aligned reads are staged as-is without re-buffering
+                        await submit(chunk)
+                        continue
+                    buffer += chunk
+                    while len(buffer) >= block_size:
+                        await submit(bytes(buffer[:block_size]))
+                        del buffer[:block_size]
+                if buffer or not block_ids:
+                    await submit(bytes(buffer))
+
+                await asyncio.gather(*tasks)
+                await async_blob_client.commit_block_list(block_ids)
+                url = async_blob_client.url
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.logger.error(f"Streaming upload failed for blob: {blob_name}", exc_info=True)
+            raise
+
+        return {
+            "url": url,
+            "size_bytes": size_bytes,
+            "sha256": digest.hexdigest(),
+            "header": bytes(header),
+        }
+
     def generate_and_upload_docx(self, analysis_text: str, blob_name: str) -> str:
         """Generate a DOCX from analysis text and upload to blob storage. Return the blob URL."""
         try:
@@ -237,54 +572,10 @@ class StorageService:
             ResourceNotFoundError: If the blob does not exist.
             Exception: For other unexpected errors.
         """
-        if not file_blob_url:
-            raise ValueError("Blob URL cannot be empty.")
-
         try:
-            parsed_url = urlparse(file_blob_url)
-            if not parsed_url.path:
-                raise ValueError("Invalid blob URL: Missing path.")
-
-            # Extract the blob name from the URL
-            # First try the expected recordings container
-            if self.config.azure_storage_recordings_container in parsed_url.path:
-                blob_name = parsed_url.path.split(
-                    self.config.azure_storage_recordings_container, 1
-                )[-1].lstrip("/")
-            else:
-                # For transcription files or other assets that might be in different containers,
-                # try to extract container and blob name from the URL path
-                path_parts = parsed_url.path.strip('/').split('/')
-                if len(path_parts) >= 2:
-                    # Assume format: /container_name/blob_name or /container_name/folder/blob_name
-                    container_name = path_parts[0]
-                    blob_name = '/'.join(path_parts[1:])
-                    self.logger.warning(f"Blob URL uses different container '{container_name}' instead of expected '{self.config.azure_storage_recordings_container}'. Using container: {container_name}")
-                else:
-                    raise ValueError(f"Blob URL path format not recognized: {parsed_url.path}")
-            
-            if not blob_name:
-                raise ValueError("Could not extract blob name from URL")
-            self.logger.debug(f"Extracted blob name: {blob_name}")
-
-            # Create an async blob client
-            async_blob_client = AsyncBlobClient(
-                account_url=self.config.azure_storage_account_url,
-                container_name=self.config.azure_storage_recordings_container,
-                blob_name=blob_name,
-                credential=self.credential,
-            )
-
-            # Stream the blob content in chunks
-            async with async_blob_client:
-                # Get the downloader without specifying chunk size
-                # The chunks() method doesn't accept a chunk_size parameter
-                downloader = await async_blob_client.download_blob()
-
-                # Stream the chunks as they come
-                async for chunk in downloader.chunks():
-                    yield chunk
-
+            download = await self.download_blob_range(file_blob_url)
+            async for chunk in download.chunks:
+                yield chunk
         except ValueError as ve:
             self.logger.warning(f"Validation error: {ve}")
             raise
@@ -1,5 +1,5 @@
 import asyncio
-from typing import Callable, TypeVar, Any
+from typing import AsyncIterator, Callable, Iterable, Iterator, List, TypeVar, Any
 
 T = TypeVar("T")
 
@@ -12,3 +12,22 @@ async def run_sync(fn: Callable[..., T], *args, **kwargs) -> T:
     event loop.
     """
     return await asyncio.to_thread(fn, *args, **kwargs)
+
+
+async def iterate_pages(pages: Iterator[Iterable[T]]) -> AsyncIterator[List[T]]:
+    """Pull pages from a blocking paged iterator one at a time in the threadpool.
+
+    Typically fed with ``container.query_items(...).by_page()`` so each Cosmos
+    continuation is only fetched when the consumer asks for the next page.
+    """
+    done = object()
+
+    def _next_page():
+        page = next(pages, done)
+        return page if page is done else list(page)
+
+    while True:
+        page = await run_sync(_next_page)
+        if page is done:
+            return
+        yield page
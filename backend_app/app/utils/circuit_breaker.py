@@ -0,0 +1,326 @@
+"""
+Circuit breakers for outbound calls, one per target endpoint.
+
+Each breaker watches a sliding time window of call outcomes and opens when
+
+* ``failure_threshold`` calls fail in a row, or
+* at least ``minimum_calls`` calls were made in the window and the failure
+  rate or the slow-call rate (calls taking ``slow_call_seconds`` or longer)
+  reaches its threshold.
+
+After ``recovery_timeout`` seconds an open breaker goes HALF_OPEN and lets at
+most ``half_open_max_calls`` probe calls through at once; everyone else is
+rejected until a probe finishes. A successful probe closes the breaker and a
+failed (or slow) probe opens it again.
+
+Breakers are keyed by endpoint (host and path), so a failing Functions route
+does not block calls to the other routes on the same host.
+``get_circuit_breaker_registry()`` is the process-wide registry reported on
+the admin health endpoint.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from ..core.errors import ApplicationError, ErrorCode
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "CLOSED"
+OPEN = "OPEN"
+HALF_OPEN = "HALF_OPEN"
+
+# Outcomes kept per breaker; older ones are dropped even if still inside the window
+MAX_WINDOW_CALLS = 1000
+
+
+class CircuitOpenError(ApplicationError):
+    """Raised instead of calling an endpoint whose breaker is open."""
+
+    def __init__(self, endpoint: str, retry_after: float = 0.0) -> None:
+        super().__init__(
+            f"{endpoint} unavailable - circuit breaker is OPEN",
+            ErrorCode.SERVICE_UNAVAILABLE,
+            503,
+            {"endpoint": endpoint, "retry_after_seconds": round(retry_after, 1)},
+        )
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+def counts_as_failure(exc: BaseException) -> bool:
+    """Client errors say nothing about the endpoint's health; 429 and 5xx do."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status >= 500 or status == 429
+    return True
+
+
+def endpoint_key(url: str) -> str:
+    """``host/path`` for URLs (scheme, query and trailing slash dropped); other names as given."""
+    parts = urlsplit(url)
+    if not parts.netloc:
+        return url
+    return f"{parts.netloc}{parts.path}".rstrip("/")
+
+
+class CircuitBreaker:
+    """Sliding-window circuit breaker with a bounded number of half-open probes."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: int = 60,
+        name: str = "default",
+        window_seconds: float = 60.0,
+        minimum_calls: int = 10,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: Optional[float] = None,
+        slow_call_rate_threshold: float = 0.8,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.window_seconds = window_seconds
+        self.minimum_calls = minimum_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self._clock = clock
+        # Consecutive failures; the open breaker's recovery timer runs from last_failure_time
+        self.failure_count = 0
+        self.last_failure_time: Optional[float] = None
+        self.state = CLOSED  # CLOSED, OPEN, HALF_OPEN
+        # (timestamp, failed, slow) per call inside the window, with running totals
+        self._window: deque = deque()
+        self._window_failures = 0
+        self._window_slow = 0
+        self._probes_in_flight = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def is_open(self) -> bool:
+        """Check if circuit breaker is open, moving to HALF_OPEN once the recovery timeout has passed."""
+        if self.state == OPEN:
+            if self._clock() - (self.last_failure_time or 0) > self.recovery_timeout:
+                self.state = HALF_OPEN
+                self._probes_in_flight = 0
+                logger.info(f"Circuit breaker {self.name} transitioning to HALF_OPEN state")
+                return False
+            return True
+        return False
+
+    def try_acquire(self) -> bool:
+        """Whether a call may go ahead; in HALF_OPEN this takes one of the probe slots."""
+        if self.is_open():
+            self.rejected += 1
+            return False
+        if self.state == HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_max_calls:
+                self.rejected += 1
+                return False
+            self._probes_in_flight += 1
+        return True
+
+    def release(self) -> None:
+        """Give back a probe slot for a call that ended without an outcome (e.g. cancelled)."""
+        if self.state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def retry_after(self) -> float:
+        if self.state != OPEN or self.last_failure_time is None:
+            return 0.0
+        return max(0.0, self.recovery_timeout - (self._clock() - self.last_failure_time))
+
+    def record_success(self, duration: Optional[float] = None):
+        """Record a successful operation, optionally with how long it took."""
+        slow = self._is_slow(duration)
+        self._record(failed=False, slow=slow)
+        self.failure_count = 0
+        if self.state == HALF_OPEN:
+            self.release()
+            if slow:
+                self._open("half-open probe was slow")
+            else:
+                self._close()
+        elif self.state == CLOSED:
+            self._evaluate()
+
+    def record_failure(self, duration: Optional[float] = None):
+        """Record a failed operation."""
+        self._record(failed=True, slow=self._is_slow(duration))
+        self.failure_count += 1
+        self.last_failure_time = self._clock()
+        if self.state == HALF_OPEN:
+            self.release()
+            self._open("half-open probe failed")
+        elif self.state == CLOSED:
+            if self.failure_count >= self.failure_threshold:
+                self._open(f"{self.failure_count} consecutive failures")
+            else:
+                self._evaluate()
+
+    def record(self, healthy: Optional[bool], duration: Optional[float] = None) -> None:
+        """Report a call admitted by ``try_acquire``; ``None`` means it ended without an outcome."""
+        if healthy is None:
+            self.release()
+        elif healthy:
+            self.record_success(duration)
+        else:
+            self.record_failure(duration)
+
+    @asynccontextmanager
+    async def guard(self, is_failure: Callable[[BaseException], bool] = counts_as_failure) -> AsyncIterator[None]:
+        """Run the body as one call through the breaker.
+
+        Raises ``CircuitOpenError`` without running the body when the breaker
+        rejects the call. Exceptions for which ``is_failure`` is false count as
+        successes; cancellation counts as neither.
+        """
+        if not self.try_acquire():
+            raise CircuitOpenError(self.name, self.retry_after())
+        started = time.monotonic()
+        try:
+            yield
+        except asyncio.CancelledError:
+            self.release()
+            raise
+        except Exception as exc:
+            if is_failure(exc):
+                self.record_failure(time.monotonic() - started)
+            else:
+                self.record_success(time.monotonic() - started)
+            raise
+        else:
+            self.record_success(time.monotonic() - started)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State, thresholds and sliding-window metrics."""
+        self._prune(self._clock())
+        calls = len(self._window)
+        return {
+            "state": self.state,
+            "failure_count": self.failure_count,
+            "failure_threshold": self.failure_threshold,
+            "last_failure_time": self.last_failure_time,
+            "recovery_timeout": self.recovery_timeout,
+            "retry_after_seconds": round(self.retry_after(), 1),
+            "window_seconds": self.window_seconds,
+            "calls": calls,
+            "failures": self._window_failures,
+            "slow_calls": self._window_slow,
+            "failure_rate": round(self._window_failures / calls, 4) if calls else 0.0,
+            "slow_call_rate": round(self._window_slow / calls, 4) if calls else 0.0,
+            "half_open_in_flight": self._probes_in_flight,
+            "half_open_max_calls": self.half_open_max_calls,
+            "rejected": self.rejected,
+            "times_opened": self.times_opened,
+        }
+
+    def _is_slow(self, duration: Optional[float]) -> bool:
+        return duration is not None and self.slow_call_seconds is not None and duration >= self.slow_call_seconds
+
+    def _record(self, failed: bool, slow: bool) -> None:
+        now = self._clock()
+        self._prune(now)
+        if len(self._window) >= MAX_WINDOW_CALLS:
+            self._drop_oldest()
+        self._window.append((now, failed, slow))
+        self._window_failures += failed
+        self._window_slow += slow
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._window and self._window[0][0] < cutoff:
+            self._drop_oldest()
+
+    def _drop_oldest(self) -> None:
+        _, failed, slow = self._window.popleft()
+        self._window_failures -= failed
+        self._window_slow -= slow
+
+    def _evaluate(self) -> None:
+        calls = len(self._window)
+        if calls < self.minimum_calls:
+            return
+        failure_rate = self._window_failures / calls
+        slow_rate = self._window_slow / calls
+        if failure_rate >= self.failure_rate_threshold:
+            self._open(f"failure rate {failure_rate:.0%} over {calls} calls")
+        elif self.slow_call_seconds is not None and slow_rate >= self.slow_call_rate_threshold:
+            self._open(f"slow-call rate {slow_rate:.0%} over {calls} calls")
+
+    def _open(self, reason: str) -> None:
+        self.state = OPEN
+        self.last_failure_time = self._clock()
+        self._probes_in_flight = 0
+        self.times_opened += 1
+        logger.warning(f"Circuit breaker {self.name} OPEN: {reason}")
+
+    def _close(self) -> None:
+        self.state = CLOSED
+        self.failure_count = 0
+        # Outcomes from before the outage must not reopen the breaker
+        self._window.clear()
+        self._window_failures = 0
+        self._window_slow = 0
+        logger.info(f"Circuit breaker {self.name} transitioning to CLOSED state")
+
+
+class CircuitBreakerRegistry:
+    """Breakers keyed by endpoint, created on first use with shared settings."""
+
+    def __init__(self, clock: Callable[[], float] = time.time, **settings: Any):
+        self._clock = clock
+        self._settings = settings
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        """The breaker for a URL (keyed by host and path) or a named dependency."""
+        key = endpoint_key(endpoint)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(name=key, clock=self._clock, **self._settings)
+            self._breakers[key] = breaker
+        return breaker
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {key: breaker.snapshot() for key, breaker in sorted(self._breakers.items())}
+
+    def open_count(self) -> int:
+        return sum(1 for breaker in self._breakers.values() if breaker.state != CLOSED)
+
+    def __len__(self) -> int:
+        return len(self._breakers)
+
+
+@lru_cache(maxsize=1)
+def get_circuit_breaker_registry() -> CircuitBreakerRegistry:
+    """Process-wide registry; settings come from the ``circuit_breaker_*`` config fields."""
+    try:
+        from ..core.config import get_config
+
+        config = get_config()
+        slow_call_seconds = float(config.circuit_breaker_slow_call_seconds)
+        return CircuitBreakerRegistry(
+            failure_threshold=int(config.circuit_breaker_failure_threshold),
+            recovery_timeout=int(config.circuit_breaker_recovery_seconds),
+            window_seconds=float(config.circuit_breaker_window_seconds),
+            minimum_calls=int(config.circuit_breaker_minimum_calls),
+            failure_rate_threshold=float(config.circuit_breaker_failure_rate),
+            slow_call_seconds=slow_call_seconds if slow_call_seconds > 0 else None,
+            slow_call_rate_threshold=float(config.circuit_breaker_slow_call_rate),
+            half_open_max_calls=int(config.circuit_breaker_half_open_calls),
+        )
+    except Exception:
+        return CircuitBreakerRegistry()
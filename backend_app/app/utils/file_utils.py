@@ -1,3 +1,4 @@
+import io
 import logging
 import mimetypes
 import os
@@ -18,6 +19,40 @@ except ImportError:
     MUTAGEN_AVAILABLE = False
 
 
+class _HeaderOnlyFile(io.RawIOBase):
+    """Read-only file object over the leading bytes of a larger file.
+
+    Seeking and ``tell`` behave as if the file had ``total_size`` bytes, but
+    reads past the captured header return nothing. This lets mutagen compute
+    durations that depend on the file size (e.g. CBR MP3) without the body.
+    """
+
+    def __init__(self, header: bytes, total_size: int):
+        self._header = header
+        self._total_size = max(total_size, len(header))
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: self._total_size}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        data = self._header[self._position:self._position + len(buffer)]
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
 class FileUtils:
     AUDIO_EXTENSIONS = {
         "wav": "audio/wav",
@@ -80,6 +115,47 @@ class FileUtils:
             logging.error(f"Error extracting audio duration from {file_path}: {str(e)}")
             return None
 
+    @classmethod
+    def get_audio_duration_from_header(
+        cls, header: bytes, total_size: int, filename: str
+    ) -> Optional[float]:
+        """
+        Estimate audio duration in seconds from the leading bytes of a file.
+
+        Used for streamed uploads where the full file is never on local disk.
+        Formats whose duration lives in the header (WAV, MP3 with Xing/VBRI,
+        MP4 with a leading moov atom, FLAC) are exact; CBR MP3 is derived from
+        the total size.
+
+        Args:
+            header: Leading bytes of the audio file
+            total_size: Size of the complete file in bytes
+            filename: Original filename, used as a format hint
+
+        Returns:
+            Duration in seconds as float, or None if it cannot be determined
+        """
+        if not MUTAGEN_AVAILABLE:
+            logging.warning("Mutagen library not available for audio duration extraction")
+            return None
+
+        if not header:
+            return None
+
+        try:
+            audio_file = MutagenFile(_HeaderOnlyFile(header, total_size), filename=filename)
+            if audio_file is None or not hasattr(audio_file, "info"):
+                return None
+
+            duration = getattr(audio_file.info, "length", None)
+            if duration and duration > 0:
+                return float(duration)
+            return None
+
+        except Exception as e:
+            logging.debug(f"Unable to sniff audio duration from header of {filename}: {str(e)}")
+            return None
+
     @classmethod
     def get_audio_duration_minutes(cls, file_path: str) -> Optional[float]:
         """
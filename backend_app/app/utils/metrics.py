@@ -0,0 +1,309 @@
+"""
+In-process request metrics with Prometheus text exposition.
+
+``MetricsMiddleware`` records one observation per HTTP request into the
+process-wide ``MetricsRegistry``: a request counter by route template and
+status, a latency histogram and a histogram of the Cosmos RU charge spent while
+serving the request. RU is collected through a context variable: the middleware
+opens a ``RequestCharge`` for each request and ``record_request_charge`` (called
+by ``execute_query_with_metrics``) adds to it, including from worker threads
+started with ``asyncio.to_thread`` since they inherit the request's context.
+
+Streamed upstream calls report their time to first token with
+``observe_time_to_first_token``, one histogram per upstream.
+
+Thread pool gauges (queue depth, live and max workers) are read at scrape time
+from executors registered with ``register_threadpool``; other gauges, such as
+the background task queue, are read from callables passed to ``register_gauge``.
+
+Observations are a dict lookup plus a bisect. Label strings and histogram line
+templates are built once per series and rendered text is cached until the series
+changes, which keeps a scrape of a hundred routes around a millisecond.
+"""
+import asyncio
+import bisect
+import contextvars
+import itertools
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REQUEST_UNIT_BUCKETS: Tuple[float, ...] = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+FIRST_TOKEN_BUCKETS: Tuple[float, ...] = (0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0)
+
+# Requests that matched no route share one label so scanners cannot blow up cardinality
+UNMATCHED_ROUTE = "unmatched"
+# The method is client input too: anything outside the standard set shares one label
+KNOWN_METHODS = frozenset({"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"})
+OTHER_METHOD = "OTHER"
+
+
+def method_label(method: str) -> str:
+    return method if method in KNOWN_METHODS else OTHER_METHOD
+
+
+@dataclass
+class RequestCharge:
+    """RU and query count accumulated while serving one request."""
+    request_units: float = 0.0
+    queries: int = 0
+
+
+_request_charge: contextvars.ContextVar[Optional[RequestCharge]] = contextvars.ContextVar(
+    "request_charge", default=None
+)
+
+
+def start_request_charge() -> Tuple[RequestCharge, contextvars.Token]:
+    """Open a charge for the current request; pass the token to ``end_request_charge``."""
+    charge = RequestCharge()
+    return charge, _request_charge.set(charge)
+
+
+def end_request_charge(token: contextvars.Token) -> None:
+    _request_charge.reset(token)
+
+
+def current_request_charge() -> Optional[RequestCharge]:
+    return _request_charge.get()
+
+
+def record_request_charge(request_units: float) -> None:
+    """Add a query's RU charge to the current request, if one is being measured."""
+    charge = _request_charge.get()
+    if charge is not None:
+        charge.request_units += request_units
+        charge.queries += 1
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts are per bucket and made cumulative on render.
+
+    A histogram created with a metric name and label string renders itself in
+    the Prometheus format. The line template is built once, and the rendered
+    text is cached until the next observation, so idle series cost nothing to
+    scrape.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count", "_template", "_rendered")
+
+    def __init__(self, buckets: Tuple[float, ...], metric: str = "", labels: str = ""):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._template = _histogram_template(metric, labels, buckets) if metric else None
+        self._rendered: Optional[str] = None
+
+    def observe(self, value: float) -> None:
+        # bisect_left puts a value equal to a bound in that bucket (Prometheus "le")
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self._rendered = None
+
+    def render(self) -> str:
+        if self._rendered is None:
+            cumulative = tuple(itertools.accumulate(self.counts[:-1]))
+            self._rendered = self._template % (*cumulative, self.count, _format_number(self.sum), self.count)
+        return self._rendered
+
+
+def _default_executor() -> Optional[Executor]:
+    """The running loop's default executor, used by ``run_sync``/``asyncio.to_thread``."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    return getattr(loop, "_default_executor", None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Iterable[str], values: Iterable[str]) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _histogram_template(metric: str, labels: str, buckets: Tuple[float, ...]) -> str:
+    """%-format template for every line of one histogram series."""
+    labels = labels.replace("%", "%%")
+    lines = [f'{metric}_bucket{{{labels},le="{_format_number(bound)}"}} %d' for bound in buckets]
+    lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} %d')
+    lines.append(f"{metric}_sum{{{labels}}} %s")
+    lines.append(f"{metric}_count{{{labels}}} %d")
+    return "\n".join(lines)
+
+
+class MetricsRegistry:
+    """Per-route request metrics and thread pool gauges for one worker process."""
+
+    def __init__(
+        self,
+        latency_buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+        request_unit_buckets: Tuple[float, ...] = REQUEST_UNIT_BUCKETS,
+    ):
+        self.latency_buckets = latency_buckets
+        self.request_unit_buckets = request_unit_buckets
+        self._requests: Dict[Tuple[str, str, str], int] = {}
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._request_units: Dict[Tuple[str, str], Histogram] = {}
+        self._queries: Dict[Tuple[str, str], int] = {}
+        self._first_token: Dict[str, Histogram] = {}
+        self._threadpools: Dict[str, Callable[[], Optional[Executor]]] = {"default": _default_executor}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        # Label rendering dominates scrape cost, so each series' label string is built once
+        self._label_cache: Dict[Tuple[str, ...], str] = {}
+
+    def observe_request(
+        self,
+        method: str,
+        route: str,
+        status_code: int,
+        duration_seconds: float,
+        charge: Optional[RequestCharge] = None,
+    ) -> None:
+        key = (method, route)
+        status_key = (method, route, str(status_code))
+        self._requests[status_key] = self._requests.get(status_key, 0) + 1
+
+        latency = self._latency.get(key)
+        if latency is None:
+            latency = self._latency[key] = Histogram(
+                self.latency_buckets, "http_request_duration_seconds", self._route_labels(key)
+            )
+        latency.observe(duration_seconds)
+
+        if charge is not None and charge.queries:
+            request_units = self._request_units.get(key)
+            if request_units is None:
+                request_units = self._request_units[key] = Histogram(
+                    self.request_unit_buckets, "cosmos_request_units_per_request", self._route_labels(key)
+                )
+            request_units.observe(charge.request_units)
+            self._queries[key] = self._queries.get(key, 0) + charge.queries
+
+    def observe_time_to_first_token(self, upstream: str, seconds: float) -> None:
+        """Time from sending a streamed request to its first content chunk."""
+        histogram = self._first_token.get(upstream)
+        if histogram is None:
+            histogram = self._first_token[upstream] = Histogram(
+                FIRST_TOKEN_BUCKETS, "upstream_time_to_first_token_seconds", _labels(("upstream",), (upstream,))
+            )
+        histogram.observe(seconds)
+
+    def _route_labels(self, key: Tuple[str, ...]) -> str:
+        labels = self._label_cache.get(key)
+        if labels is None:
+            names = ("method", "route", "status") if len(key) == 3 else ("method", "route")
+            labels = self._label_cache[key] = _labels(names, key)
+        return labels
+
+    def register_threadpool(self, name: str, getter: Callable[[], Optional[Executor]]) -> None:
+        """Report gauges for the executor returned by ``getter`` (None while it has not been created)."""
+        self._threadpools[name] = getter
+
+    def register_gauge(self, metric: str, help_text: str, getter: Callable[[], float]) -> None:
+        """Report ``getter()`` as an unlabelled gauge; registering a name again replaces it."""
+        self._gauges[metric] = (help_text, getter)
+
+    def threadpool_stats(self) -> Dict[str, Dict[str, int]]:
+        stats: Dict[str, Dict[str, int]] = {}
+        for name, getter in self._threadpools.items():
+            executor = getter()
+            work_queue = getattr(executor, "_work_queue", None)
+            if work_queue is None:
+                continue
+            stats[name] = {
+                "queue_depth": work_queue.qsize(),
+                "workers": len(getattr(executor, "_threads", ())),
+                "max_workers": getattr(executor, "_max_workers", 0),
+            }
+        return stats
+
+    def reset(self) -> None:
+        self._requests.clear()
+        self._latency.clear()
+        self._request_units.clear()
+        self._queries.clear()
+        self._first_token.clear()
+        self._label_cache.clear()
+
+    def render_prometheus(self) -> str:
+        """Render all series in the Prometheus text exposition format (0.0.4)."""
+        lines: List[str] = []
+
+        lines.append("# HELP http_requests_total HTTP requests by route template and status code.")
+        lines.append("# TYPE http_requests_total counter")
+        for labels, count in list(self._requests.items()):
+            lines.append(f"http_requests_total{{{self._route_labels(labels)}}} {count}")
+
+        self._render_histograms(
+            lines,
+            "http_request_duration_seconds",
+            "HTTP request latency by route template, until the response completed.",
+            self._latency,
+        )
+        self._render_histograms(
+            lines,
+            "cosmos_request_units_per_request",
+            "Cosmos DB request units charged while serving one request.",
+            self._request_units,
+        )
+
+        self._render_histograms(
+            lines,
+            "upstream_time_to_first_token_seconds",
+            "Time from sending a streamed upstream request to its first content chunk.",
+            self._first_token,
+        )
+
+        lines.append("# HELP cosmos_queries_total Cosmos DB queries issued by route template.")
+        lines.append("# TYPE cosmos_queries_total counter")
+        for labels, count in list(self._queries.items()):
+            lines.append(f"cosmos_queries_total{{{self._route_labels(labels)}}} {count}")
+
+        pools = self.threadpool_stats()
+        for metric, field, help_text in (
+            ("threadpool_queue_depth", "queue_depth", "Work items waiting for a thread."),
+            ("threadpool_workers", "workers", "Threads started by the pool."),
+            ("threadpool_max_workers", "max_workers", "Maximum threads the pool may start."),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for name, stats in pools.items():
+                lines.append(f'{metric}{{pool="{_escape(name)}"}} {stats[field]}')
+
+        for metric, (help_text, getter) in list(self._gauges.items()):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {_format_number(getter())}")
+
+        lines.append("")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _render_histograms(
+        lines: List[str],
+        metric: str,
+        help_text: str,
+        histograms: Dict[Any, Histogram],
+    ) -> None:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} histogram")
+        lines.extend(histogram.render() for histogram in list(histograms.values()))
+
+
+@lru_cache(maxsize=1)
+def get_metrics_registry() -> MetricsRegistry:
+    """Process-wide registry shared by the middleware, query helpers and /metrics."""
+    return MetricsRegistry()
@@ -0,0 +1,74 @@
+"""
+Password hashing helpers.
+
+bcrypt is deliberately slow (~200-300 ms per hash/verify). Calling it from an
+async handler stalls every other request on the worker, so the async helpers
+run it on a small dedicated thread pool. bcrypt releases the GIL while hashing,
+so the pool gives real parallelism while its size bounds how many CPU cores a
+login wave can take away from the rest of the API.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional
+
+from passlib.context import CryptContext
+
+from .metrics import get_metrics_registry
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+DEFAULT_PASSWORD_HASH_WORKERS = 2
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _configured_worker_count() -> int:
+    try:
+        from ..core.config import get_config
+
+        workers = int(get_config().password_hash_workers)
+    except Exception:
+        workers = DEFAULT_PASSWORD_HASH_WORKERS
+    return max(1, min(workers, os.cpu_count() or 1))
+
+
+@lru_cache(maxsize=1)
+def _get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=_configured_worker_count(),
+        thread_name_prefix="password-hash",
+    )
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password-hash executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password-hash executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), get_password_hash, password)
+
+
+def _current_executor() -> Optional[ThreadPoolExecutor]:
+    return _get_executor() if _get_executor.cache_info().currsize else None
+
+
+get_metrics_registry().register_threadpool("password-hash", _current_executor)
+
+
+def shutdown() -> None:
+    """Stop the password-hash executor during application shutdown."""
+    if _get_executor.cache_info().currsize:
+        _get_executor().shutdown(wait=False, cancel_futures=True)
+        _get_executor.cache_clear()
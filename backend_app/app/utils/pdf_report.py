@@ -0,0 +1,247 @@
+"""
+User report PDF rendering.
+
+Laying out a report with reportlab is pure-Python CPU work (tens to hundreds of
+milliseconds per report) that holds the GIL, so running it on the event loop or
+a thread stalls every other request on the worker. Reports are instead rendered
+in a small process pool from a plain-dict snapshot of the data, which is cheap
+to pickle and keeps Cosmos clients and services out of the child processes.
+
+This module lives under ``app.utils`` on purpose: worker processes import it
+by name, and keeping it free of service imports keeps their start-up cheap.
+"""
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+DEFAULT_PDF_RENDER_WORKERS = 1
+
+# Snapshot keys that do not change the rendered content
+_UNVERSIONED_KEYS = ("generated_at",)
+
+
+def format_datetime(dt_string: Optional[str]) -> str:
+    """Format an ISO datetime string for display."""
+    if not dt_string:
+        return 'N/A'
+    try:
+        dt = datetime.fromisoformat(dt_string.replace('Z', '+00:00'))
+        return dt.strftime('%Y-%m-%d %H:%M:%S UTC')
+    except (ValueError, AttributeError):
+        return dt_string
+
+
+def report_version(snapshot: Dict[str, Any]) -> str:
+    """Return a digest of everything in ``snapshot`` that affects the rendered PDF."""
+    versioned = {k: v for k, v in snapshot.items() if k not in _UNVERSIONED_KEYS}
+    payload = json.dumps(versioned, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_user_report_pdf(snapshot: Dict[str, Any], output_path: str) -> str:
+    """Render the user details report described by ``snapshot`` to ``output_path``.
+
+    ``snapshot`` holds ``user`` (display fields), ``days``, optionally ``analytics``
+    (``transcription_stats`` / ``activity_stats``) and ``records`` (per-job minutes),
+    and ``generated_at``. Runs in a worker process, so it must stay a top-level
+    function that only touches its arguments.
+    """
+    user = snapshot.get('user') or {}
+    analytics = snapshot.get('analytics')
+    days = snapshot.get('days', 30)
+
+    doc = SimpleDocTemplate(
+        output_path,
+        pagesize=A4,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=18
+    )
+
+    story = []
+    styles = getSampleStyleSheet()
+
+    # Title
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        alignment=TA_CENTER,
+        fontSize=18,
+        spaceAfter=30
+    )
+    story.append(Paragraph("User Details Report", title_style))
+    story.append(Spacer(1, 12))
+
+    # User Information Section
+    story.append(Paragraph("User Information", styles['Heading2']))
+
+    user_data = [
+        ['Field', 'Value'],
+        ['User ID', user.get('id', 'N/A')],
+        ['Email', user.get('email', 'N/A')],
+        ['Full Name', user.get('full_name', 'N/A')],
+        ['Permission Level', user.get('permission', 'N/A')],
+        ['Account Source', user.get('source', 'N/A')],
+        ['Microsoft OID', user.get('microsoft_oid', 'N/A')],
+        ['Tenant ID', user.get('tenant_id', 'N/A')],
+        ['Created At', format_datetime(user.get('created_at'))],
+        ['Last Login', format_datetime(user.get('last_login'))],
+        ['Is Active', 'Yes' if user.get('is_active') else 'No'],
+        ['Permission Last Changed', format_datetime(user.get('permission_changed_at'))],
+        ['Permission Changed By', user.get('permission_changed_by', 'N/A')],
+    ]
+
+    user_table = Table(user_data, colWidths=[2*inch, 4*inch])
+    user_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]))
+
+    story.append(user_table)
+    story.append(Spacer(1, 20))
+
+    # Analytics Section
+    if analytics:
+        story.append(Paragraph(f"Analytics Summary (Last {days} Days)", styles['Heading2']))
+
+        # Transcription Stats
+        transcription_stats = analytics.get('transcription_stats', {})
+        if transcription_stats:
+            story.append(Paragraph("Transcription Statistics", styles['Heading3']))
+
+            transcription_data = [
+                ['Metric', 'Value'],
+                ['Total Transcription Minutes', f"{transcription_stats.get('total_minutes', 0):.1f}"],
+                ['Total Jobs', str(transcription_stats.get('total_jobs', 0))],
+                ['Average Job Duration (minutes)', f"{transcription_stats.get('average_job_duration', 0):.1f}"],
+            ]
+
+            transcription_table = Table(transcription_data, colWidths=[3*inch, 2*inch])
+            transcription_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 9),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ]))
+
+            story.append(transcription_table)
+            story.append(Spacer(1, 15))
+
+        # Per-job minutes
+        records = snapshot.get('records') or []
+        if records:
+            story.append(Paragraph("Per-Job Duration Records", styles['Heading3']))
+            minutes_table_data = [["Job ID", "Timestamp", "Minutes", "File Name"]]
+            for r in records:
+                minutes_table_data.append([
+                    r.get('job_id', ''),
+                    format_datetime(r.get('timestamp')),
+                    f"{float(r.get('audio_duration_minutes', 0.0)):.2f}",
+                    r.get('file_name', '') or ''
+                ])
+            table = Table(minutes_table_data, colWidths=[2*inch, 2*inch, 1*inch, 2*inch])
+            table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                ('FONTSIZE', (0, 0), (-1, -1), 8),
+                ('ALIGN', (2, 1), (2, -1), 'RIGHT'),
+            ]))
+            story.append(table)
+            story.append(Spacer(1, 15))
+
+        # Activity Stats
+        activity_stats = analytics.get('activity_stats', {})
+        if activity_stats:
+            story.append(Paragraph("Activity Statistics", styles['Heading3']))
+
+            activity_data = [
+                ['Metric', 'Value'],
+                ['Total Events', str(activity_stats.get('total_events', 0))],
+                ['Login Count', str(activity_stats.get('login_count', 0))],
+                ['Jobs Created', str(activity_stats.get('jobs_created', 0))],
+                ['Last Activity', format_datetime(activity_stats.get('last_activity'))],
+            ]
+
+            activity_table = Table(activity_data, colWidths=[3*inch, 2*inch])
+            activity_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.lightgreen),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 9),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ]))
+
+            story.append(activity_table)
+            story.append(Spacer(1, 15))
+
+    # Footer
+    generated_at = snapshot.get('generated_at') or datetime.now(timezone.utc).isoformat()
+    story.append(Spacer(1, 30))
+    story.append(Paragraph(f"Report generated on {format_datetime(generated_at)}", styles['Normal']))
+
+    doc.build(story)
+    return output_path
+
+
+def _configured_worker_count() -> int:
+    try:
+        from ..core.config import get_config
+
+        workers = int(get_config().pdf_render_workers)
+    except Exception:
+        workers = DEFAULT_PDF_RENDER_WORKERS
+    return max(1, min(workers, os.cpu_count() or 1))
+
+
+@lru_cache(maxsize=1)
+def _get_executor() -> ProcessPoolExecutor:
+    # spawn rather than fork: the API process runs threads (SDK clients, executors)
+    # that must not be duplicated into the workers mid-operation.
+    return ProcessPoolExecutor(
+        max_workers=_configured_worker_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+async def render_user_report_pdf_async(snapshot: Dict[str, Any], output_path: str) -> str:
+    """Render a report on the PDF process pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), render_user_report_pdf, snapshot, output_path)
+
+
+def shutdown() -> None:
+    """Stop the PDF render pool during application shutdown."""
+    if _get_executor.cache_info().currsize:
+        _get_executor().shutdown(wait=False, cancel_futures=True)
+        _get_executor.cache_clear()
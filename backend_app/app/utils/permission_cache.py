@@ -1,12 +1,27 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Iterable, List, NamedTuple, Optional, Set
 import logging
 import time
 import json
 from functools import wraps, lru_cache
 
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    RedisError = Exception
+    REDIS_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_SWEEP_INTERVAL_SECONDS = 60
+CLEAR_BATCH_SIZE = 500
+
+
 class BasePermissionCache(ABC):
     """Abstract base class for permission caching implementations"""
     @abstractmethod
@@ -28,6 +43,9 @@ class BasePermissionCache(ABC):
     async def invalidate_permission_level_cache(self, permission: str):
         pass
     @abstractmethod
+    async def clear(self):
+        pass
+    @abstractmethod
     async def get_multiple_permissions(self, user_ids: List[str]) -> Dict[str, Optional[str]]:
         pass
     @abstractmethod
@@ -36,83 +54,194 @@ class BasePermissionCache(ABC):
     @abstractmethod
     async def get_cache_info(self) -> Dict[str, Any]:
         pass
+    async def close(self):
+        """Release backend resources (connections); a no-op for in-process caches."""
+        return None
+    def cache_permission_check(self, ttl: Optional[int] = None):
+        def decorator(func):
+            @wraps(func)
+            async def wrapper(user_id: str, *args, **kwargs):
+                cached_result = await self.get_user_permission(user_id)
+                if cached_result is not None:
+                    return cached_result
+                result = await func(user_id, *args, **kwargs)
+                if result is not None:
+                    await self.set_user_permission(user_id, result, ttl)
+                return result
+            return wrapper
+        return decorator
+
+
+def _member_ids(users: Iterable[Dict[str, Any]]) -> Set[str]:
+    return {str(u["id"]) for u in users if isinstance(u, dict) and u.get("id")}
+
+
+def _estimate_size(value: Any) -> int:
+    """Rough byte size of a cached value, computed once when it is stored."""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(str(k)) + _estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sum(_estimate_size(v) for v in value)
+    return 8
+
+
+class _CacheEntry(NamedTuple):
+    value: Any
+    expires: float
+    size: int
+    user_ids: frozenset
+    level: Optional[str]
+
 
 class InMemoryPermissionCache(BasePermissionCache):
-    """In-memory implementation of permission cache."""
-    def __init__(self, key_prefix: str = "permission:", default_ttl: int = 300):
-        self.cache = {}
+    """In-memory implementation of permission cache.
+
+    A size-bounded LRU. Each entry is indexed by the users it mentions (the user's
+    own permission key plus any permission-group lists they appear in) and by
+    permission level, so invalidation touches only the affected keys. Expired
+    entries are dropped lazily on read and by a sweep that runs at most once per
+    ``sweep_interval`` seconds during writes.
+    """
+    def __init__(
+        self,
+        key_prefix: str = "permission:",
+        default_ttl: int = 300,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        sweep_interval: int = DEFAULT_SWEEP_INTERVAL_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
         self.key_prefix = key_prefix
         self.default_ttl = default_ttl
-        logger.info(f"Initialized in-memory permission cache with TTL: {self.default_ttl}s")
-    async def get_user_permission(self, user_id: str) -> Optional[str]:
-        key = f"{self.key_prefix}user:{user_id}"
+        self.max_entries = max(1, int(max_entries))
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        self._user_index: Dict[str, Set[str]] = {}
+        self._level_index: Dict[str, Set[str]] = {}
+        self._size_bytes = 0
+        self._last_sweep = clock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        logger.info(f"Initialized in-memory permission cache with TTL: {self.default_ttl}s, max entries: {self.max_entries}")
+
+    def _user_key(self, user_id: str) -> str:
+        return f"{self.key_prefix}user:{user_id}"
+
+    def _group_key(self, permission: str) -> str:
+        return f"{self.key_prefix}permission_group:{permission}"
+
+    def _get(self, key: str) -> Any:
         entry = self.cache.get(key)
-        if not entry:
+        if entry is None:
+            self._stats["misses"] += 1
             return None
-        if time.time() > entry["expires"]:
-            self.cache.pop(key, None)
+        if self._clock() > entry.expires:
+            self._remove(key)
+            self._stats["expirations"] += 1
+            self._stats["misses"] += 1
             return None
-        return entry["value"]
+        self.cache.move_to_end(key)
+        self._stats["hits"] += 1
+        return entry.value
+
+    def _set(self, key: str, value: Any, ttl: Optional[int], user_ids: Iterable[str] = (), level: Optional[str] = None):
+        now = self._clock()
+        if now - self._last_sweep >= self.sweep_interval:
+            self.sweep_expired()
+        if key in self.cache:
+            self._remove(key)
+        entry = _CacheEntry(
+            value=value,
+            expires=now + (self.default_ttl if ttl is None else ttl),
+            size=len(key) + _estimate_size(value) + 16,
+            user_ids=frozenset(user_ids),
+            level=level,
+        )
+        self.cache[key] = entry
+        self._size_bytes += entry.size
+        for user_id in entry.user_ids:
+            self._user_index.setdefault(user_id, set()).add(key)
+        if level is not None:
+            self._level_index.setdefault(level, set()).add(key)
+        while len(self.cache) > self.max_entries:
+            oldest = next(iter(self.cache))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self.cache.pop(key, None)
+        if entry is None:
+            return
+        self._size_bytes -= entry.size
+        for user_id in entry.user_ids:
+            self._discard_index(self._user_index, user_id, key)
+        if entry.level is not None:
+            self._discard_index(self._level_index, entry.level, key)
+
+    @staticmethod
+    def _discard_index(index: Dict[str, Set[str]], name: str, key: str) -> None:
+        keys = index.get(name)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del index[name]
+
+    def sweep_expired(self) -> int:
+        """Drop every expired entry and return how many were removed."""
+        now = self._clock()
+        self._last_sweep = now
+        expired = [key for key, entry in self.cache.items() if now > entry.expires]
+        for key in expired:
+            self._remove(key)
+        self._stats["expirations"] += len(expired)
+        return len(expired)
+
+    async def get_user_permission(self, user_id: str) -> Optional[str]:
+        return self._get(self._user_key(user_id))
     async def set_user_permission(self, user_id: str, permission: str, ttl: Optional[int] = None):
-        if ttl is None:
-            ttl = self.default_ttl
-        key = f"{self.key_prefix}user:{user_id}"
-        self.cache[key] = {
-            "value": permission,
-            "expires": time.time() + ttl
-        }
+        self._set(self._user_key(user_id), permission, ttl, user_ids=(user_id,))
     async def get_users_by_permission(self, permission: str) -> Optional[List[Dict[str, Any]]]:
-        key = f"{self.key_prefix}permission_group:{permission}"
-        entry = self.cache.get(key)
-        if not entry:
-            return None
-        if time.time() > entry["expires"]:
-            self.cache.pop(key, None)
-            return None
-        return entry["value"]
+        return self._get(self._group_key(permission))
     async def set_users_by_permission(self, permission: str, users: List[Dict[str, Any]], ttl: Optional[int] = None):
-        if ttl is None:
-            ttl = self.default_ttl
-        key = f"{self.key_prefix}permission_group:{permission}"
-        self.cache[key] = {
-            "value": users,
-            "expires": time.time() + ttl
-        }
+        self._set(self._group_key(permission), users, ttl, user_ids=_member_ids(users), level=permission)
     async def invalidate_user_cache(self, user_id: str):
-        keys_to_remove = [key for key in self.cache.keys() if f"user:{user_id}" in key]
+        keys_to_remove = list(self._user_index.get(user_id, ()))
         for key in keys_to_remove:
-            self.cache.pop(key, None)
+            self._remove(key)
         logger.debug(f"Invalidated {len(keys_to_remove)} cache entries for user {user_id}")
     async def invalidate_permission_level_cache(self, permission: str):
-        keys_to_remove = [key for key in self.cache.keys() if f"permission_group:{permission}" in key]
+        keys_to_remove = list(self._level_index.get(permission, ()))
         for key in keys_to_remove:
-            self.cache.pop(key, None)
+            self._remove(key)
         logger.debug(f"Invalidated {len(keys_to_remove)} cache entries for permission {permission}")
+    async def clear(self):
+        removed = len(self.cache)
+        self.cache.clear()
+        self._user_index.clear()
+        self._level_index.clear()
+        self._size_bytes = 0
+        logger.debug(f"Cleared {removed} cache entries")
     async def get_multiple_permissions(self, user_ids: List[str]) -> Dict[str, Optional[str]]:
-        result = {}
-        for user_id in user_ids:
-            result[user_id] = await self.get_user_permission(user_id)
-        return result
+        return {user_id: self._get(self._user_key(user_id)) for user_id in user_ids}
     async def set_multiple_permissions(self, permissions: Dict[str, str], ttl: Optional[int] = None):
         for user_id, permission in permissions.items():
-            await self.set_user_permission(user_id, permission, ttl)
+            self._set(self._user_key(user_id), permission, ttl, user_ids=(user_id,))
     async def get_cache_info(self) -> Dict[str, Any]:
         try:
-            current_time = time.time()
-            permission_keys = [k for k in self.cache.keys() if k.startswith(self.key_prefix)]
-            valid_entries = sum(1 for k in permission_keys if current_time <= self.cache[k]["expires"])
-            total_size = 0
-            for key in permission_keys:
-                entry = self.cache[key]
-                key_size = len(key)
-                value_size = len(json.dumps(entry["value"])) if entry["value"] else 0
-                entry_size = key_size + value_size + 16
-                total_size += entry_size
+            current_time = self._clock()
+            valid_entries = sum(1 for entry in self.cache.values() if current_time <= entry.expires)
             return {
-                "total_permission_keys": len(permission_keys),
+                "total_permission_keys": len(self.cache),
                 "valid_entries": valid_entries,
-                "expired_entries": len(permission_keys) - valid_entries,
-                "memory_usage_estimate_bytes": total_size,
+                "expired_entries": len(self.cache) - valid_entries,
+                "memory_usage_estimate_bytes": self._size_bytes,
+                "max_entries": self.max_entries,
+                "indexed_users": len(self._user_index),
+                "indexed_permission_levels": len(self._level_index),
+                **self._stats,
                 "permission_key_prefix": self.key_prefix,
                 "default_ttl": self.default_ttl,
                 "cache_type": "in_memory",
@@ -120,34 +249,192 @@ class InMemoryPermissionCache(BasePermissionCache):
         except Exception as e:
             logger.error(f"Error getting cache info: {e}")
             return {"error": str(e)}
-    def cache_permission_check(self, ttl: Optional[int] = None):
-        def decorator(func):
-            @wraps(func)
-            async def wrapper(user_id: str, *args, **kwargs):
-                cached_result = await self.get_user_permission(user_id)
-                if cached_result is not None:
-                    return cached_result
-                result = await func(user_id, *args, **kwargs)
-                if result is not None:
-                    await self.set_user_permission(user_id, result, ttl)
-                return result
-            return wrapper
-        return decorator
+
+
+class RedisPermissionCache(BasePermissionCache):
+    """Redis-backed permission cache shared by every worker process.
+
+    Values live under the same key layout as the in-memory cache with native
+    Redis expiry. Each user also has an index set (``idx:user:<id>``) naming the
+    permission-group keys that list them, so invalidating a user is one
+    ``SMEMBERS`` plus one ``DEL``. Redis errors are logged and treated as cache
+    misses so an unavailable Redis degrades to uncached lookups.
+    """
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        key_prefix: str = "permission:",
+        default_ttl: int = 300,
+        client: Any = None,
+    ):
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("redis package is not installed")
+            client = aioredis.from_url(redis_url, decode_responses=True)
+        self.redis = client
+        self.key_prefix = key_prefix
+        self.default_ttl = default_ttl
+        self._stats = {"hits": 0, "misses": 0, "errors": 0}
+        logger.info(f"Initialized Redis permission cache with TTL: {self.default_ttl}s")
+
+    def _user_key(self, user_id: str) -> str:
+        return f"{self.key_prefix}user:{user_id}"
+
+    def _group_key(self, permission: str) -> str:
+        return f"{self.key_prefix}permission_group:{permission}"
+
+    def _user_index_key(self, user_id: str) -> str:
+        return f"{self.key_prefix}idx:user:{user_id}"
+
+    def _ttl(self, ttl: Optional[int]) -> int:
+        return max(1, int(self.default_ttl if ttl is None else ttl))
+
+    def _record(self, value: Any) -> Any:
+        self._stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    def _log_error(self, action: str, exc: Exception, **extra: Any) -> None:
+        self._stats["errors"] += 1
+        logger.warning(f"Redis permission cache {action} failed: {exc}", extra=extra)
+
+    async def get_user_permission(self, user_id: str) -> Optional[str]:
+        try:
+            return self._record(await self.redis.get(self._user_key(user_id)))
+        except RedisError as e:
+            self._log_error("get", e, user_id=user_id)
+            return None
+    async def set_user_permission(self, user_id: str, permission: str, ttl: Optional[int] = None):
+        try:
+            await self.redis.set(self._user_key(user_id), permission, ex=self._ttl(ttl))
+        except RedisError as e:
+            self._log_error("set", e, user_id=user_id)
+    async def get_users_by_permission(self, permission: str) -> Optional[List[Dict[str, Any]]]:
+        try:
+            raw = await self.redis.get(self._group_key(permission))
+        except RedisError as e:
+            self._log_error("get", e, permission=permission)
+            return None
+        return self._record(json.loads(raw) if raw is not None else None)
+    async def set_users_by_permission(self, permission: str, users: List[Dict[str, Any]], ttl: Optional[int] = None):
+        key = self._group_key(permission)
+        expiry = self._ttl(ttl)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.set(key, json.dumps(users, default=str), ex=expiry)
+                for user_id in _member_ids(users):
+                    index_key = self._user_index_key(user_id)
+                    pipe.sadd(index_key, key)
+                    pipe.expire(index_key, expiry)
+                await pipe.execute()
+        except RedisError as e:
+            self._log_error("set", e, permission=permission)
+    async def invalidate_user_cache(self, user_id: str):
+        index_key = self._user_index_key(user_id)
+        try:
+            group_keys = await self.redis.smembers(index_key)
+            removed = await self.redis.delete(self._user_key(user_id), index_key, *group_keys)
+        except RedisError as e:
+            self._log_error("invalidate", e, user_id=user_id)
+            return
+        logger.debug(f"Invalidated {removed} cache entries for user {user_id}")
+    async def invalidate_permission_level_cache(self, permission: str):
+        try:
+            removed = await self.redis.delete(self._group_key(permission))
+        except RedisError as e:
+            self._log_error("invalidate", e, permission=permission)
+            return
+        logger.debug(f"Invalidated {removed} cache entries for permission {permission}")
+    async def clear(self):
+        # Only this cache's prefix: the Redis database may be shared with other data
+        removed = 0
+        try:
+            batch: List[str] = []
+            async for key in self.redis.scan_iter(match=f"{self.key_prefix}*", count=CLEAR_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= CLEAR_BATCH_SIZE:
+                    removed += await self.redis.delete(*batch)
+                    batch = []
+            if batch:
+                removed += await self.redis.delete(*batch)
+        except RedisError as e:
+            self._log_error("clear", e)
+            return
+        logger.debug(f"Cleared {removed} cache entries")
+    async def get_multiple_permissions(self, user_ids: List[str]) -> Dict[str, Optional[str]]:
+        if not user_ids:
+            return {}
+        try:
+            values = await self.redis.mget([self._user_key(user_id) for user_id in user_ids])
+        except RedisError as e:
+            self._log_error("mget", e, count=len(user_ids))
+            return {user_id: None for user_id in user_ids}
+        return {user_id: self._record(value) for user_id, value in zip(user_ids, values)}
+    async def set_multiple_permissions(self, permissions: Dict[str, str], ttl: Optional[int] = None):
+        if not permissions:
+            return
+        expiry = self._ttl(ttl)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for user_id, permission in permissions.items():
+                    pipe.set(self._user_key(user_id), permission, ex=expiry)
+                await pipe.execute()
+        except RedisError as e:
+            self._log_error("mset", e, count=len(permissions))
+    async def get_cache_info(self) -> Dict[str, Any]:
+        info: Dict[str, Any] = {
+            **self._stats,
+            "permission_key_prefix": self.key_prefix,
+            "default_ttl": self.default_ttl,
+            "cache_type": "redis",
+        }
+        try:
+            info["total_keys"] = await self.redis.dbsize()
+            info["memory_usage_bytes"] = (await self.redis.info("memory")).get("used_memory")
+        except RedisError as e:
+            # Managed Redis offerings may disable INFO; the local counters still apply
+            logger.debug(f"Redis server stats unavailable: {e}")
+        return info
+    async def close(self):
+        await self.redis.aclose()
+
+
+def _cache_options(settings) -> Dict[str, Any]:
+    """Read cache options from ``AppConfig`` or the legacy nested ``Settings.cache``."""
+    cache_settings = getattr(settings, "cache", None)
+    if cache_settings is not None:
+        return {
+            "cache_type": cache_settings.cache_type,
+            "redis_url": cache_settings.redis_url,
+            "key_prefix": cache_settings.key_prefix,
+            "default_ttl": cache_settings.default_ttl,
+            "max_entries": getattr(cache_settings, "max_entries", DEFAULT_MAX_ENTRIES),
+        }
+    return {
+        "cache_type": settings.cache_type,
+        "redis_url": settings.cache_redis_url,
+        "key_prefix": settings.cache_key_prefix,
+        "default_ttl": settings.cache_default_ttl,
+        "max_entries": getattr(settings, "cache_max_entries", DEFAULT_MAX_ENTRIES),
+    }
+
 
 def _create_permission_cache(settings) -> BasePermissionCache:
     try:
-        cache_settings = settings.cache
+        options = _cache_options(settings)
 
-        if cache_settings.cache_type.lower() == "redis" and cache_settings.redis_url:
-            logger.warning("Redis cache requested but not implemented yet, falling back to in-memory cache")
-            return InMemoryPermissionCache(
-                key_prefix=cache_settings.key_prefix,
-                default_ttl=cache_settings.default_ttl
-            )
+        if options["cache_type"].lower() == "redis" and options["redis_url"]:
+            if REDIS_AVAILABLE:
+                return RedisPermissionCache(
+                    redis_url=options["redis_url"],
+                    key_prefix=options["key_prefix"],
+                    default_ttl=options["default_ttl"],
+                )
+            logger.warning("Redis cache requested but the redis package is not installed, falling back to in-memory cache")
 
         return InMemoryPermissionCache(
-            key_prefix=cache_settings.key_prefix,
-            default_ttl=cache_settings.default_ttl
+            key_prefix=options["key_prefix"],
+            default_ttl=options["default_ttl"],
+            max_entries=options["max_entries"],
         )
     except Exception as e:
         logger.warning(f"Error initializing permission cache with settings: {e}, falling back to defaults")
@@ -172,3 +459,10 @@ def get_permission_cache(settings=None) -> BasePermissionCache:
 def reset_permission_cache() -> None:
     """Reset the cached permission cache (useful in tests)."""
     _default_permission_cache.cache_clear()
+
+
+async def close_permission_cache() -> None:
+    """Close the shared permission cache's backend connections during shutdown."""
+    if _default_permission_cache.cache_info().currsize:
+        await _default_permission_cache().close()
+        _default_permission_cache.cache_clear()
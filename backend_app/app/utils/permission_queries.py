@@ -7,23 +7,43 @@ import time
 from functools import lru_cache
 import json
 import logging
-from app.utils.permission_cache import get_permission_cache
+from app.utils.async_utils import run_sync
+from app.utils.permission_cache import BasePermissionCache, get_permission_cache
 from app.models.permissions import PermissionLevel, PERMISSION_HIERARCHY
 
 logger = logging.getLogger(__name__)
 
+# User ids per ARRAY_CONTAINS query; keeps the parameter payload and per-query RU bounded
+BULK_PERMISSION_CHUNK_SIZE = 100
+# Permission reported for user documents without one (matches the legacy default)
+DEFAULT_PERMISSION = "Viewer"
+
 class PermissionQueryOptimizer:
     """
     Optimized queries for permission-based operations in Cosmos DB.
     Includes caching, indexing strategies, and efficient query patterns.
     """
     
-    def __init__(self, cosmos_client: CosmosClient = None, database_name: str = None, container_name: str = None):
-        """Initialize with optional parameters for dependency injection"""
+    def __init__(
+        self,
+        cosmos_client: CosmosClient = None,
+        database_name: str = None,
+        container_name: str = None,
+        *,
+        container=None,
+        permission_cache: Optional[BasePermissionCache] = None,
+    ):
+        """Initialize with optional parameters for dependency injection
+
+        ``container`` may be passed directly (e.g. ``CosmosService.get_container("auth")``)
+        instead of a client plus database/container names.
+        """
         self.client = cosmos_client
         self.database = self.client.get_database_client(database_name) if cosmos_client and database_name else None
-        self.container = self.database.get_container_client(container_name) if self.database and container_name else None
-        self._permission_cache = get_permission_cache()
+        self.container = container or (
+            self.database.get_container_client(container_name) if self.database and container_name else None
+        )
+        self._permission_cache = permission_cache or get_permission_cache()
         self.logger = logging.getLogger(__name__)
     
     def build_user_permission_query(self, user_id: str) -> tuple[str, List[Dict[str, Any]]]:
@@ -80,20 +100,18 @@ class PermissionQueryOptimizer:
         """
         Check user permission with caching for frequently accessed users.
         """
-        cache_key = f"permission_{user_id}"
-        
         # Check cache first
-        cached_data = self._permission_cache.get(cache_key)
+        cached_data = await self._permission_cache.get_user_permission(user_id)
         if cached_data:
             return cached_data
         
         # Query from database
         try:
-            user = self.container.read_item(item=user_id, partition_key=user_id)
-            permission = user.get('permission', 'Viewer')
+            user = await run_sync(lambda: self.container.read_item(item=user_id, partition_key=user_id))
+            permission = user.get('permission', DEFAULT_PERMISSION)
             
             # Cache the result
-            self._permission_cache.set(cache_key, permission)
+            await self._permission_cache.set_user_permission(user_id, permission)
             
             return permission
         except CosmosResourceNotFoundError:
@@ -101,26 +119,53 @@ class PermissionQueryOptimizer:
     
     async def bulk_check_permissions(self, user_ids: List[str]) -> Dict[str, str]:
         """
-        Efficiently check permissions for multiple users in a single query.
+        Efficiently check permissions for multiple users.
+
+        Cached permissions are read in one batched cache call. The remaining ids are
+        split into chunks of ``BULK_PERMISSION_CHUNK_SIZE`` and looked up with
+        parameterised ``ARRAY_CONTAINS(@ids, c.id)`` queries (one reusable query
+        plan, no string-built SQL) that run concurrently and project only id and
+        permission. Results are written back to the cache in one call. Unknown
+        users are omitted from the result.
         """
-        if not user_ids:
+        ids = list(dict.fromkeys(uid for uid in user_ids if uid))
+        if not ids:
             return {}
         
-        # Create IN clause for bulk query
-        user_ids_str = ', '.join([f"'{user_id}'" for user_id in user_ids])
-        
-        query = f"""
-        SELECT u.id, u.permission
-        FROM users u
-        WHERE u.id IN ({user_ids_str})
-        """
+        cached = await self._permission_cache.get_multiple_permissions(ids)
+        result = {uid: perm for uid, perm in cached.items() if perm is not None}
+        missing = [uid for uid in ids if uid not in result]
+        if not missing:
+            return result
         
-        items = list(self.container.query_items(
-            query=query,
-            enable_cross_partition_query=True
-        ))
+        chunks = [
+            missing[i:i + BULK_PERMISSION_CHUNK_SIZE]
+            for i in range(0, len(missing), BULK_PERMISSION_CHUNK_SIZE)
+        ]
+        pages = await asyncio.gather(*(self._query_permissions_chunk(chunk) for chunk in chunks))
         
-        return {item['id']: item.get('permission', 'Viewer') for item in items}
+        fetched = {
+            item['id']: item.get('permission') or DEFAULT_PERMISSION
+            for page in pages
+            for item in page
+        }
+        if fetched:
+            await self._permission_cache.set_multiple_permissions(fetched)
+        result.update(fetched)
+        return result
+    
+    async def _query_permissions_chunk(self, user_ids: List[str]) -> List[Dict[str, Any]]:
+        query = "SELECT c.id, c.permission FROM c WHERE c.type = 'user' AND ARRAY_CONTAINS(@ids, c.id)"
+        parameters = [{"name": "@ids", "value": user_ids}]
+        return await run_sync(
+            lambda: list(
+                self.container.query_items(
+                    query=query,
+                    parameters=parameters,
+                    enable_cross_partition_query=True,
+                )
+            )
+        )
     
     # 2. PERMISSION-BASED RESOURCE QUERIES
     
@@ -220,21 +265,16 @@ class PermissionQueryOptimizer:
     
     # 4. CACHING UTILITIES
     
-    def clear_permission_cache(self, user_id: str = None):
+    async def clear_permission_cache(self, user_id: str = None):
         """Clear permission cache for specific user or all users."""
         if user_id:
-            cache_key = f"permission_{user_id}"
-            self._permission_cache.delete(cache_key)
+            await self._permission_cache.invalidate_user_cache(user_id)
         else:
-            self._permission_cache.clear()
+            await self._permission_cache.clear()
     
-    def get_cache_stats(self) -> Dict[str, Any]:
+    async def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
-        # Note: Implementing cache stats would depend on the underlying cache implementation
-        # For example, if using Redis, you could query Redis for info
-        return {
-            "note": "Cache statistics implementation depends on the underlying cache system."
-        }
+        return await self._permission_cache.get_cache_info()
 
 # Usage Examples:
 async def example_usage():
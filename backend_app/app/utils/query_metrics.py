@@ -1,15 +1,40 @@
 """
 Query metrics logging for Cosmos DB operations.
-Tracks RU consumption and query performance.
+
+Tracks RU consumption and query performance:
+
+* RU is summed over every backend page through the SDK ``response_hook`` and
+  added to the current request's metrics (``utils.metrics``).
+* Queries are grouped by a normalised fingerprint (literals replaced by ``?``)
+  in a bounded ``QueryStatsTable`` so admins can see the most expensive shapes.
+* Slow or expensive queries are logged, sampled per fingerprint: the first
+  occurrence is always logged, later ones at ``slow_query_log_sample_rate``.
+  Other queries only log at DEBUG.
+
+``PagedQuery`` is the streaming form: it yields one page at a time from the
+threadpool instead of materialising the whole result.
 """
+import hashlib
 import logging
+import random
+import re
+import threading
 import time
-from typing import Any, Dict, List, Optional, Callable
-from functools import wraps
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Callable
+from functools import lru_cache, wraps
 from azure.cosmos import exceptions
 
+from .async_utils import iterate_pages
+from .metrics import record_request_charge
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_SLOW_QUERY_MS = 1000.0
+DEFAULT_EXPENSIVE_QUERY_RU = 50.0
+DEFAULT_SLOW_QUERY_LOG_SAMPLE_RATE = 0.1
+DEFAULT_QUERY_STATS_MAX_FINGERPRINTS = 500
+
 
 def log_query_metrics(query: str, ru_charge: float, item_count: int, duration_ms: float, **kwargs):
     """
@@ -52,6 +77,288 @@ def log_query_metrics(query: str, ru_charge: float, item_count: int, duration_ms
     )
 
 
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"(?<![\w@.])-?\d+(?:\.\d+)?(?![\w.])")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint_query(query: str) -> str:
+    """Normalise a query so executions differing only in literals group together.
+
+    String and number literals become ``?``, literal lists collapse to
+    ``(?+)`` and whitespace is squeezed. ``@parameters`` are left alone since
+    parameterised queries already share their text.
+    """
+    text = _STRING_LITERAL.sub("?", query)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _VALUE_LIST.sub("(?+)", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def fingerprint_id(fingerprint: str) -> str:
+    return hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:12]
+
+
+@dataclass
+class QueryStats:
+    """Aggregates for one query fingerprint."""
+    fingerprint_id: str
+    fingerprint: str
+    count: int = 0
+    total_ru: float = 0.0
+    max_ru: float = 0.0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    total_items: int = 0
+    last_seen: float = field(default_factory=time.time)
+
+    @property
+    def avg_ru(self) -> float:
+        return self.total_ru / self.count if self.count else 0.0
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["fingerprint"] = self.fingerprint[:500]
+        data.update(avg_ru=round(self.avg_ru, 2), avg_ms=round(self.avg_ms, 2))
+        for key in ("total_ru", "max_ru", "total_ms", "max_ms"):
+            data[key] = round(data[key], 2)
+        return data
+
+
+class QueryStatsTable:
+    """Per-fingerprint query aggregates, bounded to ``max_fingerprints`` entries.
+
+    When full, a new fingerprint replaces the one with the lowest total RU so
+    the table converges on the expensive query shapes.
+    """
+
+    SORT_KEYS = ("total_ru", "max_ru", "avg_ru", "count", "total_ms", "max_ms")
+
+    def __init__(self, max_fingerprints: int = DEFAULT_QUERY_STATS_MAX_FINGERPRINTS):
+        self.max_fingerprints = max(1, int(max_fingerprints))
+        self._stats: Dict[str, QueryStats] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def record(self, fingerprint: str, ru_charge: float, duration_ms: float, item_count: int) -> QueryStats:
+        with self._lock:
+            stats = self._stats.get(fingerprint)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    cheapest = min(self._stats.values(), key=lambda s: s.total_ru)
+                    del self._stats[cheapest.fingerprint]
+                    self.evictions += 1
+                stats = self._stats[fingerprint] = QueryStats(fingerprint_id(fingerprint), fingerprint)
+            stats.count += 1
+            stats.total_ru += ru_charge
+            stats.max_ru = max(stats.max_ru, ru_charge)
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.total_items += item_count
+            stats.last_seen = time.time()
+            return stats
+
+    def top(self, limit: int = 10, sort_by: str = "total_ru") -> List[Dict[str, Any]]:
+        if sort_by not in self.SORT_KEYS:
+            raise ValueError(f"sort_by must be one of {', '.join(self.SORT_KEYS)}")
+        with self._lock:
+            entries = list(self._stats.values())
+        entries.sort(key=lambda s: getattr(s, sort_by), reverse=True)
+        return [s.to_dict() for s in entries[:max(0, limit)]]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+
+@dataclass(frozen=True)
+class SlowQueryPolicy:
+    slow_ms: float = DEFAULT_SLOW_QUERY_MS
+    expensive_ru: float = DEFAULT_EXPENSIVE_QUERY_RU
+    sample_rate: float = DEFAULT_SLOW_QUERY_LOG_SAMPLE_RATE
+
+    def is_slow(self, ru_charge: float, duration_ms: float) -> bool:
+        return duration_ms >= self.slow_ms or ru_charge >= self.expensive_ru
+
+
+@lru_cache(maxsize=1)
+def get_slow_query_policy() -> SlowQueryPolicy:
+    try:
+        from ..core.config import get_config
+
+        config = get_config()
+        return SlowQueryPolicy(
+            slow_ms=float(config.slow_query_ms),
+            expensive_ru=float(config.expensive_query_ru),
+            sample_rate=min(1.0, max(0.0, float(config.slow_query_log_sample_rate))),
+        )
+    except Exception:
+        return SlowQueryPolicy()
+
+
+@lru_cache(maxsize=1)
+def get_query_stats() -> QueryStatsTable:
+    """Process-wide fingerprint table read by the admin top-queries endpoint."""
+    try:
+        from ..core.config import get_config
+
+        return QueryStatsTable(get_config().query_stats_max_fingerprints)
+    except Exception:
+        return QueryStatsTable()
+
+
+def observe_query(query: str, ru_charge: float, item_count: int, duration_ms: float, **kwargs) -> QueryStats:
+    """Record one finished query: request RU, fingerprint stats and sampled slow-query logging."""
+    record_request_charge(ru_charge)
+    fingerprint = fingerprint_query(query)
+    stats = get_query_stats().record(fingerprint, ru_charge, duration_ms, item_count)
+
+    policy = get_slow_query_policy()
+    if policy.is_slow(ru_charge, duration_ms):
+        if stats.count == 1 or random.random() < policy.sample_rate:
+            log_query_metrics(
+                query=query,
+                ru_charge=ru_charge,
+                item_count=item_count,
+                duration_ms=duration_ms,
+                fingerprint_id=stats.fingerprint_id,
+                fingerprint_count=stats.count,
+                **kwargs
+            )
+    elif logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Cosmos DB query executed",
+            extra={
+                "fingerprint_id": stats.fingerprint_id,
+                "ru_charge": round(ru_charge, 2),
+                "item_count": item_count,
+                "duration_ms": round(duration_ms, 2),
+            }
+        )
+    return stats
+
+
+class _ChargeHook:
+    """``response_hook`` summing ``x-ms-request-charge`` over every backend page."""
+
+    def __init__(self):
+        self.total = 0.0
+
+    def clear(self) -> None:
+        self.total = 0.0
+
+    def __call__(self, headers, result) -> None:
+        # query_items also calls the hook once with the lazy pager and the
+        # previous operation's headers; only page fetches carry this query's charge
+        if hasattr(result, "by_page"):
+            return
+        try:
+            self.total += float((headers or {}).get("x-ms-request-charge", 0) or 0)
+        except (TypeError, ValueError):
+            pass
+
+
+def _log_query_failure(query: str, error: exceptions.CosmosHttpResponseError, duration_ms: float) -> None:
+    logger.error(
+        f"Cosmos DB query failed: {error.message}",
+        extra={
+            "query": query[:200],
+            "status_code": error.status_code,
+            "duration_ms": round(duration_ms, 2),
+            "error": str(error)
+        },
+        exc_info=True
+    )
+
+
+class PagedQuery:
+    """Async iterator over the pages of a Cosmos query, fetched one at a time in the threadpool.
+
+    ``request_charge``, ``item_count`` and ``page_count`` are updated as pages
+    arrive; when iteration ends (or the consumer stops early) the totals are
+    recorded once through ``observe_query``.
+
+    Usage::
+
+        query = PagedQuery(container, "SELECT * FROM c WHERE c.type = 'job'", page_size=100)
+        async for page in query:
+            ...
+        query.request_charge  # RU summed over every page
+    """
+
+    def __init__(
+        self,
+        container,
+        query: str,
+        parameters: Optional[List[Dict[str, Any]]] = None,
+        page_size: Optional[int] = None,
+        **query_kwargs
+    ):
+        self.container = container
+        self.query = query
+        self.parameters = parameters or []
+        self.page_size = page_size
+        self.query_kwargs = query_kwargs
+        self.request_charge = 0.0
+        self.item_count = 0
+        self.page_count = 0
+        self._iterator: Optional[AsyncIterator[List[Dict[str, Any]]]] = None
+
+    def __aiter__(self) -> "PagedQuery":
+        return self
+
+    async def __anext__(self) -> List[Dict[str, Any]]:
+        if self._iterator is None:
+            self._iterator = self._pages()
+        return await self._iterator.__anext__()
+
+    async def aclose(self) -> None:
+        if self._iterator is not None:
+            await self._iterator.aclose()
+
+    async def _pages(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        hook = _ChargeHook()
+        start_time = time.perf_counter()
+        completed = False
+        try:
+            pager = self.container.query_items(
+                query=self.query,
+                parameters=self.parameters,
+                max_item_count=self.page_size,
+                response_hook=hook,
+                **self.query_kwargs
+            ).by_page()
+            async for page in iterate_pages(pager):
+                self.page_count += 1
+                self.item_count += len(page)
+                self.request_charge = hook.total
+                yield page
+            completed = True
+        except exceptions.CosmosHttpResponseError as e:
+            _log_query_failure(self.query, e, (time.perf_counter() - start_time) * 1000)
+            raise
+        finally:
+            self.request_charge = hook.total
+            observe_query(
+                self.query,
+                ru_charge=self.request_charge,
+                item_count=self.item_count,
+                duration_ms=(time.perf_counter() - start_time) * 1000,
+                page_count=self.page_count,
+                completed=completed,
+                partition_key=self.query_kwargs.get('partition_key'),
+                cross_partition=self.query_kwargs.get('enable_cross_partition_query', False)
+            )
+
+
 def execute_query_with_metrics(
     container,
     query: str,
@@ -59,7 +366,7 @@ def execute_query_with_metrics(
     **query_kwargs
 ) -> List[Dict[str, Any]]:
     """
-    Execute a Cosmos DB query and log performance metrics.
+    Execute a Cosmos DB query and record performance metrics.
     
     Args:
         container: Cosmos DB container instance
@@ -73,29 +380,25 @@ def execute_query_with_metrics(
     Raises:
         CosmosHttpResponseError: If query fails
     """
-    start_time = time.time()
-    ru_charge = 0.0
-    items = []
+    start_time = time.perf_counter()
+    hook = _ChargeHook()
     
     try:
         response = container.query_items(
             query=query,
             parameters=parameters or [],
+            response_hook=hook,
             **query_kwargs
         )
         
-        # Consume the iterator and capture RU charge
+        # Consuming the iterator fetches every page; the hook sums their charges
         items = list(response)
-        ru_charge = float(response.response_headers.get('x-ms-request-charge', 0))
-        
-        duration_ms = (time.time() - start_time) * 1000
         
-        # Log metrics
-        log_query_metrics(
-            query=query,
-            ru_charge=ru_charge,
+        observe_query(
+            query,
+            ru_charge=hook.total,
             item_count=len(items),
-            duration_ms=duration_ms,
+            duration_ms=(time.perf_counter() - start_time) * 1000,
             partition_key=query_kwargs.get('partition_key'),
             cross_partition=query_kwargs.get('enable_cross_partition_query', False)
         )
@@ -103,17 +406,7 @@ def execute_query_with_metrics(
         return items
         
     except exceptions.CosmosHttpResponseError as e:
-        duration_ms = (time.time() - start_time) * 1000
-        logger.error(
-            f"Cosmos DB query failed: {e.message}",
-            extra={
-                "query": query[:200],
-                "status_code": e.status_code,
-                "duration_ms": round(duration_ms, 2),
-                "error": str(e)
-            },
-            exc_info=True
-        )
+        _log_query_failure(query, e, (time.perf_counter() - start_time) * 1000)
         raise
 
 
@@ -127,67 +420,23 @@ async def execute_query_with_metrics_async(
     """
     Async version of execute_query_with_metrics.
     
+    Collects every page of a ``PagedQuery``; prefer iterating ``PagedQuery``
+    directly when the caller can process results page by page.
+    
     Args:
         container: Cosmos DB container instance
         query: SQL query string
         parameters: Query parameters
-        run_sync: Optional async wrapper function
+        run_sync: Unused; kept for compatibility (pages are always fetched in the threadpool)
         **query_kwargs: Additional query options
     
     Returns:
         List of query results
     """
-    start_time = time.time()
-    ru_charge = 0.0
-    items = []
-    
-    try:
-        if run_sync:
-            # Use provided async wrapper
-            response = container.query_items(
-                query=query,
-                parameters=parameters or [],
-                **query_kwargs
-            )
-            items = await run_sync(lambda: list(response))
-            ru_charge = float(response.response_headers.get('x-ms-request-charge', 0))
-        else:
-            # Direct execution
-            response = container.query_items(
-                query=query,
-                parameters=parameters or [],
-                **query_kwargs
-            )
-            items = list(response)
-            ru_charge = float(response.response_headers.get('x-ms-request-charge', 0))
-        
-        duration_ms = (time.time() - start_time) * 1000
-        
-        # Log metrics
-        log_query_metrics(
-            query=query,
-            ru_charge=ru_charge,
-            item_count=len(items),
-            duration_ms=duration_ms,
-            partition_key=query_kwargs.get('partition_key'),
-            cross_partition=query_kwargs.get('enable_cross_partition_query', False)
-        )
-        
-        return items
-        
-    except exceptions.CosmosHttpResponseError as e:
-        duration_ms = (time.time() - start_time) * 1000
-        logger.error(
-            f"Cosmos DB query failed: {e.message}",
-            extra={
-                "query": query[:200],
-                "status_code": e.status_code,
-                "duration_ms": round(duration_ms, 2),
-                "error": str(e)
-            },
-            exc_info=True
-        )
-        raise
+    items: List[Dict[str, Any]] = []
+    async for page in PagedQuery(container, query, parameters, **query_kwargs):
+        items.extend(page)
+    return items
 
 
 def query_metrics_decorator(func):
@@ -0,0 +1,253 @@
+"""
+Token-bucket rate limiting with pluggable state stores.
+
+Each key (client IP, user, or route + caller) owns one bucket holding at most
+``capacity`` tokens that refill continuously at ``refill_per_second``. A request
+spends one token; an empty bucket yields a ``Retry-After`` of the time until the
+next token. State per key is two numbers, so checks are O(1).
+
+Stores:
+
+* ``InMemoryRateLimitStore`` - per process, LRU-bounded to ``max_keys`` buckets
+  so idle clients are forgotten instead of accumulating forever.
+* ``RedisRateLimitStore`` - buckets live in Redis and are updated by one atomic
+  Lua script, so every worker enforces the same limit. Redis errors fail open.
+"""
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    RedisError = Exception
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_KEYS = 10_000
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """Bucket size and refill rate; ``per_minute`` covers the common case."""
+    capacity: int
+    refill_per_second: float
+
+    @classmethod
+    def per_minute(cls, requests: int, burst: Optional[int] = None) -> "RateLimitRule":
+        requests = max(1, int(requests))
+        return cls(capacity=max(1, int(burst or requests)), refill_per_second=requests / 60.0)
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int = 0
+    key: str = ""
+
+    def headers(self) -> Dict[str, str]:
+        headers = {"X-RateLimit-Limit": str(self.limit), "X-RateLimit-Remaining": str(self.remaining)}
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+def _decision(key: str, rule: RateLimitRule, allowed: bool, tokens: float, cost: int) -> RateLimitDecision:
+    retry_after = 0
+    if not allowed:
+        retry_after = max(1, math.ceil((cost - tokens) / rule.refill_per_second))
+    return RateLimitDecision(
+        allowed=allowed,
+        limit=rule.capacity,
+        remaining=max(0, int(tokens)),
+        retry_after=retry_after,
+        key=key,
+    )
+
+
+class BaseRateLimitStore(ABC):
+    """Stores token buckets and applies one consume step atomically."""
+
+    @abstractmethod
+    async def consume(self, key: str, rule: RateLimitRule, cost: int = 1) -> RateLimitDecision:
+        pass
+
+    async def close(self) -> None:
+        return None
+
+
+class InMemoryRateLimitStore(BaseRateLimitStore):
+    """Per-process token buckets, bounded to the ``max_keys`` most recently seen keys."""
+
+    def __init__(self, max_keys: int = DEFAULT_MAX_KEYS, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max(1, int(max_keys))
+        self._clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def consume(self, key: str, rule: RateLimitRule, cost: int = 1) -> RateLimitDecision:
+        now = self._clock()
+        tokens, updated = self._buckets.pop(key, (float(rule.capacity), now))
+        tokens = min(float(rule.capacity), tokens + max(0.0, now - updated) * rule.refill_per_second)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return _decision(key, rule, allowed, tokens, cost)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# KEYS[1] bucket; ARGV capacity, refill/s, now (s), cost. Returns {allowed, tokens}.
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+  tokens = capacity
+  ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimitStore(BaseRateLimitStore):
+    """Token buckets shared by every worker through Redis.
+
+    Buckets expire once they would have refilled completely, so Redis holds
+    state only for recently active keys.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        key_prefix: str = "ratelimit:",
+        client: Any = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("redis package is not installed")
+            client = aioredis.from_url(redis_url, decode_responses=True)
+        self.redis = client
+        self.key_prefix = key_prefix
+        self._clock = clock
+        self._script = client.register_script(_TOKEN_BUCKET_LUA)
+
+    async def consume(self, key: str, rule: RateLimitRule, cost: int = 1) -> RateLimitDecision:
+        try:
+            allowed, tokens = await self._script(
+                keys=[f"{self.key_prefix}{key}"],
+                args=[rule.capacity, rule.refill_per_second, self._clock(), cost],
+            )
+        except RedisError as e:
+            logger.warning(f"Rate limit store unavailable, allowing request: {e}", extra={"rate_limit_key": key})
+            return RateLimitDecision(allowed=True, limit=rule.capacity, remaining=rule.capacity, key=key)
+        return _decision(key, rule, bool(int(allowed)), float(tokens), cost)
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+class RateLimiter:
+    """Apply per-client, per-user and per-route quotas against one store.
+
+    Every request spends a token from its caller bucket: the authenticated user's
+    bucket (``user_rule``) when a user id is known, otherwise the client IP's
+    bucket (``default_rule``). Requests whose path starts with a prefix in
+    ``route_rules`` also spend from that route's bucket for the same caller; the
+    longest matching prefix wins. The request is rejected if any bucket is empty.
+    """
+
+    def __init__(
+        self,
+        store: BaseRateLimitStore,
+        default_rule: RateLimitRule,
+        user_rule: Optional[RateLimitRule] = None,
+        route_rules: Optional[Dict[str, RateLimitRule]] = None,
+    ):
+        self.store = store
+        self.default_rule = default_rule
+        self.user_rule = user_rule or default_rule
+        # Longest prefix first so the most specific route quota applies
+        self.route_rules: List[Tuple[str, RateLimitRule]] = sorted(
+            (route_rules or {}).items(), key=lambda item: len(item[0]), reverse=True
+        )
+
+    def _route_rule(self, path: str) -> Optional[Tuple[str, RateLimitRule]]:
+        for prefix, rule in self.route_rules:
+            if path.startswith(prefix):
+                return prefix, rule
+        return None
+
+    async def check(self, path: str, client_ip: str, user_id: Optional[str] = None) -> RateLimitDecision:
+        caller = f"user:{user_id}" if user_id else f"ip:{client_ip}"
+        decision = await self.store.consume(caller, self.user_rule if user_id else self.default_rule)
+        if not decision.allowed:
+            return decision
+
+        route = self._route_rule(path)
+        if route is not None:
+            prefix, rule = route
+            route_decision = await self.store.consume(f"route:{prefix}:{caller}", rule)
+            if not route_decision.allowed or route_decision.remaining < decision.remaining:
+                return route_decision
+        return decision
+
+    async def close(self) -> None:
+        await self.store.close()
+
+
+def parse_route_quotas(spec: Optional[str]) -> Dict[str, RateLimitRule]:
+    """Parse ``"/api/auth/login=10,/api/upload=5"`` into per-minute route rules."""
+    rules: Dict[str, RateLimitRule] = {}
+    for part in (spec or "").split(","):
+        prefix, sep, limit = part.strip().partition("=")
+        if not sep or not prefix.strip():
+            continue
+        try:
+            rules[prefix.strip()] = RateLimitRule.per_minute(int(limit))
+        except ValueError:
+            logger.warning(f"Ignoring invalid rate limit route quota: {part!r}")
+    return rules
+
+
+def create_rate_limiter(config) -> RateLimiter:
+    """Build a RateLimiter from ``AppConfig`` rate limit settings."""
+    store: BaseRateLimitStore
+    if config.rate_limit_store.lower() == "redis" and config.cache_redis_url and REDIS_AVAILABLE:
+        store = RedisRateLimitStore(redis_url=config.cache_redis_url)
+    else:
+        if config.rate_limit_store.lower() == "redis":
+            logger.warning("Redis rate limit store requested but unavailable, falling back to in-process limits")
+        store = InMemoryRateLimitStore(max_keys=config.rate_limit_max_keys)
+    return RateLimiter(
+        store,
+        default_rule=RateLimitRule.per_minute(config.rate_limit_per_minute),
+        user_rule=RateLimitRule.per_minute(config.rate_limit_user_per_minute),
+        route_rules=parse_route_quotas(config.rate_limit_route_quotas),
+    )
@@ -0,0 +1,188 @@
+"""
+Time-bucketed response cache for expensive read-only endpoints.
+
+Results are keyed by ``(namespace, params, time bucket)``. Within the current
+bucket a cached result is served as-is. Once the bucket rolls over, the previous
+result is still served (marked stale) for up to ``stale_buckets`` buckets while a
+single background task recomputes it. Concurrent requests for the same key share
+one computation (single-flight), and an ETag derived from the payload lets
+clients revalidate with ``If-None-Match``.
+
+Endpoints that read stored documents directly can instead derive the ETag
+from the documents' version markers (Cosmos ``_etag``) with
+``etag_for_versions`` and answer revalidations through ``check_not_modified``
+before doing any enrichment or serialisation.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Any, Awaitable, Callable, Dict, Hashable, Mapping, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, Tuple[Tuple[str, Hashable], ...]]
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    """A cached value plus the metadata needed for HTTP cache headers."""
+    value: Any
+    etag: str
+    bucket: int
+    computed_at: float
+    stale: bool = False
+
+
+def compute_etag(value: Any) -> str:
+    """Return a weak ETag for a JSON-serialisable payload."""
+    encoded = jsonable_encoder(value)
+    try:
+        payload = json.dumps(encoded, sort_keys=True, default=str)
+    except TypeError:
+        # Mixed-type dict keys cannot be sorted; insertion order is still deterministic
+        payload = json.dumps(encoded, default=str)
+    return f'W/"{hashlib.sha1(payload.encode("utf-8")).hexdigest()}"'
+
+
+def etag_for_versions(*versions: Any) -> str:
+    """Return a weak ETag for a response built from documents with the given versions.
+
+    Pass each document's ``_etag`` (plus its id for collections, so deletes
+    change the tag) and anything else the response depends on.
+    """
+    payload = "\x1f".join("" if version is None else str(version) for version in versions)
+    return f'W/"{hashlib.sha1(payload.encode("utf-8")).hexdigest()}"'
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether ``If-None-Match`` lists ``etag`` (weak comparison, as RFC 9110 requires for GET)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or _opaque_tag(etag) in {_opaque_tag(tag) for tag in tags}
+
+
+def check_not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Attach validator headers for ``etag``; return a 304 when the client already has it.
+
+    ``no-cache`` makes clients revalidate on every use, so a stored copy is
+    never served once the underlying documents change.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+class ResponseCache:
+    """In-process stale-while-revalidate cache with single-flight refreshes."""
+
+    def __init__(
+        self,
+        bucket_seconds: int = 60,
+        stale_buckets: int = 1,
+        max_entries: int = 256,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.bucket_seconds = max(1, int(bucket_seconds))
+        self.stale_buckets = max(0, int(stale_buckets))
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, CachedResult]" = OrderedDict()
+        self._inflight: Dict[Tuple[CacheKey, int], "asyncio.Task[CachedResult]"] = {}
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refresh_errors": 0}
+
+    @staticmethod
+    def make_key(namespace: str, params: Optional[Mapping[str, Hashable]] = None) -> CacheKey:
+        return namespace, tuple(sorted((params or {}).items()))
+
+    def current_bucket(self) -> int:
+        return int(self._clock() // self.bucket_seconds)
+
+    def seconds_until_refresh(self) -> int:
+        """Seconds left in the current bucket (used for ``max-age``)."""
+        remaining = self.bucket_seconds - (self._clock() % self.bucket_seconds)
+        return max(0, int(remaining))
+
+    async def get_or_compute(
+        self,
+        namespace: str,
+        params: Optional[Mapping[str, Hashable]],
+        compute: Callable[[], Awaitable[Any]],
+    ) -> CachedResult:
+        """Return the cached result for the current bucket, computing it at most once."""
+        key = self.make_key(namespace, params)
+        bucket = self.current_bucket()
+        entry = self._entries.get(key)
+
+        if entry is not None and entry.bucket == bucket:
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry
+
+        task = self._refresh(key, bucket, compute)
+        if entry is not None and bucket - entry.bucket <= self.stale_buckets:
+            self._stats["stale_hits"] += 1
+            return replace(entry, stale=True)
+
+        self._stats["misses"] += 1
+        # Shield so a client disconnect does not cancel a computation others are awaiting
+        return await asyncio.shield(task)
+
+    def invalidate(self, namespace: Optional[str] = None) -> None:
+        """Drop cached results, optionally only those under ``namespace``."""
+        if namespace is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == namespace]:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "entries": len(self._entries), "inflight": len(self._inflight)}
+
+    def _refresh(self, key: CacheKey, bucket: int, compute: Callable[[], Awaitable[Any]]) -> "asyncio.Task[CachedResult]":
+        flight_key = (key, bucket)
+        task = self._inflight.get(flight_key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute(key, bucket, compute))
+            self._inflight[flight_key] = task
+            task.add_done_callback(lambda t: self._on_refresh_done(flight_key, t))
+        return task
+
+    async def _compute(self, key: CacheKey, bucket: int, compute: Callable[[], Awaitable[Any]]) -> CachedResult:
+        value = await compute()
+        result = CachedResult(value=value, etag=compute_etag(value), bucket=bucket, computed_at=self._clock())
+        current = self._entries.get(key)
+        if current is None or current.bucket <= bucket:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def _on_refresh_done(self, flight_key: Tuple[CacheKey, int], task: "asyncio.Task[CachedResult]") -> None:
+        self._inflight.pop(flight_key, None)
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None:
+            self._stats["refresh_errors"] += 1
+            logger.warning(
+                "Cached response refresh failed",
+                extra={"namespace": flight_key[0][0], "error": str(exc)},
+            )
@@ -1,12 +1,22 @@
-"""Simple helpers for structured startup logging."""
+"""Simple helpers for structured startup logging.
+
+Besides the human-readable log lines, every startup produces a report (start
+time, host, outcome and per-phase timings) that is logged as one JSON line and,
+when a path is given, appended to a JSON-lines file, so slow phases can be
+tracked across deployments.
+"""
 
 from __future__ import annotations
 
+import json
 import logging
+import os
+import socket
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from functools import lru_cache
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 
 @dataclass
@@ -17,6 +27,7 @@ class _PhaseRecord:
     start: float
     end: Optional[float] = None
     description: Optional[str] = None
+    details: Dict[str, Any] = field(default_factory=dict)
 
     @property
     def duration_ms(self) -> float:
@@ -32,10 +43,14 @@ class StartupLogger:
         self._startup_start: Optional[float] = None
         self._phases: Dict[str, _PhaseRecord] = {}
         self._phase_order: list[str] = []
+        self._started_at: Optional[str] = None
+        self.last_report: Optional[Dict[str, Any]] = None
 
     def start_startup(self) -> None:
         """Record the beginning of startup."""
         self._startup_start = time.perf_counter()
+        self._started_at = datetime.now(timezone.utc).isoformat()
+        self.last_report = None
         self._phases.clear()
         self._phase_order.clear()
         self._logger.info("🚀 Starting Sonic Brief API application startup...")
@@ -51,13 +66,15 @@ class StartupLogger:
         if description:
             self._logger.info(f"� {description}")
 
-    def end_phase(self, phase_name: str) -> None:
-        """Mark the completion of a startup phase."""
+    def end_phase(self, phase_name: str, details: Optional[Dict[str, Any]] = None) -> None:
+        """Mark the completion of a startup phase, with optional details for the report."""
         record = self._phases.get(phase_name)
         if record is None or record.end is not None:
             return
 
         record.end = time.perf_counter()
+        if details:
+            record.details.update(details)
         self._logger.info(f"✅ Phase '{phase_name}' completed in {record.duration_ms:.1f}ms")
 
     def log_config_info(self, config: object) -> None:
@@ -71,22 +88,64 @@ class StartupLogger:
         if storage_container:
             self._logger.info(f"  Recordings Container: {storage_container}")
 
-    def finish_startup(self, success: bool = True) -> None:
-        """Emit a final summary once startup has completed."""
+    def report(self, success: bool = True) -> Dict[str, Any]:
+        """Structured summary of the current startup."""
+        phases = []
+        for phase_name in self._phase_order:
+            record = self._phases[phase_name]
+            phase: Dict[str, Any] = {
+                "name": phase_name,
+                "offset_ms": round((record.start - (self._startup_start or record.start)) * 1000, 1),
+                "duration_ms": round(record.duration_ms, 1),
+            }
+            if record.description:
+                phase["description"] = record.description
+            if record.details:
+                phase["details"] = record.details
+            phases.append(phase)
+
+        total_ms = (time.perf_counter() - self._startup_start) * 1000 if self._startup_start is not None else 0.0
+        return {
+            "started_at": self._started_at,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "success": success,
+            "total_ms": round(total_ms, 1),
+            "phases": phases,
+        }
+
+    def finish_startup(self, success: bool = True, report_path: Optional[str] = None) -> None:
+        """Emit a final summary once startup has completed and keep the report."""
         if self._startup_start is None:
             return
 
-        total_time_ms = (time.perf_counter() - self._startup_start) * 1000
+        report = self.report(success)
+        self.last_report = report
         prefix = "🎉" if success else "⚠️"
-        self._logger.info(f"{prefix} Application startup completed in {total_time_ms:.1f}ms")
+        self._logger.info(f"{prefix} Application startup completed in {report['total_ms']:.1f}ms")
 
-        if not self._phase_order:
-            return
+        if self._phase_order:
+            self._logger.info("📈 Startup Summary:")
+            for phase in report["phases"]:
+                self._logger.info(f"  - {phase['name']}: {phase['duration_ms']:.1f}ms")
 
-        self._logger.info("📈 Startup Summary:")
-        for phase_name in self._phase_order:
-            record = self._phases[phase_name]
-            self._logger.info(f"  - {phase_name}: {record.duration_ms:.1f}ms")
+        self._logger.info(f"📊 Startup report: {json.dumps(report, default=str)}")
+        if report_path:
+            self.append_report(report_path, report)
+
+    def append_report(self, path: str, report: Optional[Dict[str, Any]] = None) -> None:
+        """Append a report as one JSON line; failures are logged, never raised."""
+        report = report or self.last_report
+        if report is None:
+            return
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(report, default=str) + "\n")
+        except OSError as e:
+            self._logger.warning(f"Could not write startup report to {path}: {e}")
 
 
 @lru_cache(maxsize=1)
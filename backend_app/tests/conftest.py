@@ -12,6 +12,8 @@ from typing import Dict, Any, Optional
 from datetime import datetime, timezone, timedelta
 import uuid
 
+from azure.cosmos.exceptions import CosmosHttpResponseError
+
 # Set test environment variables before importing app modules
 os.environ["JWT_SECRET_KEY"] = "test-secret-key-for-testing-only"
 os.environ["JWT_ALGORITHM"] = "HS256"
@@ -585,6 +587,9 @@ def mock_analytics_container():
     container = Mock()
     container.create_item = Mock(side_effect=lambda body: body)
     container.query_items = Mock(return_value=[])
+    # No rollup documents exist until a test creates or patches them
+    container.read_item = Mock(side_effect=CosmosHttpResponseError(status_code=404, message="Not found"))
+    container.patch_item = Mock(return_value={})
     return container
 
 
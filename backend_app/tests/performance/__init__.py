@@ -0,0 +1 @@
+"""Performance benchmarks (opt-in, set RUN_BENCHMARKS=1)."""
@@ -0,0 +1,95 @@
+"""
+Performance benchmark fixtures for Sonic Brief backend.
+
+Benchmarks are slow and opt-in: they are skipped unless RUN_BENCHMARKS=1 is set.
+Results are printed (run with ``-s``) so numbers can be compared before/after a
+change; assertions only guard against gross regressions.
+
+    RUN_BENCHMARKS=1 pytest tests/performance -s --no-cov
+"""
+import asyncio
+import os
+import time
+from typing import List
+
+import pytest
+
+
+BENCHMARKS_ENABLED = os.environ.get("RUN_BENCHMARKS", "").lower() in ("1", "true", "yes")
+
+
+def pytest_collection_modifyitems(config, items):
+    skip_benchmark = pytest.mark.skip(reason="benchmarks are opt-in; set RUN_BENCHMARKS=1")
+    for item in items:
+        if "tests/performance" not in str(item.fspath).replace(os.sep, "/"):
+            continue
+        item.add_marker(pytest.mark.slow)
+        if not BENCHMARKS_ENABLED:
+            item.add_marker(skip_benchmark)
+
+
+class LoopLagMonitor:
+    """Measure how long the event loop is blocked while a workload runs.
+
+    A ticker task sleeps for ``interval`` seconds in a loop; any extra delay
+    before it wakes up is time the loop spent blocked by other work.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.lags: List[float] = []
+        self._task = None
+
+    async def _tick(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - start - self.interval))
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._tick())
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    @property
+    def max_lag(self) -> float:
+        return max(self.lags, default=0.0)
+
+    @property
+    def total_lag(self) -> float:
+        return sum(self.lags)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+@pytest.fixture
+def loop_lag_monitor():
+    """Factory for LoopLagMonitor instances."""
+    return LoopLagMonitor
+
+
+@pytest.fixture
+def percentile():
+    """Nearest-rank percentile helper: ``percentile(samples, 99)``."""
+    return _percentile
+
+
+@pytest.fixture
+def perf_timer():
+    """Return a monotonic high-resolution clock for benchmarks."""
+    return time.perf_counter
@@ -0,0 +1,56 @@
+"""
+Benchmark: peak concurrency over one million sessions.
+
+Compares the previous approach (bucket each session's last activity into hour
+buckets of user-id sets, an approximation) with the NumPy sweep line that
+returns the exact peak plus a 24h per-minute series. Session count can be
+overridden with BENCHMARK_SESSIONS.
+"""
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from app.services.analytics.concurrency import concurrency_series, peak_concurrency
+
+
+SESSION_COUNT = int(os.environ.get("BENCHMARK_SESSIONS", "1000000"))
+WINDOW_SECONDS = 30 * 24 * 3600
+
+
+@pytest.fixture(scope="module")
+def session_vectors():
+    rng = np.random.default_rng(42)
+    starts = rng.uniform(0, WINDOW_SECONDS, SESSION_COUNT)
+    ends = starts + rng.exponential(20 * 60, SESSION_COUNT)
+    return starts, ends
+
+
+def _hour_bucket_peak(starts, ends):
+    """The legacy estimate: distinct users per hour of last activity."""
+    buckets = {}
+    for user_id, end in enumerate(ends.tolist()):
+        hour = datetime.fromtimestamp(end, tz=timezone.utc).strftime('%Y-%m-%dT%H:00')
+        buckets.setdefault(hour, set()).add(user_id)
+    return max(len(v) for v in buckets.values())
+
+
+def test_sweep_line_peak_one_million_sessions(session_vectors, perf_timer):
+    starts, ends = session_vectors
+
+    t0 = perf_timer()
+    legacy_peak = _hour_bucket_peak(starts, ends)
+    legacy_seconds = perf_timer() - t0
+
+    t0 = perf_timer()
+    peak, _ = peak_concurrency(starts, ends)
+    series = concurrency_series(starts, ends, WINDOW_SECONDS - 24 * 3600, WINDOW_SECONDS, step_seconds=60)
+    sweep_seconds = perf_timer() - t0
+
+    print(
+        f"\n{SESSION_COUNT:,} sessions: hour buckets {legacy_seconds * 1000:.0f} ms (approx peak {legacy_peak}), "
+        f"sweep line {sweep_seconds * 1000:.0f} ms (exact peak {peak}, {series.size} minute points)"
+    )
+    assert series.size == 1440
+    assert sweep_seconds < 1.0
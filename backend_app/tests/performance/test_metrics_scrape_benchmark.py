@@ -0,0 +1,42 @@
+"""
+Benchmark: cost of a Prometheus scrape of the request metrics registry.
+
+Populates BENCHMARK_METRICS_ROUTES route templates (default 100) with latency
+and RU histograms, then times render_prometheus() both when only a fifth of the
+routes saw traffic since the previous scrape (the common case) and when all of
+them did.
+"""
+import os
+
+from app.utils.metrics import MetricsRegistry, RequestCharge
+
+ROUTE_COUNT = int(os.environ.get("BENCHMARK_METRICS_ROUTES", "100"))
+SCRAPES = 50
+
+
+def _scrape_p50(registry, perf_timer, percentile, active_routes):
+    samples = []
+    for _ in range(SCRAPES):
+        for i in range(active_routes):
+            registry.observe_request("GET", f"/api/route/{i}/{{item_id}}", 200, 0.02, RequestCharge(5.0, 2))
+        t0 = perf_timer()
+        registry.render_prometheus()
+        samples.append(perf_timer() - t0)
+    return percentile(samples, 50)
+
+
+def test_scrape_cost(perf_timer, percentile):
+    registry = MetricsRegistry()
+    for i in range(ROUTE_COUNT):
+        for status in (200, 404):
+            registry.observe_request("GET", f"/api/route/{i}/{{item_id}}", status, 0.01 * i, RequestCharge(5.0, 2))
+    lines = registry.render_prometheus().count("\n")
+
+    partial = _scrape_p50(registry, perf_timer, percentile, ROUTE_COUNT // 5)
+    full = _scrape_p50(registry, perf_timer, percentile, ROUTE_COUNT)
+
+    print(
+        f"\n{ROUTE_COUNT} routes, {lines} lines: scrape p50 {partial * 1000:.2f} ms with a fifth of routes active, "
+        f"{full * 1000:.2f} ms with all active"
+    )
+    assert partial < 0.001
@@ -0,0 +1,216 @@
+"""
+Benchmark: BaseHTTPMiddleware stack vs raw ASGI middlewares.
+
+Runs the same app behind the previous BaseHTTPMiddleware versions of
+SecureResponseMiddleware, SecurityMiddleware and SessionTrackingMiddleware
+(reproduced below) and behind the current ASGI versions. Reports requests per
+second for a small JSON endpoint (authenticated and unauthenticated) and the
+time to first byte of a streaming response. Request count can be overridden
+with BENCHMARK_MIDDLEWARE_REQUESTS.
+"""
+import asyncio
+import os
+import time
+from unittest.mock import AsyncMock, Mock
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware.security_middleware import SecureResponseMiddleware, SecurityMiddleware
+from app.middleware.session_tracking_middleware import SessionTrackingMiddleware
+from app.utils.rate_limiter import InMemoryRateLimitStore, RateLimiter, RateLimitRule
+
+REQUEST_COUNT = int(os.environ.get("BENCHMARK_MIDDLEWARE_REQUESTS", "3000"))
+STREAM_CHUNKS = 5
+STREAM_CHUNK_DELAY = 0.02
+STREAM_SAMPLES = 20
+
+
+class LegacySecurityMiddleware(BaseHTTPMiddleware):
+    """The previous dispatch(): checks, call_next, then header updates on the wrapped response."""
+
+    def __init__(self, app, security: SecurityMiddleware):
+        super().__init__(app)
+        self.security = security
+
+    async def dispatch(self, request, call_next):
+        rejection, rate_limit = await self.security._validate_request(request)
+        if rejection is not None:
+            return rejection
+        response = await call_next(request)
+        response.headers.update(self.security.security_headers)
+        response.headers.update(rate_limit.headers())
+        return response
+
+
+class LegacySecureResponseMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        try:
+            return await call_next(request)
+        except Exception:
+            return JSONResponse(status_code=500, content={"error": "Internal server error"})
+
+
+class LegacySessionTrackingMiddleware(BaseHTTPMiddleware):
+    """The previous dispatch(): auth extraction on every request, tracking, call_next."""
+
+    def __init__(self, app, session_service, audit_service, auth_service):
+        super().__init__(app)
+        self.session_service = session_service
+        self.audit_service = audit_service
+        self.auth_service = auth_service
+
+    async def dispatch(self, request, call_next):
+        user_info = await self.auth_service.extract_user_from_request(request)
+        if user_info:
+            await self.session_service.get_or_create_session(
+                user_id=user_info["id"],
+                user_email=None,
+                request_path=request.url.path,
+                user_agent=self.auth_service.extract_user_agent(request),
+                ip_address=self.auth_service.extract_ip_address(request),
+                timestamp=None,
+            )
+        return await call_next(request)
+
+
+def _services():
+    async def extract_user(request: Request):
+        auth = request.headers.get("Authorization")
+        return {"id": "user-1"} if auth and auth.startswith("Bearer ") else None
+
+    auth_service = Mock()
+    auth_service.extract_user_from_request = extract_user
+    auth_service.extract_ip_address = Mock(return_value="10.0.0.1")
+    auth_service.extract_user_agent = Mock(return_value="bench")
+    session_service = Mock()
+    session_service.get_or_create_session = AsyncMock(return_value="session-1")
+    audit_service = Mock()
+    audit_service.is_audit_endpoint = Mock(return_value=False)
+    return {"session_service": session_service, "audit_service": audit_service, "auth_service": auth_service}
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/items")
+    async def items():
+        return {"ok": True}
+
+    @app.get("/api/stream")
+    async def stream():
+        async def body():
+            for _ in range(STREAM_CHUNKS):
+                yield b"x" * 1024
+                await asyncio.sleep(STREAM_CHUNK_DELAY)
+
+        return StreamingResponse(body(), media_type="text/plain")
+
+    return app
+
+
+def _unlimited_security(app) -> SecurityMiddleware:
+    limiter = RateLimiter(InMemoryRateLimitStore(), default_rule=RateLimitRule.per_minute(10_000_000))
+    return SecurityMiddleware(app, rate_limiter=limiter)
+
+
+def _legacy_stack():
+    app = _app()
+    session = LegacySessionTrackingMiddleware(app, **_services())
+    security = LegacySecurityMiddleware(session, _unlimited_security(session))
+    return LegacySecureResponseMiddleware(security)
+
+
+def _asgi_stack():
+    app = _app()
+    session = SessionTrackingMiddleware(app, **_services())
+    security = _unlimited_security(session)
+    return SecureResponseMiddleware(security)
+
+
+async def _request(asgi, path, headers=()):
+    """One request through ``asgi``; returns (status, seconds to first body byte)."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": list(headers),
+        "client": ("10.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+    request_sent = False
+    done = asyncio.Event()
+    status = None
+    first_byte = None
+    started = time.perf_counter()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, first_byte
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message.get("body") and first_byte is None:
+            first_byte = time.perf_counter() - started
+
+    await asyncio.wait_for(asgi(scope, receive, send), timeout=10)
+    done.set()
+    return status, first_byte
+
+
+async def _requests_per_second(asgi, headers) -> float:
+    started = time.perf_counter()
+    for _ in range(REQUEST_COUNT):
+        status, _ = await _request(asgi, "/api/items", headers)
+        assert status == 200
+    return REQUEST_COUNT / (time.perf_counter() - started)
+
+
+async def _stream_ttfb(asgi, percentile) -> float:
+    samples = []
+    for _ in range(STREAM_SAMPLES):
+        _, first_byte = await _request(asgi, "/api/stream")
+        samples.append(first_byte)
+    return percentile(samples, 50)
+
+
+async def test_asgi_middlewares_vs_base_http_middleware(percentile, monkeypatch):
+    # Rate limiting keys on the token subject; skip real JWT verification
+    monkeypatch.setattr("app.middleware.security_middleware.decode_token", lambda token: {"sub": "user-1"})
+    bearer = [(b"authorization", b"Bearer token")]
+    results = {}
+    for name, build in (("BaseHTTPMiddleware", _legacy_stack), ("raw ASGI", _asgi_stack)):
+        asgi = build()
+        await _requests_per_second(asgi, bearer)  # warm up
+        results[name] = {
+            "anonymous_rps": await _requests_per_second(asgi, []),
+            "authenticated_rps": await _requests_per_second(asgi, bearer),
+            "stream_ttfb_ms": await _stream_ttfb(asgi, percentile) * 1000,
+        }
+
+    print(f"\n{REQUEST_COUNT} requests per scenario, three middlewares:")
+    for name, result in results.items():
+        print(
+            f"  {name:<19} anonymous {result['anonymous_rps']:>7.0f} req/s, "
+            f"authenticated {result['authenticated_rps']:>7.0f} req/s, "
+            f"stream TTFB p50 {result['stream_ttfb_ms']:.2f} ms"
+        )
+
+    legacy, asgi = results["BaseHTTPMiddleware"], results["raw ASGI"]
+    assert asgi["anonymous_rps"] > legacy["anonymous_rps"]
+    assert asgi["authenticated_rps"] > legacy["authenticated_rps"]
+    # The first chunk is sent before the stream's first sleep completes
+    assert asgi["stream_ttfb_ms"] < STREAM_CHUNK_DELAY * 1000
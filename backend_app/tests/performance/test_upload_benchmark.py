@@ -0,0 +1,110 @@
+"""
+Benchmark: POST /jobs upload path.
+
+Compares the legacy path (copy UploadFile to a temp dir, then a synchronous
+single-shot upload that re-reads the file inside the async handler) with the
+streaming path (UploadFile chunks piped into concurrently staged blob blocks).
+
+Blob storage is simulated with a fixed per-block latency so the numbers reflect
+the API process, not the network. Default size is 500 MB; override with
+BENCHMARK_UPLOAD_MB.
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+
+import pytest
+from starlette.datastructures import UploadFile
+
+from app.routers.jobs.jobs_router import _iter_upload_chunks
+from app.services.storage.blob_service import StorageService, UPLOAD_BLOCK_SIZE
+
+
+UPLOAD_MB = int(os.environ.get("BENCHMARK_UPLOAD_MB", "500"))
+# Simulated service time for staging one 4 MB block
+BLOCK_LATENCY_SECONDS = 0.02
+
+
+@pytest.fixture
+def upload_source():
+    """A spooled upload of UPLOAD_MB megabytes, rolled to disk like Starlette's."""
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    block = os.urandom(1024 * 1024)
+    for _ in range(UPLOAD_MB):
+        spooled.write(block)
+    spooled.seek(0)
+    yield spooled
+    spooled.close()
+
+
+@pytest.fixture
+def storage_service():
+    config = Mock()
+    config.azure_storage_account_url = "https://teststorage.blob.core.windows.net"
+    config.azure_storage_key = "test-storage-key-base64encoded=="
+    config.azure_storage_recordings_container = "recordings"
+    return StorageService(config)
+
+
+def _legacy_upload(upload_file, filename: str) -> None:
+    """Legacy create_job body: temp copy, then sync upload_blob re-reading the file."""
+    tmp_dir = tempfile.mkdtemp(prefix="sonic_upload_")
+    tmp_path = os.path.join(tmp_dir, filename)
+    try:
+        with open(tmp_path, "wb") as out_file:
+            shutil.copyfileobj(upload_file, out_file)
+        with open(tmp_path, "rb") as data:
+            while True:
+                block = data.read(UPLOAD_BLOCK_SIZE)
+                if not block:
+                    break
+                # upload_blob blocks the calling thread for every block it sends
+                time.sleep(BLOCK_LATENCY_SECONDS)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+@pytest.mark.asyncio
+async def test_upload_throughput_and_loop_blocking(upload_source, storage_service, loop_lag_monitor, perf_timer, percentile):
+    size_bytes = UPLOAD_MB * 1024 * 1024
+    size_mb = float(UPLOAD_MB)
+
+    async with loop_lag_monitor() as legacy_lag:
+        start = perf_timer()
+        # Legacy handler ran this inline on the event loop
+        _legacy_upload(upload_source, "upload.mp3")
+        await asyncio.sleep(0.01)
+        legacy_seconds = perf_timer() - start
+
+    async def stage_block(block_id, data, length):
+        await asyncio.sleep(BLOCK_LATENCY_SECONDS)
+
+    client = MagicMock()
+    client.url = "https://teststorage.blob.core.windows.net/recordings/upload.mp3"
+    client.stage_block = AsyncMock(side_effect=stage_block)
+    client.commit_block_list = AsyncMock()
+    client.__aenter__ = AsyncMock(return_value=client)
+    client.__aexit__ = AsyncMock(return_value=None)
+
+    upload_source.seek(0)
+    with patch("app.services.storage.blob_service.AsyncBlobClient", return_value=client):
+        upload = UploadFile(upload_source, filename="upload.mp3")
+        async with loop_lag_monitor() as streaming_lag:
+            start = perf_timer()
+            result = await storage_service.upload_stream(_iter_upload_chunks(upload), "upload.mp3")
+            streaming_seconds = perf_timer() - start
+
+    print(
+        f"\n[upload {size_mb:.0f} MB] legacy: {size_mb / legacy_seconds:.0f} MB/s, "
+        f"max loop block {legacy_lag.max_lag * 1000:.0f} ms | "
+        f"streaming: {size_mb / streaming_seconds:.0f} MB/s, "
+        f"max loop block {streaming_lag.max_lag * 1000:.1f} ms "
+        f"(p99 {percentile(streaming_lag.lags, 99) * 1000:.1f} ms)"
+    )
+
+    assert result["size_bytes"] == size_bytes
+    assert streaming_seconds < legacy_seconds
+    assert streaming_lag.max_lag < legacy_lag.max_lag
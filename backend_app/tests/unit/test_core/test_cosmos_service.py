@@ -196,6 +196,24 @@ class TestCosmosJobQueries:
             # Service returns None on error
             assert result is None
 
+    def test_read_job_uses_a_point_read(self, test_config, mock_cosmos_container, job_factory):
+        """Test read_job reads by id and partition key and rejects other document types."""
+        mock_cosmos_container.read_item.return_value = job_factory(job_id="job-1")
+        
+        with patch('app.core.dependencies.CosmosClient'):
+            service = CosmosService(test_config)
+            service._containers = {"jobs": mock_cosmos_container}
+            service._is_available = True
+            
+            assert service.read_job("job-1")["id"] == "job-1"
+            mock_cosmos_container.read_item.assert_called_with(item="job-1", partition_key="job-1")
+            
+            mock_cosmos_container.read_item.return_value = {"id": "job-1", "type": "refinement"}
+            assert service.read_job("job-1") is None
+            
+            mock_cosmos_container.read_item.side_effect = CosmosResourceNotFoundError(status_code=404, message="Not found")
+            assert service.read_job("missing") is None
+
 
 # ============================================================================
 # Job Creation Tests (Create Operations)
@@ -0,0 +1,124 @@
+"""
+Unit tests for the shared outbound HTTP client.
+
+Tests cover the per-host request limit (including streamed responses holding
+their slot until closed), client reuse and shutdown, streaming timeouts and
+time-to-first-token measurement on refinement streams.
+"""
+
+from unittest.mock import Mock, patch
+
+import httpx
+import pytest
+
+from app.core import http_client
+from app.core.http_client import HostLimitedTransport, stream_timeout
+
+
+class StreamedBody(httpx.AsyncByteStream):
+    """A body the transport has not read yet, like a real network response."""
+
+    async def __aiter__(self):
+        yield b"ok"
+
+
+def _streamed(request):
+    return httpx.Response(200, stream=StreamedBody())
+
+
+def _client(handler, max_per_host=1):
+    transport = HostLimitedTransport(httpx.MockTransport(handler), max_per_host)
+    return httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(5.0, pool=0.05)), transport
+
+
+@pytest.fixture(autouse=True)
+def no_shared_client():
+    http_client._client = None
+    yield
+    http_client._client = None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestHostLimitedTransport:
+    """Test per-host connection slots"""
+
+    async def test_requests_beyond_the_host_limit_wait_for_a_slot(self):
+        client, transport = _client(_streamed)
+
+        async with client.stream("GET", "https://func.example.net/a") as held:
+            assert transport.in_flight() == {"func.example.net": 1}
+            with pytest.raises(httpx.PoolTimeout):
+                await client.get("https://func.example.net/b")
+            # Other hosts have their own slots
+            assert (await client.get("https://openai.example.net/c")).text == "ok"
+            await held.aread()
+
+        assert (await client.get("https://func.example.net/b")).text == "ok"
+        assert transport.in_flight()["func.example.net"] == 0
+        await client.aclose()
+
+    async def test_failed_requests_release_their_slot(self):
+        def fail(request):
+            raise httpx.ConnectError("refused", request=request)
+
+        client, transport = _client(fail)
+
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                await client.get("https://func.example.net/a")
+
+        assert transport.in_flight()["func.example.net"] == 0
+        await client.aclose()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestSharedClient:
+    """Test the process-wide client"""
+
+    async def test_client_is_reused_until_shutdown(self):
+        client = http_client.get_client()
+
+        assert http_client.get_client() is client
+        assert isinstance(client._transport, HostLimitedTransport)
+
+        await http_client.shutdown()
+
+        assert client.is_closed
+        assert http_client.get_client() is not client
+        await http_client.shutdown()
+
+    async def test_stream_timeout_allows_long_gaps_between_chunks(self):
+        with patch.object(http_client, "_settings", return_value=dict(http_client.DEFAULT_SETTINGS)):
+            timeout = stream_timeout()
+
+        assert timeout.read == 120.0
+        assert timeout.connect == 5.0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_refinement_stream_records_time_to_first_token():
+    from app.services.jobs.analysis_refinement_service import AnalysisRefinementService
+    from app.utils.circuit_breaker import CircuitBreakerRegistry
+    from app.utils.metrics import MetricsRegistry
+
+    body = b'data: {"choices":[{"delta":{"content":"Hi"}}]}\n\ndata: [DONE]\n\n'
+    stream_client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body)))
+    config = Mock()
+    config.azure = Mock(openai_endpoint="https://openai.example.net", openai_key="k", openai_deployment_name="gpt")
+    metrics = MetricsRegistry()
+
+    with patch("app.services.jobs.analysis_refinement_service.get_config", return_value=config):
+        service = AnalysisRefinementService(Mock())
+    service.circuit_breakers = CircuitBreakerRegistry()
+
+    with patch("app.services.jobs.analysis_refinement_service.get_client", return_value=stream_client), patch(
+        "app.services.jobs.analysis_refinement_service.get_metrics_registry", return_value=metrics
+    ), patch("app.services.jobs.analysis_refinement_service.stream_timeout", return_value=httpx.Timeout(5.0)):
+        chunks = [chunk async for chunk in service.stream_model_provider({"user_request": "hello"})]
+
+    assert chunks == ['data: {"choices":[{"delta":{"content":"Hi"}}]}', "data: [DONE]"]
+    assert 'upstream_time_to_first_token_seconds_count{upstream="azure_openai"} 1' in metrics.render_prometheus()
+    await stream_client.aclose()
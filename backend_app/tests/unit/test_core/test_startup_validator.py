@@ -0,0 +1,152 @@
+"""
+Unit tests for startup validation and readiness.
+
+Tests cover running checks concurrently under a per-check timeout, the split
+between critical checks and deferred ones, and the readiness state reported
+to the probes.
+"""
+
+import asyncio
+import time
+from unittest.mock import Mock
+
+import pytest
+from azure.cosmos.exceptions import CosmosHttpResponseError
+
+from app.core.health import Readiness, StartupValidationError, StartupValidator
+from app.core.health.startup_validator import ValidationCheck, ValidationLevel
+
+
+def _config(**overrides):
+    config = Mock()
+    config.cosmos_key = "key"
+    config.cosmos_database = "voice"
+    config.jwt_secret_key = "secret"
+    config.azure_storage_account_url = "https://teststorage.blob.core.windows.net"
+    config.azure_storage_recordings_container = "recordings"
+    config.startup_check_timeout_seconds = 5.0
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    return config
+
+
+def _sleeper(seconds):
+    async def check():
+        await asyncio.sleep(seconds)
+        return None
+    return check
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestStartupValidator:
+    """Test concurrent, timeout-bounded validation"""
+
+    async def test_checks_run_concurrently(self):
+        validator = StartupValidator(Mock(), _config())
+        validator.checks = lambda: [ValidationCheck(f"check-{i}", _sleeper(0.2)) for i in range(4)]
+
+        start = time.perf_counter()
+        result = await validator.validate_all(fail_fast=False)
+
+        assert time.perf_counter() - start < 0.6
+        assert result.validations_passed == 4
+        assert set(result.check_durations_ms) == {f"check-{i}" for i in range(4)}
+
+    async def test_slow_critical_check_times_out_and_fails_startup(self):
+        validator = StartupValidator(Mock(), _config(), check_timeout=0.05)
+        validator.checks = lambda: [ValidationCheck("Fast", _sleeper(0)), ValidationCheck("Slow", _sleeper(5))]
+
+        with pytest.raises(StartupValidationError) as exc_info:
+            await validator.validate_all(fail_fast=True)
+
+        errors = exc_info.value.result.errors
+        assert [e.component for e in errors] == ["Slow"]
+        assert "timed out" in errors[0].message
+        assert exc_info.value.result.validations_passed == 1
+
+    async def test_non_critical_failures_are_warnings(self):
+        validator = StartupValidator(Mock(), _config(), check_timeout=0.05)
+        validator.checks = lambda: [ValidationCheck("Slow", _sleeper(5), critical=False)]
+
+        result = await validator.validate_all(fail_fast=True, critical=False)
+
+        assert result.is_healthy
+        assert [w.level for w in result.warnings] == [ValidationLevel.WARNING]
+
+    async def test_blob_storage_is_deferred(self):
+        cosmos = Mock()
+        storage = Mock()
+        storage.blob_service_client.get_container_client.return_value.exists.return_value = False
+        validator = StartupValidator(cosmos, _config(), storage_service=storage)
+
+        startup = await validator.validate_all(fail_fast=True, critical=True)
+        deferred = await validator.validate_all(fail_fast=False, critical=False)
+
+        assert "Blob Storage" not in startup.check_durations_ms
+        assert list(deferred.check_durations_ms) == ["Blob Storage"]
+        assert "not found" in deferred.warnings[0].message
+        storage.blob_service_client.get_container_client.assert_called_once_with("recordings")
+
+    async def test_missing_containers_are_reported_together(self):
+        cosmos = Mock()
+
+        def container(name):
+            client = Mock()
+            if name in ("analytics", "audit_logs"):
+                client.read.side_effect = CosmosHttpResponseError(status_code=404, message="missing")
+            return client
+
+        cosmos.get_container.side_effect = container
+        validator = StartupValidator(cosmos, _config())
+
+        error = await validator._validate_cosmos_containers()
+
+        assert error.details["missing_containers"] == ["analytics", "audit_logs"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestReadiness:
+    """Test the state behind the /ready probe"""
+
+    async def test_ready_after_startup_until_stopping(self):
+        readiness = Readiness()
+        assert readiness.snapshot()["status"] == "starting"
+
+        readiness.mark_ready(startup_report={"total_ms": 12.0})
+        snapshot = readiness.snapshot()
+        assert readiness.ready and snapshot["status"] == "ready"
+        details = readiness.details()
+        assert details["deferred_checks"] == "pending"
+        assert details["startup"] == {"total_ms": 12.0}
+
+        readiness.mark_stopping()
+        assert not readiness.ready and readiness.snapshot()["status"] == "stopping"
+
+    async def test_deferred_results_do_not_change_readiness(self):
+        readiness = Readiness()
+        readiness.mark_ready()
+        validator = StartupValidator(Mock(), _config(azure_storage_account_url=None))
+
+        result = await readiness.run_deferred_checks(validator)
+
+        assert result.warnings and readiness.ready
+        assert readiness.details()["deferred_checks"]["checks"]["warnings"] == 1
+
+    async def test_snapshot_only_exposes_state_and_counts(self):
+        readiness = Readiness()
+        validator = StartupValidator(Mock(), _config(), check_timeout=0.05)
+        validator.checks = lambda: [
+            ValidationCheck("Fast", _sleeper(0)),
+            ValidationCheck("Slow", _sleeper(5), critical=False),
+        ]
+        readiness.mark_ready(
+            await validator.validate_all(fail_fast=False, critical=True), startup_report={"host": "worker-1"}
+        )
+        await readiness.run_deferred_checks(validator)
+
+        snapshot = readiness.snapshot()
+
+        assert set(snapshot) == {"status", "ready_since", "checks"}
+        assert snapshot["checks"] == {"passed": 1, "failed": 1}
@@ -0,0 +1,236 @@
+"""
+Unit tests for the raw ASGI middlewares.
+
+Tests cover streaming passthrough (no body buffering), security headers on the
+response start message, early rejections, probe/unauthenticated short-circuits
+in session tracking, audit completion status, and the generic 500 handler.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware.security_middleware import SecureResponseMiddleware, SecurityMiddleware
+from app.middleware.session_tracking_middleware import SessionTrackingMiddleware
+
+AUTH = {"Authorization": "Bearer token"}
+
+
+async def _call(app, path="/stream", headers=None, first_chunk_sent=None):
+    """Drive ``app`` directly and return the messages it sends."""
+    messages = []
+    first_chunk_sent = first_chunk_sent or asyncio.Event()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("10.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # The client stays connected until the test finishes
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+        if message["type"] == "http.response.body" and message.get("body"):
+            first_chunk_sent.set()
+
+    await asyncio.wait_for(app(scope, receive, send), timeout=2)
+    return messages
+
+
+def _streaming_app(first_chunk_sent=None):
+    app = FastAPI()
+
+    @app.get("/stream")
+    async def stream():
+        async def body():
+            yield b"first"
+            # Only continues once the first chunk reached the client
+            if first_chunk_sent is not None:
+                await first_chunk_sent.wait()
+            yield b"second"
+
+        return StreamingResponse(body(), media_type="text/plain")
+
+    return app
+
+
+def _session_middleware(app, user=None, audited=False):
+    auth_service = Mock()
+    auth_service.extract_user_from_request = AsyncMock(return_value=user)
+    auth_service.extract_ip_address = Mock(return_value="10.0.0.1")
+    auth_service.extract_user_agent = Mock(return_value="pytest")
+    session_service = Mock()
+    session_service.get_or_create_session = AsyncMock(return_value="session-1")
+    audit_service = Mock()
+    audit_service.is_audit_endpoint = Mock(return_value=audited)
+    audit_service.determine_audit_event_type = Mock(return_value="data_access")
+    audit_service.create_audit_log = AsyncMock()
+    audit_service.log_audit_completion = AsyncMock()
+    middleware = SessionTrackingMiddleware(
+        app, session_service=session_service, audit_service=audit_service, auth_service=auth_service
+    )
+    return middleware, session_service, audit_service, auth_service
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestStreamingPassthrough:
+    """Test that no middleware waits for the full body"""
+
+    async def test_security_middleware_streams_and_adds_headers(self):
+        first_chunk_sent = asyncio.Event()
+        app = _streaming_app(first_chunk_sent)
+        middleware = SecurityMiddleware(app)
+
+        messages = await _call(middleware, first_chunk_sent=first_chunk_sent)
+
+        start = messages[0]
+        headers = dict(start["headers"])
+        assert headers[b"x-frame-options"] == b"DENY"
+        assert b"x-ratelimit-remaining" in headers
+        assert [m.get("body") for m in messages[1:] if m.get("body")] == [b"first", b"second"]
+
+    async def test_session_tracking_streams_audited_endpoint(self):
+        first_chunk_sent = asyncio.Event()
+        app = _streaming_app(first_chunk_sent)
+        middleware, _, audit_service, _ = _session_middleware(app, user={"id": "user-1"}, audited=True)
+
+        await _call(middleware, headers=AUTH, first_chunk_sent=first_chunk_sent)
+
+        assert audit_service.log_audit_completion.await_args.kwargs["status_code"] == 200
+
+    async def test_secure_response_middleware_streams(self):
+        first_chunk_sent = asyncio.Event()
+        app = _streaming_app(first_chunk_sent)
+        middleware = SecureResponseMiddleware(app)
+
+        messages = await _call(middleware, first_chunk_sent=first_chunk_sent)
+
+        assert messages[0]["status"] == 200
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestSessionTrackingMiddleware:
+    """Test the short-circuits and tracking calls"""
+
+    async def test_skips_unauthenticated_requests(self):
+        app = _streaming_app()
+        middleware, session_service, _, auth_service = _session_middleware(app, user={"id": "user-1"})
+
+        await _call(middleware)
+
+        auth_service.extract_user_from_request.assert_not_called()
+        session_service.get_or_create_session.assert_not_called()
+
+    async def test_skips_probe_paths(self):
+        app = FastAPI()
+
+        @app.get("/api/system/health")
+        async def health():
+            return {"status": "ok"}
+
+        middleware, session_service, _, auth_service = _session_middleware(app, user={"id": "user-1"})
+
+        await _call(middleware, path="/api/system/health", headers=AUTH)
+
+        auth_service.extract_user_from_request.assert_not_called()
+        session_service.get_or_create_session.assert_not_called()
+
+    async def test_tracks_authenticated_requests(self):
+        app = _streaming_app()
+        middleware, session_service, audit_service, _ = _session_middleware(app, user={"id": "user-1"})
+
+        await _call(middleware, headers=AUTH)
+
+        assert session_service.get_or_create_session.await_args.kwargs["request_path"] == "/stream"
+        audit_service.log_audit_completion.assert_not_called()
+
+    async def test_tracking_errors_do_not_break_request(self):
+        app = _streaming_app()
+        middleware, session_service, _, _ = _session_middleware(app, user={"id": "user-1"})
+        session_service.get_or_create_session.side_effect = RuntimeError("cosmos down")
+
+        messages = await _call(middleware, headers=AUTH)
+
+        assert messages[0]["status"] == 200
+
+
+@pytest.mark.unit
+class TestSecurityMiddleware:
+    """Test early rejections"""
+
+    @pytest.fixture
+    def client(self):
+        app = FastAPI()
+
+        @app.get("/items")
+        async def items():
+            return {"ok": True}
+
+        @app.get("/api/system/health")
+        async def health():
+            return {"status": "ok"}
+
+        app.add_middleware(SecurityMiddleware, max_requests_per_minute=2, max_upload_size=10)
+        return TestClient(app)
+
+    def test_rejects_dangerous_query_params(self, client):
+        response = client.get("/items", params={"q": "<script>alert(1)</script>"})
+
+        assert response.status_code == 400
+        assert response.json()["parameter"] == "q"
+
+    def test_rejects_oversized_bodies(self, client):
+        response = client.request("GET", "/items", content=b"x" * 11)
+
+        assert response.status_code == 413
+
+    def test_probe_paths_are_not_rate_limited(self, client):
+        responses = [client.get("/api/system/health") for _ in range(3)]
+
+        assert [r.status_code for r in responses] == [200, 200, 200]
+        assert "X-RateLimit-Remaining" not in responses[0].headers
+        assert responses[0].headers["X-Content-Type-Options"] == "nosniff"
+
+
+@pytest.mark.unit
+class TestSecureResponseMiddleware:
+    """Test the generic 500"""
+
+    def test_hides_exception_details(self):
+        app = FastAPI()
+
+        @app.get("/boom")
+        async def boom():
+            raise RuntimeError("secret detail")
+
+        app.add_middleware(SecureResponseMiddleware)
+        client = TestClient(app, raise_server_exceptions=False)
+
+        response = client.get("/boom", headers={"x-request-id": "req-1"})
+
+        assert response.status_code == 500
+        assert response.json()["request_id"] == "req-1"
+        assert "secret" not in response.text
@@ -0,0 +1,92 @@
+"""
+Unit tests for the session concurrency sweep line.
+
+Tests cover interval extraction/clipping from session documents, the exact
+peak (including back-to-back sessions), and the per-minute series.
+"""
+
+from datetime import datetime, timezone, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.analytics.concurrency import concurrency_series, peak_concurrency, session_intervals
+
+
+WINDOW_START = datetime(2025, 10, 1, tzinfo=timezone.utc)
+WINDOW_END = WINDOW_START + timedelta(days=1)
+
+
+def _iso(minutes: float) -> str:
+    return (WINDOW_START + timedelta(minutes=minutes)).isoformat()
+
+
+@pytest.mark.unit
+class TestSessionIntervals:
+    """Test building start/end vectors from session documents"""
+
+    def test_uses_created_and_last_activity(self):
+        starts, ends = session_intervals(
+            [{"created_at": _iso(10), "last_activity": _iso(20)}], WINDOW_START, WINDOW_END
+        )
+        assert starts.tolist() == [WINDOW_START.timestamp() + 600]
+        assert ends.tolist() == [WINDOW_START.timestamp() + 1200]
+
+    def test_prefers_ended_at_and_clips_to_window(self):
+        sessions = [
+            {"created_at": (WINDOW_START - timedelta(hours=2)).isoformat(), "last_activity": _iso(90), "ended_at": _iso(30)},
+        ]
+        starts, ends = session_intervals(sessions, WINDOW_START, WINDOW_END)
+        assert starts.tolist() == [WINDOW_START.timestamp()]
+        assert ends.tolist() == [WINDOW_START.timestamp() + 1800]
+
+    def test_skips_unparseable_and_out_of_window(self):
+        sessions = [
+            {"created_at": "not-a-date"},
+            {"created_at": (WINDOW_START - timedelta(days=3)).isoformat(), "last_activity": (WINDOW_START - timedelta(days=2)).isoformat()},
+            {"last_heartbeat": _iso(5)},
+        ]
+        starts, ends = session_intervals(sessions, WINDOW_START, WINDOW_END)
+        assert starts.size == 1
+        assert ends[0] > starts[0]
+
+
+@pytest.mark.unit
+class TestPeakConcurrency:
+    """Test exact peak computation"""
+
+    def test_empty(self):
+        assert peak_concurrency(np.array([]), np.array([])) == (0, None)
+
+    def test_overlapping_sessions(self):
+        starts = np.array([0.0, 10.0, 20.0, 100.0])
+        ends = np.array([50.0, 30.0, 60.0, 110.0])
+        peak, at = peak_concurrency(starts, ends)
+        assert peak == 3
+        assert at == 20.0
+
+    def test_back_to_back_sessions_do_not_overlap(self):
+        starts = np.array([0.0, 10.0, 20.0])
+        ends = np.array([10.0, 20.0, 30.0])
+        assert peak_concurrency(starts, ends)[0] == 1
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(7)
+        starts = rng.uniform(0, 1_000, 300)
+        ends = starts + rng.uniform(1, 100, 300)
+        expected = max(int(np.sum((starts <= t) & (ends > t))) for t in starts)
+        assert peak_concurrency(starts, ends)[0] == expected
+
+
+@pytest.mark.unit
+class TestConcurrencySeries:
+    """Test the per-minute series"""
+
+    def test_counts_sessions_overlapping_each_minute(self):
+        starts = np.array([0.0, 30.0, 150.0])
+        ends = np.array([90.0, 60.0, 170.0])
+        series = concurrency_series(starts, ends, 0.0, 240.0, step_seconds=60)
+        assert series.tolist() == [2, 1, 1, 0]
+
+    def test_empty_range(self):
+        assert concurrency_series(np.array([1.0]), np.array([2.0]), 10.0, 10.0).size == 0
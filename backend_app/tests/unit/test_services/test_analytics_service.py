@@ -19,9 +19,22 @@ from datetime import datetime, timezone, timedelta
 from azure.cosmos.exceptions import CosmosHttpResponseError, CosmosResourceNotFoundError
 
 from app.services.analytics.analytics_service import AnalyticsService
+from app.services.analytics.rollup_service import ROLLUP_DAY_TYPE, ROLLUP_USER_TYPE, rollup_day_key
 from app.core.dependencies import CosmosService
 
 
+def _route_queries(raw_docs=None, day_rollups=None, active_user_count=None):
+    """Build a query_items side effect that answers rollup and raw queries separately."""
+    def _query_items(query=None, parameters=None, **kwargs):
+        types = {p["value"] for p in (parameters or []) if p["name"] == "@type"}
+        if ROLLUP_DAY_TYPE in types:
+            return list(day_rollups or [])
+        if ROLLUP_USER_TYPE in types:
+            return [] if active_user_count is None else [active_user_count]
+        return list(raw_docs or [])
+    return _query_items
+
+
 # ============================================================================
 # Test Class: Event Tracking
 # ============================================================================
@@ -305,6 +318,83 @@ class TestJobEventTracking:
         assert event_id != ""
         mock_events_container.create_item.assert_called_once()
 
+    async def test_track_job_event_increments_rollups(self, mock_cosmos_service, mock_events_container, mock_analytics_container):
+        """Test job creation patches the day and user rollups"""
+        # Arrange
+        mock_cosmos_service.events_container = mock_events_container
+        mock_cosmos_service.analytics_container = mock_analytics_container
+        service = AnalyticsService(mock_cosmos_service)
+        day = rollup_day_key()
+
+        # Act
+        await service.track_job_event(
+            job_id="job-123",
+            user_id="user-456",
+            event_type="job_created",
+            metadata={"audio_duration_seconds": 120}
+        )
+
+        # Assert
+        patches = {}
+        for c in mock_analytics_container.patch_item.call_args_list:
+            patches.setdefault(c.kwargs["item"], c.kwargs)
+        day_ops = {op["path"]: op["value"] for op in patches[f"rollup_day_{day}"]["patch_operations"]}
+        user_ops = {op["path"]: op["value"] for op in patches["rollup_user_user-456"]["patch_operations"]}
+        assert day_ops["/jobs"] == 1
+        assert day_ops["/audio_minutes"] == 2.0
+        assert user_ops[f"/jobs_by_day/{day}"] == 1
+        assert user_ops[f"/minutes_by_day/{day}"] == 2.0
+        assert patches[f"rollup_day_{day}"]["partition_key"] == f"rollup_day_{day}"
+
+    async def test_track_job_event_completion_not_counted_in_rollups(self, mock_cosmos_service, mock_events_container, mock_analytics_container):
+        """Test completion events do not count the job a second time"""
+        # Arrange
+        mock_cosmos_service.events_container = mock_events_container
+        mock_cosmos_service.analytics_container = mock_analytics_container
+        service = AnalyticsService(mock_cosmos_service)
+
+        # Act
+        await service.track_job_event(
+            job_id="job-123",
+            user_id="user-456",
+            event_type="job_completed",
+            metadata={"audio_duration_seconds": 120}
+        )
+
+        # Assert
+        mock_analytics_container.create_item.assert_called_once()
+        mock_analytics_container.patch_item.assert_not_called()
+
+    async def test_track_job_event_seeds_missing_rollups(self, mock_cosmos_service, mock_events_container, mock_analytics_container):
+        """Test a missing rollup is created with zero counters and then patched"""
+        # Arrange
+        mock_cosmos_service.events_container = mock_events_container
+        patched = set()
+
+        def _patch_item(item, partition_key, patch_operations, filter_predicate=None):
+            if item not in patched:
+                patched.add(item)
+                raise CosmosHttpResponseError(status_code=404, message="Not found")
+            return {}
+
+        mock_analytics_container.patch_item = Mock(side_effect=_patch_item)
+        mock_cosmos_service.analytics_container = mock_analytics_container
+        service = AnalyticsService(mock_cosmos_service)
+
+        # Act
+        await service.track_job_event(
+            job_id="job-123",
+            user_id="user-456",
+            event_type="job_created",
+            metadata={"audio_duration_minutes": 3.0}
+        )
+
+        # Assert
+        seeded = [c.kwargs["body"] for c in mock_analytics_container.create_item.call_args_list if c.kwargs["body"]["type"] != "transcription_analytics"]
+        assert {doc["type"] for doc in seeded} == {ROLLUP_DAY_TYPE, ROLLUP_USER_TYPE}
+        assert all(doc.get("jobs", 0) == 0 and doc.get("total_jobs", 0) == 0 for doc in seeded)
+        assert all(doc["id"] == doc["partition_key"] == doc["user_id"] for doc in seeded)
+
 
 # ============================================================================
 # Test Class: User Analytics
@@ -315,6 +405,56 @@ class TestJobEventTracking:
 class TestUserAnalytics:
     """Test user analytics queries"""
     
+    async def test_get_user_analytics_from_rollup(self, mock_cosmos_service, mock_analytics_container):
+        """Test user analytics sums the user rollup for days inside the window"""
+        # Arrange
+        today = rollup_day_key()
+        mock_analytics_container.read_item = Mock(return_value={
+            "id": "rollup_user_user-123",
+            "jobs_by_day": {today: 2, "2000-01-01": 9},
+            "minutes_by_day": {today: 12.0, "2000-01-01": 90.0},
+        })
+        mock_cosmos_service.analytics_container = mock_analytics_container
+        service = AnalyticsService(mock_cosmos_service)
+
+        # Act
+        result = await service.get_user_analytics(user_id="user-123", days=30)
+
+        # Assert
+        stats = result["analytics"]["transcription_stats"]
+        assert stats["total_jobs"] == 2
+        assert stats["total_minutes"] == 12.0
+        mock_analytics_container.query_items.assert_not_called()
+
+    async def test_get_user_analytics_scans_only_before_rollup_began(self, mock_cosmos_service, mock_analytics_container):
+        """Test a window partly covered by the user rollup adds raw history from before it"""
+        # Arrange
+        rollout = datetime.now(timezone.utc) - timedelta(days=10)
+        today = rollup_day_key()
+        mock_analytics_container.read_item = Mock(return_value={
+            "id": "rollup_user_user-123",
+            "created_at": rollout.isoformat(),
+            "jobs_by_day": {today: 2},
+            "minutes_by_day": {today: 12.0},
+        })
+        mock_analytics_container.query_items = Mock(return_value=[
+            {"audio_duration_minutes": 5.0},
+            {"audio_duration_minutes": 10.0},
+        ])
+        mock_cosmos_service.analytics_container = mock_analytics_container
+        service = AnalyticsService(mock_cosmos_service)
+
+        # Act
+        result = await service.get_user_analytics(user_id="user-123", days=30)
+
+        # Assert
+        stats = result["analytics"]["transcription_stats"]
+        assert stats["total_jobs"] == 4
+        assert stats["total_minutes"] == 27.0
+        params = {p["name"]: p["value"] for p in mock_analytics_container.query_items.call_args.kwargs["parameters"]}
+        assert params["@start"] == result["start_date"]
+        assert params["@end"] == rollout.isoformat()
+
     async def test_get_user_analytics_from_analytics_container(self, mock_cosmos_service, mock_analytics_container, analytics_factory):
         """Test user analytics from analytics container"""
         # Arrange
@@ -473,7 +613,7 @@ class TestSystemAnalytics:
             analytics_factory(user_id="user-2", audio_duration_minutes=10.0),
             analytics_factory(user_id="user-3", audio_duration_minutes=3.0),
         ]
-        mock_analytics_container.query_items = Mock(return_value=analytics_docs)
+        mock_analytics_container.query_items = Mock(side_effect=_route_queries(raw_docs=analytics_docs))
         mock_cosmos_service.analytics_container = mock_analytics_container
         
         # Mock sessions_container to return empty list (so active users calculation completes)
@@ -500,7 +640,7 @@ class TestSystemAnalytics:
             {"audio_duration_seconds": 600, "timestamp": "2025-10-08T12:00:00+00:00"},  # 10 minutes
             {"audio_duration_seconds": 300, "timestamp": "2025-10-08T13:00:00+00:00"},  # 5 minutes
         ]
-        mock_analytics_container.query_items = Mock(return_value=analytics_docs)
+        mock_analytics_container.query_items = Mock(side_effect=_route_queries(raw_docs=analytics_docs))
         mock_cosmos_service.analytics_container = mock_analytics_container
         
         # Mock sessions_container to return empty list
@@ -517,6 +657,88 @@ class TestSystemAnalytics:
         assert result["total_minutes"] == 15.0
         assert result["analytics"]["total_minutes"] == 15.0
 
+    async def test_get_system_analytics_reads_daily_rollups(self, mock_cosmos_service, mock_analytics_container):
+        """Test totals come from day rollups without scanning raw analytics"""
+        # Arrange
+        today = rollup_day_key()
+        day_rollups = [
+            {"day": today, "jobs": 4, "audio_minutes": 20.0, "active_users": 3},
+            {"day": "2000-01-01", "jobs": 2, "audio_minutes": 7.5, "active_users": 2},
+        ]
+        mock_analytics_container.query_items = Mock(
+            side_effect=_route_queries(day_rollups=day_rollups, active_user_count=4)
+        )
+        mock_cosmos_service.analytics_container = mock_analytics_container
+        mock_cosmos_service.jobs_container = Mock()
+        mock_cosmos_service.sessions_container = Mock(query_items=Mock(return_value=[]))
+
+        service = AnalyticsService(mock_cosmos_service)
+
+        # Act
+        result = await service.get_system_analytics(days=30)
+
+        # Assert
+        assert result["total_jobs"] == 6
+        assert result["total_minutes"] == 27.5
+        assert result["active_users"] == 4
+        assert [d["date"] for d in result["analytics"]["daily"]] == ["2000-01-01", today]
+        mock_cosmos_service.jobs_container.query_items.assert_not_called()
+        raw_queries = [
+            c.kwargs["query"] for c in mock_analytics_container.query_items.call_args_list
+            if "transcription_analytics" in c.kwargs["query"]
+        ]
+        assert len(raw_queries) == 1 and "TOP @limit" in raw_queries[0]
+
+
+    async def test_get_system_analytics_window_partly_covered_by_rollups(self, mock_cosmos_service, mock_analytics_container):
+        """Test days before the first rollup are scanned raw and added to the rollup totals"""
+        # Arrange
+        rollout = datetime.now(timezone.utc) - timedelta(days=10)
+        rollout_day = rollup_day_key(rollout)
+        today = rollup_day_key()
+        early = (rollout - timedelta(days=5)).isoformat()
+        same_day = rollout.replace(hour=0, minute=0, second=1).isoformat()
+        day_rollups = [
+            {"day": rollout_day, "jobs": 1, "audio_minutes": 4.0, "active_users": 1, "created_at": rollout.isoformat()},
+            {"day": today, "jobs": 3, "audio_minutes": 6.0, "active_users": 2, "created_at": today + "T00:01:00+00:00"},
+        ]
+        raw_docs = [
+            {"user_id": "user-1", "timestamp": early, "audio_duration_minutes": 5.0},
+            {"user_id": "user-2", "timestamp": same_day, "audio_duration_minutes": 10.0},
+        ]
+        mock_analytics_container.query_items = Mock(
+            side_effect=_route_queries(raw_docs=raw_docs, day_rollups=day_rollups, active_user_count=2)
+        )
+        mock_cosmos_service.analytics_container = mock_analytics_container
+        mock_cosmos_service.jobs_container = Mock()
+        mock_cosmos_service.sessions_container = Mock(query_items=Mock(return_value=[
+            {"user_id": "user-1", "status": "active"},
+            {"user_id": "user-2", "status": "active"},
+            {"user_id": "user-3", "status": "active"},
+        ]))
+
+        service = AnalyticsService(mock_cosmos_service)
+
+        # Act
+        result = await service.get_system_analytics(days=30)
+
+        # Assert
+        assert result["total_jobs"] == 6
+        assert result["total_minutes"] == 25.0
+        assert result["active_users"] == 3
+        daily = {d["date"]: d for d in result["analytics"]["daily"]}
+        assert list(daily) == sorted(daily) and set(daily) == {early[:10], rollout_day, today}
+        assert daily[rollout_day]["jobs"] == 2 and daily[rollout_day]["minutes"] == 14.0
+        scans = [
+            c.kwargs for c in mock_analytics_container.query_items.call_args_list
+            if "transcription_analytics" in c.kwargs["query"] and "TOP @limit" not in c.kwargs["query"]
+        ]
+        assert len(scans) == 1
+        params = {p["name"]: p["value"] for p in scans[0]["parameters"]}
+        assert params["@start"] == result["start_date"]
+        assert params["@end"] == rollout.isoformat()
+        mock_cosmos_service.jobs_container.query_items.assert_not_called()
+
 
 # ============================================================================
 # Test Class: Container Availability
@@ -2,7 +2,8 @@
 Unit tests for BackgroundProcessingService.
 
 Tests cover background task scheduling, execution with retry logic, circuit breaker patterns,
-Azure Functions integration, task status tracking, and error handling.
+Azure Functions integration, task status tracking, the bounded priority worker pool,
+registry eviction, durable task state and resumption, and error handling.
 
 Coverage target: 90%+
 """
@@ -21,8 +22,21 @@ from app.services.processing.background_service import (
     BackgroundProcessingService,
     BackgroundTask,
     TaskStatus,
-    CircuitBreaker
+    TaskPriority,
+    TaskRegistry,
+    TaskRejectedError,
+    CircuitBreaker,
+    CircuitOpenError,
 )
+from app.services.processing.task_store import SqliteTaskStore
+from app.utils.circuit_breaker import get_circuit_breaker_registry
+
+
+@pytest.fixture(autouse=True)
+def fresh_circuit_breakers():
+    get_circuit_breaker_registry.cache_clear()
+    yield
+    get_circuit_breaker_registry.cache_clear()
 
 
 # ============================================================================
@@ -192,7 +206,7 @@ class TestBackgroundProcessingServiceInitialization:
         assert service.storage_service == storage_service
         assert service.cosmos_service == mock_cosmos_service
         assert service.analytics_service == analytics_service
-        assert service.circuit_breaker is not None
+        assert service.circuit_breakers is not None
         assert service.tasks == {}
 
     def test_azure_functions_base_url_from_config(self, mock_cosmos_service):
@@ -359,15 +373,32 @@ class TestAzureFunctionsIntegration:
         analytics_service = Mock()
         service = BackgroundProcessingService(storage_service, mock_cosmos_service, analytics_service)
         
-        # Open the circuit breaker
-        service.circuit_breaker.state = "OPEN"
-        service.circuit_breaker.last_failure_time = datetime.now().timestamp()
+        # Open the endpoint's circuit breaker
+        breaker = service.circuit_breakers.get("https://func-app.azurewebsites.net/api/test")
+        breaker.state = "OPEN"
+        breaker.last_failure_time = datetime.now().timestamp()
         
         payload = {"job_id": "job-123"}
         
         with pytest.raises(Exception, match="circuit breaker is OPEN"):
             await service.call_azure_function("https://func-app.azurewebsites.net/api/test", payload)
 
+    @pytest.mark.asyncio
+    async def test_open_breaker_only_blocks_its_own_endpoint(self, mock_cosmos_service, mock_httpx_client):
+        """Should keep calling other function routes while one route's breaker is open"""
+        service = BackgroundProcessingService(Mock(), mock_cosmos_service, Mock())
+        breaker = service.circuit_breakers.get("https://func-app.azurewebsites.net/api/analyze-audio")
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+
+        with patch('app.core.http_client.get_client', return_value=mock_httpx_client):
+            with pytest.raises(CircuitOpenError):
+                await service.call_azure_function("https://func-app.azurewebsites.net/api/analyze-audio", {})
+            result = await service.call_azure_function("https://func-app.azurewebsites.net/api/refine-text", {})
+
+        assert result == {"status": "success"}
+        mock_httpx_client.post.assert_called_once()
+
     @pytest.mark.asyncio
     async def test_call_azure_function_http_error(self, mock_cosmos_service, mock_httpx_client):
         """Should handle HTTP errors and record circuit breaker failure"""
@@ -383,7 +414,7 @@ class TestAzureFunctionsIntegration:
             with pytest.raises(httpx.HTTPError):
                 await service.call_azure_function("https://func-app.azurewebsites.net/api/test", payload)
         
-        assert service.circuit_breaker.failure_count > 0
+        assert service.circuit_breakers.get("https://func-app.azurewebsites.net/api/test").failure_count > 0
 
     @pytest.mark.asyncio
     async def test_call_azure_function_with_custom_headers(self, mock_cosmos_service, mock_httpx_client):
@@ -617,7 +648,8 @@ class TestCircuitBreakerStatus:
         analytics_service = Mock()
         service = BackgroundProcessingService(storage_service, mock_cosmos_service, analytics_service)
         
-        status = service.get_circuit_breaker_status()
+        service.circuit_breakers.get("https://func-app.azurewebsites.net/api/test")
+        status = service.get_circuit_breaker_status()["func-app.azurewebsites.net/api/test"]
         
         assert "state" in status
         assert "failure_count" in status
@@ -631,9 +663,292 @@ class TestCircuitBreakerStatus:
         analytics_service = Mock()
         service = BackgroundProcessingService(storage_service, mock_cosmos_service, analytics_service)
         
-        service.circuit_breaker.record_failure()
-        service.circuit_breaker.record_failure()
+        breaker = service.circuit_breakers.get("https://func-app.azurewebsites.net/api/test")
+        breaker.record_failure()
+        breaker.record_failure()
         
-        status = service.get_circuit_breaker_status()
+        status = service.get_circuit_breaker_status()["func-app.azurewebsites.net/api/test"]
         
         assert status["failure_count"] == 2
+        assert status["failures"] == 2
+
+
+# ============================================================================
+# Test Worker Pool
+# ============================================================================
+
+def _pool_service(mock_cosmos_service, workers=1, queue_size=100, registry_max=5000, task_store=None):
+    mock_cosmos_service.config.max_concurrent_jobs = workers
+    mock_cosmos_service.config.background_queue_max_size = queue_size
+    mock_cosmos_service.config.background_task_registry_max = registry_max
+    return BackgroundProcessingService(Mock(), mock_cosmos_service, Mock(), task_store=task_store)
+
+
+class TestWorkerPool:
+    """Test the bounded priority worker pool"""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_limited_to_max_concurrent_jobs(self, mock_cosmos_service):
+        """Should never run more tasks at once than max_concurrent_jobs"""
+        service = _pool_service(mock_cosmos_service, workers=2)
+        active = 0
+        peak = 0
+
+        async def job():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+        service.start()
+        for i in range(6):
+            await service.submit_task(f"task-{i}", "test", "user-1", job)
+        await service.stop(timeout=5)
+
+        assert peak == 2
+        assert all(task.status == TaskStatus.COMPLETED for task in service.tasks.values())
+
+    @pytest.mark.asyncio
+    async def test_higher_priority_runs_first(self, mock_cosmos_service):
+        """Should serve HIGH priority tasks before NORMAL and LOW ones"""
+        service = _pool_service(mock_cosmos_service)
+        order = []
+
+        async def job(name):
+            order.append(name)
+
+        await service.submit_task("low", "test", "user-1", job, None, None, "low", priority=TaskPriority.LOW)
+        await service.submit_task("normal", "test", "user-1", job, None, None, "normal")
+        await service.submit_task("high", "test", "user-1", job, None, None, "high", priority=TaskPriority.HIGH)
+        service.start()
+        await service.stop(timeout=5)
+
+        assert order == ["high", "normal", "low"]
+
+    @pytest.mark.asyncio
+    async def test_users_take_turns(self, mock_cosmos_service):
+        """Should interleave users so one bulk submission cannot starve others"""
+        service = _pool_service(mock_cosmos_service)
+        order = []
+
+        async def job(name):
+            order.append(name)
+
+        for i in range(3):
+            await service.submit_task(f"bulk-{i}", "upload", "bulk-user", job, name=f"bulk-{i}")
+        await service.submit_task("other-0", "upload", "other-user", job, name="other-0")
+        service.start()
+        await service.stop(timeout=5)
+
+        assert order == ["bulk-0", "other-0", "bulk-1", "bulk-2"]
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects_submission(self, mock_cosmos_service):
+        """Should reject tasks beyond the queue capacity without tracking them"""
+        service = _pool_service(mock_cosmos_service, queue_size=1)
+
+        async def job():
+            return None
+
+        await service.submit_task("task-1", "test", "user-1", job)
+        with pytest.raises(TaskRejectedError) as exc_info:
+            await service.submit_task("task-2", "test", "user-1", job)
+
+        assert exc_info.value.status_code == 503
+        assert "task-2" not in service.tasks
+        assert service.get_queue_metrics()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stop_rejects_new_work_and_fails_unstarted_tasks(self, mock_cosmos_service):
+        """Should cancel what is left after the drain timeout and refuse new tasks"""
+        service = _pool_service(mock_cosmos_service)
+
+        async def slow_job():
+            await asyncio.sleep(10)
+
+        service.start()
+        running = await service.submit_task("running", "test", "user-1", slow_job)
+        queued = await service.submit_task("queued", "test", "user-1", slow_job)
+        await asyncio.sleep(0)
+
+        await service.stop(timeout=0.05)
+
+        assert running.status == TaskStatus.FAILED
+        assert queued.status == TaskStatus.FAILED
+        assert queued.error_message == "Not started before shutdown"
+        with pytest.raises(TaskRejectedError):
+            await service.submit_task("late", "test", "user-1", slow_job)
+
+    @pytest.mark.asyncio
+    async def test_queue_metrics_report_depth_and_wait(self, mock_cosmos_service):
+        """Should expose queue depth, status counts and wait percentiles"""
+        service = _pool_service(mock_cosmos_service)
+
+        async def job():
+            return None
+
+        await service.submit_task("task-1", "test", "user-1", job)
+        before = service.get_queue_metrics()
+        service.start()
+        await service.stop(timeout=5)
+        after = service.get_queue_metrics()
+
+        assert before["queue_depth"] == 1
+        assert before["tasks_by_status"]["pending"] == 1
+        assert after["queue_depth"] == 0
+        assert after["tasks_by_status"]["completed"] == 1
+        assert after["wait_seconds"]["samples"] == 1
+
+
+class TestTaskRegistry:
+    """Test bounded task registry eviction"""
+
+    def test_evicts_oldest_finished_tasks_beyond_max(self):
+        """Should drop the oldest finished tasks once over the size limit"""
+        registry = TaskRegistry(max_tasks=2)
+        for task_id in ("a", "b"):
+            task = BackgroundTask(task_id, "test", "user-1")
+            task.update_status(TaskStatus.COMPLETED)
+            registry[task_id] = task
+
+        registry["c"] = BackgroundTask("c", "test", "user-1")
+
+        assert list(registry) == ["b", "c"]
+        assert registry.evictions == 1
+
+    def test_live_tasks_are_never_evicted(self):
+        """Should keep pending tasks even past the size limit"""
+        registry = TaskRegistry(max_tasks=1)
+        registry["a"] = BackgroundTask("a", "test", "user-1")
+        registry["b"] = BackgroundTask("b", "test", "user-1")
+
+        assert list(registry) == ["a", "b"]
+
+    def test_expired_finished_tasks_are_evicted_on_insert(self):
+        """Should drop finished tasks older than the retention period"""
+        registry = TaskRegistry(retention_seconds=3600)
+        old = BackgroundTask("old", "test", "user-1")
+        old.update_status(TaskStatus.FAILED, error_message="boom")
+        registry["old"] = old
+        old.created_at = datetime.now(timezone.utc) - timedelta(hours=2)
+
+        registry["new"] = BackgroundTask("new", "test", "user-1")
+
+        assert "old" not in registry
+        assert "new" in registry
+
+
+class TestDurableTaskState:
+    """Test persisted task state shared between workers"""
+
+    @pytest.fixture
+    async def store(self, tmp_path):
+        store = SqliteTaskStore(str(tmp_path / "tasks.sqlite3"))
+        yield store
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_status_is_visible_from_another_worker(self, mock_cosmos_service, store):
+        """Should serve status of tasks accepted by a different worker"""
+        accepting = _pool_service(mock_cosmos_service, task_store=store)
+        polling = _pool_service(mock_cosmos_service, task_store=store)
+
+        async def job():
+            return {"ok": True}
+
+        await accepting.submit_task("task-1", "test", "user-1", job)
+        accepting.start()
+        await accepting.stop(timeout=5)
+
+        status = await polling.fetch_task_status("task-1")
+        assert status["status"] == "completed"
+        assert status["result"] == {"ok": True}
+        assert [t["task_id"] for t in await polling.fetch_user_tasks("user-1")] == ["task-1"]
+        assert polling.get_task_status("task-1") is None
+
+    @pytest.mark.asyncio
+    async def test_status_reads_are_cached(self, mock_cosmos_service, store):
+        """Should reuse a recent store read instead of reading again"""
+        service = _pool_service(mock_cosmos_service, task_store=store)
+        await store.save(BackgroundTask("task-1", "test", "user-1").to_record())
+
+        with patch.object(store, "get", wraps=store.get) as get:
+            await service.fetch_task_status("task-1")
+            await service.fetch_task_status("task-1")
+
+        assert get.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_crashed_worker_tasks_are_resumed(self, mock_cosmos_service, store):
+        """Should rerun a resumable task left behind by a worker that died"""
+        crashed = _pool_service(mock_cosmos_service, task_store=store)
+        task = await crashed.queue_text_refinement("text", "shorter", "job-1", "user-1")
+
+        survivor = _pool_service(mock_cosmos_service, task_store=store)
+        survivor.process_text_refinement = AsyncMock(return_value={"refined": "t"})
+        survivor.handlers["text_refinement"] = survivor.process_text_refinement
+        await store.renew_lease(survivor.owner_id, 60)
+
+        assert await survivor.recover_orphaned_tasks() == 1
+        survivor.start()
+        await survivor.stop(timeout=5)
+
+        survivor.process_text_refinement.assert_awaited_once_with(
+            text="text", refinement_prompt="shorter", job_id="job-1", user_id="user-1"
+        )
+        record = await store.get(task.task_id)
+        assert record["status"] == "completed"
+        assert record["retry_count"] == 1
+        assert record["owner"] == survivor.owner_id
+
+    @pytest.mark.asyncio
+    async def test_shutdown_releases_unstarted_resumable_tasks(self, mock_cosmos_service, store):
+        """Should hand queued resumable tasks back to the store on shutdown"""
+        service = _pool_service(mock_cosmos_service, task_store=store)
+        task = await service.queue_audio_analysis("blob.mp3", "job-1", "user-1")
+
+        await service.stop(timeout=0)
+
+        record = await store.get(task.task_id)
+        assert record["status"] == "pending"
+        assert record["owner"] is None
+
+    @pytest.mark.asyncio
+    async def test_orphans_that_no_longer_fit_are_released(self, mock_cosmos_service, store):
+        """Should hand claimed orphans back unowned when the queue fills during the claim"""
+        for i in range(2):
+            orphan = BackgroundTask(f"task-{i}", "audio_analysis", "user-1")
+            orphan.payload = {"file_path": "f", "job_id": "j", "user_id": "user-1"}
+            await store.save(orphan.to_record())
+        service = _pool_service(mock_cosmos_service, queue_size=2, task_store=store)
+        claim_orphans = store.claim_orphans
+
+        async def claim_while_a_task_is_submitted(owner, limit):
+            await service.submit_task("new", "test", "user-2", AsyncMock())
+            return await claim_orphans(owner, limit)
+
+        with patch.object(store, "claim_orphans", side_effect=claim_while_a_task_is_submitted):
+            assert await service.recover_orphaned_tasks() == 1
+
+        records = [await store.get(f"task-{i}") for i in range(2)]
+        assert sorted(r["owner"] is None for r in records) == [False, True]
+        released = next(r for r in records if r["owner"] is None)
+        assert released["status"] == "pending"
+        assert released["retry_count"] == 0
+        assert released["id"] not in service.tasks
+
+    @pytest.mark.asyncio
+    async def test_tasks_out_of_retries_are_failed(self, mock_cosmos_service, store):
+        """Should stop resuming a task after max_retries takeovers"""
+        orphan = BackgroundTask("task-1", "audio_analysis", "user-1")
+        orphan.payload = {"file_path": "f", "job_id": "j", "user_id": "user-1"}
+        orphan.retry_count = orphan.max_retries
+        await store.save(orphan.to_record())
+        service = _pool_service(mock_cosmos_service, task_store=store)
+
+        assert await service.recover_orphaned_tasks() == 0
+
+        record = await store.get("task-1")
+        assert record["status"] == "failed"
+        assert "Abandoned" in record["error"]
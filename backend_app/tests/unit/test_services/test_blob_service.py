@@ -104,6 +104,83 @@ class TestSASTokenGeneration:
                 call_kwargs = mock_gen_sas.call_args.kwargs
                 assert 'user_delegation_key' in call_kwargs
 
+    def test_generate_sas_token_reuses_cached_delegation_key(self, storage_config):
+        """Should fetch the user delegation key once and sign later tokens locally"""
+        storage_config.azure_storage_key = None
+
+        with patch('app.services.storage.blob_service.DefaultAzureCredential'):
+            service = StorageService(storage_config)
+            service.blob_service_client.get_user_delegation_key = Mock(return_value=Mock())
+
+            with patch('app.services.storage.blob_service.generate_blob_sas') as mock_gen_sas:
+                mock_gen_sas.return_value = "sv=2022-11-02&sr=b&sig=test-signature"
+
+                for i in range(5):
+                    service.generate_sas_token(f"https://teststorage.blob.core.windows.net/recordings/test-{i}.mp3")
+
+                service.blob_service_client.get_user_delegation_key.assert_called_once()
+                assert mock_gen_sas.call_count == 5
+
+    def test_generate_sas_token_refreshes_delegation_key_before_expiry(self, storage_config):
+        """Should request a new delegation key once the cached one cannot cover a full SAS lifetime"""
+        storage_config.azure_storage_key = None
+
+        with patch('app.services.storage.blob_service.DefaultAzureCredential'):
+            service = StorageService(storage_config)
+            service.blob_service_client.get_user_delegation_key = Mock(return_value=Mock())
+            blob_url = "https://teststorage.blob.core.windows.net/recordings/test.mp3"
+
+            with patch('app.services.storage.blob_service.generate_blob_sas', return_value="sig=x"):
+                service.generate_sas_token(blob_url)
+                # Simulate the cached key nearing expiry
+                service._user_delegation_key_expiry = datetime.utcnow() + timedelta(hours=1)
+                service.generate_sas_token(blob_url)
+
+            assert service.blob_service_client.get_user_delegation_key.call_count == 2
+            assert service._user_delegation_key_expiry > datetime.utcnow() + timedelta(hours=8)
+
+    def test_sign_urls_batch_with_managed_identity(self, storage_config):
+        """Should sign a batch of URLs with a single delegation key request"""
+        storage_config.azure_storage_key = None
+
+        with patch('app.services.storage.blob_service.DefaultAzureCredential'):
+            service = StorageService(storage_config)
+            service.blob_service_client.get_user_delegation_key = Mock(return_value=Mock())
+            urls = [
+                "https://teststorage.blob.core.windows.net/recordings/a.mp3",
+                "https://teststorage.blob.core.windows.net/recordings/b.mp3",
+                "https://teststorage.blob.core.windows.net/recordings/a.mp3",
+                "https://teststorage.blob.core.windows.net/recordings",
+            ]
+
+            with patch('app.services.storage.blob_service.generate_blob_sas', return_value="sig=x") as mock_gen_sas:
+                signed = service.sign_urls(urls)
+
+            service.blob_service_client.get_user_delegation_key.assert_called_once()
+            assert mock_gen_sas.call_count == 2
+            assert signed[urls[0]] == f"{urls[0]}?sig=x"
+            assert signed[urls[1]] == f"{urls[1]}?sig=x"
+            # URLs without a blob name are returned unchanged
+            assert signed[urls[3]] == urls[3]
+
+    def test_sign_urls_delegation_key_failure_returns_unsigned(self, storage_config):
+        """Should return URLs unchanged when the delegation key cannot be obtained"""
+        storage_config.azure_storage_key = None
+
+        with patch('app.services.storage.blob_service.DefaultAzureCredential'):
+            service = StorageService(storage_config)
+            service.blob_service_client.get_user_delegation_key = Mock(side_effect=AzureError("denied"))
+            url = "https://teststorage.blob.core.windows.net/recordings/a.mp3"
+
+            assert service.sign_urls([url]) == {url: url}
+
+    def test_sign_urls_empty(self, storage_config):
+        """Should return an empty mapping for no URLs"""
+        service = StorageService(storage_config)
+
+        assert service.sign_urls([]) == {}
+        assert service.sign_urls([None, ""]) == {}
+
     def test_generate_sas_token_empty_url(self, storage_config):
         """Should return None for empty blob URL"""
         service = StorageService(storage_config)
@@ -381,22 +458,21 @@ class TestBlobStreaming:
             
             blob_url = "https://teststorage.blob.core.windows.net/recordings/2025-10-08/test_audio/test.mp3"
             
-            with patch('app.services.storage.blob_service.AsyncBlobClient') as mock_async_client_cls:
+            with patch('app.services.storage.blob_service.AsyncBlobServiceClient') as mock_service_cls:
                 # Setup mock async blob client
                 mock_async_client = AsyncMock()
-                mock_async_client_cls.return_value = mock_async_client
+                mock_service_cls.return_value.get_blob_client = Mock(return_value=mock_async_client)
                 
                 # Mock downloader with chunks
-                mock_downloader = AsyncMock()
+                mock_downloader = Mock()
                 async def mock_chunks():
                     yield b"chunk1"
                     yield b"chunk2"
                     yield b"chunk3"
                 mock_downloader.chunks = mock_chunks
+                mock_downloader.properties.content_range = "bytes 0-17/18"
                 
                 mock_async_client.download_blob = AsyncMock(return_value=mock_downloader)
-                mock_async_client.__aenter__ = AsyncMock(return_value=mock_async_client)
-                mock_async_client.__aexit__ = AsyncMock(return_value=None)
                 
                 # Stream and collect chunks
                 chunks = []
@@ -437,13 +513,11 @@ class TestBlobStreaming:
             
             blob_url = "https://teststorage.blob.core.windows.net/recordings/nonexistent.mp3"
             
-            with patch('app.services.storage.blob_service.AsyncBlobClient') as mock_async_client_cls:
+            with patch('app.services.storage.blob_service.AsyncBlobServiceClient') as mock_service_cls:
                 mock_async_client = AsyncMock()
-                mock_async_client_cls.return_value = mock_async_client
+                mock_service_cls.return_value.get_blob_client = Mock(return_value=mock_async_client)
                 
                 mock_async_client.download_blob = AsyncMock(side_effect=ResourceNotFoundError("Blob not found"))
-                mock_async_client.__aenter__ = AsyncMock(return_value=mock_async_client)
-                mock_async_client.__aexit__ = AsyncMock(return_value=None)
                 
                 with pytest.raises(ResourceNotFoundError):
                     async for _ in service.stream_blob_content(blob_url):
@@ -458,18 +532,17 @@ class TestBlobStreaming:
             # URL with different container
             blob_url = "https://teststorage.blob.core.windows.net/transcriptions/test.json"
             
-            with patch('app.services.storage.blob_service.AsyncBlobClient') as mock_async_client_cls:
+            with patch('app.services.storage.blob_service.AsyncBlobServiceClient') as mock_service_cls:
                 mock_async_client = AsyncMock()
-                mock_async_client_cls.return_value = mock_async_client
+                mock_service_cls.return_value.get_blob_client = Mock(return_value=mock_async_client)
                 
-                mock_downloader = AsyncMock()
+                mock_downloader = Mock()
                 async def mock_chunks():
                     yield b"data"
                 mock_downloader.chunks = mock_chunks
+                mock_downloader.properties.content_range = "bytes 0-3/4"
                 
                 mock_async_client.download_blob = AsyncMock(return_value=mock_downloader)
-                mock_async_client.__aenter__ = AsyncMock(return_value=mock_async_client)
-                mock_async_client.__aexit__ = AsyncMock(return_value=None)
                 
                 # Should extract container and blob name from URL
                 chunks = []
@@ -477,6 +550,7 @@ class TestBlobStreaming:
                     chunks.append(chunk)
                 
                 assert len(chunks) == 1
+                mock_service_cls.return_value.get_blob_client.assert_called_once_with("transcriptions", "test.json")
 
     @pytest.mark.asyncio
     async def test_stream_blob_content_unexpected_error(self, storage_config):
@@ -486,19 +560,231 @@ class TestBlobStreaming:
             
             blob_url = "https://teststorage.blob.core.windows.net/recordings/test.mp3"
             
-            with patch('app.services.storage.blob_service.AsyncBlobClient') as mock_async_client_cls:
+            with patch('app.services.storage.blob_service.AsyncBlobServiceClient') as mock_service_cls:
                 mock_async_client = AsyncMock()
-                mock_async_client_cls.return_value = mock_async_client
+                mock_service_cls.return_value.get_blob_client = Mock(return_value=mock_async_client)
                 
                 mock_async_client.download_blob = AsyncMock(side_effect=Exception("Unexpected error"))
-                mock_async_client.__aenter__ = AsyncMock(return_value=mock_async_client)
-                mock_async_client.__aexit__ = AsyncMock(return_value=None)
                 
                 with pytest.raises(Exception, match="Unexpected error"):
                     async for _ in service.stream_blob_content(blob_url):
                         pass
 
 
+    @pytest.mark.asyncio
+    async def test_downloads_share_one_async_client(self, storage_config):
+        """Should reuse the aio service client across downloads and close it on aclose"""
+        with patch('app.services.storage.blob_service.BlobServiceClient'):
+            service = StorageService(storage_config)
+
+            with patch('app.services.storage.blob_service.AsyncBlobServiceClient') as mock_service_cls:
+                mock_service_cls.return_value.get_blob_client = Mock(return_value=_mock_async_read_client(b"ab"))
+                mock_service_cls.return_value.close = AsyncMock()
+
+                for _ in range(2):
+                    async for _ in service.stream_blob_content("https://teststorage.blob.core.windows.net/recordings/a.txt"):
+                        pass
+                await service.aclose()
+
+                mock_service_cls.assert_called_once()
+                mock_service_cls.return_value.close.assert_awaited_once()
+
+
+# ============================================================================
+# Test Transcript Delivery
+# ============================================================================
+
+def _mock_async_read_client(data, content_encoding=None, offset=0):
+    downloader = Mock()
+
+    async def chunks():
+        yield data
+
+    downloader.chunks = chunks
+    downloader.size = len(data)
+    downloader.properties.content_range = f"bytes {offset}-{offset + len(data) - 1}/100"
+    downloader.properties.content_settings.content_type = "text/plain; charset=utf-8"
+    downloader.properties.content_settings.content_encoding = content_encoding
+    client = Mock()
+    client.download_blob = AsyncMock(return_value=downloader)
+    return client
+
+
+class TestTranscriptDelivery:
+    """Test short-lived read URLs and ranged downloads"""
+
+    def test_parse_byte_range(self):
+        """Should accept single bounded or open ranges only"""
+        from app.services.storage.blob_service import parse_byte_range
+
+        assert parse_byte_range("bytes=0-99") == (0, 100)
+        assert parse_byte_range("bytes=50-") == (50, None)
+        assert parse_byte_range("bytes=-20") is None
+        assert parse_byte_range("bytes=0-1,5-9") is None
+        assert parse_byte_range("bytes=9-3") is None
+        assert parse_byte_range(None) is None
+
+    def test_generate_read_url_uses_the_given_lifetime(self, storage_config):
+        """Should sign a read-only URL that expires after the requested lifetime"""
+        service = StorageService(storage_config)
+        blob_url = "https://teststorage.blob.core.windows.net/recordings/job_transcription.txt"
+
+        with patch('app.services.storage.blob_service.generate_blob_sas', return_value="sv=1&sig=x") as mock_gen_sas:
+            url, expires_at = service.generate_read_url(blob_url + "?old=sas", timedelta(minutes=5))
+
+        assert url == f"{blob_url}?sv=1&sig=x"
+        call_kwargs = mock_gen_sas.call_args.kwargs
+        assert call_kwargs['expiry'] == expires_at
+        assert call_kwargs['permission'].read and not call_kwargs['permission'].write
+        assert timedelta(minutes=4) < expires_at - datetime.utcnow() <= timedelta(minutes=5)
+
+    def test_generate_read_url_returns_none_when_signing_fails(self, storage_config):
+        """Should let callers fall back to proxying when no URL can be signed"""
+        service = StorageService(storage_config)
+
+        with patch('app.services.storage.blob_service.generate_blob_sas', side_effect=Exception("boom")):
+            assert service.generate_read_url("https://teststorage.blob.core.windows.net/recordings/a.txt", timedelta(minutes=5)) is None
+
+    @pytest.mark.asyncio
+    async def test_download_blob_range_reports_the_served_range(self, storage_config):
+        """Should pass the range to storage and report it with the stored encoding"""
+        service = StorageService(storage_config)
+        client = _mock_async_read_client(b"0123456789", content_encoding="gzip", offset=10)
+
+        with patch('app.services.storage.blob_service.AsyncBlobServiceClient') as mock_service_cls:
+            mock_service_cls.return_value.get_blob_client = Mock(return_value=client)
+            download = await service.download_blob_range(
+                "https://teststorage.blob.core.windows.net/recordings/a.txt", offset=10, length=10
+            )
+
+        client.download_blob.assert_awaited_once_with(offset=10, length=10)
+        assert download.content_range == "bytes 10-19/100"
+        assert download.content_encoding == "gzip"
+        assert [chunk async for chunk in download.chunks] == [b"0123456789"]
+
+    @pytest.mark.asyncio
+    async def test_download_blob_range_past_the_end(self, storage_config):
+        """Should raise RangeNotSatisfiableError carrying the blob size"""
+        from azure.core.exceptions import HttpResponseError
+        from app.services.storage.blob_service import RangeNotSatisfiableError
+
+        service = StorageService(storage_config)
+        error = HttpResponseError("InvalidRange")
+        error.status_code = 416
+        client = Mock()
+        client.download_blob = AsyncMock(side_effect=error)
+        client.get_blob_properties = AsyncMock(return_value=Mock(size=100))
+
+        with patch('app.services.storage.blob_service.AsyncBlobServiceClient') as mock_service_cls:
+            mock_service_cls.return_value.get_blob_client = Mock(return_value=client)
+            with pytest.raises(RangeNotSatisfiableError) as exc_info:
+                await service.download_blob_range(
+                    "https://teststorage.blob.core.windows.net/recordings/a.txt", offset=500
+                )
+
+        assert exc_info.value.size == 100
+
+
+# ============================================================================
+# Test Streaming Upload
+# ============================================================================
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+def _mock_async_upload_client(url="https://teststorage.blob.core.windows.net/recordings/test.mp3"):
+    client = MagicMock()
+    client.url = url
+    client.stage_block = AsyncMock()
+    client.commit_block_list = AsyncMock()
+    client.__aenter__ = AsyncMock(return_value=client)
+    client.__aexit__ = AsyncMock(return_value=None)
+    return client
+
+
+class TestStreamingUpload:
+    """Test block-staged streaming uploads"""
+
+    @pytest.mark.asyncio
+    async def test_upload_stream_stages_blocks_and_commits(self, storage_config):
+        """Should re-cut chunks into blocks, stage them and commit in order"""
+        import hashlib
+
+        service = StorageService(storage_config)
+        parts = [b"a" * 7, b"b" * 7, b"c" * 3]
+        client = _mock_async_upload_client()
+
+        with patch('app.services.storage.blob_service.AsyncBlobClient', return_value=client):
+            result = await service.upload_stream(_chunks(*parts), "my audio.mp3", block_size=5, max_concurrency=2)
+
+        data = b"".join(parts)
+        staged = [call.kwargs["data"] for call in client.stage_block.call_args_list]
+        staged_ids = [call.kwargs["block_id"] for call in client.stage_block.call_args_list]
+        assert b"".join(staged) == data
+        assert all(len(block) == 5 for block in staged[:-1])
+        client.commit_block_list.assert_awaited_once_with(staged_ids)
+        assert result["url"] == client.url
+        assert result["size_bytes"] == len(data)
+        assert result["sha256"] == hashlib.sha256(data).hexdigest()
+        assert result["header"] == data
+
+    @pytest.mark.asyncio
+    async def test_upload_stream_uses_sanitized_blob_name(self, storage_config):
+        """Should build the same dated blob name as upload_file"""
+        service = StorageService(storage_config)
+        client = _mock_async_upload_client()
+
+        with patch('app.services.storage.blob_service.AsyncBlobClient', return_value=client) as mock_cls:
+            await service.upload_stream(_chunks(b"data"), "my audio.mp3")
+
+        blob_name = mock_cls.call_args.kwargs["blob_name"]
+        assert blob_name.endswith("/my_audio.mp3")
+        assert mock_cls.call_args.kwargs["credential"] == storage_config.azure_storage_key
+
+    @pytest.mark.asyncio
+    async def test_upload_stream_empty_file_commits_single_block(self, storage_config):
+        """Should still create a (zero-length) blob for an empty stream"""
+        service = StorageService(storage_config)
+        client = _mock_async_upload_client()
+
+        with patch('app.services.storage.blob_service.AsyncBlobClient', return_value=client):
+            result = await service.upload_stream(_chunks(), "empty.mp3")
+
+        assert client.stage_block.await_count == 1
+        client.commit_block_list.assert_awaited_once()
+        assert result["size_bytes"] == 0
+
+    @pytest.mark.asyncio
+    async def test_upload_stream_stage_failure_skips_commit(self, storage_config):
+        """Should propagate block staging errors and never commit a partial blob"""
+        service = StorageService(storage_config)
+        client = _mock_async_upload_client()
+        client.stage_block = AsyncMock(side_effect=AzureError("Stage failed"))
+
+        with patch('app.services.storage.blob_service.AsyncBlobClient', return_value=client):
+            with pytest.raises(AzureError):
+                await service.upload_stream(_chunks(b"x" * 20), "file.mp3", block_size=5)
+
+        client.commit_block_list.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_upload_stream_header_is_capped(self, storage_config):
+        """Should keep only the leading header bytes for sniffing"""
+        from app.services.storage.blob_service import UPLOAD_HEADER_BYTES
+
+        service = StorageService(storage_config)
+        client = _mock_async_upload_client()
+        data = b"z" * (UPLOAD_HEADER_BYTES + 1000)
+
+        with patch('app.services.storage.blob_service.AsyncBlobClient', return_value=client):
+            result = await service.upload_stream(_chunks(data), "file.mp3")
+
+        assert result["header"] == data[:UPLOAD_HEADER_BYTES]
+        assert result["size_bytes"] == len(data)
+
+
 # ============================================================================
 # Test Service Properties
 # ============================================================================
@@ -4,13 +4,16 @@ Unit tests for ExportService
 Tests export functionality for users and analytics data to CSV/PDF formats.
 """
 
+import asyncio
 import pytest
 import tempfile
+import io
 import os
 import csv
 from datetime import datetime, timezone, timedelta
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 from app.services.analytics.export_service import ExportService
+from app.utils import pdf_report
 
 
 @pytest.fixture
@@ -32,14 +35,35 @@ def mock_analytics_service():
 
 
 @pytest.fixture
-def export_service(mock_cosmos_service, mock_analytics_service):
+def export_service(mock_cosmos_service, mock_analytics_service, tmp_path):
     """Create ExportService instance with mocked dependencies"""
     return ExportService(
         cosmos_service=mock_cosmos_service,
-        analytics_service=mock_analytics_service
+        analytics_service=mock_analytics_service,
+        report_cache_dir=str(tmp_path / "reports"),
     )
 
 
+@pytest.fixture(scope="module", autouse=True)
+def stop_pdf_render_pool():
+    """Shut down PDF render worker processes started by this module"""
+    yield
+    pdf_report.shutdown()
+
+
+@pytest.fixture
+def counting_renderer():
+    """Render PDFs in-process and count how often rendering happens"""
+    calls = []
+
+    async def _render(snapshot, output_path):
+        calls.append(snapshot)
+        return pdf_report.render_user_report_pdf(snapshot, output_path)
+
+    with patch('app.services.analytics.export_service.render_user_report_pdf_async', side_effect=_render):
+        yield calls
+
+
 @pytest.fixture
 def sample_users():
     """Sample user data for testing"""
@@ -94,77 +118,83 @@ def sample_user():
     }
 
 
+def _paged(*pages):
+    """Mimic ``query_items(...)`` whose ``by_page()`` yields the given pages."""
+    result = Mock()
+    result.by_page = Mock(return_value=iter([list(p) for p in pages]))
+    return result
+
+
+async def _read_csv(result):
+    body = b"".join([chunk async for chunk in result['stream']])
+    return list(csv.reader(io.StringIO(body.decode('utf-8'))))
+
+
+@pytest.fixture
+def mock_auth_container(mock_cosmos_service):
+    """Auth container returned by ``get_container('auth')``"""
+    container = Mock()
+    mock_cosmos_service.get_container = Mock(return_value=container)
+    return container
+
+
 class TestExportUsersCSV:
     """Tests for export_users_csv method"""
 
     @pytest.mark.asyncio
-    async def test_export_users_csv_success(self, export_service, mock_cosmos_service, sample_users):
+    async def test_export_users_csv_success(self, export_service, mock_auth_container, sample_users):
         """Test successful export of users to CSV"""
-        mock_cosmos_service.get_all_users.return_value = sample_users
+        mock_auth_container.query_items = Mock(return_value=_paged(sample_users))
 
         result = await export_service.export_users_csv()
 
         assert result['status'] == 'success'
-        assert 'file_path' in result
-        assert 'filename' in result
-        assert result['record_count'] == 2
+        assert 'file_path' not in result
         assert result['content_type'] == 'text/csv'
         assert 'sonic-brief-users-' in result['filename']
         assert result['filename'].endswith('.csv')
 
-        # Verify CSV content
-        with open(result['file_path'], 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            rows = list(reader)
-            
-            # Check header
-            assert rows[0][0] == 'ID'
-            assert rows[0][1] == 'Email'
-            assert rows[0][2] == 'Full Name'
-            
-            # Check data rows
-            assert len(rows) == 3  # Header + 2 data rows
-            assert rows[1][0] == 'user-1'
-            assert rows[1][1] == 'test1@example.com'
-            assert rows[2][0] == 'user-2'
-            assert rows[2][1] == 'test2@example.com'
+        rows = await _read_csv(result)
 
-        # Cleanup
-        os.remove(result['file_path'])
+        # Check header
+        assert rows[0][0] == 'ID'
+        assert rows[0][1] == 'Email'
+        assert rows[0][2] == 'Full Name'
+
+        # Check data rows
+        assert len(rows) == 3  # Header + 2 data rows
+        assert rows[1][0] == 'user-1'
+        assert rows[1][1] == 'test1@example.com'
+        assert rows[2][0] == 'user-2'
+        assert rows[2][1] == 'test2@example.com'
 
     @pytest.mark.asyncio
-    async def test_export_users_csv_empty_list(self, export_service, mock_cosmos_service):
+    async def test_export_users_csv_empty_list(self, export_service, mock_auth_container):
         """Test CSV export with no users"""
-        mock_cosmos_service.get_all_users.return_value = []
+        mock_auth_container.query_items = Mock(return_value=_paged([]))
 
         result = await export_service.export_users_csv()
 
         assert result['status'] == 'success'
-        assert result['record_count'] == 0
-
-        # Verify CSV has only header
-        with open(result['file_path'], 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            rows = list(reader)
-            assert len(rows) == 1  # Only header
-
-        os.remove(result['file_path'])
+        rows = await _read_csv(result)
+        assert len(rows) == 1  # Only header
 
     @pytest.mark.asyncio
-    async def test_export_users_csv_with_filters(self, export_service, mock_cosmos_service, sample_users):
+    async def test_export_users_csv_with_filters(self, export_service, mock_auth_container, sample_users):
         """Test CSV export with filters applied"""
-        mock_cosmos_service.get_all_users.return_value = sample_users
+        mock_auth_container.query_items = Mock(return_value=_paged(sample_users))
 
         filters = {'permission': 'admin'}
         result = await export_service.export_users_csv(filters=filters)
 
         assert result['status'] == 'success'
-        mock_cosmos_service.get_all_users.assert_called_once()
+        rows = await _read_csv(result)
+        assert [r[3] for r in rows[1:]] == ['admin']
 
     @pytest.mark.asyncio
-    async def test_export_users_csv_database_error(self, export_service, mock_cosmos_service):
-        """Test CSV export handles database errors"""
-        mock_cosmos_service.get_all_users.side_effect = Exception("Database connection failed")
+    async def test_export_users_csv_database_error(self, export_service, mock_auth_container):
+        """Test CSV export surfaces database errors before streaming starts"""
+        mock_auth_container.query_items = Mock(return_value=Mock(by_page=Mock(side_effect=Exception("Database connection failed"))))
 
         result = await export_service.export_users_csv()
 
@@ -173,7 +203,7 @@ class TestExportUsersCSV:
         assert 'Database connection failed' in result['message']
 
     @pytest.mark.asyncio
-    async def test_export_users_csv_handles_missing_fields(self, export_service, mock_cosmos_service):
+    async def test_export_users_csv_handles_missing_fields(self, export_service, mock_auth_container):
         """Test CSV export handles users with missing fields"""
         incomplete_users = [
             {
@@ -182,24 +212,73 @@ class TestExportUsersCSV:
                 # Missing other fields
             }
         ]
-        mock_cosmos_service.get_all_users.return_value = incomplete_users
+        mock_auth_container.query_items = Mock(return_value=_paged(incomplete_users))
 
         result = await export_service.export_users_csv()
 
         assert result['status'] == 'success'
-        assert result['record_count'] == 1
 
         # Verify CSV handles missing fields
-        with open(result['file_path'], 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            rows = list(reader)
-            assert len(rows) == 2
-            assert rows[1][0] == 'user-1'
-            assert rows[1][1] == 'test@example.com'
-            # Other fields should be empty strings
-            assert rows[1][2] == ''
+        rows = await _read_csv(result)
+        assert len(rows) == 2
+        assert rows[1][0] == 'user-1'
+        assert rows[1][1] == 'test@example.com'
+        # Other fields should be empty strings
+        assert rows[1][2] == ''
 
-        os.remove(result['file_path'])
+    @pytest.mark.asyncio
+    async def test_export_users_csv_streams_one_chunk_per_page(self, export_service, mock_auth_container, sample_users):
+        """Test later pages are fetched lazily and emitted as separate chunks"""
+        pages = iter([[sample_users[0]], [sample_users[1]]])
+        fetched = []
+
+        def _next_pages():
+            for page in pages:
+                fetched.append(page)
+                yield page
+
+        mock_auth_container.query_items = Mock(return_value=Mock(by_page=Mock(return_value=_next_pages())))
+
+        result = await export_service.export_users_csv()
+        assert len(fetched) == 1  # only the primed first page so far
+
+        chunks = [chunk async for chunk in result['stream']]
+        assert len(chunks) == 2
+        assert len(fetched) == 2
+        assert mock_auth_container.query_items.call_args.kwargs['max_item_count'] > 0
+
+
+class TestExportSystemAnalyticsCSV:
+    """Tests for export_system_analytics_csv method"""
+
+    @pytest.mark.asyncio
+    async def test_export_system_analytics_csv_streams_rows(self, export_service, mock_cosmos_service, mock_auth_container):
+        """Test rows are streamed with emails resolved once per page"""
+        mock_cosmos_service.analytics_container = Mock()
+        mock_cosmos_service.analytics_container.query_items = Mock(return_value=_paged(
+            [
+                {'job_id': 'job-1', 'user_id': 'user-1', 'timestamp': '2025-10-01T00:00:00+00:00', 'audio_duration_seconds': 90},
+                {'job_id': 'job-2', 'user_id': 'user-1', 'timestamp': '2025-10-02T00:00:00+00:00', 'audio_duration_minutes': 2.0},
+            ],
+            [
+                {'job_id': 'job-3', 'user_id': 'user-2', 'timestamp': '2025-10-03T00:00:00+00:00', 'audio_duration_minutes': 1.0},
+            ],
+        ))
+        mock_auth_container.query_items = Mock(side_effect=[
+            [{'id': 'user-1', 'email': 'one@example.com'}],
+            [{'id': 'user-2', 'email': 'two@example.com'}],
+        ])
+
+        result = await export_service.export_system_analytics_csv(days=7)
+
+        assert result['status'] == 'success'
+        assert 'sonic-brief-system-analytics-7d-' in result['filename']
+        rows = await _read_csv(result)
+        assert rows[0] == ['job_id', 'user_id', 'timestamp', 'minutes', 'file_name', 'user_email']
+        assert rows[1][3] == '1.50'
+        assert [r[5] for r in rows[1:]] == ['one@example.com', 'one@example.com', 'two@example.com']
+        assert mock_auth_container.query_items.call_count == 2
+        mock_cosmos_service.get_user_by_id.assert_not_called()
 
 
 class TestExportUserDetailsPDF:
@@ -295,6 +374,69 @@ class TestExportUserDetailsPDF:
         os.remove(result['file_path'])
 
 
+class TestUserReportCache:
+    """Tests for rendered PDF report caching"""
+
+    @pytest.fixture(autouse=True)
+    def _user(self, mock_cosmos_service, mock_analytics_service, sample_user):
+        mock_cosmos_service.get_user_by_id.return_value = sample_user
+        mock_analytics_service.get_user_analytics.return_value = {
+            'analytics': {'transcription_stats': {'total_minutes': 12.0, 'total_jobs': 2}}
+        }
+        mock_analytics_service.get_user_minutes_records.return_value = {
+            'records': [{'job_id': 'job-1', 'timestamp': '2024-01-01T00:00:00Z', 'audio_duration_minutes': 6.0}]
+        }
+
+    @pytest.mark.asyncio
+    async def test_repeat_export_serves_cached_file(self, export_service, counting_renderer):
+        first = await export_service.export_user_details_pdf('user-1', days=30)
+        second = await export_service.export_user_details_pdf('user-1', days=30)
+
+        assert len(counting_renderer) == 1
+        assert first['cached'] is False
+        assert second['cached'] is True
+        assert first['file_path'] == second['file_path']
+        assert os.path.exists(second['file_path'])
+
+    @pytest.mark.asyncio
+    async def test_changed_data_renders_new_report(self, export_service, mock_analytics_service, counting_renderer):
+        first = await export_service.export_user_details_pdf('user-1', days=30)
+        mock_analytics_service.get_user_analytics.return_value = {
+            'analytics': {'transcription_stats': {'total_minutes': 20.0, 'total_jobs': 3}}
+        }
+        second = await export_service.export_user_details_pdf('user-1', days=30)
+
+        assert len(counting_renderer) == 2
+        assert first['file_path'] != second['file_path']
+
+    @pytest.mark.asyncio
+    async def test_days_is_part_of_the_cache_key(self, export_service, mock_analytics_service, counting_renderer):
+        await export_service.export_user_details_pdf('user-1', days=30)
+        await export_service.export_user_details_pdf('user-1', days=60)
+
+        assert len(counting_renderer) == 2
+        mock_analytics_service.get_user_minutes_records.assert_called_with('user-1', days=60)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_exports_share_one_render(self, export_service, counting_renderer):
+        results = await asyncio.gather(
+            *(export_service.export_user_details_pdf('user-1', days=30) for _ in range(4))
+        )
+
+        assert len(counting_renderer) == 1
+        assert {r['file_path'] for r in results} == {results[0]['file_path']}
+
+    @pytest.mark.asyncio
+    async def test_prunes_least_recently_served_reports(self, export_service, counting_renderer):
+        with patch('app.services.analytics.export_service.REPORT_CACHE_MAX_FILES', 1):
+            first = await export_service.export_user_details_pdf('user-1', days=30)
+            os.utime(first['file_path'], (0, 0))
+            second = await export_service.export_user_details_pdf('user-1', days=60)
+
+        assert not os.path.exists(first['file_path'])
+        assert os.path.exists(second['file_path'])
+
+
 class TestExportAnalyticsData:
     """Tests for export_analytics_data method"""
 
@@ -29,6 +29,7 @@ def mock_job_service():
     """Mock JobService"""
     mock = Mock()
     mock.enrich_job_file_urls = Mock(side_effect=lambda job: job)
+    mock.enrich_jobs_file_urls = Mock(side_effect=lambda jobs: jobs)
     return mock
 
 
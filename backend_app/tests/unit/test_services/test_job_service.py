@@ -18,7 +18,7 @@ from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from datetime import datetime, timezone
 import uuid
 
-from app.services.jobs.job_service import JobService
+from app.services.jobs.job_service import SIGNED_URL_FIELDS, JobService, job_etag, job_summary_select
 
 
 # ============================================================================
@@ -141,6 +141,28 @@ class TestJobQueries:
         
         assert len(result) == 2
 
+    def test_listing_projection_leaves_out_large_fields(self):
+        """Test listings select summary fields, not transcripts or refinement turns."""
+        select = job_summary_select()
+        
+        assert select.startswith("SELECT c.id, c.type, c.user_id")
+        for field in SIGNED_URL_FIELDS + ("shared_with", "displayname", "refinement_count"):
+            assert f"c.{field}" in select
+        for field in ("text_content", "analysis_text", "refinement_history", "pre_session_form_data"):
+            assert f"c.{field}" not in select
+
+
+    def test_job_etag_tracks_document_viewer_and_sas_lifetime(self):
+        """Test job ETags change with the stored document, the viewer and the SAS epoch."""
+        job = {"id": "job-1", "_etag": '"0001"'}
+        etag = job_etag(job, "user-1", now=1000.0)
+        
+        assert job_etag(dict(job), "user-1", now=1001.0) == etag
+        assert job_etag(dict(job, _etag='"0002"'), "user-1", now=1000.0) != etag
+        assert job_etag(job, "user-2", now=1000.0) != etag
+        # Revalidated copies must not outlive the SAS tokens in them
+        assert job_etag(job, "user-1", now=1000.0 + 8 * 3600) != etag
+
 
 # ============================================================================
 # File URL Enrichment Tests
@@ -235,6 +257,39 @@ class TestFileURLEnrichment:
         assert "file_name" in enriched
         assert enriched["file_name"] == "test-audio.mp3"
 
+    def test_enrich_jobs_file_urls_signs_in_one_batch(self, mock_cosmos_service, mock_storage_service, job_factory):
+        """Test that a page of jobs is signed with a single sign_urls call."""
+        jobs = [
+            job_factory(
+                job_id=f"job-{i}",
+                file_path=f"https://storage.blob.core.windows.net/uploads/audio-{i}.mp3",
+                transcription_file_path=f"https://storage.blob.core.windows.net/uploads/transcription-{i}.txt",
+            )
+            for i in range(3)
+        ]
+        mock_storage_service.sign_urls = Mock(
+            side_effect=lambda urls: {url: f"{url}?sas_token=xyz" for url in urls}
+        )
+
+        service = JobService(mock_cosmos_service, mock_storage_service)
+        enriched = service.enrich_jobs_file_urls(jobs)
+
+        mock_storage_service.sign_urls.assert_called_once()
+        mock_storage_service.add_sas_token_to_url.assert_not_called()
+        assert len(mock_storage_service.sign_urls.call_args.args[0]) == 6
+        assert all("?sas_token=" in job["file_path"] for job in enriched)
+        assert all("?sas_token=" in job["transcription_file_path"] for job in enriched)
+        assert enriched[1]["file_name"] == "audio-1.mp3"
+
+    def test_enrich_jobs_file_urls_empty_page(self, mock_cosmos_service, mock_storage_service):
+        """Test that an empty page does not touch storage."""
+        mock_storage_service.sign_urls = Mock()
+
+        service = JobService(mock_cosmos_service, mock_storage_service)
+
+        assert service.enrich_jobs_file_urls([]) == []
+        mock_storage_service.sign_urls.assert_not_called()
+
 
 # ============================================================================
 # Upload and Create Workflow Tests
@@ -379,6 +434,60 @@ class TestJobValidation:
         assert "file_path" in result
         assert "status" in result
     
+    @pytest.mark.asyncio
+    async def test_async_stream_upload_and_create_job(self, mock_cosmos_service, mock_storage_service, user_factory):
+        """Test streamed upload records size, hash and sniffed audio duration."""
+        user = user_factory()
+
+        async def chunks():
+            yield b"audio-bytes"
+
+        mock_storage_service.upload_stream = AsyncMock(return_value={
+            "url": "https://storage.blob.core.windows.net/uploads/file.mp3",
+            "size_bytes": 11,
+            "sha256": "abc123",
+            "header": b"audio-bytes",
+        })
+        mock_cosmos_service.create_job = Mock(side_effect=lambda job: {**job, "_etag": "etag"})
+        mock_storage_service.add_sas_token_to_url = Mock(side_effect=lambda url: url)
+
+        service = JobService(mock_cosmos_service, mock_storage_service)
+        with patch("app.services.jobs.job_service.FileUtils.get_audio_duration_from_header", return_value=90.0) as mock_sniff:
+            result = await service.async_stream_upload_and_create_job(chunks(), "file.mp3", user, {"prompt_category_id": "cat-1"})
+
+        mock_sniff.assert_called_once_with(b"audio-bytes", 11, "file.mp3")
+        assert result["file_path"] == "https://storage.blob.core.windows.net/uploads/file.mp3"
+        assert result["file_size_bytes"] == 11
+        assert result["file_sha256"] == "abc123"
+        assert result["audio_duration_seconds"] == 90.0
+        assert result["audio_duration_minutes"] == 1.5
+        assert result["prompt_category_id"] == "cat-1"
+        assert result["status"] == "uploaded"
+
+    @pytest.mark.asyncio
+    async def test_async_stream_upload_skips_duration_for_non_audio(self, mock_cosmos_service, mock_storage_service, user_factory):
+        """Test that non-audio uploads are not sniffed for duration."""
+        user = user_factory()
+
+        async def chunks():
+            yield b"text"
+
+        mock_storage_service.upload_stream = AsyncMock(return_value={
+            "url": "https://storage.blob.core.windows.net/uploads/notes.txt",
+            "size_bytes": 4,
+            "sha256": "def456",
+            "header": b"text",
+        })
+        mock_cosmos_service.create_job = Mock(side_effect=lambda job: dict(job))
+        mock_storage_service.add_sas_token_to_url = Mock(side_effect=lambda url: url)
+
+        service = JobService(mock_cosmos_service, mock_storage_service)
+        with patch("app.services.jobs.job_service.FileUtils.get_audio_duration_from_header") as mock_sniff:
+            result = await service.async_stream_upload_and_create_job(chunks(), "notes.txt", user)
+
+        mock_sniff.assert_not_called()
+        assert "audio_duration_seconds" not in result
+
     def test_job_id_is_unique(self, mock_cosmos_service, mock_storage_service, user_factory):
         """Test that each job gets a unique ID."""
         user = user_factory()
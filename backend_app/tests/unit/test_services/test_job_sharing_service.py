@@ -8,7 +8,9 @@ get_shared_jobs, and permission validation.
 import pytest
 from datetime import datetime, timezone
 from unittest.mock import Mock, AsyncMock, patch
-from app.services.jobs.job_sharing_service import JobSharingService
+from azure.cosmos.exceptions import CosmosHttpResponseError
+
+from app.services.jobs.job_sharing_service import JobSharingService, share_index_id
 from app.core.config import DatabaseError
 
 
@@ -309,38 +311,110 @@ class TestGetJobSharingInfo:
         assert result['status'] == 'success'
 
 
+def _not_found():
+    return CosmosHttpResponseError(status_code=404, message="Not found")
+
+
+def _read_from(docs):
+    def _read_item(item, partition_key):
+        if item not in docs:
+            raise _not_found()
+        return docs[item]
+    return _read_item
+
+
 class TestGetSharedJobs:
     """Tests for get_shared_jobs method"""
 
     @pytest.mark.asyncio
     async def test_get_shared_jobs_success(self, job_sharing_service, mock_cosmos_service):
-        """Test getting jobs shared with user"""
-        shared_jobs = [
-            {
-                'id': 'job-1',
-                'user_id': 'other-owner',
-                'type': 'job',
-                'shared_with': [{'user_id': 'user-456', 'permission_level': 'view'}]
+        """Test getting jobs shared with user from the share index"""
+        docs = {
+            share_index_id('user-456'): {
+                'id': share_index_id('user-456'),
+                'backfilled': True,
+                'shared_with_me': {'job-1': {'owner_user_id': 'other-owner'}, 'job-2': {'owner_user_id': 'another-owner'}},
+                'shared_by_me': {'job-3': 1},
             },
-            {
-                'id': 'job-2',
-                'user_id': 'another-owner',
-                'type': 'job',
-                'shared_with': [{'user_id': 'user-456', 'permission_level': 'edit'}]
-            }
-        ]
-        
-        with patch('app.services.jobs.job_sharing_service.run_sync', return_value=shared_jobs):
-            result = await job_sharing_service.get_shared_jobs('user-456')
+            'job-1': {'id': 'job-1', 'user_id': 'other-owner', 'type': 'job',
+                      'shared_with': [{'user_id': 'user-456', 'permission_level': 'view'}]},
+            'job-2': {'id': 'job-2', 'user_id': 'another-owner', 'type': 'job',
+                      'shared_with': [{'user_id': 'user-456', 'permission_level': 'edit'}]},
+            'job-3': {'id': 'job-3', 'user_id': 'user-456', 'type': 'job',
+                      'shared_with': [{'user_id': 'someone-else', 'permission_level': 'view'}]},
+        }
+        mock_cosmos_service.jobs_container.read_item = Mock(side_effect=_read_from(docs))
 
-        assert isinstance(result, list)
-        assert len(result) == 2
+        result = await job_sharing_service.get_shared_jobs('user-456')
+
+        assert [job['id'] for job in result] == ['job-1', 'job-2', 'job-3']
+        mock_cosmos_service.jobs_container.query_items.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_shared_jobs_skips_stale_index_entries(self, job_sharing_service, mock_cosmos_service):
+        """Index entries for deleted, missing or no-longer-shared jobs are ignored"""
+        docs = {
+            share_index_id('user-456'): {
+                'id': share_index_id('user-456'),
+                'backfilled': True,
+                'shared_with_me': {'job-1': {}, 'job-gone': {}, 'job-unshared': {}},
+                'shared_by_me': {},
+            },
+            'job-1': {'id': 'job-1', 'user_id': 'o', 'deleted': True, 'shared_with': [{'user_id': 'user-456'}]},
+            'job-unshared': {'id': 'job-unshared', 'user_id': 'o', 'shared_with': []},
+        }
+        mock_cosmos_service.jobs_container.read_item = Mock(side_effect=_read_from(docs))
+
+        result = await job_sharing_service.get_shared_jobs('user-456')
+
+        assert result == []
+
+    @pytest.mark.asyncio
+    async def test_get_shared_jobs_backfills_missing_index(self, job_sharing_service, mock_cosmos_service):
+        """Without an index the legacy scans answer once and seed the index"""
+        shared_job = {'id': 'job-1', 'user_id': 'other-owner', 'type': 'job',
+                      'shared_with': [{'user_id': 'user-456', 'permission_level': 'edit'}]}
+        owned_job = {'id': 'job-2', 'user_id': 'user-456', 'type': 'job',
+                     'shared_with': [{'user_id': 'x'}, {'user_id': 'y'}]}
+        mock_cosmos_service.jobs_container.read_item = Mock(side_effect=_read_from({}))
+        mock_cosmos_service.jobs_container.query_items = Mock(side_effect=[[shared_job], [], [owned_job]])
+        mock_cosmos_service.jobs_container.create_item = Mock()
+
+        result = await job_sharing_service.get_shared_jobs('user-456')
+
+        assert [job['id'] for job in result] == ['job-1', 'job-2']
+        index = mock_cosmos_service.jobs_container.create_item.call_args.kwargs['body']
+        assert index['id'] == share_index_id('user-456')
+        assert index['backfilled'] is True
+        assert index['shared_with_me']['job-1']['permission_level'] == 'edit'
+        assert index['shared_by_me'] == {'job-2': 2}
+
+    @pytest.mark.asyncio
+    async def test_get_shared_jobs_keeps_legacy_email_shares(self, job_sharing_service, mock_cosmos_service):
+        """A share stored only by email stays visible once the index is backfilled"""
+        legacy_job = {'id': 'job-1', 'user_id': 'other-owner', 'type': 'job',
+                      'shared_with': [{'user_email': 'user@example.com', 'permission_level': 'view'}]}
+        docs = {}
+        mock_cosmos_service.jobs_container.read_item = Mock(side_effect=_read_from(docs))
+        mock_cosmos_service.jobs_container.query_items = Mock(side_effect=[[], [legacy_job], []])
+        mock_cosmos_service.jobs_container.create_item = Mock(
+            side_effect=lambda body: docs.update({body['id']: body, 'job-1': legacy_job})
+        )
+
+        backfilled = await job_sharing_service.get_shared_jobs('user@example.com')
+        indexed = await job_sharing_service.get_shared_jobs('user@example.com')
+
+        assert [job['id'] for job in backfilled] == ['job-1']
+        assert [job['id'] for job in indexed] == ['job-1']
 
     @pytest.mark.asyncio
     async def test_get_shared_jobs_empty(self, job_sharing_service, mock_cosmos_service):
         """Test when no jobs are shared with user"""
-        with patch('app.services.jobs.job_sharing_service.run_sync', return_value=[]):
-            result = await job_sharing_service.get_shared_jobs('user-456')
+        mock_cosmos_service.jobs_container.read_item = Mock(return_value={
+            'id': share_index_id('user-456'), 'backfilled': True, 'shared_with_me': {}, 'shared_by_me': {},
+        })
+
+        result = await job_sharing_service.get_shared_jobs('user-456')
 
         assert isinstance(result, list)
         assert result == []
@@ -353,6 +427,70 @@ class TestGetSharedJobs:
                 await job_sharing_service.get_shared_jobs('user-456')
 
 
+class TestShareIndexMaintenance:
+    """Tests for share index updates on share/unshare"""
+
+    @pytest.mark.asyncio
+    async def test_share_indexes_recipient_and_owner(self, job_sharing_service, mock_cosmos_service,
+                                                     sample_job, sample_target_user):
+        mock_cosmos_service.get_job_by_id_async.return_value = sample_job.copy()
+        mock_cosmos_service.get_user_by_email.return_value = sample_target_user
+
+        await job_sharing_service.share_job('job-123', 'owner-456', 'target@example.com', 'edit')
+
+        patches = {
+            c.kwargs['item']: c.kwargs['patch_operations']
+            for c in mock_cosmos_service.jobs_container.patch_item.call_args_list
+        }
+        recipient_op = patches[share_index_id('target-user-789')][0]
+        assert recipient_op['path'] == '/shared_with_me/job-123'
+        assert recipient_op['value']['permission_level'] == 'edit'
+        assert patches[share_index_id('owner-456')] == [
+            {'op': 'set', 'path': '/shared_by_me/job-123', 'value': 1}
+        ]
+
+    @pytest.mark.asyncio
+    async def test_share_creates_index_on_first_use(self, job_sharing_service, mock_cosmos_service,
+                                                    sample_job, sample_target_user):
+        mock_cosmos_service.get_job_by_id_async.return_value = sample_job.copy()
+        mock_cosmos_service.get_user_by_email.return_value = sample_target_user
+        mock_cosmos_service.jobs_container.patch_item = Mock(side_effect=[_not_found(), None, None])
+        mock_cosmos_service.jobs_container.create_item = Mock()
+
+        await job_sharing_service.share_job('job-123', 'owner-456', 'target@example.com')
+
+        seed = mock_cosmos_service.jobs_container.create_item.call_args.kwargs['body']
+        assert seed['id'] == share_index_id('target-user-789')
+        assert seed['backfilled'] is False
+        assert mock_cosmos_service.jobs_container.patch_item.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_index_failure_does_not_fail_share(self, job_sharing_service, mock_cosmos_service,
+                                                     sample_job, sample_target_user):
+        mock_cosmos_service.get_job_by_id_async.return_value = sample_job.copy()
+        mock_cosmos_service.get_user_by_email.return_value = sample_target_user
+        mock_cosmos_service.jobs_container.patch_item = Mock(
+            side_effect=CosmosHttpResponseError(status_code=503, message="unavailable")
+        )
+
+        result = await job_sharing_service.share_job('job-123', 'owner-456', 'target@example.com')
+
+        assert result['status'] == 'success'
+
+    @pytest.mark.asyncio
+    async def test_unshare_removes_index_entries(self, job_sharing_service, mock_cosmos_service, sample_shared_job):
+        mock_cosmos_service.get_job_by_id_async.return_value = sample_shared_job.copy()
+
+        await job_sharing_service.unshare_job('job-789', 'owner-456', 'shared1@example.com')
+
+        patches = {
+            c.kwargs['item']: c.kwargs['patch_operations']
+            for c in mock_cosmos_service.jobs_container.patch_item.call_args_list
+        }
+        assert patches[share_index_id('shared-user-1')] == [{'op': 'remove', 'path': '/shared_with_me/job-789'}]
+        assert patches[share_index_id('owner-456')] == [{'op': 'remove', 'path': '/shared_by_me/job-789'}]
+
+
 # Note: get_job_shares method not found in JobSharingService
 # Use get_job_sharing_info instead for getting share information
 
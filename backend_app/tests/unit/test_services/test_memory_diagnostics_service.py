@@ -6,13 +6,16 @@ Tests cover:
 - Process memory tracking  
 - Diagnostics enable/disable
 - Graceful handling of missing dependencies (psutil, tracemalloc)
+- Sampling mode: reading ring buffer, trace windows and growth-site diffs
 
 Coverage target: 90%+ on app/services/monitoring/memory_diagnostics_service.py
 """
 
 import pytest
 from unittest.mock import Mock, patch, MagicMock
+import asyncio
 import os
+import tracemalloc
 
 from app.services.monitoring.memory_diagnostics_service import MemoryDiagnosticsService
 
@@ -234,3 +237,152 @@ class TestServiceProperties:
         
         # Act & Assert
         assert service.pending_threshold == 300
+
+
+# ============================================================================
+# Test Class: Sampling Mode
+# ============================================================================
+
+_retained = []
+
+
+def _allocate_at_one_site():
+    _retained.append([object() for _ in range(2000)])
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestSamplingMode:
+    """Test low-overhead sampling: readings, trace windows and their diffs"""
+    
+    @pytest.fixture(autouse=True)
+    def no_tracing(self):
+        was_tracing = tracemalloc.is_tracing()
+        if was_tracing:
+            tracemalloc.stop()
+        _retained.clear()
+        yield
+        _retained.clear()
+        if was_tracing:
+            tracemalloc.start()
+    
+    def _service(self, **kwargs):
+        return MemoryDiagnosticsService(enable_diagnostics=True, mode="sampling", **kwargs)
+    
+    async def test_sampling_mode_does_not_trace_at_startup(self):
+        """Sampling mode leaves tracemalloc off outside trace windows"""
+        service = self._service()
+        
+        assert service.mode == "sampling"
+        assert not tracemalloc.is_tracing()
+    
+    async def test_readings_are_kept_in_a_ring_buffer(self):
+        """Only the newest readings are kept"""
+        service = self._service(sample_history=3)
+        
+        for _ in range(5):
+            service.take_sample()
+        
+        report = service.sampling_report()
+        assert len(report["samples"]) == 3
+        assert len(report["samples"][0]["gc_counts"]) == 3
+        assert report["samples"][0]["traced_bytes"] is None
+        assert len(service.sampling_report(readings=1)["samples"]) == 1
+    
+    async def test_rss_trend_reports_growth(self):
+        """RSS growth is computed from the first and last readings"""
+        service = self._service()
+        with patch.object(service, "_read_rss", side_effect=[100, 150, 130]):
+            for _ in range(3):
+                service.take_sample()
+        
+        trend = service.sampling_report()["rss_trend"]
+        assert trend["growth_bytes"] == 30
+        assert (trend["min_rss"], trend["max_rss"]) == (100, 150)
+    
+    async def test_trace_window_reports_retained_growth_sites_and_stops_tracing(self):
+        """A window traces only while open and records where retained memory grew"""
+        service = self._service()
+        
+        async def allocate_during_window():
+            await asyncio.sleep(0.01)
+            _allocate_at_one_site()
+        
+        window, _ = await asyncio.gather(service.trace_window(0.05), allocate_during_window())
+        
+        assert not tracemalloc.is_tracing()
+        assert window["method"] == "window"
+        assert window["growth_bytes"] > 0
+        assert any(__file__ in site["site"] for site in window["sites"])
+        assert all(site["windows_in_a_row"] == 1 for site in window["sites"])
+    
+    async def test_sites_growing_across_windows_are_persistent(self):
+        """Sites seen in consecutive windows are flagged with their previous size"""
+        service = self._service()
+        
+        for _ in range(2):
+            async def allocate_during_window():
+                await asyncio.sleep(0.01)
+                _allocate_at_one_site()
+            await asyncio.gather(service.trace_window(0.05), allocate_during_window())
+        
+        persistent = service.sampling_report()["persistent_sites"]
+        assert any(__file__ in site["site"] and site["previous_size_bytes"] for site in persistent)
+    
+    async def test_sampler_starts_only_when_enabled(self):
+        """The background sampler runs in sampling mode and stops cleanly"""
+        disabled = MemoryDiagnosticsService(enable_diagnostics=False, mode="sampling")
+        assert disabled.start_sampling() is False
+        
+        service = self._service(sample_interval=0.01, trace_interval=0.01, trace_window=0.01)
+        assert service.start_sampling() is True
+        await asyncio.sleep(0.1)
+        await service.stop_sampling()
+        
+        report = service.sampling_report()
+        assert report["sampling"] is False
+        assert report["samples"] and report["windows"]
+        assert not tracemalloc.is_tracing()
+    
+    async def test_from_config(self):
+        """Settings come from the MEMORY_* config fields"""
+        config = Mock(
+            memory_diagnostics_enabled=True,
+            memory_diagnostics_mode="sampling",
+            memory_sample_interval_seconds=15.0,
+            memory_sample_history=10,
+            memory_trace_interval_seconds=120.0,
+            memory_trace_window_seconds=2.0,
+        )
+        
+        service = MemoryDiagnosticsService.from_config(config)
+        
+        assert service.enable_diagnostics and service.mode == "sampling"
+        assert (service.sample_interval, service.trace_interval, service.trace_window_seconds) == (15.0, 120.0, 2.0)
+        assert service._samples.maxlen == 10
+    
+    @pytest.mark.parametrize(
+        "environ, enabled, mode",
+        [
+            ({}, False, "sampling"),
+            ({"ENABLE_SESSION_MEMORY_DIAG": "true", "MEMORY_DIAG_MODE": "full"}, True, "full"),
+            ({"MEMORY_DIAGNOSTICS_ENABLED": "1"}, True, "sampling"),
+        ],
+    )
+    async def test_from_config_reads_environment_names(self, environ, enabled, mode):
+        """ENABLE_SESSION_MEMORY_DIAG / MEMORY_DIAG_MODE reach the service through AppConfig"""
+        from app.core.config import AppConfig
+        
+        required = {
+            "JWT_SECRET_KEY": "secret",
+            "AZURE_STORAGE_ACCOUNT_URL": "https://example.blob.core.windows.net",
+            "AZURE_OPENAI_ENDPOINT": "https://example.openai.azure.com",
+            "AZURE_FUNCTIONS_KEY": "key",
+        }
+        with patch.dict(os.environ, {**required, **environ}, clear=True):
+            service = MemoryDiagnosticsService.from_config(AppConfig(_env_file=None))
+        
+        assert service.enable_diagnostics is enabled
+        assert service.mode == mode
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
@@ -18,7 +18,7 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime, timezone
 import uuid
 
-from app.services.prompts.prompt_service import PromptService
+from app.services.prompts.prompt_service import CATEGORY_TYPE, SUBCATEGORY_TYPE, PromptService, prompts_etag
 from app.core.dependencies import CosmosService
 
 
@@ -516,6 +516,26 @@ class TestHierarchyRetrieval:
         assert cat2["category_name"] == "Category 2"
         assert len(cat2["subcategories"]) == 1
     
+    def test_hierarchy_etag_matches_the_version_listing(self, mock_cosmos_service, mock_prompt_container, category_factory, subcategory_factory):
+        """Test the hierarchy ETag equals the one computed from list_versions rows"""
+        categories = [dict(category_factory(category_id="cat_1"), _etag='"c1"')]
+        subcategories = [dict(subcategory_factory(subcategory_id="sub_1", category_id="cat_1"), _etag='"s1"')]
+        mock_prompt_container.query_items = Mock(side_effect=[
+            categories,
+            subcategories,
+            [{"id": "sub_1", "_etag": '"s1"'}, {"id": "cat_1", "_etag": '"c1"'}],
+        ])
+        mock_cosmos_service.get_container = Mock(return_value=mock_prompt_container)
+        service = PromptService(mock_cosmos_service)
+        
+        _, etag = service.retrieve_prompts_hierarchy_with_etag()
+        versions = service.list_versions((CATEGORY_TYPE, SUBCATEGORY_TYPE))
+        
+        assert prompts_etag(versions) == etag
+        query = mock_prompt_container.query_items.call_args.kwargs
+        assert query["query"].startswith("SELECT c.id, c._etag FROM c")
+        assert query["parameters"] == [{"name": "@types", "value": [CATEGORY_TYPE, SUBCATEGORY_TYPE]}]
+    
     def test_retrieve_prompts_hierarchy_empty(self, mock_cosmos_service, mock_prompt_container):
         """Test retrieving hierarchy when no data exists"""
         # Arrange
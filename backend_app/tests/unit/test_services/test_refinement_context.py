@@ -0,0 +1,214 @@
+"""
+Unit tests for the token-budgeted refinement context.
+
+Tests cover the budget priority (analysis first), verbatim recent turns, the
+incrementally built rolling summary cached on the job, and the payload the
+refinement service sends and the turn it stores.
+"""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.services.jobs.refinement_context import (
+    SUMMARY_KEY,
+    RefinementContextBuilder,
+    count_tokens,
+    truncate_to_tokens,
+)
+from app.services.jobs.refinement_store import RefinementStore
+
+
+def _turn(index, words=50, status="success"):
+    return {
+        "user_request": f"question {index}",
+        "ai_response": " ".join(f"answer{index}" for _ in range(words)),
+        "status": status,
+    }
+
+
+def _job(history=None, analysis="The analysis.", transcript="The transcript."):
+    return {
+        "analysis_content": analysis,
+        "text_content": transcript,
+        "refinement_history": history or [],
+    }
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens():
+    # Deterministic counts whether or not tiktoken is installed
+    with patch("app.services.jobs.refinement_context._encoding", return_value=None):
+        yield
+
+
+@pytest.mark.unit
+class TestTokenCounting:
+    """Test local token counts and truncation"""
+
+    def test_estimates_four_characters_per_token(self):
+        assert count_tokens("") == 0
+        assert count_tokens("abcdefghi") == 3
+
+    def test_truncation_keeps_the_start_and_marks_the_cut(self):
+        text = "word " * 100
+
+        cut = truncate_to_tokens(text, 20)
+
+        assert count_tokens(cut) <= 20
+        assert cut.startswith("word word")
+        assert cut.endswith("[...truncated]")
+        assert truncate_to_tokens("short", 20) == "short"
+
+
+@pytest.mark.unit
+class TestRefinementContextBuilder:
+    """Test budget priority and the rolling summary"""
+
+    def test_small_sessions_are_sent_whole(self):
+        job = _job([_turn(1), _turn(2)])
+
+        context, summary_state = RefinementContextBuilder(token_budget=4000).build(job, "next?")
+
+        assert [t["user_request"] for t in context.recent_turns] == ["question 1", "question 2"]
+        assert context.original_text == "The transcript."
+        assert context.summary == ""
+        assert summary_state is None
+        assert context.total_tokens <= 4000
+
+    def test_analysis_is_kept_before_transcript_and_history(self):
+        analysis = "a" * 2400  # 600 tokens
+        job = _job([_turn(1, words=200)], analysis=analysis, transcript="t" * 4000)
+
+        context, _ = RefinementContextBuilder(token_budget=1000, summary_token_budget=100).build(job, "q")
+
+        assert context.current_analysis == analysis
+        assert context.recent_turns == []
+        assert "original_text" in context.truncated
+        assert context.total_tokens <= 1000
+
+    def test_oversized_analysis_is_truncated_to_the_budget(self):
+        job = _job(analysis="a" * 8000)
+
+        context, _ = RefinementContextBuilder(token_budget=1000).build(job, "q")
+
+        assert "current_analysis" in context.truncated
+        assert context.original_text == ""
+        assert context.total_tokens <= 1000
+
+    def test_older_turns_are_summarised_and_cached(self):
+        history = [_turn(i, words=60) for i in range(10)]
+        job = _job(history)
+        builder = RefinementContextBuilder(token_budget=1200, summary_token_budget=400)
+
+        context, summary_state = builder.build(job, "q")
+
+        covered = summary_state["turns"]
+        assert 0 < covered < 10
+        assert [t["user_request"] for t in context.recent_turns][0] == f"question {covered}"
+        assert "User: question 0" in context.summary
+        assert count_tokens(context.summary) <= 400
+
+    def test_oldest_summary_lines_roll_off(self):
+        job = _job([_turn(i, words=60) for i in range(10)])
+
+        context, summary_state = RefinementContextBuilder(token_budget=1200, summary_token_budget=100).build(job, "q")
+
+        assert "User: question 0" not in context.summary
+        assert len(summary_state["lines"]) < summary_state["turns"]
+        assert count_tokens(context.summary) <= 100
+
+    def test_summary_is_extended_incrementally(self):
+        builder = RefinementContextBuilder(token_budget=1200, summary_token_budget=2000)
+        job = _job([_turn(i, words=60) for i in range(10)])
+        _, job[SUMMARY_KEY] = builder.build(job, "q")
+        covered = job[SUMMARY_KEY]["turns"]
+        job[SUMMARY_KEY]["lines"][0] = "- cached line"
+
+        job["refinement_history"].extend(_turn(i, words=60) for i in range(10, 13))
+        context, summary_state = builder.build(job, "q")
+
+        assert summary_state["turns"] > covered
+        # Lines already in the cache are reused, not recomputed
+        assert summary_state["lines"][0] == "- cached line"
+        assert f"User: question {covered}" in context.summary
+
+    def test_summary_resumes_from_a_window_of_stored_turns(self):
+        builder = RefinementContextBuilder(token_budget=1200, summary_token_budget=2000)
+        history = [dict(_turn(i, words=60), seq=i) for i in range(20)]
+        job = _job()
+        del job["refinement_history"]
+        job[SUMMARY_KEY] = {"turns": 4, "lines": ["- cached line"]}
+
+        _, summary_state = builder.build(job, "q", history[4:], first_turn=4)
+
+        assert summary_state["turns"] > 4
+        assert summary_state["lines"][0] == "- cached line"
+        # Folding starts at the first uncovered turn, not at the start of the window list
+        assert summary_state["lines"][1].startswith("- User: question 4 ")
+
+    def test_failed_turns_are_left_out(self):
+        job = _job([_turn(1), {"user_request": "x", "ai_response": "Assistant: timed out.", "status": "fallback"}])
+
+        context, _ = RefinementContextBuilder(token_budget=4000).build(job, "q")
+
+        assert [t["user_request"] for t in context.recent_turns] == ["question 1"]
+
+    def test_render_puts_the_request_last(self):
+        context, _ = RefinementContextBuilder().build(_job([_turn(1, words=3)]), "What next?")
+
+        rendered = context.render()
+
+        assert rendered.startswith("Current analysis:\nThe analysis.")
+        assert rendered.endswith("User request: What next?")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_refinement_sends_budgeted_context_and_records_usage():
+    from app.services.jobs.analysis_refinement_service import AnalysisRefinementService
+
+    config = Mock(spec=["azure_functions", "refinement_context_token_budget", "refinement_summary_token_budget"])
+    config.azure_functions = {"base_url": "https://func.example.net"}
+    config.refinement_context_token_budget = 1200
+    config.refinement_summary_token_budget = 200
+    cosmos = Mock()
+    job = dict(_job([_turn(i, words=60) for i in range(10)]), id="job-1", user_id="user-1")
+    cosmos.get_job_by_id_async = Mock(return_value=_awaitable(job))
+    cosmos.update_job_async = Mock(return_value=_awaitable(None))
+    container = Mock()
+
+    with patch("app.services.jobs.analysis_refinement_service.get_config", return_value=config):
+        service = AnalysisRefinementService(cosmos, RefinementStore(container))
+
+    sent = {}
+
+    async def call_functions(request_data):
+        sent.update(request_data)
+        return {"refined_analysis": "Refined.", "status": "success", "usage": {"total_tokens": 900}}
+
+    with patch.object(service, "_call_functions_api", side_effect=call_functions):
+        result = await service.refine_analysis("job-1", "user-1", "Shorter please")
+
+    assert result["status"] == "success"
+    assert len(sent["conversation_history"]) < 10
+    assert sent["conversation_summary"].startswith("- User: question ")
+    assert "context_prompt" in sent
+    saved = cosmos.update_job_async.call_args.args[1]
+    assert saved[SUMMARY_KEY]["turns"] > 0
+    # The embedded turns moved to the refinements container along with the new one
+    assert "refinement_history" not in saved
+    assert saved["refinement_count"] == 11
+    entry = container.upsert_item.call_args.args[0]
+    assert entry["seq"] == 10 and entry["job_id"] == "job-1"
+    assert entry["context_tokens"] == sum(sent["context_tokens"].values())
+    assert entry["usage"] == {"total_tokens": 900}
+    assert entry["latency_ms"] >= 0
+
+
+async def _coro(value):
+    return value
+
+
+def _awaitable(value):
+    return _coro(value)
@@ -0,0 +1,97 @@
+"""
+Unit tests for the refinement turn store.
+
+Tests cover turn numbering on append, moving turns embedded in legacy job
+documents into the container, and the single-partition paged reads.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+
+from app.services.jobs.refinement_store import COUNT_KEY, HISTORY_KEY, RefinementStore
+
+
+def _pager(items):
+    pager = Mock()
+    pager.by_page.return_value = iter([items])
+    return pager
+
+
+def _turns(seqs):
+    # Newest first, as the store's queries order them
+    return [{"id": f"r{seq}", "seq": seq, "user_request": f"q{seq}"} for seq in sorted(seqs, reverse=True)]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestRefinementStoreWrites:
+    """Test appending turns and migrating embedded history"""
+
+    async def test_append_numbers_turns_and_updates_the_job(self):
+        container = Mock()
+        store = RefinementStore(container)
+        job = {"id": "job-1", COUNT_KEY: 3}
+
+        doc = await store.append(job, {"id": "r3", "timestamp": "2024-01-01T00:00:00+00:00"})
+
+        assert doc["seq"] == 3 and doc["job_id"] == "job-1" and doc["type"] == "refinement"
+        container.upsert_item.assert_called_once_with(doc)
+        assert job[COUNT_KEY] == 4
+        assert job["last_refined_at"] == "2024-01-01T00:00:00+00:00"
+
+    async def test_embedded_history_moves_out_of_the_job(self):
+        container = Mock()
+        store = RefinementStore(container)
+        job = {"id": "job-1", HISTORY_KEY: [{"id": "a", "user_request": "q0"}, {"user_request": "q1"}]}
+
+        assert await store.migrate_embedded(job) is True
+
+        docs = [call.args[0] for call in container.upsert_item.call_args_list]
+        assert [(d["id"], d["seq"]) for d in docs] == [("a", 0), ("job-1-1", 1)]
+        assert HISTORY_KEY not in job
+        assert job[COUNT_KEY] == 2
+        # Nothing left to move
+        assert await store.migrate_embedded(job) is False
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestRefinementStoreReads:
+    """Test paged, single-partition history reads"""
+
+    async def test_first_page_is_the_newest_turns_oldest_first(self):
+        container = Mock()
+        container.query_items = Mock(return_value=_pager(_turns([7, 8, 9])))
+        store = RefinementStore(container)
+
+        turns, next_before = await store.page("job-1", limit=3)
+
+        assert [t["seq"] for t in turns] == [7, 8, 9]
+        assert next_before == 7
+        kwargs = container.query_items.call_args.kwargs
+        assert kwargs["partition_key"] == "job-1"
+        assert "c.seq <" not in kwargs["query"]
+
+    async def test_older_pages_use_the_cursor(self):
+        container = Mock()
+        container.query_items = Mock(return_value=_pager(_turns([0, 1])))
+        store = RefinementStore(container)
+
+        turns, next_before = await store.page("job-1", limit=3, before=2)
+
+        assert [t["seq"] for t in turns] == [0, 1]
+        assert next_before is None
+        kwargs = container.query_items.call_args.kwargs
+        assert "c.seq < @before" in kwargs["query"]
+        assert {"name": "@before", "value": 2} in kwargs["parameters"]
+
+    async def test_recent_reads_only_uncovered_turns(self):
+        container = Mock()
+        container.query_items = Mock(return_value=_pager(_turns([5, 6])))
+        store = RefinementStore(container)
+
+        turns = await store.recent("job-1", since=5, limit=10)
+
+        assert [t["seq"] for t in turns] == [5, 6]
+        assert {"name": "@since", "value": 5} in container.query_items.call_args.kwargs["parameters"]
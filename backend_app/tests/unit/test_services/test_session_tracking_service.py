@@ -141,6 +141,64 @@ class TestSessionCreation:
         # Assert - should return None on error
         assert session_id is None
 
+    async def test_get_or_create_session_resumed_session_restarts_interval(self, mock_cosmos_service, mock_sessions_container):
+        """Test reusing an expired session resets created_at for concurrency analytics"""
+        # Arrange
+        now = datetime.now(timezone.utc)
+        old = now - timedelta(days=2)
+        mock_sessions_container.read_item = Mock(return_value={
+            "id": "user-123",
+            "user_id": "user-123",
+            "status": "expired",
+            "created_at": old.isoformat(),
+            "last_activity": old.isoformat(),
+            "expires_at": (old + timedelta(minutes=15)).isoformat(),
+            "ended_at": old.isoformat(),
+        })
+        mock_cosmos_service.sessions_container = mock_sessions_container
+        service = SessionTrackingService(mock_cosmos_service)
+
+        # Act
+        await service.get_or_create_session(user_id="user-123", timestamp=now)
+
+        # Assert
+        session = mock_sessions_container.upsert_item.call_args[0][0]
+        assert session["created_at"] == now.isoformat()
+        assert session["status"] == "active"
+        assert "ended_at" not in session
+
+    async def test_get_or_create_session_first_activity_of_day_updates_rollups(self, mock_cosmos_service, mock_sessions_container, mock_analytics_container):
+        """Test the first heartbeat of a day marks the user active in the rollups"""
+        # Arrange
+        yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+        mock_sessions_container.read_item = Mock(return_value={"id": "user-123", "user_id": "user-123", "last_activity": yesterday})
+        mock_cosmos_service.sessions_container = mock_sessions_container
+        mock_cosmos_service.analytics_container = mock_analytics_container
+        service = SessionTrackingService(mock_cosmos_service)
+
+        # Act
+        await service.get_or_create_session(user_id="user-123")
+
+        # Assert
+        patched = [c.kwargs["item"] for c in mock_analytics_container.patch_item.call_args_list]
+        assert patched[0] == "rollup_user_user-123"
+        assert patched[1].startswith("rollup_day_")
+
+    async def test_get_or_create_session_same_day_skips_rollups(self, mock_cosmos_service, mock_sessions_container, mock_analytics_container):
+        """Test later heartbeats on the same day do not write rollups"""
+        # Arrange
+        now = datetime.now(timezone.utc)
+        mock_sessions_container.read_item = Mock(return_value={"id": "user-123", "user_id": "user-123", "last_activity": now.isoformat()})
+        mock_cosmos_service.sessions_container = mock_sessions_container
+        mock_cosmos_service.analytics_container = mock_analytics_container
+        service = SessionTrackingService(mock_cosmos_service)
+
+        # Act
+        await service.get_or_create_session(user_id="user-123", timestamp=now)
+
+        # Assert
+        mock_analytics_container.patch_item.assert_not_called()
+
 
 # ============================================================================
 # Test Class: Session Deactivation
@@ -0,0 +1,168 @@
+"""
+Unit tests for durable background task stores.
+
+Tests cover SQLite persistence, worker leases and orphan claiming, purging of
+finished tasks, and the conditional patch used by the Cosmos store's claims.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+from azure.cosmos.exceptions import CosmosHttpResponseError
+
+from app.services.processing.task_store import (
+    CosmosTaskStore,
+    SqliteTaskStore,
+    create_task_store,
+)
+
+
+def _record(task_id, status="pending", owner="worker-a", user_id="user-1", created_at=100.0, updated_at=100.0):
+    return {
+        "id": task_id,
+        "task_type": "audio_analysis",
+        "user_id": user_id,
+        "status": status,
+        "payload": {"job_id": task_id},
+        "owner": owner,
+        "retry_count": 0,
+        "created_at": created_at,
+        "updated_at": updated_at,
+    }
+
+
+def _pager(items):
+    pager = Mock()
+    pager.by_page.return_value = iter([items])
+    return pager
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+async def store(tmp_path, clock):
+    store = SqliteTaskStore(str(tmp_path / "tasks.sqlite3"), clock=clock)
+    yield store
+    await store.close()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestSqliteTaskStore:
+    """Test the local SQLite task store"""
+
+    async def test_save_replaces_and_get_round_trips(self, store):
+        await store.save(_record("t1"))
+        await store.save(_record("t1", status="completed", updated_at=200.0))
+
+        record = await store.get("t1")
+
+        assert record["status"] == "completed"
+        assert record["payload"] == {"job_id": "t1"}
+        assert await store.get("missing") is None
+
+    async def test_list_for_user_is_newest_first(self, store):
+        await store.save(_record("old", created_at=1.0))
+        await store.save(_record("new", created_at=2.0))
+        await store.save(_record("other", user_id="user-2"))
+
+        records = await store.list_for_user("user-1", limit=10)
+
+        assert [r["id"] for r in records] == ["new", "old"]
+
+    async def test_tasks_of_a_live_worker_are_not_claimed(self, store):
+        await store.renew_lease("worker-a", 60)
+        await store.save(_record("t1"))
+
+        assert await store.claim_orphans("worker-b") == []
+
+    async def test_tasks_are_claimed_once_the_owner_lease_lapses(self, store, clock):
+        await store.renew_lease("worker-a", 60)
+        await store.save(_record("t1", status="running"))
+        await store.save(_record("done", status="completed"))
+        clock.now += 61
+
+        claimed = await store.claim_orphans("worker-b")
+
+        assert [r["id"] for r in claimed] == ["t1"]
+        assert (await store.get("t1"))["owner"] == "worker-b"
+        # Already claimed, so a third worker gets nothing
+        await store.renew_lease("worker-b", 60)
+        assert await store.claim_orphans("worker-c") == []
+
+    async def test_released_tasks_are_claimable(self, store):
+        await store.renew_lease("worker-a", 60)
+        await store.save(_record("t1", owner=None))
+
+        claimed = await store.claim_orphans("worker-b")
+
+        assert [r["id"] for r in claimed] == ["t1"]
+
+    async def test_purge_removes_only_old_finished_tasks(self, store):
+        await store.save(_record("old-done", status="completed", updated_at=10.0))
+        await store.save(_record("old-live", status="pending", updated_at=10.0))
+        await store.save(_record("new-done", status="failed", updated_at=500.0))
+
+        removed = await store.purge_finished(before=100.0)
+
+        assert removed == 1
+        assert await store.get("old-done") is None
+        assert await store.get("old-live") is not None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestCosmosTaskStore:
+    """Test Cosmos documents and conditional claims"""
+
+    async def test_finished_tasks_get_a_ttl(self):
+        container = Mock()
+        store = CosmosTaskStore(container, retention_seconds=3600)
+
+        await store.save(_record("t1", status="completed"))
+
+        body = container.upsert_item.call_args.args[0]
+        assert body["type"] == "background_task"
+        assert body["ttl"] == 3600
+
+    async def test_claim_skips_tasks_taken_by_another_worker(self):
+        container = Mock()
+        orphans = [_record("t1", owner="dead"), _record("t2", owner=None)]
+        container.query_items = Mock(
+            side_effect=lambda query, **kwargs: _pager(orphans if "TOP" in query else ["live-worker"])
+        )
+
+        def patch_item(item, partition_key, patch_operations, filter_predicate):
+            if item == "t1":
+                raise CosmosHttpResponseError(status_code=412, message="Precondition failed")
+            return dict(_record(item), owner=patch_operations[0]["value"])
+
+        container.patch_item = Mock(side_effect=patch_item)
+        store = CosmosTaskStore(container)
+
+        claimed = await store.claim_orphans("me")
+
+        assert [(r["id"], r["owner"]) for r in claimed] == [("t2", "me")]
+        predicates = [call.kwargs["filter_predicate"] for call in container.patch_item.call_args_list]
+        assert predicates[0] == "FROM c WHERE c.owner = 'dead'"
+        assert "IS_NULL(c.owner)" in predicates[1]
+
+
+@pytest.mark.unit
+def test_memory_store_keeps_state_in_process(tmp_path):
+    config = Mock(background_task_store="memory")
+    assert create_task_store(config) is None
+
+    config = Mock(background_task_store="sqlite", background_task_sqlite_path=str(tmp_path / "t.sqlite3"))
+    assert isinstance(create_task_store(config), SqliteTaskStore)
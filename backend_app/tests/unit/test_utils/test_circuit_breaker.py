@@ -0,0 +1,226 @@
+"""
+Unit tests for per-endpoint circuit breakers.
+
+Tests cover sliding-window failure-rate and slow-call tripping, the limit on
+concurrent half-open probes, endpoint keying in the registry and the breaker
+state reported by the system health service.
+"""
+
+from unittest.mock import Mock, patch
+
+import httpx
+import pytest
+
+from app.utils.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+    endpoint_key,
+)
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _breaker(clock, **kwargs):
+    settings = dict(
+        failure_threshold=100,
+        recovery_timeout=30,
+        window_seconds=60,
+        minimum_calls=4,
+        failure_rate_threshold=0.5,
+        clock=clock,
+    )
+    settings.update(kwargs)
+    return CircuitBreaker(**settings)
+
+
+def _trip(breaker):
+    for _ in range(breaker.minimum_calls):
+        breaker.record_failure()
+    assert breaker.state == "OPEN"
+
+
+@pytest.mark.unit
+class TestSlidingWindow:
+    """Test failure-rate and slow-call thresholds"""
+
+    def test_opens_at_failure_rate_once_minimum_calls_reached(self):
+        breaker = _breaker(FakeClock())
+
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_success()
+        assert breaker.state == "CLOSED"
+
+        breaker.record_failure()
+
+        assert breaker.state == "OPEN"
+        assert breaker.snapshot()["failure_rate"] == 0.5
+
+    def test_old_outcomes_leave_the_window(self):
+        clock = FakeClock()
+        breaker = _breaker(clock)
+        breaker.record_failure()
+        breaker.record_failure()
+        clock.now += 61
+
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_success()
+
+        assert breaker.state == "CLOSED"
+        assert breaker.snapshot()["calls"] == 4
+
+    def test_opens_at_slow_call_rate(self):
+        breaker = _breaker(FakeClock(), slow_call_seconds=2.0, slow_call_rate_threshold=0.75)
+
+        for duration in (5.0, 5.0, 0.1):
+            breaker.record_success(duration)
+        assert breaker.state == "CLOSED"
+
+        breaker.record_success(5.0)
+
+        assert breaker.state == "OPEN"
+        assert breaker.snapshot()["slow_calls"] == 3
+
+    def test_consecutive_failures_still_trip_before_minimum_calls(self):
+        breaker = _breaker(FakeClock(), failure_threshold=2, minimum_calls=50)
+
+        breaker.record_failure()
+        breaker.record_failure()
+
+        assert breaker.state == "OPEN"
+
+
+@pytest.mark.unit
+class TestHalfOpenProbes:
+    """Test the half-open probe limit"""
+
+    def test_only_configured_probes_are_admitted(self):
+        clock = FakeClock()
+        breaker = _breaker(clock, half_open_max_calls=2)
+        _trip(breaker)
+        assert not breaker.try_acquire()
+        clock.now += 31
+
+        admitted = [breaker.try_acquire() for _ in range(3)]
+
+        assert admitted == [True, True, False]
+        assert breaker.state == "HALF_OPEN"
+        assert breaker.snapshot()["rejected"] == 2
+
+    def test_probe_success_closes_and_clears_the_window(self):
+        clock = FakeClock()
+        breaker = _breaker(clock)
+        _trip(breaker)
+        clock.now += 31
+
+        assert breaker.try_acquire()
+        breaker.record_success(0.1)
+
+        assert breaker.state == "CLOSED"
+        assert breaker.snapshot()["failures"] == 0
+
+    def test_probe_failure_reopens_and_restarts_recovery(self):
+        clock = FakeClock()
+        breaker = _breaker(clock)
+        _trip(breaker)
+        clock.now += 31
+
+        assert breaker.try_acquire()
+        breaker.record_failure()
+
+        assert breaker.state == "OPEN"
+        assert breaker.retry_after() == 30
+        assert breaker.snapshot()["times_opened"] == 2
+
+    def test_released_probe_frees_its_slot(self):
+        clock = FakeClock()
+        breaker = _breaker(clock)
+        _trip(breaker)
+        clock.now += 31
+
+        assert breaker.try_acquire()
+        breaker.record(None)
+
+        assert breaker.try_acquire()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestGuard:
+    """Test the async guard"""
+
+    async def test_rejects_without_running_the_body_when_open(self):
+        breaker = _breaker(FakeClock(), name="func/api/analyze-audio")
+        _trip(breaker)
+        body = Mock()
+
+        with pytest.raises(CircuitOpenError, match="circuit breaker is OPEN") as exc_info:
+            async with breaker.guard():
+                body()
+
+        body.assert_not_called()
+        assert exc_info.value.status_code == 503
+
+    async def test_client_errors_do_not_count_as_failures(self):
+        breaker = _breaker(FakeClock())
+        response = httpx.Response(404, request=httpx.Request("POST", "https://func/api/x"))
+
+        with pytest.raises(httpx.HTTPStatusError):
+            async with breaker.guard():
+                response.raise_for_status()
+
+        assert breaker.snapshot()["failures"] == 0
+        assert breaker.snapshot()["calls"] == 1
+
+
+@pytest.mark.unit
+class TestRegistry:
+    """Test endpoint keying"""
+
+    def test_endpoint_key_drops_scheme_query_and_trailing_slash(self):
+        assert endpoint_key("https://func.example.net/api/refine-text/?code=x") == "func.example.net/api/refine-text"
+        assert endpoint_key("openai-chat") == "openai-chat"
+
+    def test_endpoints_on_one_host_do_not_share_a_breaker(self):
+        registry = CircuitBreakerRegistry(failure_threshold=1)
+        _audio = registry.get("https://func.example.net/api/analyze-audio")
+        _audio.record_failure()
+
+        refine = registry.get("https://func.example.net/api/refine-analysis")
+
+        assert refine.try_acquire()
+        assert registry.get("http://func.example.net/api/analyze-audio") is _audio
+        assert registry.open_count() == 1
+        assert set(registry.snapshot()) == {
+            "func.example.net/api/analyze-audio",
+            "func.example.net/api/refine-analysis",
+        }
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_health_reports_breakers_and_degrades_when_one_is_open():
+    from app.services.monitoring.system_health_service import SystemHealthService
+
+    registry = CircuitBreakerRegistry(failure_threshold=1)
+    registry.get("https://func.example.net/api/analyze-audio").record_failure()
+    service = SystemHealthService(Mock())
+
+    with patch(
+        "app.services.monitoring.system_health_service.get_circuit_breaker_registry", return_value=registry
+    ), patch.object(service, "_test_api_response_time", return_value=1.0), patch.object(
+        service, "_test_database_health", return_value=1.0
+    ), patch.object(service, "_get_real_memory_usage", return_value=10.0):
+        health = await service.get_system_health()
+
+    assert health.status == "degraded"
+    assert health.circuit_breakers["func.example.net/api/analyze-audio"]["state"] == "OPEN"
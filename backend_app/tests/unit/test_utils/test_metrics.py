@@ -0,0 +1,211 @@
+"""
+Unit tests for request metrics.
+
+Tests cover histogram bucketing, RU attribution through the request context
+(including worker threads), route-template labels from MetricsMiddleware,
+thread pool gauges, the Prometheus rendering and the admin-only endpoint.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.errors import PermissionError
+from app.middleware.metrics_middleware import MetricsMiddleware
+from app.routers.system.health import get_metrics
+from app.utils.metrics import (
+    Histogram,
+    MetricsRegistry,
+    RequestCharge,
+    current_request_charge,
+    end_request_charge,
+    record_request_charge,
+    start_request_charge,
+)
+from app.utils.query_metrics import execute_query_with_metrics
+
+
+def _container(charge: float):
+    def query_items(query, parameters=None, response_hook=None, **kwargs):
+        response_hook({"x-ms-request-charge": str(charge)}, [{"id": "1"}])
+        return iter([{"id": "1"}])
+
+    container = Mock()
+    container.query_items = Mock(side_effect=query_items)
+    return container
+
+
+@pytest.mark.unit
+class TestHistogram:
+    """Test bucket boundaries"""
+
+    def test_values_on_a_bound_fall_in_that_bucket(self):
+        histogram = Histogram((0.1, 1.0))
+
+        for value in (0.05, 0.1, 0.5, 5.0):
+            histogram.observe(value)
+
+        assert histogram.counts == [2, 1, 1]
+        assert histogram.count == 4
+        assert histogram.sum == pytest.approx(5.65)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestRequestCharge:
+    """Test RU attribution through the context variable"""
+
+    async def test_queries_add_to_current_request(self):
+        charge, token = start_request_charge()
+        try:
+            execute_query_with_metrics(_container(2.5), "SELECT * FROM c")
+            # Worker threads inherit the request context
+            await asyncio.to_thread(execute_query_with_metrics, _container(4.0), "SELECT * FROM c")
+        finally:
+            end_request_charge(token)
+
+        assert charge.request_units == pytest.approx(6.5)
+        assert charge.queries == 2
+
+    async def test_no_request_no_attribution(self):
+        record_request_charge(10.0)
+        execute_query_with_metrics(_container(1.0), "SELECT * FROM c")
+
+        assert current_request_charge() is None
+
+
+@pytest.mark.unit
+class TestMetricsMiddleware:
+    """Test per-route recording"""
+
+    @pytest.fixture
+    def registry(self):
+        return MetricsRegistry()
+
+    @pytest.fixture
+    def client(self, registry):
+        app = FastAPI()
+
+        @app.get("/api/jobs/{job_id}")
+        async def get_job(job_id: str):
+            record_request_charge(3.0)
+            record_request_charge(1.5)
+            return {"id": job_id}
+
+        app.add_middleware(MetricsMiddleware, registry=registry)
+        return TestClient(app)
+
+    def test_labels_use_route_template_and_sum_ru(self, client, registry):
+        client.get("/api/jobs/a")
+        client.get("/api/jobs/b")
+        client.get("/nope")
+
+        text = registry.render_prometheus()
+
+        assert 'http_requests_total{method="GET",route="/api/jobs/{job_id}",status="200"} 2' in text
+        assert 'http_requests_total{method="GET",route="unmatched",status="404"} 1' in text
+        assert 'http_request_duration_seconds_count{method="GET",route="/api/jobs/{job_id}"} 2' in text
+        assert 'cosmos_request_units_per_request_bucket{method="GET",route="/api/jobs/{job_id}",le="5"} 2' in text
+        assert 'cosmos_request_units_per_request_sum{method="GET",route="/api/jobs/{job_id}"} 9' in text
+        assert 'cosmos_queries_total{method="GET",route="/api/jobs/{job_id}"} 4' in text
+
+    def test_unknown_methods_share_one_label(self, client, registry):
+        client.request("PURGE", "/api/jobs/a")
+        client.request("X-RANDOM-1", "/api/jobs/a")
+        client.request("X-RANDOM-2", "/nope")
+        client.request("DELETE", "/api/jobs/a")
+
+        text = registry.render_prometheus()
+
+        assert 'http_requests_total{method="OTHER",route="/api/jobs/{job_id}",status="405"} 2' in text
+        assert 'http_requests_total{method="OTHER",route="unmatched",status="404"} 1' in text
+        assert 'method="DELETE"' in text
+        assert "PURGE" not in text and "X-RANDOM" not in text
+
+
+@pytest.mark.unit
+class TestMetricsRegistry:
+    """Test rendering and gauges"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry(latency_buckets=(0.1, 1.0))
+        for duration in (0.05, 0.5, 2.0):
+            registry.observe_request("GET", "/x", 200, duration)
+
+        text = registry.render_prometheus()
+
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/x",le="0.1"} 1' in text
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/x",le="1"} 2' in text
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/x",le="+Inf"} 3' in text
+        assert "# TYPE http_request_duration_seconds histogram" in text
+
+    def test_requests_without_queries_have_no_ru_series(self):
+        registry = MetricsRegistry()
+        registry.observe_request("GET", "/x", 200, 0.01, RequestCharge())
+
+        assert "cosmos_request_units_per_request_count" not in registry.render_prometheus()
+
+    def test_threadpool_queue_depth(self):
+        registry = MetricsRegistry()
+        executor = ThreadPoolExecutor(max_workers=3)
+        registry.register_threadpool("reports", lambda: executor)
+        registry.register_threadpool("idle", lambda: None)
+        try:
+            stats = registry.threadpool_stats()
+            text = registry.render_prometheus()
+        finally:
+            executor.shutdown()
+
+        assert stats["reports"] == {"queue_depth": 0, "workers": 0, "max_workers": 3}
+        assert "idle" not in stats
+        assert 'threadpool_max_workers{pool="reports"} 3' in text
+
+    def test_registered_gauges_are_read_at_scrape_time(self):
+        registry = MetricsRegistry()
+        depth = [3]
+        registry.register_gauge("background_queue_depth", "Tasks waiting.", lambda: depth[0])
+
+        depth[0] = 7
+        text = registry.render_prometheus()
+
+        assert "# TYPE background_queue_depth gauge" in text
+        assert "background_queue_depth 7" in text
+
+    def test_time_to_first_token_is_a_histogram_per_upstream(self):
+        registry = MetricsRegistry()
+        registry.observe_time_to_first_token("azure_openai", 0.4)
+        registry.observe_time_to_first_token("azure_openai", 1.5)
+
+        text = registry.render_prometheus()
+
+        assert 'upstream_time_to_first_token_seconds_bucket{upstream="azure_openai",le="0.5"} 1' in text
+        assert 'upstream_time_to_first_token_seconds_count{upstream="azure_openai"} 2' in text
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.observe_request("GET", 'odd"route', 200, 0.01)
+
+        assert 'route="odd\\"route"' in registry.render_prometheus()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestMetricsEndpoint:
+    """Test the admin-only exposition endpoint"""
+
+    async def test_admin_gets_prometheus_text(self):
+        registry = MetricsRegistry()
+        registry.observe_request("GET", "/x", 200, 0.01)
+
+        response = await get_metrics(current_user={"id": "admin", "permission": "Admin"}, registry=registry)
+
+        assert response.media_type.startswith("text/plain; version=0.0.4")
+        assert b'route="/x"' in response.body
+
+    async def test_editor_is_rejected(self):
+        with pytest.raises(PermissionError):
+            await get_metrics(current_user={"id": "editor", "permission": "Editor"}, registry=MetricsRegistry())
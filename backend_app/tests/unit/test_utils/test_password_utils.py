@@ -0,0 +1,101 @@
+"""
+Unit tests for password hashing helpers.
+
+Tests cover sync/async hashing and verification, executor bounding and
+shutdown, and that bcrypt work runs off the event loop thread.
+"""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from app.utils import password_utils
+
+
+@pytest.fixture(autouse=True)
+def fresh_executor():
+    """Each test gets a freshly created executor."""
+    password_utils.shutdown()
+    yield
+    password_utils.shutdown()
+
+
+class TestPasswordHashing:
+    """Test hashing and verification round-trips"""
+
+    def test_sync_hash_and_verify(self):
+        hashed = password_utils.get_password_hash("s3cret")
+
+        assert hashed != "s3cret"
+        assert password_utils.verify_password("s3cret", hashed)
+        assert not password_utils.verify_password("wrong", hashed)
+
+    @pytest.mark.asyncio
+    async def test_async_hash_and_verify(self):
+        hashed = await password_utils.get_password_hash_async("s3cret")
+
+        assert await password_utils.verify_password_async("s3cret", hashed)
+        assert not await password_utils.verify_password_async("wrong", hashed)
+
+
+class TestPasswordExecutor:
+    """Test the dedicated bcrypt executor"""
+
+    @pytest.mark.asyncio
+    async def test_verify_runs_off_event_loop_thread(self):
+        loop_thread = threading.get_ident()
+        seen = {}
+
+        def fake_verify(plain, hashed):
+            seen["thread"] = threading.get_ident()
+            seen["name"] = threading.current_thread().name
+            return True
+
+        with patch.object(password_utils, "verify_password", side_effect=fake_verify):
+            assert await password_utils.verify_password_async("a", "b")
+
+        assert seen["thread"] != loop_thread
+        assert seen["name"].startswith("password-hash")
+
+    def test_worker_count_is_bounded_by_cpu_count(self):
+        with patch("app.core.config.get_config") as mock_config, \
+                patch("app.utils.password_utils.os.cpu_count", return_value=2):
+            mock_config.return_value.password_hash_workers = 64
+            assert password_utils._configured_worker_count() == 2
+
+    def test_worker_count_falls_back_to_default(self):
+        with patch("app.core.config.get_config", side_effect=Exception("no config")), \
+                patch("app.utils.password_utils.os.cpu_count", return_value=8):
+            assert password_utils._configured_worker_count() == password_utils.DEFAULT_PASSWORD_HASH_WORKERS
+
+    @pytest.mark.asyncio
+    async def test_concurrent_verifications_are_capped_by_pool_size(self):
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+        release = threading.Event()
+
+        def slow_verify(plain, hashed):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            release.wait(0.05)
+            with lock:
+                active -= 1
+            return True
+
+        with patch.object(password_utils, "_configured_worker_count", return_value=2), \
+                patch.object(password_utils, "verify_password", side_effect=slow_verify):
+            results = await asyncio.gather(*(password_utils.verify_password_async("a", "b") for _ in range(6)))
+
+        assert all(results)
+        assert peak == 2
+
+    def test_shutdown_resets_executor(self):
+        first = password_utils._get_executor()
+        password_utils.shutdown()
+
+        assert password_utils._get_executor() is not first
@@ -0,0 +1,59 @@
+"""
+Unit tests for the user report PDF renderer.
+
+Tests cover snapshot versioning and in-process rendering of the report.
+"""
+
+import pytest
+
+from app.utils.pdf_report import format_datetime, render_user_report_pdf, report_version
+
+
+def _snapshot(**overrides):
+    snapshot = {
+        'user_id': 'user-1',
+        'days': 30,
+        'include_analytics': True,
+        'user': {'id': 'user-1', 'email': 'user@example.com', 'is_active': True},
+        'analytics': {'transcription_stats': {'total_minutes': 12.5, 'total_jobs': 2}, 'activity_stats': {}},
+        'records': [{'job_id': 'job-1', 'timestamp': '2024-01-01T00:00:00Z', 'audio_duration_minutes': 6.0}],
+        'generated_at': '2024-01-02T00:00:00+00:00',
+    }
+    snapshot.update(overrides)
+    return snapshot
+
+
+@pytest.mark.unit
+class TestReportVersion:
+    """Test report version digests"""
+
+    def test_ignores_generation_time(self):
+        assert report_version(_snapshot()) == report_version(_snapshot(generated_at='2025-01-01T00:00:00+00:00'))
+
+    def test_changes_with_report_data(self):
+        assert report_version(_snapshot()) != report_version(_snapshot(days=60))
+        assert report_version(_snapshot()) != report_version(_snapshot(records=[]))
+
+
+@pytest.mark.unit
+class TestRenderUserReport:
+    """Test PDF rendering"""
+
+    def test_renders_pdf_file(self, tmp_path):
+        output = tmp_path / 'report.pdf'
+
+        render_user_report_pdf(_snapshot(), str(output))
+
+        assert output.read_bytes().startswith(b'%PDF')
+
+    def test_renders_without_analytics(self, tmp_path):
+        output = tmp_path / 'report.pdf'
+
+        render_user_report_pdf(_snapshot(analytics=None, records=[]), str(output))
+
+        assert output.exists()
+
+    def test_format_datetime(self):
+        assert format_datetime('2024-01-01T12:00:00Z') == '2024-01-01 12:00:00 UTC'
+        assert format_datetime(None) == 'N/A'
+        assert format_datetime('not a date') == 'not a date'
@@ -0,0 +1,252 @@
+"""
+Unit tests for the permission cache backends.
+
+Tests cover LRU bounds, index-based invalidation, lazy expiry and sweeping for
+the in-memory cache, the Redis backend against fakeredis, and backend selection
+from configuration.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from app.core.config import AppConfig
+from app.utils.permission_cache import (
+    InMemoryPermissionCache,
+    RedisPermissionCache,
+    _create_permission_cache,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock):
+    return InMemoryPermissionCache(default_ttl=60, max_entries=3, sweep_interval=30, clock=clock)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestInMemoryPermissionCache:
+    """Test the bounded in-memory cache"""
+
+    async def test_round_trip(self, cache):
+        await cache.set_user_permission("user-1", "Admin")
+
+        assert await cache.get_user_permission("user-1") == "Admin"
+        assert await cache.get_user_permission("user-2") is None
+
+    async def test_clear_drops_entries_and_indexes(self, cache):
+        await cache.set_user_permission("user-1", "Admin")
+        await cache.set_users_by_permission("Admin", [{"id": "user-1"}])
+
+        await cache.clear()
+
+        assert await cache.get_user_permission("user-1") is None
+        info = await cache.get_cache_info()
+        assert info["total_permission_keys"] == 0
+        assert info["memory_usage_estimate_bytes"] == 0
+        assert info["indexed_users"] == info["indexed_permission_levels"] == 0
+
+    async def test_evicts_least_recently_used(self, cache):
+        for i in range(3):
+            await cache.set_user_permission(f"user-{i}", "User")
+        await cache.get_user_permission("user-0")
+
+        await cache.set_user_permission("user-3", "User")
+
+        assert await cache.get_user_permission("user-1") is None
+        assert await cache.get_user_permission("user-0") == "User"
+        info = await cache.get_cache_info()
+        assert info["total_permission_keys"] == 3
+        assert info["evictions"] == 1
+
+    async def test_invalidate_user_is_exact_and_covers_group_lists(self, cache):
+        await cache.set_user_permission("user-1", "Admin")
+        await cache.set_user_permission("user-12", "User")
+        await cache.set_users_by_permission("Admin", [{"id": "user-1"}])
+
+        await cache.invalidate_user_cache("user-1")
+
+        assert await cache.get_user_permission("user-1") is None
+        assert await cache.get_users_by_permission("Admin") is None
+        assert await cache.get_user_permission("user-12") == "User"
+
+    async def test_invalidate_permission_level(self, cache):
+        await cache.set_users_by_permission("Admin", [{"id": "user-1"}])
+        await cache.set_users_by_permission("User", [{"id": "user-2"}])
+
+        await cache.invalidate_permission_level_cache("Admin")
+
+        assert await cache.get_users_by_permission("Admin") is None
+        assert await cache.get_users_by_permission("User") == [{"id": "user-2"}]
+        assert (await cache.get_cache_info())["indexed_permission_levels"] == 1
+
+    async def test_lazy_expiry_on_read(self, cache, clock):
+        await cache.set_user_permission("user-1", "Admin", ttl=10)
+
+        clock.now += 11
+
+        assert await cache.get_user_permission("user-1") is None
+        assert (await cache.get_cache_info())["total_permission_keys"] == 0
+
+    async def test_writes_sweep_expired_entries_periodically(self, cache, clock):
+        await cache.set_user_permission("user-1", "Admin", ttl=10)
+        await cache.set_user_permission("user-2", "User", ttl=10)
+
+        clock.now += 31
+        await cache.set_user_permission("user-3", "User")
+
+        info = await cache.get_cache_info()
+        assert info["total_permission_keys"] == 1
+        assert info["expirations"] == 2
+        assert info["indexed_users"] == 1
+
+    async def test_memory_estimate_tracks_entries(self, cache):
+        await cache.set_users_by_permission("Admin", [{"id": "user-1", "email": "a@example.com"}])
+        populated = (await cache.get_cache_info())["memory_usage_estimate_bytes"]
+
+        await cache.invalidate_permission_level_cache("Admin")
+
+        assert populated > 0
+        assert (await cache.get_cache_info())["memory_usage_estimate_bytes"] == 0
+
+    async def test_multiple_permissions(self, cache):
+        await cache.set_multiple_permissions({"user-1": "Admin", "user-2": "User"})
+
+        result = await cache.get_multiple_permissions(["user-1", "user-2", "user-9"])
+
+        assert result == {"user-1": "Admin", "user-2": "User", "user-9": None}
+
+
+@pytest.fixture
+async def redis_cache():
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    cache = RedisPermissionCache(key_prefix="permission:", default_ttl=60, client=client)
+    yield cache
+    await cache.close()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestRedisPermissionCache:
+    """Test the Redis-backed cache"""
+
+    async def test_round_trip_with_expiry(self, redis_cache):
+        await redis_cache.set_user_permission("user-1", "Admin", ttl=30)
+
+        assert await redis_cache.get_user_permission("user-1") == "Admin"
+        assert 0 < await redis_cache.redis.ttl("permission:user:user-1") <= 30
+
+    async def test_group_lists_round_trip(self, redis_cache):
+        users = [{"id": "user-1", "email": "a@example.com"}]
+        await redis_cache.set_users_by_permission("Admin", users)
+
+        assert await redis_cache.get_users_by_permission("Admin") == users
+
+    async def test_invalidate_user_drops_indexed_group_lists(self, redis_cache):
+        await redis_cache.set_user_permission("user-1", "Admin")
+        await redis_cache.set_users_by_permission("Admin", [{"id": "user-1"}])
+        await redis_cache.set_users_by_permission("User", [{"id": "user-2"}])
+
+        await redis_cache.invalidate_user_cache("user-1")
+
+        assert await redis_cache.get_user_permission("user-1") is None
+        assert await redis_cache.get_users_by_permission("Admin") is None
+        assert await redis_cache.get_users_by_permission("User") == [{"id": "user-2"}]
+
+    async def test_clear_only_drops_this_prefix(self, redis_cache):
+        await redis_cache.set_user_permission("user-1", "Admin")
+        await redis_cache.set_users_by_permission("Admin", [{"id": "user-1"}])
+        await redis_cache.redis.set("other:key", "kept")
+
+        await redis_cache.clear()
+
+        assert await redis_cache.get_user_permission("user-1") is None
+        assert await redis_cache.get_users_by_permission("Admin") is None
+        assert await redis_cache.redis.keys("permission:*") == []
+        assert await redis_cache.redis.get("other:key") == "kept"
+
+    async def test_multiple_permissions(self, redis_cache):
+        await redis_cache.set_multiple_permissions({"user-1": "Admin", "user-2": "User"})
+
+        result = await redis_cache.get_multiple_permissions(["user-1", "user-2", "user-9"])
+
+        assert result == {"user-1": "Admin", "user-2": "User", "user-9": None}
+
+    async def test_cache_info(self, redis_cache):
+        await redis_cache.set_user_permission("user-1", "Admin")
+        await redis_cache.get_user_permission("user-1")
+
+        info = await redis_cache.get_cache_info()
+
+        assert info["cache_type"] == "redis"
+        assert info["hits"] == 1
+
+
+@pytest.mark.unit
+class TestCreatePermissionCache:
+    """Test backend selection from configuration"""
+
+    def _config(self, **overrides):
+        values = {
+            "cache_type": "in_memory",
+            "cache_redis_url": None,
+            "cache_key_prefix": "perm:",
+            "cache_default_ttl": 120,
+            "cache_max_entries": 50,
+        }
+        values.update(overrides)
+        return SimpleNamespace(**values)
+
+    def test_in_memory_from_app_config(self):
+        cache = _create_permission_cache(self._config())
+
+        assert isinstance(cache, InMemoryPermissionCache)
+        assert cache.key_prefix == "perm:"
+        assert cache.max_entries == 50
+
+    def test_redis_when_configured(self):
+        pytest.importorskip("redis")
+
+        cache = _create_permission_cache(self._config(cache_type="redis", cache_redis_url="redis://localhost:6379/0"))
+
+        assert isinstance(cache, RedisPermissionCache)
+        assert cache.default_ttl == 120
+
+    def test_redis_without_url_falls_back(self):
+        cache = _create_permission_cache(self._config(cache_type="redis"))
+
+        assert isinstance(cache, InMemoryPermissionCache)
+
+    @pytest.mark.parametrize(
+        "environ, expected",
+        [
+            ({"REDIS_URL": "redis://shared:6379/0"}, "redis://shared:6379/0"),
+            ({"REDIS_URL": "redis://shared:6379/0", "CACHE_REDIS_URL": "redis://cache:6379/1"}, "redis://cache:6379/1"),
+        ],
+    )
+    def test_redis_url_from_environment(self, environ, expected):
+        required = {
+            "JWT_SECRET_KEY": "secret",
+            "AZURE_STORAGE_ACCOUNT_URL": "https://example.blob.core.windows.net",
+            "AZURE_OPENAI_ENDPOINT": "https://example.openai.azure.com",
+            "AZURE_FUNCTIONS_KEY": "key",
+        }
+        with patch.dict("os.environ", {**required, **environ}, clear=True):
+            config = AppConfig(_env_file=None)
+
+        assert config.cache_redis_url == expected
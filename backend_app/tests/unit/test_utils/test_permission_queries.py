@@ -0,0 +1,127 @@
+"""
+Unit tests for PermissionQueryOptimizer bulk permission lookups.
+
+Tests cover cache-first lookups, chunked parameterised queries, projection,
+cache fill, the single-user cached check and clearing the cache.
+"""
+
+from unittest.mock import Mock, patch
+
+import pytest
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
+
+from app.utils.permission_cache import InMemoryPermissionCache
+from app.utils.permission_queries import PermissionQueryOptimizer
+
+USERS = {f"user-{i}": ("Admin" if i % 2 else "User") for i in range(250)}
+
+
+def _query_items(query, parameters, enable_cross_partition_query):
+    ids = parameters[0]["value"]
+    return [{"id": uid, "permission": USERS[uid]} for uid in ids if uid in USERS]
+
+
+@pytest.fixture
+def container():
+    container = Mock()
+    container.query_items = Mock(side_effect=_query_items)
+    return container
+
+
+@pytest.fixture
+def permission_cache():
+    return InMemoryPermissionCache(default_ttl=60)
+
+
+@pytest.fixture
+def optimizer(container, permission_cache):
+    return PermissionQueryOptimizer(container=container, permission_cache=permission_cache)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestBulkCheckPermissions:
+    """Test the bulk permission path"""
+
+    async def test_uses_parameterised_array_contains(self, optimizer, container):
+        result = await optimizer.bulk_check_permissions(["user-1", "user-2"])
+
+        assert result == {"user-1": "Admin", "user-2": "User"}
+        kwargs = container.query_items.call_args.kwargs
+        assert "ARRAY_CONTAINS(@ids, c.id)" in kwargs["query"]
+        assert kwargs["query"].startswith("SELECT c.id, c.permission FROM c")
+        assert kwargs["parameters"] == [{"name": "@ids", "value": ["user-1", "user-2"]}]
+
+    async def test_chunks_large_id_lists(self, optimizer, container):
+        with patch("app.utils.permission_queries.BULK_PERMISSION_CHUNK_SIZE", 100):
+            result = await optimizer.bulk_check_permissions(list(USERS))
+
+        assert len(result) == 250
+        assert container.query_items.call_count == 3
+        chunk_sizes = sorted(len(c.kwargs["parameters"][0]["value"]) for c in container.query_items.call_args_list)
+        assert chunk_sizes == [50, 100, 100]
+
+    async def test_fills_cache_and_skips_cached_ids(self, optimizer, container, permission_cache):
+        await optimizer.bulk_check_permissions(["user-1", "user-2"])
+        assert await permission_cache.get_user_permission("user-1") == "Admin"
+
+        container.query_items.reset_mock()
+        result = await optimizer.bulk_check_permissions(["user-1", "user-2", "user-3"])
+
+        assert result == {"user-1": "Admin", "user-2": "User", "user-3": "Admin"}
+        assert container.query_items.call_args.kwargs["parameters"][0]["value"] == ["user-3"]
+
+    async def test_all_cached_needs_no_query(self, optimizer, container, permission_cache):
+        await permission_cache.set_multiple_permissions({"user-1": "Admin"})
+
+        assert await optimizer.bulk_check_permissions(["user-1"]) == {"user-1": "Admin"}
+        container.query_items.assert_not_called()
+
+    async def test_deduplicates_and_omits_unknown_users(self, optimizer, container):
+        result = await optimizer.bulk_check_permissions(["user-1", "user-1", "ghost", ""])
+
+        assert result == {"user-1": "Admin"}
+        assert container.query_items.call_args.kwargs["parameters"][0]["value"] == ["user-1", "ghost"]
+
+    async def test_empty_input(self, optimizer, container):
+        assert await optimizer.bulk_check_permissions([]) == {}
+        container.query_items.assert_not_called()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestCheckUserPermissionCached:
+    """Test the single-user cached lookup"""
+
+    async def test_reads_through_cache(self, optimizer, container):
+        container.read_item = Mock(return_value={"id": "user-1", "permission": "Admin"})
+
+        assert await optimizer.check_user_permission_cached("user-1") == "Admin"
+        assert await optimizer.check_user_permission_cached("user-1") == "Admin"
+        container.read_item.assert_called_once()
+
+    async def test_missing_user(self, optimizer, container):
+        container.read_item = Mock(side_effect=CosmosResourceNotFoundError(message="missing"))
+
+        assert await optimizer.check_user_permission_cached("ghost") is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestClearPermissionCache:
+    """Test clearing the optimizer's cache"""
+
+    async def test_clear_all_empties_the_shared_cache_in_place(self, optimizer, permission_cache):
+        await permission_cache.set_multiple_permissions({"user-1": "Admin", "user-2": "User"})
+
+        await optimizer.clear_permission_cache()
+
+        assert optimizer._permission_cache is permission_cache
+        assert await permission_cache.get_multiple_permissions(["user-1", "user-2"]) == {"user-1": None, "user-2": None}
+
+    async def test_clear_one_user(self, optimizer, permission_cache):
+        await permission_cache.set_multiple_permissions({"user-1": "Admin", "user-2": "User"})
+
+        await optimizer.clear_permission_cache("user-1")
+
+        assert await permission_cache.get_multiple_permissions(["user-1", "user-2"]) == {"user-1": None, "user-2": "User"}
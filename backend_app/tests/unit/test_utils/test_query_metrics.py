@@ -0,0 +1,244 @@
+"""
+Unit tests for Cosmos query metrics.
+
+Tests cover query fingerprinting, RU summed across pages through the response
+hook, the streaming PagedQuery, the bounded top-N fingerprint table and sampled
+slow-query logging.
+"""
+
+import logging
+from unittest.mock import patch
+
+import pytest
+
+from app.core.errors import PermissionError
+from app.routers.system.health import get_top_queries
+from app.utils.metrics import end_request_charge, start_request_charge
+from app.utils.query_metrics import (
+    PagedQuery,
+    QueryStatsTable,
+    SlowQueryPolicy,
+    execute_query_with_metrics,
+    execute_query_with_metrics_async,
+    fingerprint_query,
+    get_query_stats,
+    get_slow_query_policy,
+    observe_query,
+)
+
+
+class FakePager:
+    """Mimics ItemPaged: iterating or ``by_page()`` fetches pages and fires the response hook."""
+
+    def __init__(self, pages, charges, hook):
+        self.pages = pages
+        self.charges = charges
+        self.hook = hook
+        self.fetched = 0
+
+    def _fetch(self):
+        for page, charge in zip(self.pages, self.charges):
+            self.fetched += 1
+            if self.hook:
+                self.hook({"x-ms-request-charge": str(charge)}, page)
+            yield page
+
+    def by_page(self):
+        return self._fetch()
+
+    def __iter__(self):
+        return (item for page in self._fetch() for item in page)
+
+
+class FakeContainer:
+    def __init__(self, pages, charges):
+        self.pages = pages
+        self.charges = charges
+        self.calls = []
+        self.pager = None
+
+    def query_items(self, query, parameters=None, response_hook=None, **kwargs):
+        self.calls.append({"query": query, "parameters": parameters, **kwargs})
+        self.pager = FakePager(self.pages, self.charges, response_hook)
+        if response_hook:
+            # The SDK also calls the hook with the lazy pager and stale headers
+            response_hook({"x-ms-request-charge": "999"}, self.pager)
+        return self.pager
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats():
+    get_query_stats.cache_clear()
+    get_slow_query_policy.cache_clear()
+    yield
+    get_query_stats.cache_clear()
+    get_slow_query_policy.cache_clear()
+
+
+@pytest.mark.unit
+class TestFingerprint:
+    """Test query normalisation"""
+
+    def test_literals_and_lists_are_replaced(self):
+        query = "SELECT * FROM c WHERE c.type = 'job' AND c.size > 10 AND c.id IN ('a', 'b')  OFFSET 0 LIMIT 50"
+
+        assert fingerprint_query(query) == "SELECT * FROM c WHERE c.type = ? AND c.size > ? AND c.id IN (?+) OFFSET ? LIMIT ?"
+
+    def test_parameters_and_identifiers_are_kept(self):
+        query = "SELECT c.field2 FROM c WHERE c.user_id = @user_id"
+
+        assert fingerprint_query(query) == query
+
+    def test_executions_differing_in_literals_share_a_fingerprint(self):
+        assert fingerprint_query("SELECT * FROM c WHERE c.id = 'x'") == fingerprint_query(
+            "SELECT *  FROM c\nWHERE c.id = 'y'"
+        )
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestPagedQuery:
+    """Test the streaming query helper"""
+
+    async def test_yields_pages_and_sums_ru_across_them(self):
+        container = FakeContainer([[{"id": 1}, {"id": 2}], [{"id": 3}]], [2.5, 4.0])
+        query = PagedQuery(container, "SELECT * FROM c", page_size=2, enable_cross_partition_query=True)
+
+        pages = [page async for page in query]
+
+        assert pages == [[{"id": 1}, {"id": 2}], [{"id": 3}]]
+        assert query.request_charge == pytest.approx(6.5)
+        assert (query.item_count, query.page_count) == (3, 2)
+        assert container.calls[0]["max_item_count"] == 2
+
+    async def test_fetches_lazily(self):
+        container = FakeContainer([[1], [2], [3]], [1, 1, 1])
+        query = PagedQuery(container, "SELECT * FROM c")
+
+        await query.__anext__()
+        assert container.pager.fetched == 1
+
+        await query.aclose()
+        assert get_query_stats().top(1)[0]["total_items"] == 1
+
+    async def test_ru_is_attributed_to_the_request(self):
+        container = FakeContainer([[1], [2]], [3.0, 3.0])
+        charge, token = start_request_charge()
+        try:
+            async for _ in PagedQuery(container, "SELECT * FROM c"):
+                pass
+        finally:
+            end_request_charge(token)
+
+        assert charge.request_units == pytest.approx(6.0)
+
+    async def test_async_helper_collects_all_pages(self):
+        container = FakeContainer([[1, 2], [3]], [1.0, 2.0])
+
+        items = await execute_query_with_metrics_async(container, "SELECT * FROM c")
+
+        assert items == [1, 2, 3]
+        assert get_query_stats().top(1)[0]["total_ru"] == 3.0
+
+
+@pytest.mark.unit
+def test_sync_helper_sums_every_page():
+    container = FakeContainer([[1], [2], [3]], [1.0, 2.0, 3.0])
+
+    items = execute_query_with_metrics(container, "SELECT * FROM c WHERE c.id = 'a'")
+
+    assert items == [1, 2, 3]
+    assert get_query_stats().top(1)[0]["total_ru"] == 6.0
+
+
+@pytest.mark.unit
+class TestQueryStatsTable:
+    """Test the top-N fingerprint table"""
+
+    def test_top_sorts_by_requested_key(self):
+        table = QueryStatsTable()
+        table.record("cheap", 1.0, 5.0, 1)
+        table.record("cheap", 1.0, 5.0, 1)
+        table.record("costly", 40.0, 2.0, 1)
+
+        assert [q["fingerprint"] for q in table.top(2)] == ["costly", "cheap"]
+        assert [q["fingerprint"] for q in table.top(2, sort_by="count")] == ["cheap", "costly"]
+        assert table.top(1)[0]["avg_ru"] == 40.0
+
+    def test_evicts_cheapest_fingerprint_when_full(self):
+        table = QueryStatsTable(max_fingerprints=2)
+        table.record("a", 10.0, 1.0, 1)
+        table.record("b", 1.0, 1.0, 1)
+
+        table.record("c", 5.0, 1.0, 1)
+
+        assert {q["fingerprint"] for q in table.top(10)} == {"a", "c"}
+        assert table.evictions == 1
+
+    def test_rejects_unknown_sort_key(self):
+        with pytest.raises(ValueError):
+            QueryStatsTable().top(sort_by="fingerprint")
+
+
+@pytest.mark.unit
+class TestSlowQueryLogging:
+    """Test sampled slow-query logs"""
+
+    @pytest.fixture(autouse=True)
+    def policy(self):
+        with patch(
+            "app.utils.query_metrics.get_slow_query_policy",
+            return_value=SlowQueryPolicy(slow_ms=100, expensive_ru=50, sample_rate=0.0),
+        ):
+            yield
+
+    def _slow_logs(self, caplog):
+        return [r for r in caplog.records if r.getMessage().endswith("Cosmos DB Query executed")]
+
+    def test_first_slow_execution_of_a_fingerprint_is_always_logged(self, caplog):
+        caplog.set_level(logging.INFO, logger="app.utils.query_metrics")
+
+        observe_query("SELECT * FROM c WHERE c.id = 'a'", ru_charge=80, item_count=1, duration_ms=5)
+        observe_query("SELECT * FROM c WHERE c.id = 'b'", ru_charge=80, item_count=1, duration_ms=5)
+
+        logs = self._slow_logs(caplog)
+        assert len(logs) == 1
+        assert logs[0].fingerprint_id == get_query_stats().top(1)[0]["fingerprint_id"]
+
+    def test_repeats_are_sampled(self, caplog):
+        caplog.set_level(logging.INFO, logger="app.utils.query_metrics")
+
+        with patch("app.utils.query_metrics.random.random", return_value=0.0), patch(
+            "app.utils.query_metrics.get_slow_query_policy",
+            return_value=SlowQueryPolicy(slow_ms=100, expensive_ru=50, sample_rate=0.5),
+        ):
+            for _ in range(3):
+                observe_query("SELECT * FROM c", ru_charge=1, item_count=1, duration_ms=500)
+
+        assert len(self._slow_logs(caplog)) == 3
+
+    def test_fast_cheap_queries_are_not_logged_at_info(self, caplog):
+        caplog.set_level(logging.INFO, logger="app.utils.query_metrics")
+
+        observe_query("SELECT * FROM c", ru_charge=1, item_count=1, duration_ms=5)
+
+        assert self._slow_logs(caplog) == []
+        assert get_query_stats().top(1)[0]["count"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_top_queries_endpoint_is_admin_only():
+    table = QueryStatsTable()
+    table.record("SELECT * FROM c", 12.0, 3.0, 4)
+
+    result = await get_top_queries(
+        limit=5, sort_by="total_ru", current_user={"id": "admin", "permission": "Admin"}, query_stats=table
+    )
+    assert result["queries"][0]["total_ru"] == 12.0
+    assert result["tracked_fingerprints"] == 1
+
+    with pytest.raises(PermissionError):
+        await get_top_queries(
+            limit=5, sort_by="total_ru", current_user={"id": "editor", "permission": "Editor"}, query_stats=table
+        )
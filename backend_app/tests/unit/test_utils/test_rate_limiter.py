@@ -0,0 +1,185 @@
+"""
+Unit tests for the token-bucket rate limiter.
+
+Tests cover bucket refill and Retry-After, LRU bounds on tracked keys, per-user
+and per-route quotas, the Redis store shared between workers, and the 429
+response produced by SecurityMiddleware.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware.security_middleware import SecurityMiddleware
+from app.utils.rate_limiter import (
+    InMemoryRateLimitStore,
+    RateLimiter,
+    RateLimitRule,
+    RedisRateLimitStore,
+    parse_route_quotas,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def store(clock):
+    return InMemoryRateLimitStore(max_keys=100, clock=clock)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestInMemoryRateLimitStore:
+    """Test token bucket behaviour"""
+
+    async def test_allows_burst_then_rejects_with_retry_after(self, store):
+        rule = RateLimitRule.per_minute(3)
+
+        decisions = [await store.consume("ip:1", rule) for _ in range(4)]
+
+        assert [d.allowed for d in decisions] == [True, True, True, False]
+        assert decisions[2].remaining == 0
+        assert decisions[3].retry_after == 20
+        assert decisions[3].headers()["Retry-After"] == "20"
+
+    async def test_tokens_refill_over_time(self, store, clock):
+        rule = RateLimitRule.per_minute(60)
+        for _ in range(60):
+            await store.consume("ip:1", rule)
+        assert not (await store.consume("ip:1", rule)).allowed
+
+        clock.now += 1
+
+        assert (await store.consume("ip:1", rule)).allowed
+
+    async def test_bucket_never_exceeds_capacity(self, store, clock):
+        rule = RateLimitRule.per_minute(2)
+        await store.consume("ip:1", rule)
+
+        clock.now += 3600
+        decision = await store.consume("ip:1", rule)
+
+        assert decision.remaining == 1
+
+    async def test_tracked_keys_are_lru_bounded(self, clock):
+        store = InMemoryRateLimitStore(max_keys=2, clock=clock)
+        rule = RateLimitRule.per_minute(1)
+        await store.consume("ip:1", rule)
+        await store.consume("ip:2", rule)
+        await store.consume("ip:1", rule)
+
+        await store.consume("ip:3", rule)
+
+        assert len(store) == 2
+        # ip:2 was least recently used, so it starts again with a full bucket
+        assert (await store.consume("ip:2", rule)).allowed
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestRateLimiter:
+    """Test quota selection"""
+
+    async def test_users_get_their_own_quota(self, store):
+        limiter = RateLimiter(store, default_rule=RateLimitRule.per_minute(1), user_rule=RateLimitRule.per_minute(3))
+
+        anonymous = [await limiter.check("/api/jobs", "10.0.0.1") for _ in range(2)]
+        user = [await limiter.check("/api/jobs", "10.0.0.1", user_id="user-1") for _ in range(3)]
+
+        assert [d.allowed for d in anonymous] == [True, False]
+        assert all(d.allowed for d in user)
+
+    async def test_route_quota_applies_per_caller(self, store):
+        limiter = RateLimiter(
+            store,
+            default_rule=RateLimitRule.per_minute(100),
+            route_rules={"/api/auth/login": RateLimitRule.per_minute(2), "/api/auth": RateLimitRule.per_minute(50)},
+        )
+
+        login = [await limiter.check("/api/auth/login", "10.0.0.1") for _ in range(3)]
+        other_client = await limiter.check("/api/auth/login", "10.0.0.2")
+        other_route = await limiter.check("/api/jobs", "10.0.0.1")
+
+        assert [d.allowed for d in login] == [True, True, False]
+        assert login[2].key == "route:/api/auth/login:ip:10.0.0.1"
+        assert other_client.allowed
+        assert other_route.allowed
+
+
+@pytest.mark.unit
+def test_parse_route_quotas():
+    rules = parse_route_quotas("/api/auth/login=10, /api/upload=5,bad,/x=notanumber")
+
+    assert set(rules) == {"/api/auth/login", "/api/upload"}
+    assert rules["/api/upload"].capacity == 5
+
+
+@pytest.fixture
+def fake_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestRedisRateLimitStore:
+    """Test the shared Redis store"""
+
+    async def test_limits_are_shared_between_workers(self, fake_redis, clock):
+        worker_a = RedisRateLimitStore(client=fake_redis, clock=clock)
+        worker_b = RedisRateLimitStore(client=fake_redis, clock=clock)
+        rule = RateLimitRule.per_minute(2)
+
+        results = [
+            await worker_a.consume("ip:1", rule),
+            await worker_b.consume("ip:1", rule),
+            await worker_a.consume("ip:1", rule),
+        ]
+
+        assert [d.allowed for d in results] == [True, True, False]
+        assert results[2].retry_after == 30
+
+    async def test_bucket_expires_once_refilled(self, fake_redis, clock):
+        store = RedisRateLimitStore(client=fake_redis, clock=clock)
+
+        await store.consume("ip:1", RateLimitRule.per_minute(60))
+
+        ttl_ms = await fake_redis.pttl("ratelimit:ip:1")
+        assert 0 < ttl_ms <= 61_000
+
+
+@pytest.mark.unit
+class TestSecurityMiddlewareRateLimit:
+    """Test the middleware response when a limit is hit"""
+
+    def test_returns_429_with_retry_after(self):
+        app = FastAPI()
+
+        @app.get("/ping")
+        async def ping():
+            return {"ok": True}
+
+        limiter = RateLimiter(InMemoryRateLimitStore(), default_rule=RateLimitRule.per_minute(1))
+        app.add_middleware(SecurityMiddleware, rate_limiter=limiter)
+        client = TestClient(app)
+
+        first = client.get("/ping")
+        second = client.get("/ping")
+
+        assert first.status_code == 200
+        assert first.headers["X-RateLimit-Remaining"] == "0"
+        assert second.status_code == 429
+        assert int(second.headers["Retry-After"]) >= 1
+        assert second.json()["retry_after"] == int(second.headers["Retry-After"])
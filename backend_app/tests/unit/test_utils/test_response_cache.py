@@ -0,0 +1,206 @@
+"""
+Unit tests for the time-bucketed response cache.
+
+Tests cover bucket hits, single-flight sharing, stale-while-revalidate
+refreshes, expiry past the stale window, error propagation, ETags and
+conditional-request handling.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import Response
+from starlette.requests import Request
+
+from app.utils.response_cache import (
+    ResponseCache,
+    check_not_modified,
+    compute_etag,
+    etag_for_versions,
+    etag_matches,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock):
+    return ResponseCache(bucket_seconds=60, stale_buckets=1, clock=clock)
+
+
+def counting_compute(results):
+    calls = {"count": 0}
+
+    async def _compute():
+        calls["count"] += 1
+        await asyncio.sleep(0)
+        return results[min(calls["count"], len(results)) - 1]
+
+    return _compute, calls
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestResponseCache:
+    """Test caching behaviour"""
+
+    async def test_reuses_result_within_bucket(self, cache):
+        compute, calls = counting_compute([{"total": 1}])
+
+        first = await cache.get_or_compute("system", {"days": 30}, compute)
+        second = await cache.get_or_compute("system", {"days": 30}, compute)
+
+        assert first.value == second.value == {"total": 1}
+        assert first.etag == second.etag
+        assert calls["count"] == 1
+
+    async def test_params_are_part_of_key(self, cache):
+        compute, calls = counting_compute([{"total": 1}, {"total": 2}])
+
+        await cache.get_or_compute("system", {"days": 30}, compute)
+        other = await cache.get_or_compute("system", {"days": 7}, compute)
+
+        assert other.value == {"total": 2}
+        assert calls["count"] == 2
+
+    async def test_concurrent_requests_share_one_computation(self, cache):
+        started = asyncio.Event()
+        release = asyncio.Event()
+        calls = {"count": 0}
+
+        async def slow_compute():
+            calls["count"] += 1
+            started.set()
+            await release.wait()
+            return {"total": 42}
+
+        waiters = [asyncio.create_task(cache.get_or_compute("system", {"days": 30}, slow_compute)) for _ in range(5)]
+        await started.wait()
+        release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert calls["count"] == 1
+        assert {r.value["total"] for r in results} == {42}
+
+    async def test_serves_stale_and_refreshes_in_background(self, cache, clock):
+        compute, calls = counting_compute([{"total": 1}, {"total": 2}])
+        await cache.get_or_compute("system", {"days": 30}, compute)
+
+        clock.now += 60
+        stale = await cache.get_or_compute("system", {"days": 30}, compute)
+        assert stale.stale is True
+        assert stale.value == {"total": 1}
+
+        # Let the background refresh finish
+        await asyncio.sleep(0.01)
+        fresh = await cache.get_or_compute("system", {"days": 30}, compute)
+        assert fresh.stale is False
+        assert fresh.value == {"total": 2}
+        assert calls["count"] == 2
+
+    async def test_recomputes_after_stale_window(self, cache, clock):
+        compute, calls = counting_compute([{"total": 1}, {"total": 2}])
+        await cache.get_or_compute("system", {"days": 30}, compute)
+
+        clock.now += 180
+        result = await cache.get_or_compute("system", {"days": 30}, compute)
+
+        assert result.stale is False
+        assert result.value == {"total": 2}
+
+    async def test_errors_propagate_and_are_not_cached(self, cache):
+        calls = {"count": 0}
+
+        async def failing_compute():
+            calls["count"] += 1
+            raise RuntimeError("cosmos down")
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute("system", {"days": 30}, failing_compute)
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute("system", {"days": 30}, failing_compute)
+
+        assert calls["count"] == 2
+        assert cache.stats()["refresh_errors"] == 2
+
+    async def test_invalidate_namespace(self, cache):
+        compute, calls = counting_compute([{"total": 1}, {"total": 2}])
+        await cache.get_or_compute("system", {"days": 30}, compute)
+
+        cache.invalidate("system")
+        result = await cache.get_or_compute("system", {"days": 30}, compute)
+
+        assert result.value == {"total": 2}
+
+    async def test_evicts_least_recently_used(self, clock):
+        cache = ResponseCache(bucket_seconds=60, max_entries=2, clock=clock)
+        compute, _ = counting_compute([{"total": 1}])
+
+        for days in (1, 2, 3):
+            await cache.get_or_compute("system", {"days": days}, compute)
+
+        assert cache.stats()["entries"] == 2
+
+
+@pytest.mark.unit
+class TestEtag:
+    """Test ETag derivation"""
+
+    def test_etag_is_stable_across_key_order(self):
+        assert compute_etag({"a": 1, "b": 2}) == compute_etag({"b": 2, "a": 1})
+
+    def test_etag_changes_with_payload(self):
+        assert compute_etag({"a": 1}) != compute_etag({"a": 2})
+        assert compute_etag({"a": 1}).startswith('W/"')
+
+    def test_version_etag_changes_with_any_version(self):
+        assert etag_for_versions("job-1", '"0a00"') == etag_for_versions("job-1", '"0a00"')
+        assert etag_for_versions("job-1", '"0a00"') != etag_for_versions("job-1", '"0b00"')
+        assert etag_for_versions("a", "bc") != etag_for_versions("ab", "c")
+
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+@pytest.mark.unit
+class TestConditionalRequests:
+    """Test If-None-Match handling"""
+
+    def test_weak_comparison_and_lists(self):
+        etag = etag_for_versions("x")
+
+        assert etag_matches(_request(etag), etag)
+        assert etag_matches(_request(f'"other", {etag[2:]}'), etag)
+        assert etag_matches(_request("*"), etag)
+        assert not etag_matches(_request('"other"'), etag)
+        assert not etag_matches(_request(), etag)
+
+    def test_match_returns_an_empty_304_with_validators(self):
+        etag = etag_for_versions("x")
+
+        result = check_not_modified(_request(etag), Response(), etag)
+
+        assert result.status_code == 304
+        assert result.body == b""
+        assert result.headers["etag"] == etag
+
+    def test_miss_sets_headers_on_the_response(self):
+        etag = etag_for_versions("x")
+        response = Response()
+
+        assert check_not_modified(_request('"stale"'), response, etag) is None
+        assert response.headers["etag"] == etag
+        assert response.headers["cache-control"] == "private, no-cache"
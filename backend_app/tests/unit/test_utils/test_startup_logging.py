@@ -0,0 +1,57 @@
+"""
+Unit tests for startup phase logging.
+
+Tests cover the structured startup report and appending it to a JSON-lines
+file.
+"""
+
+import json
+import logging
+
+import pytest
+
+from app.utils.startup_logging import StartupLogger
+
+
+@pytest.mark.unit
+class TestStartupReport:
+    """Test the structured report kept for each startup"""
+
+    def test_report_lists_phases_in_order_with_details(self):
+        startup = StartupLogger(logging.getLogger("test-startup"))
+        startup.start_startup()
+        startup.start_phase("configuration", "Loading configuration")
+        startup.end_phase("configuration")
+        startup.start_phase("validation")
+        startup.end_phase("validation", {"checks_ms": {"Configuration": 1.0}})
+        startup.finish_startup()
+
+        report = startup.last_report
+        assert report["success"] is True
+        assert [p["name"] for p in report["phases"]] == ["configuration", "validation"]
+        assert report["phases"][0]["description"] == "Loading configuration"
+        assert report["phases"][1]["details"] == {"checks_ms": {"Configuration": 1.0}}
+        assert report["phases"][1]["offset_ms"] >= report["phases"][0]["offset_ms"]
+        assert report["started_at"] and report["total_ms"] >= 0
+
+    def test_reports_are_appended_as_json_lines(self, tmp_path):
+        path = tmp_path / "reports" / "startup.jsonl"
+        startup = StartupLogger(logging.getLogger("test-startup"))
+        for success in (True, False):
+            startup.start_startup()
+            startup.start_phase("configuration")
+            startup.end_phase("configuration")
+            startup.finish_startup(success=success, report_path=str(path))
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["success"] for line in lines] == [True, False]
+
+    def test_unwritable_report_path_is_not_fatal(self, tmp_path):
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        startup = StartupLogger(logging.getLogger("test-startup"))
+        startup.start_startup()
+
+        startup.finish_startup(report_path=str(blocker / "startup.jsonl"))
+
+        assert startup.last_report is not None
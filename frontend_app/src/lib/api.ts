@@ -1044,6 +1044,8 @@ export interface SystemAnalytics {
   peak_active_users?: number; // added for direct backend field
   analytics: {
     records: AnalyticsRecord[];
+    // Per-day totals from the backend rollups; records only hold the most recent activity
+    daily?: Array<{ date: string; jobs: number; minutes: number; active_users: number }>;
     total_minutes: number;
     total_jobs: number;
     active_users?: number; // surfaced root metric
@@ -1180,8 +1182,16 @@ export function transformSystemAnalytics(data: SystemAnalytics): SystemAnalytics
     dailyActiveUsers[dateStr] = 0;
   }
   
+  const daily = data.analytics.daily || [];
+
   // Process records by date
-  if (records.length > 0) {
+  if (daily.length > 0) {
+    daily.forEach(day => {
+      dailyActivity[day.date] = day.jobs;
+      dailyMinutes[day.date] = day.minutes;
+      dailyActiveUsers[day.date] = day.active_users;
+    });
+  } else if (records.length > 0) {
     records.forEach(record => {
       const date = record.timestamp.split('T')[0];
       dailyActivity[date] = (dailyActivity[date] || 0) + 1;
@@ -1196,7 +1206,9 @@ export function transformSystemAnalytics(data: SystemAnalytics): SystemAnalytics
   
   // Calculate active users per day
   const usersByDate: Record<string, Set<string>> = {};
-  if (records.length > 0) {
+  if (daily.length > 0) {
+    // Already filled from the rollups above
+  } else if (records.length > 0) {
     records.forEach(record => {
       const date = record.timestamp.split('T')[0];
       if (!usersByDate[date]) usersByDate[date] = new Set();
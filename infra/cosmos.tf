@@ -560,3 +560,103 @@ resource "azurerm_cosmosdb_sql_role_definition" "data_contributor" {
     ]
   }
 }
+
+resource "azurerm_cosmosdb_sql_container" "voice_background_tasks_container" {
+  name                = "voice_background_tasks"
+  resource_group_name = azurerm_resource_group.rg.name
+  account_name        = azurerm_cosmosdb_account.voice_account.name
+  database_name       = azurerm_cosmosdb_sql_database.voice_db.name
+
+  partition_key_paths   = ["/id"]
+  partition_key_version = 2
+
+  # Per-item TTL: finished tasks and worker leases set their own ttl
+  default_ttl = -1
+
+  conflict_resolution_policy {
+    mode                     = "LastWriterWins"
+    conflict_resolution_path = "/_ts"
+  }
+
+  indexing_policy {
+    indexing_mode = "consistent"
+
+    included_path {
+      path = "/type/?"
+    }
+
+    included_path {
+      path = "/user_id/?"
+    }
+
+    included_path {
+      path = "/status/?"
+    }
+
+    included_path {
+      path = "/owner/?"
+    }
+
+    included_path {
+      path = "/created_at/?"
+    }
+
+    included_path {
+      path = "/expires_at/?"
+    }
+
+    # Composite index for type + user_id + created_at (a user's recent tasks)
+    composite_index {
+      index {
+        path  = "/type"
+        order = "ascending"
+      }
+      index {
+        path  = "/user_id"
+        order = "ascending"
+      }
+      index {
+        path  = "/created_at"
+        order = "descending"
+      }
+    }
+
+    # Task payloads and results are only ever read whole
+    excluded_path {
+      path = "/*"
+    }
+  }
+}
+
+resource "azurerm_cosmosdb_sql_container" "voice_refinements_container" {
+  name                = "voice_refinements"
+  resource_group_name = azurerm_resource_group.rg.name
+  account_name        = azurerm_cosmosdb_account.voice_account.name
+  database_name       = azurerm_cosmosdb_sql_database.voice_db.name
+
+  # One logical partition per job: history pages are single-partition queries
+  partition_key_paths   = ["/job_id"]
+  partition_key_version = 2
+
+  conflict_resolution_policy {
+    mode                     = "LastWriterWins"
+    conflict_resolution_path = "/_ts"
+  }
+
+  indexing_policy {
+    indexing_mode = "consistent"
+
+    included_path {
+      path = "/type/?"
+    }
+
+    included_path {
+      path = "/seq/?"
+    }
+
+    # Turn text is only ever read whole
+    excluded_path {
+      path = "/*"
+    }
+  }
+}